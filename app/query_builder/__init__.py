@@ -1,5 +1,13 @@
 """Flexible SQL query builder package."""
-from app.query_builder.core import FlexibleQueryBuilder
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.core.builder import FlexibleQueryBuilder
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FlexibleQueryBuilder': 'app.query_builder.core.builder'
+})
 
 # Export only what should be in the public API
 __all__ = ['FlexibleQueryBuilder']
\ No newline at end of file
@@ -1,6 +1,37 @@
 """Field and join analyzers for the flexible query builder."""
-from app.query_builder.analyzers.field_analyzer import FieldAnalyzer
-from app.query_builder.analyzers.join_analyzer import JoinAnalyzer
-from app.query_builder.analyzers.dependency_analyzer import DependencyAnalyzer
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
 
-__all__ = ['FieldAnalyzer', 'JoinAnalyzer', 'DependencyAnalyzer']
\ No newline at end of file
+if TYPE_CHECKING:
+    from app.query_builder.analyzers.field_analyzer import FieldAnalyzer, FieldDependencies
+    from app.query_builder.analyzers.join_analyzer import JoinAnalyzer
+    from app.query_builder.analyzers.dependency_analyzer import DependencyAnalyzer
+    from app.query_builder.analyzers.index_advisor import IndexAdvisor, IndexRecommendation
+    from app.query_builder.analyzers.rollup_router import RollupRewrite, RollupRouter
+    from app.query_builder.analyzers.partition_pruner import DateRange, PartitionPruner
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FieldAnalyzer': 'app.query_builder.analyzers.field_analyzer',
+    'FieldDependencies': 'app.query_builder.analyzers.field_analyzer',
+    'JoinAnalyzer': 'app.query_builder.analyzers.join_analyzer',
+    'DependencyAnalyzer': 'app.query_builder.analyzers.dependency_analyzer',
+    'IndexAdvisor': 'app.query_builder.analyzers.index_advisor',
+    'IndexRecommendation': 'app.query_builder.analyzers.index_advisor',
+    'RollupRewrite': 'app.query_builder.analyzers.rollup_router',
+    'RollupRouter': 'app.query_builder.analyzers.rollup_router',
+    'DateRange': 'app.query_builder.analyzers.partition_pruner',
+    'PartitionPruner': 'app.query_builder.analyzers.partition_pruner'
+})
+
+__all__ = [
+    'FieldAnalyzer',
+    'FieldDependencies',
+    'JoinAnalyzer',
+    'DependencyAnalyzer',
+    'IndexAdvisor',
+    'IndexRecommendation',
+    'RollupRewrite',
+    'RollupRouter',
+    'DateRange',
+    'PartitionPruner'
+]
\ No newline at end of file
@@ -1,21 +1,21 @@
 """Join dependency analyzer for the flexible query builder."""
-from typing import Dict, List, Set, Any
+from typing import List, Optional, Set
 
-from app.utils.constants import JOIN_PATHS
+from app.query_builder.schema import Catalog, JoinRecord, get_catalog
 
 
 class DependencyAnalyzer:
     """Analyzer for determining join dependencies."""
 
-    def __init__(self):
-        """Initialize the dependency analyzer."""
-        # Define known join dependencies
-        self.join_dependencies = {
-            'industry': ['company'],  # industry join requires company join
-            'country': ['company'],  # country join requires company join
-        }
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the dependency analyzer.
 
-    def analyze_join_dependencies(self, joins: List[Dict[str, Any]]) -> Set[str]:
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
+    def analyze_join_dependencies(self, joins: List[JoinRecord]) -> Set[str]:
         """Analyze joins to determine additional required joins.
 
         Args:
@@ -25,17 +25,17 @@ class DependencyAnalyzer:
             Set of additional join keys required
         """
         required_joins = set()
-        existing_join_keys = {j['key'] for j in joins}
+        existing_join_keys = {j.key for j in joins}
 
-        # Check each join for dependencies
+        # Check each join for dependencies declared in the catalog
         for join in joins:
-            join_key = join['key']
+            edge = self.catalog.joins.get(join.key)
+            if edge is None:
+                continue
 
-            # If this join has dependencies
-            if join_key in self.join_dependencies:
-                # Add each dependency if not already in the join list
-                for dep_key in self.join_dependencies[join_key]:
-                    if dep_key not in existing_join_keys:
-                        required_joins.add(dep_key)
+            # Add each dependency if not already in the join list
+            for dep_key in edge.requires:
+                if dep_key not in existing_join_keys:
+                    required_joins.add(dep_key)
 
-        return required_joins
\ No newline at end of file
+        return required_joins
@@ -1,6 +1,43 @@
 """Field usage analyzer for the flexible query builder."""
 import re
-from typing import Dict, List, Set, Any
+import sys
+from typing import Any, Dict, List, Set
+
+# Qualified field references such as "c.companyName"
+FIELD_REF_PATTERN = re.compile(r'\b([a-z]+)\.([a-zA-Z_][a-zA-Z0-9_]*)')
+
+# Conditions like "tr.transactionIdTypeId = '1'"
+EQUALITY_PARAM_PATTERN = re.compile(r'([a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*\'([^\']+)\'')
+
+# IN conditions like "si.simpleIndustryId IN ('32', '34')"
+IN_PARAM_PATTERN = re.compile(r'([a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*)\s+IN\s+\(([^\)]+)\)')
+
+_intern = sys.intern
+
+
+class FieldDependencies:
+    """Aliases, field references and filter values a query depends on.
+
+    Item access (``dependencies['used_aliases']``) is kept for code written
+    against the dict this record replaced.
+    """
+
+    __slots__ = ('used_aliases', 'field_refs', 'query_params')
+
+    def __init__(
+            self,
+            used_aliases: Set[str],
+            field_refs: Dict[str, Set[str]],
+            query_params: Dict[str, str]
+    ):
+        self.used_aliases = used_aliases
+        self.field_refs = field_refs
+        self.query_params = query_params
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
 
 
 class FieldAnalyzer:
@@ -16,7 +53,7 @@ class FieldAnalyzer:
             where_conditions: List[str],
             group_by_fields: List[str],
             order_by_clauses: List[str]
-    ) -> Dict[str, Any]:
+    ) -> FieldDependencies:
         """Analyze field usage to determine dependencies.
 
         Args:
@@ -26,36 +63,9 @@ class FieldAnalyzer:
             order_by_clauses: List of order by clauses
 
         Returns:
-            Dictionary with field dependency information
+            Field dependency information
         """
-        # Find all aliases used in the query
-        used_aliases = self._find_all_field_aliases(
-            select_fields, where_conditions, group_by_fields, order_by_clauses
-        )
-
-        # Extract field references
-        field_refs = self._extract_field_references(
-            select_fields, where_conditions, group_by_fields, order_by_clauses
-        )
-
-        # Extract parameter values from where conditions
-        query_params = self._extract_query_params(where_conditions)
-
-        return {
-            'used_aliases': used_aliases,
-            'field_refs': field_refs,
-            'query_params': query_params
-        }
-
-    def _find_all_field_aliases(
-            self,
-            select_fields: List[str],
-            where_conditions: List[str],
-            group_by_fields: List[str],
-            order_by_clauses: List[str]
-    ) -> Set[str]:
-        """Find all field aliases used in the query."""
-        # Compile all text that might contain field references
+        # Compile all text that might contain field references, scanned once
         all_text = ' '.join(
             select_fields +
             where_conditions +
@@ -63,59 +73,36 @@ class FieldAnalyzer:
             order_by_clauses
         )
 
-        # Extract all field references like 'c.companyName'
-        field_refs = re.findall(r'([a-z]+)\.([a-zA-Z_]+)', all_text)
-
-        # Collect unique aliases
-        aliases = set()
-        for alias, field in field_refs:
-            aliases.add(alias)
-
-        return aliases
-
-    def _extract_field_references(
-            self,
-            select_fields: List[str],
-            where_conditions: List[str],
-            group_by_fields: List[str],
-            order_by_clauses: List[str]
-    ) -> Dict[str, Set[str]]:
-        """Extract field references used in the query."""
-        # Compile all text that might contain field references
-        all_text = ' '.join(
-            select_fields +
-            where_conditions +
-            group_by_fields +
-            order_by_clauses
+        # Organize field references like 'c.companyName' by alias; alias and
+        # column names are interned so they share the catalog's strings
+        field_refs: Dict[str, Set[str]] = {}
+        for alias, field in FIELD_REF_PATTERN.findall(all_text):
+            columns = field_refs.get(alias)
+            if columns is None:
+                columns = field_refs[_intern(alias)] = set()
+            columns.add(_intern(field))
+
+        return FieldDependencies(
+            used_aliases=set(field_refs),
+            field_refs=field_refs,
+            query_params=self._extract_query_params(where_conditions)
         )
 
-        # Extract all field references like 'c.companyName'
-        field_refs = re.findall(r'([a-z]+)\.([a-zA-Z_]+)', all_text)
-
-        # Organize by alias
-        refs_by_alias = {}
-        for alias, field in field_refs:
-            if alias not in refs_by_alias:
-                refs_by_alias[alias] = set()
-            refs_by_alias[alias].add(field)
-
-        return refs_by_alias
-
     def _extract_query_params(self, where_conditions: List[str]) -> Dict[str, str]:
         """Extract query parameters from where conditions."""
         params = {}
         for condition in where_conditions:
             # Parse conditions like "tr.transactionIdTypeId = '1'"
-            match = re.match(r'([a-z]+\.[a-zA-Z_]+)\s*=\s*\'([^\']+)\'', condition)
+            match = EQUALITY_PARAM_PATTERN.match(condition)
             if match:
                 field, value = match.groups()
                 params[field] = value
 
             # Parse IN conditions like "si.simpleIndustryId IN ('32', '34')"
-            match = re.match(r'([a-z]+\.[a-zA-Z_]+)\s+IN\s+\(([^\)]+)\)', condition)
+            match = IN_PARAM_PATTERN.match(condition)
             if match:
                 field, values_str = match.groups()
                 values = [v.strip().strip("'") for v in values_str.split(',')]
                 params[field] = ','.join(values)
 
-        return params
\ No newline at end of file
+        return params
@@ -0,0 +1,281 @@
+"""Index recommendations from observed request traffic.
+
+Replays a captured request log through the builder's field analysis and
+recommends composite indexes per table (equality columns first, then one
+range column, then sort columns), ranked by estimated benefit::
+
+    python -m app.query_builder.analyzers.index_advisor requests.jsonl [--top 20] [--json]
+
+The log holds one JSON object per line, either the request parameters
+themselves or an object with a ``params`` key.
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.query_builder.core.builder import FlexibleQueryBuilder
+from app.query_builder.schema import Catalog, get_catalog
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Simple predicates as produced by FilterParser: "<alias>.<column> <op> <value>"
+CONDITION_PATTERN = re.compile(
+    r"^\s*([a-z]+)\.([a-zA-Z_][a-zA-Z0-9_]*)\s+(=|!=|<>|>=|<=|>|<|LIKE|IN)\s+(.*)$",
+    re.IGNORECASE
+)
+
+# Join conditions: "<alias>.<column> = <alias>.<column>"
+JOIN_PATTERN = re.compile(r"([a-z]+)\.([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*([a-z]+)\.([a-zA-Z_][a-zA-Z0-9_]*)")
+
+# Relative benefit of an index column by how it is used
+EQUALITY_WEIGHT = 1.0
+RANGE_WEIGHT = 0.5
+SORT_WEIGHT = 0.3
+
+
+class IndexRecommendation:
+    """Recommended composite index for a table."""
+
+    __slots__ = ('table', 'columns', 'benefit', 'requests', 'example')
+
+    def __init__(self, table: str, columns: Tuple[str, ...]):
+        self.table = table
+        self.columns = columns
+        self.benefit = 0.0
+        self.requests = 0
+        self.example: Optional[Dict[str, Any]] = None
+
+    def ddl(self, schema: str) -> str:
+        """Render a CREATE INDEX statement for the recommendation."""
+        name = f"ix_{self.table}_{'_'.join(self.columns)}"
+        return f"CREATE INDEX {name} ON {schema}.{self.table} ({', '.join(self.columns)})"
+
+    def to_dict(self, schema: str) -> Dict[str, Any]:
+        """Get a JSON-serializable description of the recommendation."""
+        return {
+            'table': self.table,
+            'columns': list(self.columns),
+            'benefit': round(self.benefit, 2),
+            'requests': self.requests,
+            'ddl': self.ddl(schema),
+            'example': self.example
+        }
+
+
+class IndexAdvisor:
+    """Advisor that accumulates index candidates from replayed requests."""
+
+    def __init__(
+            self,
+            schema: str = "dbo",
+            base_table: str = "ciqTransaction",
+            base_alias: str = "tr",
+            catalog: Optional[Catalog] = None
+    ):
+        """Initialize the index advisor.
+
+        Args:
+            schema: Database schema used in the generated DDL
+            base_table: Base table name
+            base_alias: Base table alias
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.schema = schema
+        self.base_table = base_table
+        self.base_alias = base_alias
+        self.catalog = catalog or get_catalog()
+        self.replayed = 0
+        self.failed = 0
+        self._candidates: Dict[Tuple[str, Tuple[str, ...]], IndexRecommendation] = {}
+
+    def replay(self, requests: Iterable[Dict[str, Any]]) -> None:
+        """Replay request parameters through the builder and collect candidates."""
+        for params in requests:
+            builder = FlexibleQueryBuilder(
+                self.schema, self.base_table, self.base_alias, catalog=self.catalog
+            )
+            try:
+                builder.parse_request_params(params)
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"Skipping unparseable request {params}: {e}")
+                continue
+            self.replayed += 1
+            self.add_usage(builder, params)
+
+    def add_usage(self, builder: Any, params: Optional[Dict[str, Any]] = None) -> None:
+        """Add the index candidates of one parsed request."""
+        equality: Dict[str, List[str]] = {}
+        ranges: Dict[str, List[str]] = {}
+        sorts: Dict[str, List[str]] = {}
+
+        for condition in builder.where_conditions:
+            match = CONDITION_PATTERN.match(condition)
+            if not match:
+                continue  # compound or non-sargable predicate
+            alias, column, op, value = match.groups()
+            op = op.upper()
+            if op in ('=', 'IN'):
+                _append_unique(equality, alias, column)
+            elif op in ('>=', '<=', '>', '<'):
+                _append_unique(ranges, alias, column)
+            elif op == 'LIKE' and not value.lstrip("'").startswith('%'):
+                # Prefix patterns can use a range scan
+                _append_unique(ranges, alias, column)
+
+        # Joined tables are probed on their join column
+        for join in builder.joins:
+            edge = join.info
+            for left_alias, left_col, right_alias, right_col in JOIN_PATTERN.findall(
+                    edge.render_condition(builder.base_alias)
+            ):
+                if left_alias == edge.alias:
+                    _append_unique(equality, left_alias, left_col)
+                elif right_alias == edge.alias:
+                    _append_unique(equality, right_alias, right_col)
+
+        # GROUP BY and ORDER BY can read rows in index order instead of sorting
+        for field in list(builder.group_by_fields) + [
+            clause.rsplit(' ', 1)[0] for clause in builder.order_by_clauses
+        ]:
+            alias, _, column = field.partition('.')
+            if column and re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', column):
+                _append_unique(sorts, alias, column)
+
+        for alias in set(equality) | set(ranges) | set(sorts):
+            table = self.catalog.table_for_alias(alias, builder.base_table, builder.base_alias)
+            if not table:
+                continue
+            eq_columns = sorted(equality.get(alias, []))
+            range_columns = [c for c in ranges.get(alias, []) if c not in eq_columns][:1]
+            sort_columns = [
+                c for c in sorts.get(alias, []) if c not in eq_columns and c not in range_columns
+            ]
+            columns = tuple(eq_columns + range_columns + sort_columns)
+            benefit = (
+                EQUALITY_WEIGHT * len(eq_columns)
+                + RANGE_WEIGHT * len(range_columns)
+                + SORT_WEIGHT * len(sort_columns)
+            )
+            self._add_candidate(table, columns, benefit, params)
+
+    def recommend(self, top_n: Optional[int] = None) -> List[IndexRecommendation]:
+        """Get index recommendations ranked by estimated benefit.
+
+        Candidates already served by an existing catalog index (as a prefix)
+        are dropped, and a candidate that is a prefix of another candidate on
+        the same table is folded into the longer one.
+        """
+        candidates = [
+            candidate for candidate in self._candidates.values()
+            if not self._is_covered(candidate)
+        ]
+
+        merged: Dict[Tuple[str, Tuple[str, ...]], IndexRecommendation] = {}
+        for candidate in sorted(candidates, key=lambda c: len(c.columns), reverse=True):
+            target = next(
+                (
+                    longer for longer in merged.values()
+                    if longer.table == candidate.table
+                    and longer.columns[:len(candidate.columns)] == candidate.columns
+                ),
+                None
+            )
+            if target is None:
+                # Copy so that repeated calls do not accumulate merged benefits
+                target = merged[(candidate.table, candidate.columns)] = IndexRecommendation(
+                    candidate.table, candidate.columns
+                )
+                target.example = candidate.example
+                target.benefit = candidate.benefit
+                target.requests = candidate.requests
+            else:
+                target.benefit += candidate.benefit
+                target.requests += candidate.requests
+
+        ranked = sorted(merged.values(), key=lambda c: c.benefit, reverse=True)
+        return ranked[:top_n]
+
+    def report(self, top_n: Optional[int] = None) -> Dict[str, Any]:
+        """Get a JSON-serializable recommendation report."""
+        return {
+            'replayed': self.replayed,
+            'failed': self.failed,
+            'recommendations': [
+                recommendation.to_dict(self.schema) for recommendation in self.recommend(top_n)
+            ]
+        }
+
+    def _add_candidate(
+            self,
+            table: str,
+            columns: Tuple[str, ...],
+            benefit: float,
+            params: Optional[Dict[str, Any]]
+    ) -> None:
+        """Accumulate the benefit of a candidate index."""
+        if not columns:
+            return
+        candidate = self._candidates.get((table, columns))
+        if candidate is None:
+            candidate = self._candidates[(table, columns)] = IndexRecommendation(table, columns)
+            candidate.example = params
+        candidate.benefit += benefit
+        candidate.requests += 1
+
+    def _is_covered(self, candidate: IndexRecommendation) -> bool:
+        """Check if an existing index already serves a candidate."""
+        table = self.catalog.table(candidate.table)
+        if table is None:
+            return False
+        size = len(candidate.columns)
+        return any(index.columns[:size] == candidate.columns for index in table.indexes)
+
+
+def _append_unique(columns_by_alias: Dict[str, List[str]], alias: str, column: str) -> None:
+    """Append a column to an alias' list if not already present."""
+    columns = columns_by_alias.setdefault(alias, [])
+    if column not in columns:
+        columns.append(column)
+
+
+def read_request_log(path: str) -> Iterable[Dict[str, Any]]:
+    """Read request parameters from a JSON-lines request log."""
+    with open(path, 'r', encoding='utf-8') as log_file:
+        for line in log_file:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            yield entry.get('params', entry) if isinstance(entry, dict) else entry
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print index recommendations for a request log."""
+    parser = argparse.ArgumentParser(description="Recommend indexes from a request log")
+    parser.add_argument('log', help="JSON-lines file of request parameters")
+    parser.add_argument('--schema', default="dbo", help="schema used in the generated DDL")
+    parser.add_argument('--top', type=int, default=20, help="number of recommendations")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    advisor = IndexAdvisor(schema=args.schema)
+    advisor.replay(read_request_log(args.log))
+
+    if args.json:
+        print(json.dumps(advisor.report(args.top), indent=2))
+        return 0
+
+    print(f"Replayed {advisor.replayed} requests ({advisor.failed} failed)")
+    for recommendation in advisor.recommend(args.top):
+        print(f"{recommendation.benefit:10.1f}  {recommendation.requests:8d}  "
+              f"{recommendation.ddl(args.schema)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,35 +1,55 @@
 """Join analyzer for the flexible query builder."""
-from typing import Dict, List, Set, Tuple, Any
+import re
+from typing import Dict, List, Optional, Set, Tuple, Any
 
-from app.utils.constants import JOIN_PATHS
+from app.query_builder.analyzers.field_analyzer import FieldDependencies
+from app.query_builder.schema import Catalog, JoinEdge, JoinRecord, get_catalog
+from app.query_builder.utils.regex_helpers import extract_field_aliases, strip_string_literals
+
+# How joins needed only by filters are rendered:
+# - join: regular JOIN (default)
+# - exists: correlated WHERE EXISTS (...) semi-join
+# - in: <column> IN (SELECT ...) semi-join
+# - cte: <column> IN (SELECT ... FROM <cte>) with the filtered keys in a WITH clause
+# The in and cte forms need a single-column equality join condition and fall
+# back to exists otherwise.
+FILTER_JOIN_POLICIES = ('join', 'exists', 'in', 'cte')
+
+# Single-column equality join conditions: "<alias>.<column> = <alias>.<column>"
+EQUI_JOIN_PATTERN = re.compile(r"^\s*([a-z]+)\.([a-zA-Z_]+)\s*=\s*([a-z]+)\.([a-zA-Z_]+)\s*$")
 
 
 class JoinAnalyzer:
     """Analyzer for determining required joins based on field usage."""
 
-    def __init__(self):
-        """Initialize the join analyzer."""
-        pass
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the join analyzer.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
 
-    def determine_joins(self, field_dependencies: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def determine_joins(self, field_dependencies: FieldDependencies) -> List[JoinRecord]:
         """Determine required joins based on field dependencies.
 
         Args:
             field_dependencies: Field dependency information
 
         Returns:
-            List of required joins
+            List of required joins (records shared through the catalog)
         """
         # Extract data from field dependencies
-        used_aliases = field_dependencies['used_aliases']
-        query_params = field_dependencies['query_params']
+        used_aliases = field_dependencies.used_aliases
+        query_params = field_dependencies.query_params
 
         # Track joins to be added
         joins = []
 
-        # Map aliases to potential joins
-        for alias in used_aliases:
-            matching_joins = self._find_joins_for_alias(alias)
+        # Map aliases to potential joins; sorted so the discovery order
+        # does not depend on set iteration order
+        for alias in sorted(used_aliases):
+            matching_joins = self.catalog.joins_by_alias.get(alias)
 
             if not matching_joins:
                 continue
@@ -38,119 +58,224 @@ class JoinAnalyzer:
             self._handle_specific_joins(alias, matching_joins, query_params, joins)
 
             # If no specific handling, add the first matching join
-            if not self._has_join_for_alias(alias, joins) and matching_joins:
-                self._add_join(matching_joins[0][0], matching_joins[0][1], joins)
+            if not self._has_join_for_alias(alias, joins):
+                self._add_dependent_join(matching_joins[0].key, joins)
 
         # Order joins to ensure dependencies are met
         return self._order_joins(joins)
 
-    def _find_joins_for_alias(self, alias: str) -> List[Tuple[str, Dict]]:
-        """Find all joins that provide a given alias."""
-        matching_joins = []
-        for join_key, join_info in JOIN_PATHS.items():
-            if join_info['alias'] == alias:
-                matching_joins.append((join_key, join_info))
-        return matching_joins
+    def plan_semi_joins(
+            self,
+            joins: List[JoinRecord],
+            select_fields: List[str],
+            where_conditions: List[str],
+            group_by_fields: List[str],
+            order_by_clauses: List[str],
+            base_alias: str,
+            policy: str = 'join'
+    ) -> List[Dict[str, Any]]:
+        """Decide which joins are only needed by filters and plan them as semi-joins.
+
+        A join is filter-only when its alias appears in WHERE conditions but
+        not in the SELECT, GROUP BY or ORDER BY lists, and no remaining join
+        depends on it. Filter-only joins are grouped into chains rooted at
+        the join that links them to the outer query (e.g. company ->
+        industry); every condition on a chain must reference nothing but
+        the chain's aliases, otherwise the chain stays a regular join.
+
+        Args:
+            joins: Joins determined for the request
+            select_fields: List of selected fields
+            where_conditions: List of where conditions
+            group_by_fields: List of group by fields
+            order_by_clauses: List of order by clauses
+            base_alias: Base table alias
+            policy: One of FILTER_JOIN_POLICIES
+
+        Returns:
+            Semi-join plans with the keys:
+            - key: Key of the chain's root join
+            - joins: Joins of the chain, root first
+            - conditions: Where conditions evaluated inside the semi-join
+            - mode: exists, in or cte
+            - correlation: (outer field, inner field) for the in and cte modes
+        """
+        if policy not in FILTER_JOIN_POLICIES:
+            raise ValueError(f"Unknown filter join policy: {policy}")
+        if policy == 'join' or not joins:
+            return []
+
+        projected = extract_field_aliases(' '.join(
+            select_fields + group_by_fields + order_by_clauses
+        ))
+        condition_aliases = [
+            (condition, extract_field_aliases(strip_string_literals(condition)))
+            for condition in where_conditions
+        ]
+        joins_by_key = {join.key: join for join in joins}
+        alias_keys = {join.info.alias: join.key for join in joins}
+        semi = {key for key, join in joins_by_key.items() if join.info.alias not in projected}
+
+        while True:
+            # Joins that remaining regular joins depend on must stay joins too
+            for key in set(joins_by_key) - semi:
+                semi -= self._required_keys(key, joins_by_key)
+
+            roots = self._chain_roots(semi, joins_by_key)
+            chain_aliases: Dict[str, Set[str]] = {}
+            for key, root in roots.items():
+                chain_aliases.setdefault(root, set()).add(joins_by_key[key].info.alias)
+
+            # Conditions mixing a chain with other aliases keep the chain as joins
+            blocked = set()
+            for _, aliases in condition_aliases:
+                chains = {roots[alias_keys[a]] for a in aliases if alias_keys.get(a) in roots}
+                if len(chains) > 1 or (chains and not aliases <= chain_aliases[next(iter(chains))]):
+                    blocked |= chains
+            blocked |= {root for root in chain_aliases if root is None}
+            if not blocked:
+                break
+            semi -= {key for key, root in roots.items() if root in blocked}
+
+        plans = []
+        for root, aliases in chain_aliases.items():
+            conditions = [
+                condition for condition, condition_refs in condition_aliases
+                if condition_refs and condition_refs <= aliases
+            ]
+            if not conditions:
+                continue
+            chain = [joins_by_key[root]] + [
+                join for join in joins
+                if join.key != root and roots.get(join.key) == root
+            ]
+            mode, correlation = policy, None
+            if policy != 'exists':
+                correlation = self._correlation(joins_by_key[root].info, base_alias)
+                if correlation is None:
+                    mode = 'exists'
+            plans.append({
+                'key': root,
+                'joins': chain,
+                'conditions': conditions,
+                'mode': mode,
+                'correlation': correlation
+            })
+        return plans
 
-    def _has_join_for_alias(self, alias: str, joins: List[Dict[str, Any]]) -> bool:
+    def _required_keys(self, key: str, joins_by_key: Dict[str, JoinRecord]) -> Set[str]:
+        """Get the keys of the joins a join depends on, transitively."""
+        required = set()
+        for dep_key in joins_by_key[key].info.requires:
+            if dep_key in joins_by_key and dep_key not in required:
+                required.add(dep_key)
+                required |= self._required_keys(dep_key, joins_by_key)
+        return required
+
+    def _chain_roots(
+            self,
+            semi: Set[str],
+            joins_by_key: Dict[str, JoinRecord]
+    ) -> Dict[str, Optional[str]]:
+        """Map each filter-only join to the root of its chain.
+
+        Joins depending on more than one filter-only join have no single
+        root and map to None.
+        """
+        roots: Dict[str, Optional[str]] = {}
+        for key in semi:
+            root: Optional[str] = key
+            while root is not None:
+                parents = [dep for dep in joins_by_key[root].info.requires if dep in semi]
+                if not parents:
+                    break
+                root = parents[0] if len(parents) == 1 else None
+            roots[key] = root
+        return roots
+
+    def _correlation(self, edge: JoinEdge, base_alias: str) -> Optional[Tuple[str, str]]:
+        """Get the (outer field, inner field) pair of a single-column equality join."""
+        match = EQUI_JOIN_PATTERN.match(edge.render_condition(base_alias))
+        if not match:
+            return None
+        left_alias, left_column, right_alias, right_column = match.groups()
+        left, right = f"{left_alias}.{left_column}", f"{right_alias}.{right_column}"
+        if left_alias == edge.alias and right_alias != edge.alias:
+            return right, left
+        if right_alias == edge.alias and left_alias != edge.alias:
+            return left, right
+        return None
+
+    def _has_join_for_alias(self, alias: str, joins: List[JoinRecord]) -> bool:
         """Check if we already have a join that provides this alias."""
         for join in joins:
-            if join['info']['alias'] == alias:
+            if join.info.alias == alias:
                 return True
         return False
 
     def _handle_specific_joins(
             self,
             alias: str,
-            matching_joins: List[Tuple[str, Dict]],
+            matching_joins: Tuple[JoinEdge, ...],
             query_params: Dict[str, str],
-            joins: List[Dict[str, Any]]
+            joins: List[JoinRecord]
     ) -> None:
         """Handle parameter-specific joins."""
         for field, value in query_params.items():
-            if field == 'tr.transactionIdTypeId':
-                if value == '1':
-                    # Use tt for transaction type in this case
-                    for join_key, join_info in matching_joins:
-                        if join_key == 'type':
-                            self._add_join(join_key, join_info, joins)
-                elif value == '14':
-                    # Use trtype for transaction type in this case
-                    for join_key, join_info in matching_joins:
-                        if join_key == 'transaction_type':
-                            self._add_join(join_key, join_info, joins)
-            elif field.startswith('c.'):
-                # Company-related joins
-                if alias == 'c':
-                    for join_key, join_info in matching_joins:
-                        if join_key == 'company':
-                            self._add_join(join_key, join_info, joins)
-            elif field.startswith('si.'):
-                # Industry-related joins
-                if alias == 'si':
-                    for join_key, join_info in matching_joins:
-                        if join_key == 'industry':
-                            self._add_join(join_key, join_info, joins)
-                            # Also need company join for industry
-                            self._add_dependent_join('company', joins)
-            elif field.startswith('geo.'):
-                # Country-related joins
-                if alias == 'geo':
-                    for join_key, join_info in matching_joins:
-                        if join_key == 'country':
-                            self._add_join(join_key, join_info, joins)
-                            # Also need company join for country
-                            self._add_dependent_join('company', joins)
-
-    def _add_dependent_join(self, join_key: str, joins: List[Dict[str, Any]]) -> None:
-        """Add a dependent join if not already added."""
-        if join_key not in [j['key'] for j in joins]:
-            join_info = JOIN_PATHS.get(join_key)
-            if join_info:
-                self._add_join(join_key, join_info, joins)
-
-    def _add_join(
-            self,
-            join_key: str,
-            join_info: Dict[str, Any],
-            joins: List[Dict[str, Any]]
-    ) -> None:
-        """Add a join if not already added."""
-        if join_key not in [j['key'] for j in joins]:
-            # Check if we need special handling for this join
-            if join_key == 'company_reverse':
-                # For company_reverse, we want to use the exact condition
-                joins.append({
-                    'key': join_key,
-                    'info': join_info,
-                    'use_exact': True
-                })
+            selector = self.catalog.join_selectors.get(field)
+            if selector is not None:
+                # The filtered value decides which join provides the alias
+                # (e.g. the transaction type join depends on transactionIdTypeId)
+                join_key = selector.get(value)
+            elif field.split('.', 1)[0] == alias:
+                # Filtering on the alias uses its preferred join
+                join_key = self.catalog.preferred_joins.get(alias)
             else:
-                joins.append({
-                    'key': join_key,
-                    'info': join_info,
-                    'use_exact': False
-                })
-
-    def _order_joins(self, joins: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Order joins to ensure dependencies are met."""
-        ordered_joins = []
-        remaining_joins = joins.copy()
-
-        # First add company joins
-        company_joins = [j for j in remaining_joins if j['info']['table'] == 'ciqCompany']
-        for join in company_joins:
-            ordered_joins.append(join)
-            remaining_joins.remove(join)
-
-        # Next add transaction type joins
-        tt_joins = [j for j in remaining_joins if j['info']['table'] == 'ciqTransactionType']
-        for join in tt_joins:
-            ordered_joins.append(join)
-            remaining_joins.remove(join)
-
-        # Add remaining joins
-        for join in remaining_joins:
-            ordered_joins.append(join)
-
-        return ordered_joins
\ No newline at end of file
+                continue
+
+            for edge in matching_joins:
+                if edge.key == join_key:
+                    self._add_join(edge, joins)
+                    # Also add the joins this join depends on
+                    for dep_key in edge.requires:
+                        self._add_dependent_join(dep_key, joins)
+
+    def _add_dependent_join(self, join_key: str, joins: List[JoinRecord]) -> None:
+        """Add a dependent join (and its own dependencies) if not already added."""
+        edge = self.catalog.joins.get(join_key)
+        if edge:
+            self._add_join(edge, joins)
+            for dep_key in edge.requires:
+                self._add_dependent_join(dep_key, joins)
+
+    def _add_join(self, edge: JoinEdge, joins: List[JoinRecord]) -> None:
+        """Add a join if not already added."""
+        if not any(join.key == edge.key for join in joins):
+            joins.append(self.catalog.join_records[edge.key])
+
+    def _order_joins(self, joins: List[JoinRecord]) -> List[JoinRecord]:
+        """Order joins to ensure dependencies are met.
+
+        Every join comes after the joins it requires (the catalog loader
+        rejects cyclic requirements). Among joins whose requirements are
+        met, the table priority declared in the catalog decides (company
+        joins first, then transaction type joins), then discovery order.
+        """
+        priority = self.catalog.join_priority
+        fallback = len(priority)
+        keys = {join.key for join in joins}
+        pending = sorted(
+            enumerate(joins),
+            key=lambda item: (priority.get(item[1].info.table, fallback), item[0])
+        )
+        ordered: List[JoinRecord] = []
+        placed: Set[str] = set()
+        while pending:
+            index = next(
+                position for position, (_, join) in enumerate(pending)
+                if all(dep in placed or dep not in keys for dep in join.info.requires)
+            )
+            join = pending.pop(index)[1]
+            ordered.append(join)
+            placed.add(join.key)
+        return ordered
@@ -0,0 +1,289 @@
+"""Date range normalization and partition pruning for the base table.
+
+Tables partitioned by a date column are declared in the catalog's
+``partitions`` section. Filters on the partition column of the base table
+are not rendered one by one; they are collected into a single
+:class:`DateRange`:
+
+* values may be given at year (``2020``), month (``2020-03``), day or,
+  for datetime columns, timestamp precision, and denote the whole period:
+  ``lte:2020`` includes all of 2020, ``announcedDate=2020-03`` is March;
+* ``between:<from>,<to>`` includes both periods;
+* all bounds on the column are intersected.
+
+The range is rendered as a sargable pair of conditions on the bare column
+(``col >= start AND col < end``), with date literals typed for the
+dialect, so the database can prune partitions and use indexes on the
+column. A range within a single partition can also be routed to the
+table holding that partition.
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from app.query_builder.schema import Catalog, PartitionDef, get_catalog
+from app.utils.errors import QueryBuildError
+
+YEAR_PATTERN = re.compile(r"^(\d{4})$")
+MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})$")
+
+# Range operators of the filter syntax; equality and BETWEEN are handled too
+RANGE_OPERATORS = frozenset({'>=', '>', '<=', '<'})
+
+# Type of typed date and timestamp literals per dialect. Literals are
+# rendered as CAST('...' AS <type>) rather than DATE '...' so that prepared
+# execution can still lift the string into a bind parameter. Dialects not
+# listed (SQLite stores dates as ISO text) compare with plain ISO strings.
+DATE_LITERAL_TYPES = {
+    'postgres': ('DATE', 'TIMESTAMP'),
+    'mysql': ('DATE', 'DATETIME'),
+    'mssql': ('DATE', 'DATETIME2'),
+}
+
+# Literals rendered by render_date_literal: "'<text>'" or "CAST('<text>' AS <type>)"
+DATE_LITERAL_PATTERN = re.compile(r"^(?:'([^']*)'|CAST\('([^']*)' AS ([A-Z][A-Z0-9]*)\))$")
+
+# A range bound: (value, inclusive)
+Bound = Tuple[datetime, bool]
+
+
+class DateRange:
+    """Range of a partition column; bounds are (value, inclusive) or None."""
+
+    __slots__ = ('lower', 'upper')
+
+    def __init__(self, lower: Optional[Bound] = None, upper: Optional[Bound] = None):
+        self.lower = lower
+        self.upper = upper
+
+    def intersect(self, other: 'DateRange') -> 'DateRange':
+        """Get the range of values within both ranges."""
+        lower = self.lower
+        if other.lower is not None and (
+                lower is None or (other.lower[0], not other.lower[1]) > (lower[0], not lower[1])
+        ):
+            lower = other.lower
+        upper = self.upper
+        if other.upper is not None and (
+                upper is None or (other.upper[0], other.upper[1]) < (upper[0], upper[1])
+        ):
+            upper = other.upper
+        return DateRange(lower, upper)
+
+    @property
+    def empty(self) -> bool:
+        """Whether no value is within the range."""
+        if self.lower is None or self.upper is None:
+            return False
+        (low, low_inclusive), (high, high_inclusive) = self.lower, self.upper
+        return low > high or (low == high and not (low_inclusive and high_inclusive))
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, DateRange) and (self.lower, self.upper) == (other.lower, other.upper)
+
+    def __repr__(self) -> str:
+        return f"DateRange(lower={self.lower!r}, upper={self.upper!r})"
+
+
+def parse_period(value: str, allow_time: bool = False) -> Tuple[datetime, Optional[datetime]]:
+    """Parse a date filter value into the period it denotes.
+
+    Args:
+        value: ``YYYY``, ``YYYY-MM``, an ISO date or (if allowed) an ISO timestamp
+        allow_time: Whether timestamps are accepted
+
+    Returns:
+        Tuple of (start, end) of the half-open period; end is None for a
+        timestamp, which denotes a single instant
+
+    Raises:
+        ValueError: If the value is not a date of one of these forms
+    """
+    text = value.strip()
+    match = YEAR_PATTERN.match(text)
+    if match:
+        year = int(match.group(1))
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    match = MONTH_PATTERN.match(text)
+    if match:
+        start = datetime(int(match.group(1)), int(match.group(2)), 1)
+        return start, _next_start(start, 'month')
+    try:
+        day = date.fromisoformat(text)
+    except ValueError:
+        if not allow_time:
+            raise
+        instant = datetime.fromisoformat(text)
+        if instant.tzinfo is not None:
+            # Bounds are compared with each other; keep them all naive
+            raise ValueError(value)
+        return instant, None
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def render_date_literal(value: datetime, dialect: Optional[str] = None) -> str:
+    """Render a date (midnight) or timestamp literal for a dialect."""
+    has_time = value != datetime(value.year, value.month, value.day)
+    text = value.isoformat(sep=' ') if has_time else value.date().isoformat()
+    types = DATE_LITERAL_TYPES.get(dialect)
+    return typed_literal(text, None if types is None else types[1] if has_time else types[0])
+
+
+def typed_literal(text: str, sql_type: Optional[str] = None) -> str:
+    """Render a string literal, cast to an SQL type if one is given."""
+    return f"'{text}'" if sql_type is None else f"CAST('{text}' AS {sql_type})"
+
+
+def parse_typed_literal(literal: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Split a literal rendered by :func:`typed_literal` into (text, SQL type).
+
+    Returns:
+        Tuple of (text, SQL type or None), or None for other expressions
+    """
+    match = DATE_LITERAL_PATTERN.match(literal)
+    if not match:
+        return None
+    if match.group(1) is not None:
+        return match.group(1), None
+    return match.group(2), match.group(3)
+
+
+class PartitionPruner:
+    """Analyzer turning partition column filters into prunable ranges."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the partition pruner.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
+    def partition_column(self, builder: Any) -> Optional[str]:
+        """Get the qualified partition column of a builder's base table, if partitioned."""
+        partition = self.catalog.partitions.get(builder.base_table)
+        return None if partition is None else f"{builder.base_alias}.{partition.column}"
+
+    def restrict(self, builder: Any, sql_op: Optional[str], value: str) -> bool:
+        """Restrict the partition column range of a builder by a filter.
+
+        Args:
+            builder: FlexibleQueryBuilder parsing the request
+            sql_op: SQL operator of the filter, or None for equality
+            value: Filter value (two comma-separated values for BETWEEN)
+
+        Returns:
+            False if the filter is not a range filter (e.g. an IN list or
+            LIKE) and must be rendered as usual
+
+        Raises:
+            QueryBuildError: If a value is not a valid date
+        """
+        if sql_op is not None and sql_op not in RANGE_OPERATORS and sql_op != 'BETWEEN':
+            return False
+        if sql_op is None and ',' in value:
+            return False
+
+        partition = self.catalog.partitions[builder.base_table]
+        allow_time = self._column_type(partition) == 'datetime'
+        field = f"{builder.base_alias}.{partition.column}"
+        values = [part.strip() for part in value.split(',')]
+        if sql_op == 'BETWEEN' and len(values) != 2:
+            raise QueryBuildError(f"BETWEEN on {field} needs two values: {value}")
+        try:
+            if sql_op == 'BETWEEN':
+                restriction = self._range('>=', parse_period(values[0], allow_time)).intersect(
+                    self._range('<=', parse_period(values[1], allow_time))
+                )
+            else:
+                restriction = self._range(sql_op, parse_period(value, allow_time))
+        except ValueError:
+            expected = 'date or datetime' if allow_time else 'date'
+            raise QueryBuildError(f"Invalid value for {field} (expected {expected}): {value!r}")
+
+        current = builder.date_range
+        builder.date_range = restriction if current is None else current.intersect(restriction)
+        return True
+
+    def conditions(self, builder: Any, date_range: DateRange) -> List[str]:
+        """Render a range of the partition column as sargable WHERE conditions."""
+        if date_range.empty:
+            return ["1 = 0"]
+        field = self.partition_column(builder)
+        conditions = []
+        if date_range.lower is not None:
+            value, inclusive = date_range.lower
+            conditions.append(
+                f"{field} {'>=' if inclusive else '>'} {render_date_literal(value, builder.dialect)}"
+            )
+        if date_range.upper is not None:
+            value, inclusive = date_range.upper
+            conditions.append(
+                f"{field} {'<=' if inclusive else '<'} {render_date_literal(value, builder.dialect)}"
+            )
+        return conditions
+
+    def partition_table(self, base_table: str, date_range: DateRange) -> Optional[str]:
+        """Get the table holding the single partition a range falls in.
+
+        Returns:
+            Partition table name, or None if the table has no partition
+            tables or the range is unbounded or spans several partitions
+        """
+        partition = self.catalog.partitions.get(base_table)
+        if (
+                partition is None
+                or partition.table_pattern is None
+                or date_range.lower is None
+                or date_range.upper is None
+                or date_range.empty
+        ):
+            return None
+        start = _period_start(date_range.lower[0], partition.interval)
+        end = _next_start(start, partition.interval)
+        high, high_inclusive = date_range.upper
+        if high > end or (high == end and high_inclusive):
+            return None
+        return partition.table_pattern.format(year=start.year, month=start.month)
+
+    @staticmethod
+    def _range(sql_op: Optional[str], period: Tuple[datetime, Optional[datetime]]) -> DateRange:
+        """Get the range of values matching a comparison with a period."""
+        start, end = period
+        if end is None:
+            # A single instant keeps the operator as given
+            instant = start
+            return {
+                '>=': DateRange(lower=(instant, True)),
+                '>': DateRange(lower=(instant, False)),
+                '<=': DateRange(upper=(instant, True)),
+                '<': DateRange(upper=(instant, False)),
+                None: DateRange((instant, True), (instant, True)),
+            }[sql_op]
+        return {
+            '>=': DateRange(lower=(start, True)),
+            '>': DateRange(lower=(end, True)),
+            '<=': DateRange(upper=(end, False)),
+            '<': DateRange(upper=(start, False)),
+            None: DateRange((start, True), (end, False)),
+        }[sql_op]
+
+    def _column_type(self, partition: PartitionDef) -> str:
+        return self.catalog.tables[partition.table].column_index[partition.column].type
+
+
+def _period_start(value: datetime, interval: str) -> datetime:
+    """Get the start of the partition interval containing a value."""
+    if interval == 'year':
+        return datetime(value.year, 1, 1)
+    return datetime(value.year, value.month, 1)
+
+
+def _next_start(start: datetime, interval: str) -> datetime:
+    """Get the start of the interval following the one starting at ``start``."""
+    if interval == 'year':
+        return datetime(start.year + 1, 1, 1)
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
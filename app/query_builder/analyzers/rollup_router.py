@@ -0,0 +1,218 @@
+"""Routing of grouped requests to pre-aggregated rollup tables.
+
+A rollup declared in the catalog can answer a grouped request when every
+group key, filter column and ORDER BY field is one of its dimensions and
+every aggregate is one of its stored measures (or combinable from them,
+e.g. ``COUNT(*)`` as the ``SUM`` of stored counts). The rewritten query
+reads the rollup under the base alias and needs no joins.
+
+Rollups must be built with the same join semantics as the builder's
+queries (inner joins along the catalog join paths to the dimension
+tables). Inner joins drop rows whose references dangle, so a rollup only
+answers requests that join exactly the tables it was built from.
+"""
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from app.query_builder.schema import (
+    Catalog,
+    RollupDef,
+    get_catalog,
+    normalize_aggregate
+)
+from app.query_builder.schema.catalog import ROLLUP_COMBINERS
+
+# Qualified column references such as "si.simpleIndustryId"
+FIELD_REF_PATTERN = re.compile(r"\b([a-z]+)\.([a-zA-Z_][a-zA-Z0-9_]*)\b")
+
+# Quoted SQL string literals (with '' escapes)
+LITERAL_PATTERN = re.compile(r"('(?:[^']|'')*')")
+
+# Trailing "AS <label>" of a select expression
+LABEL_PATTERN = re.compile(r"^(.*?)\s+AS\s+(\w+)$", re.IGNORECASE | re.DOTALL)
+
+
+class RollupRewrite:
+    """Query components rewritten to read from a rollup table."""
+
+    __slots__ = (
+        'rollup',
+        'table',
+        'select_fields',
+        'where_conditions',
+        'group_by_fields',
+        'order_by_clauses'
+    )
+
+    def __init__(
+            self,
+            rollup: RollupDef,
+            select_fields: List[str],
+            where_conditions: List[str],
+            group_by_fields: List[str],
+            order_by_clauses: List[str]
+    ):
+        self.rollup = rollup
+        self.table = rollup.name
+        self.select_fields = select_fields
+        self.where_conditions = where_conditions
+        self.group_by_fields = group_by_fields
+        self.order_by_clauses = order_by_clauses
+
+
+class RollupRouter:
+    """Router that retargets covered grouped requests to a rollup."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the rollup router.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
+    def route(self, builder: Any) -> Optional[RollupRewrite]:
+        """Find the most aggregated rollup covering a parsed request.
+
+        Args:
+            builder: FlexibleQueryBuilder that has parsed the request
+
+        Returns:
+            Rewritten query components, or None if no rollup covers the request
+        """
+        rollups = self.catalog.rollups.get(builder.base_table)
+        if not rollups or not builder.group_by_fields:
+            return None
+
+        for rollup in rollups:
+            rewrite = self.rewrite(rollup, builder)
+            if rewrite is not None:
+                return rewrite
+        return None
+
+    def rewrite(self, rollup: RollupDef, builder: Any) -> Optional[RollupRewrite]:
+        """Rewrite a parsed request against one rollup.
+
+        Returns:
+            Rewritten query components, or None if the rollup does not cover
+            the request
+        """
+        alias = builder.base_alias
+        joined = {join.info.alias for join in builder.joins}
+        if joined != self._join_aliases(rollup, alias):
+            return None
+
+        group_by_fields = []
+        for field in builder.group_by_fields:
+            column = rollup.dimensions.get(field.strip())
+            if column is None:
+                return None
+            group_by_fields.append(f"{alias}.{column}")
+
+        select_fields = []
+        labels = set()
+        for field in builder.select_fields:
+            rewritten = self._rewrite_select(rollup, alias, field)
+            if rewritten is None:
+                return None
+            select_fields.append(rewritten)
+            label_match = LABEL_PATTERN.match(field.strip())
+            if label_match:
+                labels.add(label_match.group(2))
+
+        where_conditions = []
+        for condition in builder.where_conditions:
+            rewritten = self._rewrite_condition(rollup, alias, condition)
+            if rewritten is None:
+                return None
+            where_conditions.append(rewritten)
+
+        order_by_clauses = []
+        for clause in builder.order_by_clauses:
+            field, _, direction = clause.strip().rpartition(' ')
+            if not field:
+                field, direction = direction, ''
+            if field in labels:
+                expression = field
+            else:
+                expression = self._rewrite_expression(rollup, alias, field)
+                if expression is None:
+                    return None
+            order_by_clauses.append(f"{expression} {direction}".strip())
+
+        return RollupRewrite(
+            rollup=rollup,
+            select_fields=select_fields,
+            where_conditions=where_conditions,
+            group_by_fields=group_by_fields,
+            order_by_clauses=order_by_clauses
+        )
+
+    def _join_aliases(self, rollup: RollupDef, base_alias: str) -> Set[str]:
+        """Get the aliases joined to build a rollup, including required joins."""
+        pending = [field.partition('.')[0] for field in rollup.dimensions]
+        aliases: Set[str] = set()
+        while pending:
+            join_alias = pending.pop()
+            if join_alias == base_alias or join_alias in aliases:
+                continue
+            aliases.add(join_alias)
+            key = self.catalog.preferred_joins.get(join_alias)
+            edges = self.catalog.joins_by_alias.get(join_alias, ())
+            edge = self.catalog.joins[key] if key in self.catalog.joins else next(iter(edges), None)
+            if edge is not None:
+                pending.extend(self.catalog.joins[required].alias for required in edge.requires)
+        return aliases
+
+    def _rewrite_select(self, rollup: RollupDef, alias: str, field: str) -> Optional[str]:
+        """Rewrite a select expression, keeping its result column label."""
+        field = field.strip()
+        label_match = LABEL_PATTERN.match(field)
+        expression, label = label_match.groups() if label_match else (field, None)
+
+        rewritten = self._rewrite_expression(rollup, alias, expression)
+        if rewritten is None:
+            return None
+
+        if label is None and expression in rollup.dimensions:
+            # Keep the column name the base query would have produced
+            label = expression.partition('.')[2]
+            if rewritten == f"{alias}.{label}":
+                label = None
+        return f"{rewritten} AS {label}" if label else rewritten
+
+    def _rewrite_expression(self, rollup: RollupDef, alias: str, expression: str) -> Optional[str]:
+        """Rewrite a dimension or aggregate expression."""
+        expression = expression.strip()
+        column = rollup.dimensions.get(expression)
+        if column is not None:
+            return f"{alias}.{column}"
+
+        aggregate = normalize_aggregate(expression)
+        column = rollup.measures.get(aggregate) if aggregate else None
+        if column is None:
+            return None
+        combiner = ROLLUP_COMBINERS[aggregate.partition('(')[0]]
+        return f"{combiner}({alias}.{column})"
+
+    def _rewrite_condition(self, rollup: RollupDef, alias: str, condition: str) -> Optional[str]:
+        """Rewrite the column references of a filter condition outside literals."""
+        parts = LITERAL_PATTERN.split(condition)
+        for position in range(0, len(parts), 2):
+            rewritten = self._rewrite_field_refs(rollup, alias, parts[position])
+            if rewritten is None:
+                return None
+            parts[position] = rewritten
+        return ''.join(parts)
+
+    @staticmethod
+    def _rewrite_field_refs(rollup: RollupDef, alias: str, text: str) -> Optional[str]:
+        """Replace dimension references in SQL text; None if others remain."""
+        replacements: Dict[str, str] = {}
+        for ref_alias, column in FIELD_REF_PATTERN.findall(text):
+            field = f"{ref_alias}.{column}"
+            target = rollup.dimensions.get(field)
+            if target is None:
+                return None
+            replacements[field] = f"{alias}.{target}"
+        return FIELD_REF_PATTERN.sub(lambda match: replacements[match.group(0)], text)
@@ -1,13 +1,33 @@
 """SQL clause constructors for the flexible query builder."""
-from app.query_builder.constructors.base import ClauseConstructor
-from app.query_builder.constructors.select_constructor import SelectConstructor
-from app.query_builder.constructors.from_constructor import FromConstructor
-from app.query_builder.constructors.join_constructor import JoinConstructor
-from app.query_builder.constructors.where_constructor import WhereConstructor
-from app.query_builder.constructors.group_constructor import GroupByConstructor
-from app.query_builder.constructors.order_constructor import OrderByConstructor
-from app.query_builder.constructors.limit_constructor import LimitOffsetConstructor
-from app.query_builder.constructors.sql_constructor import SQLQueryConstructor
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.constructors.base import ClauseConstructor
+    from app.query_builder.constructors.select_constructor import SelectConstructor
+    from app.query_builder.constructors.from_constructor import FromConstructor
+    from app.query_builder.constructors.join_constructor import JoinConstructor
+    from app.query_builder.constructors.where_constructor import WhereConstructor
+    from app.query_builder.constructors.group_constructor import GroupByConstructor
+    from app.query_builder.constructors.order_constructor import OrderByConstructor
+    from app.query_builder.constructors.limit_constructor import LimitOffsetConstructor
+    from app.query_builder.constructors.semi_join_constructor import SemiJoinConstructor
+    from app.query_builder.constructors.union_constructor import UnionConstructor
+    from app.query_builder.constructors.sql_constructor import SQLQueryConstructor
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ClauseConstructor': 'app.query_builder.constructors.base',
+    'SelectConstructor': 'app.query_builder.constructors.select_constructor',
+    'FromConstructor': 'app.query_builder.constructors.from_constructor',
+    'JoinConstructor': 'app.query_builder.constructors.join_constructor',
+    'WhereConstructor': 'app.query_builder.constructors.where_constructor',
+    'GroupByConstructor': 'app.query_builder.constructors.group_constructor',
+    'OrderByConstructor': 'app.query_builder.constructors.order_constructor',
+    'LimitOffsetConstructor': 'app.query_builder.constructors.limit_constructor',
+    'SemiJoinConstructor': 'app.query_builder.constructors.semi_join_constructor',
+    'UnionConstructor': 'app.query_builder.constructors.union_constructor',
+    'SQLQueryConstructor': 'app.query_builder.constructors.sql_constructor'
+})
 
 __all__ = [
     'ClauseConstructor',
@@ -18,5 +38,7 @@ __all__ = [
     'GroupByConstructor',
     'OrderByConstructor',
     'LimitOffsetConstructor',
+    'SemiJoinConstructor',
+    'UnionConstructor',
     'SQLQueryConstructor'
 ]
\ No newline at end of file
@@ -1,22 +1,32 @@
 """Base constructor for SQL clauses."""
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
+
+from app.query_builder.schema import Catalog, get_catalog
 
 
 class ClauseConstructor(ABC):
     """Base interface for SQL clause constructors."""
 
-    def __init__(self, schema: str, base_table: str, base_alias: str):
+    def __init__(
+            self,
+            schema: str,
+            base_table: str,
+            base_alias: str,
+            catalog: Optional[Catalog] = None
+    ):
         """Initialize the clause constructor.
 
         Args:
             schema: Database schema name
             base_table: Base table name
             base_alias: Base table alias
+            catalog: Schema catalog, defaults to the current catalog
         """
         self.schema = schema
         self.base_table = base_table
         self.base_alias = base_alias
+        self.catalog = catalog or get_catalog()
 
     @abstractmethod
     def construct(self, *args: Any, **kwargs: Any) -> str:
@@ -11,9 +11,12 @@ class FromConstructor(ClauseConstructor):
         """Construct a FROM clause.
 
         Args:
-            **kwargs: Keyword arguments (unused)
+            **kwargs: Keyword arguments including:
+                - table: Table read instead of the base table (e.g. a rollup),
+                  still under the base alias
 
         Returns:
             Constructed FROM clause string
         """
-        return f"FROM {self.schema}.{self.base_table} {self.base_alias}"
\ No newline at end of file
+        table = kwargs.get('table') or self.base_table
+        return f"FROM {self.schema}.{table} {self.base_alias}"
\ No newline at end of file
@@ -2,12 +2,19 @@
 from typing import Dict, List, Any
 
 from app.query_builder.constructors.base import ClauseConstructor
+from app.query_builder.schema import JoinRecord
 
 
 class JoinConstructor(ClauseConstructor):
     """Constructor for JOIN clauses."""
 
-    def construct(self, joins: List[Dict[str, Any]], **kwargs: Any) -> str:
+    def __init__(self, *args: Any, **kwargs: Any):
+        """Initialize the join constructor."""
+        super().__init__(*args, **kwargs)
+        # Rendered JOIN statements per catalog join edge
+        self._rendered: Dict[Any, str] = {}
+
+    def construct(self, joins: List[JoinRecord], **kwargs: Any) -> str:
         """Construct a JOIN clause.
 
         Args:
@@ -23,39 +30,13 @@ class JoinConstructor(ClauseConstructor):
         join_statements = []
 
         for join_item in joins:
-            join_key = join_item['key']
-            join_info = join_item['info']
-            use_exact = join_item.get('use_exact', False)
-
-            if join_key == 'industry':
-                # Use specific join for industry
-                join_statements.append(
-                    f"JOIN {self.schema}.{join_info['table']} {join_info['alias']} "
-                    f"ON {join_info['alias']}.simpleIndustryId = c.simpleIndustryId"
-                )
-            elif join_key == 'country':
-                # Use specific join for country
-                join_statements.append(
-                    f"JOIN {self.schema}.{join_info['table']} {join_info['alias']} "
-                    f"ON {join_info['alias']}.countryId = c.countryId"
-                )
-            elif join_key == 'company_reverse':
-                # Use reverse order company join
-                join_statements.append(
-                    f"JOIN {self.schema}.{join_info['table']} {join_info['alias']} "
-                    f"ON {join_info['alias']}.companyId = {self.base_alias}.companyId"
-                )
-            elif use_exact:
-                # Use the exact condition as specified
-                join_statements.append(
-                    f"JOIN {self.schema}.{join_info['table']} {join_info['alias']} "
-                    f"ON {join_info['condition']}"
-                )
-            else:
-                # Normal join
-                join_statements.append(
-                    f"JOIN {self.schema}.{join_info['table']} {join_info['alias']} "
-                    f"ON {join_info['condition']}"
-                )
-
-        return " ".join(join_statements)
\ No newline at end of file
+            edge = join_item.info
+            statement = self._rendered.get(edge)
+            if statement is None:
+                # Join conditions (including the industry/country and reverse
+                # company special cases) come from the catalog
+                statement = edge.render(self.schema, self.base_alias)
+                self._rendered[edge] = statement
+            join_statements.append(statement)
+
+        return " ".join(join_statements)
@@ -0,0 +1,72 @@
+"""Semi-join constructor for the flexible query builder."""
+from typing import Any, Dict, List
+
+from app.query_builder.constructors.base import ClauseConstructor
+
+
+class SemiJoinConstructor(ClauseConstructor):
+    """Constructor for filter-only joins rendered as EXISTS/IN subqueries or CTEs."""
+
+    def construct(self, semi_joins: List[Dict[str, Any]], **kwargs: Any) -> str:
+        """Construct the WITH clause holding the CTEs of semi-joins.
+
+        Args:
+            semi_joins: Semi-join plans from JoinAnalyzer.plan_semi_joins
+            **kwargs: Additional keyword arguments (unused)
+
+        Returns:
+            Constructed WITH clause string, empty when no plan uses a CTE
+        """
+        ctes = [
+            f"{self._cte_name(semi_join)} AS ("
+            f"SELECT DISTINCT {semi_join['correlation'][1]} {self._subquery_body(semi_join)})"
+            for semi_join in semi_joins if semi_join['mode'] == 'cte'
+        ]
+        if not ctes:
+            return ""
+        return f"WITH {', '.join(ctes)}"
+
+    def predicates(self, semi_joins: List[Dict[str, Any]]) -> List[str]:
+        """Construct the WHERE predicates that replace the semi-joined filters.
+
+        Args:
+            semi_joins: Semi-join plans from JoinAnalyzer.plan_semi_joins
+
+        Returns:
+            One predicate per semi-join
+        """
+        predicates = []
+        for semi_join in semi_joins:
+            mode = semi_join['mode']
+            if mode == 'exists':
+                root = semi_join['joins'][0].info
+                predicates.append(
+                    f"EXISTS (SELECT 1 {self._subquery_body(semi_join)} "
+                    f"AND {root.render_condition(self.base_alias)})"
+                )
+                continue
+
+            outer_field, inner_field = semi_join['correlation']
+            if mode == 'cte':
+                column = inner_field.split('.', 1)[1]
+                predicates.append(
+                    f"{outer_field} IN (SELECT {column} FROM {self._cte_name(semi_join)})"
+                )
+            else:
+                predicates.append(
+                    f"{outer_field} IN (SELECT {inner_field} {self._subquery_body(semi_join)})"
+                )
+        return predicates
+
+    def _subquery_body(self, semi_join: Dict[str, Any]) -> str:
+        """Render the FROM, JOIN and WHERE parts of a semi-join subquery."""
+        root, *chained = semi_join['joins']
+        parts = [f"FROM {self.schema}.{root.info.table} {root.info.alias}"]
+        parts.extend(join.info.render(self.schema, self.base_alias) for join in chained)
+        parts.append(f"WHERE {' AND '.join(semi_join['conditions'])}")
+        return " ".join(parts)
+
+    @staticmethod
+    def _cte_name(semi_join: Dict[str, Any]) -> str:
+        """Get the CTE name of a semi-join."""
+        return f"{semi_join['key']}_filter"
@@ -1,5 +1,5 @@
 """SQL query constructor for the flexible query builder."""
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from app.query_builder.constructors.base import ClauseConstructor
 from app.query_builder.constructors.select_constructor import SelectConstructor
@@ -9,31 +9,44 @@ from app.query_builder.constructors.where_constructor import WhereConstructor
 from app.query_builder.constructors.group_constructor import GroupByConstructor
 from app.query_builder.constructors.order_constructor import OrderByConstructor
 from app.query_builder.constructors.limit_constructor import LimitOffsetConstructor
+from app.query_builder.constructors.semi_join_constructor import SemiJoinConstructor
+from app.query_builder.constructors.union_constructor import UnionConstructor
+from app.query_builder.schema import Catalog, JoinRecord, get_catalog
 
 
 class SQLQueryConstructor:
     """Constructor for complete SQL queries."""
 
-    def __init__(self, schema: str, base_table: str, base_alias: str):
+    def __init__(
+            self,
+            schema: str,
+            base_table: str,
+            base_alias: str,
+            catalog: Optional[Catalog] = None
+    ):
         """Initialize the SQL query constructor.
 
         Args:
             schema: Database schema name
             base_table: Base table name
             base_alias: Base table alias
+            catalog: Schema catalog, defaults to the current catalog
         """
         self.schema = schema
         self.base_table = base_table
         self.base_alias = base_alias
+        self.catalog = catalog or get_catalog()
 
         # Create clause constructors
-        self.select_constructor = SelectConstructor(schema, base_table, base_alias)
-        self.from_constructor = FromConstructor(schema, base_table, base_alias)
-        self.join_constructor = JoinConstructor(schema, base_table, base_alias)
-        self.where_constructor = WhereConstructor(schema, base_table, base_alias)
-        self.group_constructor = GroupByConstructor(schema, base_table, base_alias)
-        self.order_constructor = OrderByConstructor(schema, base_table, base_alias)
-        self.limit_constructor = LimitOffsetConstructor(schema, base_table, base_alias)
+        self.select_constructor = SelectConstructor(schema, base_table, base_alias, self.catalog)
+        self.from_constructor = FromConstructor(schema, base_table, base_alias, self.catalog)
+        self.join_constructor = JoinConstructor(schema, base_table, base_alias, self.catalog)
+        self.where_constructor = WhereConstructor(schema, base_table, base_alias, self.catalog)
+        self.group_constructor = GroupByConstructor(schema, base_table, base_alias, self.catalog)
+        self.order_constructor = OrderByConstructor(schema, base_table, base_alias, self.catalog)
+        self.limit_constructor = LimitOffsetConstructor(schema, base_table, base_alias, self.catalog)
+        self.semi_join_constructor = SemiJoinConstructor(schema, base_table, base_alias, self.catalog)
+        self.union_constructor = UnionConstructor(schema, base_table, base_alias, self.catalog)
 
     def build_query(
             self,
@@ -43,7 +56,9 @@ class SQLQueryConstructor:
             order_by_clauses: List[str],
             limit_value: Optional[int],
             offset_value: Optional[int],
-            joins: List[Dict[str, Any]]
+            joins: List[JoinRecord],
+            from_table: Optional[str] = None,
+            semi_joins: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """Build the complete SQL query.
 
@@ -55,13 +70,49 @@ class SQLQueryConstructor:
             limit_value: Limit value
             offset_value: Offset value
             joins: List of required joins
+            from_table: Table read instead of the base table (e.g. a rollup)
+            semi_joins: Filter-only joins to render as semi-joins instead;
+                their joins and conditions are taken out of ``joins`` and
+                ``where_conditions``
 
         Returns:
             Complete SQL query string
         """
+        with_clause, query = self._build_parts(
+            select_fields, where_conditions, group_by_fields, order_by_clauses,
+            limit_value, offset_value, joins, from_table, semi_joins
+        )
+        return f"{with_clause} {query}" if with_clause else query
+
+    def _build_parts(
+            self,
+            select_fields: List[str],
+            where_conditions: List[str],
+            group_by_fields: List[str],
+            order_by_clauses: List[str],
+            limit_value: Optional[int],
+            offset_value: Optional[int],
+            joins: List[JoinRecord],
+            from_table: Optional[str] = None,
+            semi_joins: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[str, str]:
+        """Build the WITH clause of a query (empty if none) and the rest of it.
+
+        Takes the same arguments as :meth:`build_query`.
+        """
+        with_clause = ""
+        if semi_joins:
+            semi_keys = {join.key for semi_join in semi_joins for join in semi_join['joins']}
+            moved = {condition for semi_join in semi_joins for condition in semi_join['conditions']}
+            joins = [join for join in joins if join.key not in semi_keys]
+            where_conditions = [
+                condition for condition in where_conditions if condition not in moved
+            ] + self.semi_join_constructor.predicates(semi_joins)
+            with_clause = self.semi_join_constructor.construct(semi_joins=semi_joins)
+
         # Build each clause
         select_clause = self.select_constructor.construct(select_fields=select_fields)
-        from_clause = self.from_constructor.construct()
+        from_clause = self.from_constructor.construct(table=from_table)
         join_clause = self.join_constructor.construct(joins=joins)
         where_clause = self.where_constructor.construct(where_conditions=where_conditions)
         group_by_clause = self.group_constructor.construct(group_by_fields=group_by_fields)
@@ -85,4 +136,72 @@ class SQLQueryConstructor:
         if limit_clause:
             query_parts.append(limit_clause)
 
-        return " ".join(query_parts)
\ No newline at end of file
+        return with_clause, " ".join(query_parts)
+
+    def build_union_query(
+            self,
+            tables: List[str],
+            select_fields: List[str],
+            where_conditions: List[str],
+            group_by_fields: List[str],
+            order_by_clauses: List[str],
+            limit_value: Optional[int],
+            offset_value: Optional[int],
+            joins: List[JoinRecord],
+            semi_joins: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Build the query as a UNION ALL of one branch per table.
+
+        Every branch reads one table under the base alias with its own
+        joins, semi-joins and WHERE conditions, so the database can use the
+        indexes (and prune the partitions) of each table. With a LIMIT,
+        each branch is ordered and limited to the rows the outer query can
+        return; the outer query orders, offsets and limits the union.
+
+        Args:
+            tables: Table read by each branch (all sharing the base table's
+                columns, see check_column_contract)
+            select_fields: List of selected fields
+            where_conditions: List of where conditions
+            group_by_fields: List of group by fields; must be empty
+            order_by_clauses: List of order by clauses
+            limit_value: Limit value
+            offset_value: Offset value
+            joins: List of required joins
+            semi_joins: Filter-only joins to render as semi-joins
+
+        Returns:
+            Complete SQL query string
+
+        Raises:
+            QueryBuildError: If the request cannot be answered by a union
+                (see UnionConstructor.plan_columns)
+        """
+        branch_fields, columns, outer_order = self.union_constructor.plan_columns(
+            select_fields, group_by_fields, order_by_clauses
+        )
+        branch_limit = None if limit_value is None else limit_value + (offset_value or 0)
+        parts = [
+            self._build_parts(
+                select_fields=branch_fields,
+                where_conditions=where_conditions,
+                group_by_fields=[],
+                order_by_clauses=order_by_clauses if branch_limit is not None else [],
+                limit_value=branch_limit,
+                offset_value=None,
+                joins=joins,
+                from_table=table,
+                semi_joins=semi_joins
+            )
+            for table in tables
+        ]
+        # Semi-join CTEs do not depend on the table a branch reads, so the
+        # branches share one WITH clause at the top of the statement
+        return self.union_constructor.construct(
+            branches=[query for _, query in parts],
+            columns=columns,
+            order_by_clauses=outer_order,
+            limit_value=limit_value,
+            offset_value=offset_value,
+            with_clause=parts[0][0]
+        )
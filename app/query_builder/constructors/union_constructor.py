@@ -0,0 +1,183 @@
+"""UNION ALL constructor for queries over several base tables."""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.query_builder.constructors.base import ClauseConstructor
+from app.query_builder.schema import Catalog
+from app.utils.errors import QueryBuildError
+
+# Select expressions with an explicit output name: "<expression> AS <name>"
+AS_NAME_PATTERN = re.compile(r"\s+AS\s+([A-Za-z_][A-Za-z0-9_]*)\s*$", re.IGNORECASE)
+
+# Qualified columns and wildcards: "c.companyName", "tr.*"
+QUALIFIED_PATTERN = re.compile(r"^([a-z]+)\.([A-Za-z_][A-Za-z0-9_]*|\*)$")
+
+# Aggregates, which would be computed per branch instead of over all rows
+AGGREGATE_PATTERN = re.compile(r"\b(COUNT|SUM|MIN|MAX|AVG)\s*\(", re.IGNORECASE)
+
+# Prefix of the hidden columns carrying ORDER BY values not in the select list
+SORT_COLUMN_PREFIX = "_sort"
+
+
+def check_column_contract(catalog: Catalog, base_table: str, tables: Sequence[str]) -> None:
+    """Check that tables can be read in a union with the base table.
+
+    Every table must be in the catalog with the base table's columns (same
+    names and types), so a request parsed against the base table means the
+    same in every branch.
+
+    Raises:
+        ValueError: If a table is unknown, repeated or has other columns
+    """
+    base = catalog.table(base_table)
+    if base is None:
+        raise ValueError(f"Base table {base_table} has no column metadata for a union")
+    contract = {column.name: column.type for column in base.columns}
+    seen = {base_table}
+    for table in tables:
+        if table in seen:
+            raise ValueError(f"Union table {table} is listed twice")
+        seen.add(table)
+        table_def = catalog.table(table)
+        if table_def is None:
+            raise ValueError(f"Unknown union table: {table}")
+        columns = {column.name: column.type for column in table_def.columns}
+        if columns != contract:
+            raise ValueError(f"Union table {table} does not have the columns of {base_table}")
+
+
+class UnionConstructor(ClauseConstructor):
+    """Constructor for UNION ALL queries with an outer ORDER BY and LIMIT."""
+
+    def plan_columns(
+            self,
+            select_fields: List[str],
+            group_by_fields: List[str],
+            order_by_clauses: List[str]
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Plan the columns of the branches and the outer query.
+
+        Branches need explicit, uniquely named columns so the outer query
+        can refer to them: wildcards are expanded from the catalog and
+        ORDER BY expressions missing from the select list are carried in
+        hidden columns.
+
+        Args:
+            select_fields: List of selected fields
+            group_by_fields: List of group by fields
+            order_by_clauses: List of order by clauses
+
+        Returns:
+            Tuple of (branch select fields, visible column names, outer
+            order by clauses)
+
+        Raises:
+            QueryBuildError: If the request groups or aggregates rows, or
+                selects columns without a distinct name
+        """
+        if group_by_fields or any(AGGREGATE_PATTERN.search(field) for field in select_fields):
+            raise QueryBuildError("Grouped and aggregate requests cannot be read across union tables")
+
+        branch_fields: List[str] = []
+        names: List[str] = []
+        name_of: Dict[str, str] = {}
+        for field in select_fields:
+            for expression in self._expand(field):
+                name = self._output_name(expression)
+                if name in names:
+                    raise QueryBuildError(
+                        f"Column {name} is selected twice; alias one with AS for a union"
+                    )
+                branch_fields.append(expression)
+                names.append(name)
+                name_of[expression] = name
+
+        outer_order: List[str] = []
+        for clause in order_by_clauses:
+            expression, direction = self._split_order(clause)
+            name = name_of.get(expression) or (expression if expression in names else None)
+            if name is None:
+                name = f"{SORT_COLUMN_PREFIX}{len(outer_order)}"
+                branch_fields.append(f"{expression} AS {name}")
+            outer_order.append(f"{name} {direction}" if direction else name)
+        return branch_fields, names, outer_order
+
+    def construct(
+            self,
+            branches: List[str],
+            columns: List[str],
+            order_by_clauses: List[str],
+            limit_value: Optional[int] = None,
+            offset_value: Optional[int] = None,
+            with_clause: str = "",
+            **kwargs: Any
+    ) -> str:
+        """Construct the UNION ALL of the branch queries.
+
+        Args:
+            branches: Query of each branch, without a WITH clause
+            columns: Visible column names of the result
+            order_by_clauses: Order by clauses over the column names
+            limit_value: Limit value
+            offset_value: Offset value
+            with_clause: WITH clause shared by the branches, rendered once
+                at the top of the statement (derived tables cannot contain
+                one on SQL Server or MySQL before 8.0)
+            **kwargs: Additional keyword arguments (unused)
+
+        Returns:
+            Constructed query string
+        """
+        query_parts = [with_clause] if with_clause else []
+
+        # Without an outer ORDER BY/LIMIT the branches have neither, so they
+        # are united as they are
+        if not order_by_clauses and limit_value is None:
+            query_parts.append(" UNION ALL ".join(branches))
+            return " ".join(query_parts)
+
+        # Branches may carry their own ORDER BY/LIMIT, so each is a derived table
+        union = " UNION ALL ".join(
+            f"SELECT * FROM ({branch}) {self.base_alias}_{index}"
+            for index, branch in enumerate(branches, 1)
+        )
+        query_parts.append(f"SELECT {', '.join(columns)} FROM ({union}) {self.base_alias}_union")
+        if order_by_clauses:
+            query_parts.append(f"ORDER BY {', '.join(order_by_clauses)}")
+        if limit_value is not None:
+            query_parts.append(f"LIMIT {limit_value}")
+            if offset_value is not None:
+                query_parts.append(f"OFFSET {offset_value}")
+        return " ".join(query_parts)
+
+    def _expand(self, field: str) -> List[str]:
+        """Expand a wildcard into the catalog columns of its table."""
+        match = QUALIFIED_PATTERN.match(field)
+        if not match or match.group(2) != '*':
+            return [field]
+        alias = match.group(1)
+        table = self.catalog.table(
+            self.catalog.table_for_alias(alias, self.base_table, self.base_alias)
+        )
+        if table is None:
+            raise QueryBuildError(f"Cannot expand {field} for a union: no column metadata")
+        return [f"{alias}.{column.name}" for column in table.columns]
+
+    @staticmethod
+    def _output_name(expression: str) -> str:
+        """Get the result column name of a select expression."""
+        match = AS_NAME_PATTERN.search(expression)
+        if match:
+            return match.group(1)
+        match = QUALIFIED_PATTERN.match(expression)
+        if match:
+            return match.group(2)
+        raise QueryBuildError(f"Select expression needs an AS name for a union: {expression}")
+
+    @staticmethod
+    def _split_order(clause: str) -> Tuple[str, str]:
+        """Split an order by clause into its expression and direction."""
+        expression, _, direction = clause.rpartition(' ')
+        if expression and direction.upper() in ('ASC', 'DESC'):
+            return expression.strip(), direction.upper()
+        return clause.strip(), ''
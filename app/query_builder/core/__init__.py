@@ -1,4 +1,12 @@
 """Core query builder components."""
-from app.query_builder.core.builder import FlexibleQueryBuilder
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.core.builder import FlexibleQueryBuilder
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FlexibleQueryBuilder': 'app.query_builder.core.builder'
+})
 
 __all__ = ['FlexibleQueryBuilder']
\ No newline at end of file
@@ -1,42 +1,208 @@
 """Main flexible SQL query builder class."""
 import logging
-from typing import Dict, List, Optional
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 from app.query_builder.parsers import RequestParserFactory
-from app.query_builder.analyzers import FieldAnalyzer, JoinAnalyzer
+from app.query_builder.analyzers import FieldAnalyzer, JoinAnalyzer, RollupRewrite, RollupRouter
+from app.query_builder.analyzers.join_analyzer import FILTER_JOIN_POLICIES
+from app.query_builder.analyzers.partition_pruner import DateRange, PartitionPruner
 from app.query_builder.constructors import SQLQueryConstructor
+from app.query_builder.constructors.union_constructor import check_column_contract
+from app.query_builder.plans.cache import PlanCache, QueryPlan, plan_key
+from app.query_builder.schema import (
+    Catalog,
+    DEFAULT_PROJECTION,
+    JoinRecord,
+    ProjectionResolver,
+    get_catalog
+)
+from app.query_builder.stats import QueryFingerprint, ShapeStatsCollector, fingerprint_request
 from app.utils.errors import QueryBuildError
 
+if TYPE_CHECKING:
+    from app.query_builder.execution.policy import ExecutionPolicy
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Distinct (catalog, schema, base table, base alias) combinations whose
+# helper objects are kept for reuse
+SHARED_HELPERS_SIZE = 64
+
+
+@lru_cache(maxsize=SHARED_HELPERS_SIZE)
+def _shared_helpers(catalog: Catalog, schema: str, base_table: str, base_alias: str) -> Tuple[Any, ...]:
+    """Create the helper objects of builders with the same catalog, schema and base table.
+
+    Parsers, analyzers and constructors keep no per-request state (the
+    builder is passed to them), so builders share them instead of
+    allocating a new set per request.
+    """
+    return (
+        RequestParserFactory(catalog),
+        ProjectionResolver(catalog),
+        FieldAnalyzer(),
+        JoinAnalyzer(catalog),
+        RollupRouter(catalog),
+        PartitionPruner(catalog),
+        SQLQueryConstructor(schema, base_table, base_alias, catalog)
+    )
+
 
 class FlexibleQueryBuilder:
     """Dynamic SQL query builder that supports flexible parameters."""
 
-    def __init__(self, schema: str, base_table: str = "ciqTransaction", base_alias: str = "tr"):
-        """Initialize the query builder with schema and base table information."""
+    # A builder is created per request; slots keep its state compact
+    __slots__ = (
+        'schema',
+        'base_table',
+        'base_alias',
+        'default_projection',
+        'catalog',
+        'stats_collector',
+        'use_rollups',
+        'filter_join_policy',
+        'plan_cache',
+        'policy',
+        'dialect',
+        'route_partitions',
+        'union_tables',
+        'select_fields',
+        'excluded_fields',
+        'where_conditions',
+        'group_by_fields',
+        'order_by_clauses',
+        'limit_value',
+        'offset_value',
+        'joins',
+        'rollup',
+        'semi_joins',
+        'fingerprint',
+        'date_range',
+        'partition_table',
+        'parser_factory',
+        'projection_resolver',
+        'field_analyzer',
+        'join_analyzer',
+        'rollup_router',
+        'partition_pruner',
+        'sql_constructor'
+    )
+
+    def __init__(
+            self,
+            schema: str,
+            base_table: str = "ciqTransaction",
+            base_alias: str = "tr",
+            default_projection: Optional[str] = DEFAULT_PROJECTION,
+            catalog: Optional[Catalog] = None,
+            stats_collector: Optional[ShapeStatsCollector] = None,
+            use_rollups: bool = True,
+            filter_join_policy: str = 'join',
+            plan_cache: Optional[PlanCache] = None,
+            policy: Optional['ExecutionPolicy'] = None,
+            dialect: Optional[str] = None,
+            route_partitions: bool = False,
+            union_tables: Sequence[str] = ()
+    ):
+        """Initialize the query builder with schema and base table information.
+
+        Args:
+            schema: Database schema name
+            base_table: Base table name
+            base_alias: Base table alias
+            default_projection: Projection profile used when no select fields
+                are requested; None selects ``<base_alias>.*``
+            catalog: Schema catalog, defaults to the current catalog. The
+                builder keeps the catalog it was created with for its lifetime.
+            stats_collector: Collector that records the shape and parse
+                latency of every parsed request
+            use_rollups: Whether grouped requests covered by a catalog rollup
+                are answered from the rollup table
+            filter_join_policy: How joins needed only by filters are
+                rendered: ``join``, ``exists``, ``in`` or ``cte`` (see
+                JoinAnalyzer.plan_semi_joins)
+            plan_cache: Cache of parsed request plans shared by the builders
+                of a worker; requests found in it are not parsed again
+            policy: Execution policy of the built queries; its row cap
+                bounds the LIMIT of every query
+            dialect: Database dialect of the built queries (``postgres``,
+                ``mysql``, ``mssql`` or ``sqlite``); partition column ranges
+                are rendered with date literals typed for it. None renders
+                plain ISO date strings.
+            route_partitions: Whether queries whose partition column range
+                falls within one partition read the catalog-declared table
+                of that partition instead of the base table
+            union_tables: Tables with the base table's columns read along
+                with it (e.g. an archive table); queries become a UNION ALL
+                of one branch per table. Grouped and aggregate requests are
+                rejected, and rollups are not used.
+        """
+        if filter_join_policy not in FILTER_JOIN_POLICIES:
+            raise ValueError(f"Unknown filter join policy: {filter_join_policy}")
+
         self.schema = schema
         self.base_table = base_table
         self.base_alias = base_alias
+        self.default_projection = default_projection
+        self.catalog = catalog or get_catalog()
+        self.stats_collector = stats_collector
+        self.use_rollups = use_rollups
+        self.filter_join_policy = filter_join_policy
+        self.plan_cache = plan_cache
+        self.policy = policy
+        self.dialect = dialect
+        self.route_partitions = route_partitions
+        self.union_tables = tuple(union_tables)
+        if self.union_tables:
+            check_column_contract(self.catalog, base_table, self.union_tables)
 
         # Query components
         self.select_fields = []
+        self.excluded_fields = []
         self.where_conditions = []
         self.group_by_fields = []
         self.order_by_clauses = []
         self.limit_value = None
         self.offset_value = None
-        self.joins = []
+        self.joins: List[JoinRecord] = []
 
-        # Create helper objects
-        self.parser_factory = RequestParserFactory()
-        self.field_analyzer = FieldAnalyzer()
-        self.join_analyzer = JoinAnalyzer()
-        self.sql_constructor = SQLQueryConstructor(schema, base_table, base_alias)
+        # Rollup the query is answered from, if any (set by parse_request_params)
+        self.rollup: Optional[RollupRewrite] = None
+
+        # Filter-only joins rendered as semi-joins (set by parse_request_params)
+        self.semi_joins: List[Dict] = []
+
+        # Shape of the parsed request (set by parse_request_params)
+        self.fingerprint: Optional[QueryFingerprint] = None
+
+        # Range of the base table's partition column (set by FilterParser)
+        self.date_range: Optional[DateRange] = None
+
+        # Partition table read instead of the base table (set by parse_request_params)
+        self.partition_table: Optional[str] = None
+
+        # Helper objects, shared with builders of the same catalog and base table
+        (
+            self.parser_factory,
+            self.projection_resolver,
+            self.field_analyzer,
+            self.join_analyzer,
+            self.rollup_router,
+            self.partition_pruner,
+            self.sql_constructor
+        ) = _shared_helpers(self.catalog, schema, base_table, base_alias)
 
     def parse_request_params(self, params: Dict[str, str]) -> None:
         """Parse request parameters into SQL query components."""
+        started = time.perf_counter()
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = plan_key(params, self)
+            if self._apply_cached_plan(cache_key, started):
+                return
         try:
             # Process each parameter using appropriate parser
             for key, value in params.items():
@@ -44,9 +210,27 @@ class FlexibleQueryBuilder:
                 if parser:
                     parser.parse(key, value, self)
 
-            # If no select fields specified, use * as default
+            # Render the partition column filters as one sargable range
+            if self.date_range is not None:
+                self.where_conditions.extend(
+                    self.partition_pruner.conditions(self, self.date_range)
+                )
+
+            # Enforce the row cap of the execution policy through LIMIT
+            if self.policy is not None:
+                self.limit_value = self.policy.cap_limit(self.limit_value)
+
+            # If no select fields specified, use the default projection profile
             if not self.select_fields:
-                self.select_fields = [f"{self.base_alias}.*"]
+                self.select_fields = self.projection_resolver.default_fields(
+                    self.base_table, self.base_alias, self.default_projection
+                )
+
+            # Drop excluded columns (e.g. heavy text columns)
+            if self.excluded_fields:
+                self.select_fields = self.projection_resolver.apply_exclusions(
+                    self.select_fields, self.excluded_fields, self.base_table, self.base_alias
+                )
 
             # Analyze fields to determine required joins
             field_dependencies = self.field_analyzer.analyze_fields(
@@ -59,6 +243,41 @@ class FlexibleQueryBuilder:
             # Determine required joins based on field dependencies
             self.joins = self.join_analyzer.determine_joins(field_dependencies)
 
+            # Answer covered grouped requests from a pre-aggregated rollup
+            # (rollups aggregate the base table alone, so not for unions)
+            if self.use_rollups and not self.union_tables:
+                self.rollup = self.rollup_router.route(self)
+
+            # Read a single partition's table directly when the range allows it
+            if self.route_partitions and self.rollup is None and self.date_range is not None:
+                self.partition_table = self.partition_pruner.partition_table(
+                    self.base_table, self.date_range
+                )
+
+            # Let the join analyzer turn filter-only joins into semi-joins
+            if self.rollup is None:
+                self.semi_joins = self.join_analyzer.plan_semi_joins(
+                    self.joins,
+                    self.select_fields,
+                    self.where_conditions,
+                    self.group_by_fields,
+                    self.order_by_clauses,
+                    self.base_alias,
+                    self.filter_join_policy
+                )
+
+            # Fingerprint the request shape for workload statistics
+            self.fingerprint = fingerprint_request(params, self)
+            if self.plan_cache is not None:
+                self.plan_cache.put(cache_key, QueryPlan.capture(self))
+            if self.stats_collector is not None:
+                self.stats_collector.record(
+                    self.fingerprint, (time.perf_counter() - started) * 1000
+                )
+
+        except QueryBuildError:
+            # Validation errors already describe the offending parameter
+            raise
         except ValueError as e:
             # Handle numeric conversion errors
             raise QueryBuildError(f"Invalid numeric value: {str(e)}")
@@ -67,8 +286,57 @@ class FlexibleQueryBuilder:
             logger.error(f"Error parsing parameters: {e}", exc_info=True)
             raise QueryBuildError(f"Error parsing query parameters: {str(e)}")
 
+    def _apply_cached_plan(self, key: bytes, started: float) -> bool:
+        """Adopt the cached plan of a request, if any.
+
+        Returns:
+            True if a cached plan was applied
+        """
+        plan = self.plan_cache.get(key)
+        if plan is None:
+            return False
+        try:
+            plan.apply(self)
+        except KeyError:
+            # The plan refers to joins or rollups the catalog no longer has
+            self.plan_cache.discard(key)
+            return False
+        if self.stats_collector is not None:
+            self.stats_collector.record(self.fingerprint, (time.perf_counter() - started) * 1000)
+        return True
+
     def build_query(self) -> str:
         """Build the complete SQL query."""
+        if self.rollup is not None:
+            # Read the rollup instead of the base table; it needs no joins
+            query = self.sql_constructor.build_query(
+                select_fields=self.rollup.select_fields,
+                where_conditions=self.rollup.where_conditions,
+                group_by_fields=self.rollup.group_by_fields,
+                order_by_clauses=self.rollup.order_by_clauses,
+                limit_value=self.limit_value,
+                offset_value=self.offset_value,
+                joins=[],
+                from_table=self.rollup.table
+            )
+            logger.info(f"Generated query (rollup {self.rollup.table}): {query}")
+            return query
+
+        if self.union_tables:
+            query = self.sql_constructor.build_union_query(
+                tables=self._branch_tables(),
+                select_fields=self.select_fields,
+                where_conditions=self.where_conditions,
+                group_by_fields=self.group_by_fields,
+                order_by_clauses=self.order_by_clauses,
+                limit_value=self.limit_value,
+                offset_value=self.offset_value,
+                joins=self.joins,
+                semi_joins=self.semi_joins
+            )
+            logger.info(f"Generated query (union of {len(self.union_tables) + 1} tables): {query}")
+            return query
+
         # Use the SQL constructor to build the query
         query = self.sql_constructor.build_query(
             select_fields=self.select_fields,
@@ -77,10 +345,35 @@ class FlexibleQueryBuilder:
             order_by_clauses=self.order_by_clauses,
             limit_value=self.limit_value,
             offset_value=self.offset_value,
-            joins=self.joins
+            joins=self.joins,
+            from_table=self.partition_table,
+            semi_joins=self.semi_joins
         )
 
         # Log the query for debugging
         logger.info(f"Generated query: {query}")
 
-        return query
\ No newline at end of file
+        return query
+
+    def _branch_tables(self) -> List[str]:
+        """Get the table read by each union branch, base table first."""
+        tables = [self.partition_table or self.base_table]
+        for table in self.union_tables:
+            partition_table = None
+            if self.route_partitions and self.date_range is not None:
+                partition_table = self.partition_pruner.partition_table(table, self.date_range)
+            tables.append(partition_table or table)
+        return tables
+
+    def explain(self, executor: Any) -> Any:
+        """Run the database's EXPLAIN for the built query.
+
+        Args:
+            executor: QueryExecutor of the database the query runs on
+
+        Returns:
+            ExplainPlan with the parsed plan and the issues found in it
+        """
+        from app.query_builder.execution.explain import QueryExplainer
+
+        return QueryExplainer(executor, self.catalog).explain(self)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Query execution helpers for the flexible query builder."""
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.execution.base import QueryExecutor, QueryResult
+    from app.query_builder.execution.dbapi_executor import DBAPIExecutor, SQLiteExecutor
+    from app.query_builder.execution.columnar import ColumnarMaterializer, ColumnarResult
+    from app.query_builder.execution.export import (
+        CSVEncoder,
+        ExportEncoder,
+        ExportPipeline,
+        NDJSONEncoder,
+        ParquetEncoder
+    )
+    from app.query_builder.execution.cancellation import (
+        CancellationToken,
+        QueryCancelledError,
+        QueryTimeoutError,
+        cancellation_scope
+    )
+    from app.query_builder.execution.policy import ExecutionPolicy, GuardedExecutor
+    from app.query_builder.execution.explain import (
+        ExplainPlan,
+        PlanIssue,
+        PlanNode,
+        PlanSampler,
+        QueryExplainer
+    )
+    from app.query_builder.execution.prepared import (
+        DriverStatementCache,
+        PostgresPreparer,
+        PreparedExecutor,
+        PreparedStatementRegistry,
+        SQLServerPreparer,
+        StatementPreparer,
+        parameterize_sql
+    )
+    from app.query_builder.execution.fanout import (
+        FanOutPlan,
+        FanOutRunner,
+        PartitionPlanner,
+        SubQuery
+    )
+    from app.query_builder.execution.coalescing import AsyncRequestCoalescer, RequestCoalescer
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'QueryExecutor': 'app.query_builder.execution.base',
+    'QueryResult': 'app.query_builder.execution.base',
+    'DBAPIExecutor': 'app.query_builder.execution.dbapi_executor',
+    'SQLiteExecutor': 'app.query_builder.execution.dbapi_executor',
+    'ColumnarMaterializer': 'app.query_builder.execution.columnar',
+    'ColumnarResult': 'app.query_builder.execution.columnar',
+    'CSVEncoder': 'app.query_builder.execution.export',
+    'ExportEncoder': 'app.query_builder.execution.export',
+    'ExportPipeline': 'app.query_builder.execution.export',
+    'NDJSONEncoder': 'app.query_builder.execution.export',
+    'ParquetEncoder': 'app.query_builder.execution.export',
+    'CancellationToken': 'app.query_builder.execution.cancellation',
+    'QueryCancelledError': 'app.query_builder.execution.cancellation',
+    'QueryTimeoutError': 'app.query_builder.execution.cancellation',
+    'cancellation_scope': 'app.query_builder.execution.cancellation',
+    'ExecutionPolicy': 'app.query_builder.execution.policy',
+    'GuardedExecutor': 'app.query_builder.execution.policy',
+    'ExplainPlan': 'app.query_builder.execution.explain',
+    'PlanIssue': 'app.query_builder.execution.explain',
+    'PlanNode': 'app.query_builder.execution.explain',
+    'PlanSampler': 'app.query_builder.execution.explain',
+    'QueryExplainer': 'app.query_builder.execution.explain',
+    'DriverStatementCache': 'app.query_builder.execution.prepared',
+    'PostgresPreparer': 'app.query_builder.execution.prepared',
+    'PreparedExecutor': 'app.query_builder.execution.prepared',
+    'PreparedStatementRegistry': 'app.query_builder.execution.prepared',
+    'SQLServerPreparer': 'app.query_builder.execution.prepared',
+    'StatementPreparer': 'app.query_builder.execution.prepared',
+    'parameterize_sql': 'app.query_builder.execution.prepared',
+    'FanOutPlan': 'app.query_builder.execution.fanout',
+    'FanOutRunner': 'app.query_builder.execution.fanout',
+    'PartitionPlanner': 'app.query_builder.execution.fanout',
+    'SubQuery': 'app.query_builder.execution.fanout',
+    'AsyncRequestCoalescer': 'app.query_builder.execution.coalescing',
+    'RequestCoalescer': 'app.query_builder.execution.coalescing'
+})
+
+__all__ = [
+    'QueryExecutor',
+    'QueryResult',
+    'DBAPIExecutor',
+    'SQLiteExecutor',
+    'ColumnarMaterializer',
+    'ColumnarResult',
+    'CSVEncoder',
+    'ExportEncoder',
+    'ExportPipeline',
+    'NDJSONEncoder',
+    'ParquetEncoder',
+    'CancellationToken',
+    'QueryCancelledError',
+    'QueryTimeoutError',
+    'cancellation_scope',
+    'ExecutionPolicy',
+    'GuardedExecutor',
+    'ExplainPlan',
+    'PlanIssue',
+    'PlanNode',
+    'PlanSampler',
+    'QueryExplainer',
+    'DriverStatementCache',
+    'PostgresPreparer',
+    'PreparedExecutor',
+    'PreparedStatementRegistry',
+    'SQLServerPreparer',
+    'StatementPreparer',
+    'parameterize_sql',
+    'FanOutPlan',
+    'FanOutRunner',
+    'PartitionPlanner',
+    'SubQuery',
+    'AsyncRequestCoalescer',
+    'RequestCoalescer'
+]
@@ -0,0 +1,104 @@
+"""Query executor interface for running built queries."""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from app.query_builder.execution.cancellation import current_token
+
+
+class QueryResult:
+    """Rows returned by a query together with their column names."""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns: List[str], rows: List[Tuple[Any, ...]]):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return iter(self.rows)
+
+    def __repr__(self) -> str:
+        return f"QueryResult(columns={self.columns!r}, rows={len(self.rows)})"
+
+
+class QueryExecutor(ABC):
+    """Interface for executing SQL produced by the query builder.
+
+    Implementations provide DB-API cursors; fetching, batching and column
+    naming are shared here so that every executor behaves the same.
+    """
+
+    # SQL dialect of the underlying database
+    dialect = "generic"
+
+    @abstractmethod
+    @contextmanager
+    def cursor(self, sql: str, params: Optional[Sequence[Any]] = None) -> Iterator[Any]:
+        """Execute a statement and yield its DB-API cursor.
+
+        Args:
+            sql: SQL statement
+            params: Bind parameters for the statement
+
+        Yields:
+            Cursor positioned before the first row
+        """
+        pass
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> QueryResult:
+        """Execute a query and fetch all of its rows.
+
+        Args:
+            sql: SQL statement
+            params: Bind parameters for the statement
+
+        Returns:
+            Query result
+        """
+        with self.cursor(sql, params) as cursor:
+            return QueryResult(self.column_names(cursor), [tuple(row) for row in cursor.fetchall()])
+
+    def iter_batches(
+            self,
+            sql: str,
+            params: Optional[Sequence[Any]] = None,
+            batch_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """Execute a query and fetch its rows in batches.
+
+        Args:
+            sql: SQL statement
+            params: Bind parameters for the statement
+            batch_size: Rows per batch
+
+        Yields:
+            Tuples of (column names, rows) for each batch; an empty result
+            yields a single empty batch so the column names are known
+
+        Raises:
+            QueryCancelledError: If the current cancellation token is
+                cancelled between batches
+        """
+        token = current_token()
+        with self.cursor(sql, params) as cursor:
+            columns = self.column_names(cursor)
+            fetched = False
+            while True:
+                if token is not None:
+                    token.raise_if_cancelled()
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    if not fetched:
+                        yield columns, []
+                    break
+                fetched = True
+                yield columns, [tuple(row) for row in rows]
+
+    @staticmethod
+    def column_names(cursor: Any) -> List[str]:
+        """Get the result column names of a cursor."""
+        return [column[0] for column in cursor.description or ()]
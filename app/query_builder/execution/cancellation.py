@@ -0,0 +1,109 @@
+"""Cooperative cancellation of running queries.
+
+A :class:`CancellationToken` made current with :func:`cancellation_scope`
+is honored by everything that runs queries in the block: the guarded
+executor aborts the running statement when the token is cancelled or its
+deadline passes, ``iter_batches`` checks it between batches and the
+export pipeline between chunks.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+_current_token: ContextVar[Optional['CancellationToken']] = ContextVar(
+    'query_cancellation_token', default=None
+)
+
+
+class QueryCancelledError(Exception):
+    """Raised when a query is cancelled through its cancellation token."""
+    pass
+
+
+class QueryTimeoutError(QueryCancelledError):
+    """Raised when a query runs past its deadline."""
+    pass
+
+
+class CancellationToken:
+    """Thread-safe token used to cancel running queries cooperatively."""
+
+    def __init__(self, timeout_ms: Optional[float] = None):
+        """Initialize the token.
+
+        Args:
+            timeout_ms: Time after which the token counts as cancelled
+        """
+        self.deadline = None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token was cancelled or its deadline has passed."""
+        return self._event.is_set() or self.expired
+
+    @property
+    def requested(self) -> bool:
+        """Whether :meth:`cancel` was called."""
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining_ms(self) -> Optional[float]:
+        """Get the time left before the deadline, if there is one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+
+    def cancel(self) -> None:
+        """Cancel the token and run its callbacks (e.g. server-side cancels)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # the statement fails or finishes on its own
+
+    def raise_if_cancelled(self) -> None:
+        """Raise if the token was cancelled or its deadline has passed."""
+        if self._event.is_set():
+            raise QueryCancelledError("Query cancelled")
+        if self.expired:
+            raise QueryTimeoutError("Query exceeded its deadline")
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Run a callback if the token is cancelled while the block runs."""
+        with self._lock:
+            self._callbacks.append(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make a token current for the queries run in the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Get the cancellation token of the current scope, if any."""
+    return _current_token.get()
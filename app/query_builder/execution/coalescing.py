@@ -0,0 +1,213 @@
+"""Coalescing of identical in-flight requests.
+
+Dashboards fire the same request from many clients at once. A coalescer
+keys every request with :func:`request_key`, so requests differing only
+in spelling (parameter order, whitespace, field mapping aliases, IN list
+order) match, and lets concurrent requests with the same key share one
+build and execution: the first caller runs the query and the others wait
+for its result. Nothing is cached once the query finishes; a request
+arriving afterwards runs again.
+
+If the shared query is cancelled through the leading caller's
+cancellation token, waiting callers whose own token is not cancelled
+retry instead of failing with somebody else's cancellation.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from app.query_builder.execution.base import QueryExecutor, QueryResult
+from app.query_builder.execution.cancellation import QueryCancelledError, current_token
+from app.query_builder.plans.cache import request_key
+
+# Interval in seconds at which waiting callers check their cancellation token
+WAIT_INTERVAL = 0.05
+
+
+def _run(builder: Any, params: Dict[str, Any], executor: QueryExecutor) -> QueryResult:
+    """Build and execute one request."""
+    builder.parse_request_params(params)
+    return executor.execute(builder.build_query())
+
+
+def _share(result: QueryResult) -> QueryResult:
+    """Give a waiting caller its own result lists (rows are immutable tuples)."""
+    return QueryResult(list(result.columns), list(result.rows))
+
+
+class RequestCoalescer:
+    """Coalescer for requests executed from threads."""
+
+    def __init__(self, executor: QueryExecutor, builder_factory: Callable[[], Any]):
+        """Initialize the coalescer.
+
+        Args:
+            executor: Executor the shared queries run on
+            builder_factory: Callable returning a fresh FlexibleQueryBuilder;
+                every request is keyed with the settings of its builder
+        """
+        self.executor = executor
+        self.builder_factory = builder_factory
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[bytes, Future] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, params: Dict[str, Any]) -> QueryResult:
+        """Execute a request, sharing the execution of an identical one in flight.
+
+        Args:
+            params: Request parameters
+
+        Returns:
+            Query result
+
+        Raises:
+            QueryBuildError: If the request is invalid
+            QueryCancelledError: If the caller's cancellation token is
+                cancelled while it waits or runs the query
+        """
+        builder = self.builder_factory()
+        key = request_key(params, builder)
+        token = current_token()
+        while True:
+            with self._lock:
+                future = self._in_flight.get(key)
+                leading = future is None
+                if leading:
+                    future = self._in_flight[key] = Future()
+                    self.executions += 1
+                else:
+                    self.coalesced += 1
+
+            if leading:
+                return self._lead(key, future, builder, params)
+            try:
+                return _share(self._wait(future, token))
+            except QueryCancelledError:
+                if token is not None and token.cancelled:
+                    raise
+                # The leading caller was cancelled; run the request again
+                builder = self.builder_factory()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the execution statistics of the coalescer."""
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight)
+            }
+
+    def _lead(self, key: bytes, future: Future, builder: Any, params: Dict[str, Any]) -> QueryResult:
+        """Run a request for every caller waiting on its future."""
+        try:
+            result = _run(builder, params, self.executor)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    @staticmethod
+    def _wait(future: Future, token: Any) -> QueryResult:
+        """Wait for a shared result, honoring the caller's cancellation token."""
+        if token is None:
+            return future.result()
+        while True:
+            token.raise_if_cancelled()
+            try:
+                return future.result(timeout=WAIT_INTERVAL)
+            except FutureTimeoutError:
+                continue
+
+
+class AsyncRequestCoalescer:
+    """Coalescer for requests executed from asyncio tasks.
+
+    Builds and executions run in a thread pool, in the context of the
+    leading caller (so its cancellation scope applies). The coalescer must
+    be used from a single event loop. Cancelling a waiting task does not
+    cancel the shared execution other tasks wait for.
+    """
+
+    def __init__(
+            self,
+            executor: QueryExecutor,
+            builder_factory: Callable[[], Any],
+            pool: Optional[Executor] = None
+    ):
+        """Initialize the coalescer.
+
+        Args:
+            executor: Executor the shared queries run on
+            builder_factory: Callable returning a fresh FlexibleQueryBuilder;
+                every request is keyed with the settings of its builder
+            pool: Thread pool the blocking builds and executions run in,
+                defaults to the event loop's default executor
+        """
+        self.executor = executor
+        self.builder_factory = builder_factory
+        self.pool = pool
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[bytes, asyncio.Future] = {}
+
+    async def execute(self, params: Dict[str, Any]) -> QueryResult:
+        """Execute a request, sharing the execution of an identical one in flight.
+
+        Args:
+            params: Request parameters
+
+        Returns:
+            Query result
+
+        Raises:
+            QueryBuildError: If the request is invalid
+            QueryCancelledError: If the caller's cancellation token is
+                cancelled while it runs the query
+        """
+        builder = self.builder_factory()
+        key = request_key(params, builder)
+        token = current_token()
+        while True:
+            future = self._in_flight.get(key)
+            leading = future is None
+            if leading:
+                future = self._start(key, builder, params)
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+            try:
+                result = await asyncio.shield(future)
+            except QueryCancelledError:
+                if leading or (token is not None and token.cancelled):
+                    raise
+                # The leading caller was cancelled; run the request again
+                builder = self.builder_factory()
+                continue
+            return result if leading else _share(result)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the execution statistics of the coalescer."""
+        return {
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight)
+        }
+
+    def _start(self, key: bytes, builder: Any, params: Dict[str, Any]) -> asyncio.Future:
+        """Start the shared execution of a request in the thread pool."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(self.pool, context.run, _run, builder, params, self.executor)
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return future
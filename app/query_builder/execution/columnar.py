@@ -0,0 +1,282 @@
+"""Columnar (NumPy/Arrow) materialization of query results.
+
+Rows are fetched in batches and written straight into typed NumPy buffers,
+one per column, using the column types from the schema catalog. Results
+can be handed to pandas or Arrow without per-row Python objects.
+
+NumPy is required; pandas and pyarrow are only needed for the matching
+conversions.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.query_builder.execution.base import QueryExecutor
+from app.query_builder.schema import ProjectionResolver
+
+# NumPy dtype per catalog column type; other types are kept as objects
+NUMPY_DTYPES = {
+    'int': 'int64',
+    'float': 'float64',
+    'bool': 'bool',
+    'date': 'datetime64[D]',
+    'datetime': 'datetime64[us]',
+}
+
+
+def _import_numpy() -> Any:
+    """Import NumPy, explaining the optional dependency if missing."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Columnar materialization requires numpy (pip install numpy)") from e
+    return numpy
+
+
+def _import_optional(module: str, feature: str) -> Any:
+    """Import an optional dependency used by one conversion."""
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"{feature} requires {module} (pip install {module})") from e
+
+
+class _ColumnBuffer:
+    """Growable typed buffer for one result column."""
+
+    __slots__ = ('np', 'name', 'type', 'dtype', 'values', 'mask', 'size')
+
+    def __init__(self, np: Any, name: str, column_type: Optional[str], capacity: int):
+        self.np = np
+        self.name = name
+        self.type = column_type
+        self.dtype = NUMPY_DTYPES.get(column_type, 'object')
+        self.values = np.empty(capacity, dtype=self.dtype)
+        self.mask = np.zeros(capacity, dtype=bool)
+        self.size = 0
+
+    def extend(self, batch: Sequence[Any]) -> None:
+        """Append one batch of column values."""
+        np = self.np
+        count = len(batch)
+        self._reserve(self.size + count)
+        end = self.size + count
+        mask = np.fromiter((value is None for value in batch), dtype=bool, count=count)
+
+        try:
+            self.values[self.size:end] = self._convert(batch, mask, count)
+        except (TypeError, ValueError, OverflowError):
+            # Values do not match the catalog type; keep the column as objects
+            self._demote()
+            self.values[self.size:end] = self._convert(batch, mask, count)
+
+        self.mask[self.size:end] = mask
+        self.size = end
+
+    def finish(self) -> Any:
+        """Get the filled values and null mask (None when there are no nulls)."""
+        values = self.values[:self.size]
+        mask = self.mask[:self.size]
+        return values, (mask if mask.any() else None)
+
+    def _convert(self, batch: Sequence[Any], mask: Any, count: int) -> Any:
+        """Convert a batch of Python values to the buffer dtype."""
+        np = self.np
+        if self.dtype in ('int64', 'bool'):
+            return np.fromiter(
+                (0 if value is None else value for value in batch), dtype=self.dtype, count=count
+            )
+        if self.dtype == 'float64':
+            return np.fromiter(
+                (np.nan if value is None else value for value in batch), dtype=self.dtype, count=count
+            )
+        if self.dtype.startswith('datetime64'):
+            return np.array(['NaT' if value is None else value for value in batch], dtype=self.dtype)
+        converted = np.empty(count, dtype=object)
+        converted[:] = batch
+        return converted
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the buffers (doubling) to hold at least ``capacity`` values."""
+        if capacity <= len(self.values):
+            return
+        new_capacity = max(capacity, 2 * len(self.values))
+        values = self.np.empty(new_capacity, dtype=self.dtype)
+        values[:self.size] = self.values[:self.size]
+        mask = self.np.zeros(new_capacity, dtype=bool)
+        mask[:self.size] = self.mask[:self.size]
+        self.values, self.mask = values, mask
+
+    def _demote(self) -> None:
+        """Switch the buffer to object dtype."""
+        values = self.np.empty(len(self.values), dtype=object)
+        values[:self.size] = self.values[:self.size]
+        self.values, self.dtype, self.type = values, 'object', None
+
+
+class ColumnarResult:
+    """Query result stored as one typed NumPy array per column."""
+
+    __slots__ = ('columns', 'types', 'arrays', 'masks')
+
+    def __init__(
+            self,
+            columns: List[str],
+            types: List[Optional[str]],
+            arrays: List[Any],
+            masks: List[Optional[Any]]
+    ):
+        self.columns = columns
+        self.types = types
+        self.arrays = arrays
+        self.masks = masks  # boolean null masks, None for columns without nulls
+
+    @property
+    def num_rows(self) -> int:
+        """Get the number of rows."""
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def column(self, name: str) -> Any:
+        """Get the values of a column by name."""
+        return self.arrays[self.columns.index(name)]
+
+    def to_pandas(self) -> Any:
+        """Convert to a pandas DataFrame without copying the column buffers.
+
+        Integer and boolean columns containing nulls become pandas nullable
+        arrays backed by the same buffers.
+        """
+        pd = _import_optional('pandas', "Conversion to pandas")
+        data: Dict[str, Any] = {}
+        for name, values, mask in zip(self.columns, self.arrays, self.masks):
+            if mask is not None and values.dtype.kind == 'i':
+                values = pd.arrays.IntegerArray(values, mask)
+            elif mask is not None and values.dtype.kind == 'b':
+                values = pd.arrays.BooleanArray(values, mask)
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> Any:
+        """Convert to an Arrow record batch (numeric buffers are shared)."""
+        pa = _import_optional('pyarrow', "Conversion to Arrow")
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values, mask=mask) for values, mask in zip(self.arrays, self.masks)],
+            names=self.columns
+        )
+
+
+class ColumnarMaterializer:
+    """Materializer that fetches query results into columnar buffers."""
+
+    def __init__(self, executor: QueryExecutor, batch_size: int = 10000):
+        """Initialize the columnar materializer.
+
+        Args:
+            executor: Executor used to run queries
+            batch_size: Rows fetched per batch
+        """
+        self.executor = executor
+        self.batch_size = batch_size
+
+    def materialize(self, builder: Any) -> ColumnarResult:
+        """Execute a parsed request and materialize its result column-wise.
+
+        Args:
+            builder: FlexibleQueryBuilder that has parsed the request
+
+        Returns:
+            Columnar result typed from the schema catalog
+        """
+        return self.materialize_sql(builder.build_query(), builder=builder)
+
+    def materialize_sql(
+            self,
+            sql: str,
+            types: Optional[List[Optional[str]]] = None,
+            builder: Any = None
+    ) -> ColumnarResult:
+        """Execute SQL and materialize its result column-wise.
+
+        Args:
+            sql: SQL statement
+            types: Catalog type per result column; resolved from the builder
+                (or left untyped) when omitted
+            builder: Builder the SQL came from, used to resolve column types
+
+        Returns:
+            Columnar result
+        """
+        np = _import_numpy()
+        buffers: List[_ColumnBuffer] = []
+        columns: List[str] = []
+
+        for columns, rows in self.executor.iter_batches(sql, batch_size=self.batch_size):
+            if not buffers:
+                column_types = types or resolve_result_types(builder, columns)
+                buffers = [
+                    _ColumnBuffer(np, name, column_type, self.batch_size)
+                    for name, column_type in zip(columns, column_types)
+                ]
+            for buffer, values in zip(buffers, zip(*rows)):
+                buffer.extend(values)
+
+        if not buffers:
+            column_types = types or resolve_result_types(builder, columns)
+            buffers = [_ColumnBuffer(np, name, column_type, 0)
+                       for name, column_type in zip(columns, column_types)]
+
+        finished = [buffer.finish() for buffer in buffers]
+        return ColumnarResult(
+            columns=list(columns),
+            types=[buffer.type for buffer in buffers],
+            arrays=[values for values, _ in finished],
+            masks=[mask for _, mask in finished]
+        )
+
+    def iter_arrow_batches(self, builder: Any) -> Iterator[Any]:
+        """Execute a parsed request and stream its result as Arrow record batches."""
+        column_types: Optional[List[Optional[str]]] = None
+
+        for columns, rows in self.executor.iter_batches(
+                builder.build_query(), batch_size=self.batch_size
+        ):
+            if column_types is None:
+                column_types = resolve_result_types(builder, columns)
+            yield rows_to_arrow_batch(columns, column_types, rows)
+
+
+def rows_to_arrow_batch(
+        columns: List[str],
+        column_types: List[Optional[str]],
+        rows: List[Sequence[Any]]
+) -> Any:
+    """Convert a batch of rows into an Arrow record batch typed from the catalog."""
+    np = _import_numpy()
+    pa = _import_optional('pyarrow', "Arrow record batches")
+    arrays = []
+    columns_values = list(zip(*rows)) if rows else [()] * len(columns)
+    for name, column_type, values in zip(columns, column_types, columns_values):
+        buffer = _ColumnBuffer(np, name, column_type, len(values))
+        buffer.extend(values)
+        data, mask = buffer.finish()
+        arrays.append(pa.array(data, mask=mask))
+    return pa.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+def resolve_result_types(builder: Any, columns: List[str]) -> List[Optional[str]]:
+    """Resolve the catalog type of each result column of a builder's query.
+
+    Types follow the select list positionally; when it contains wildcards,
+    result columns are looked up by name in the base table instead.
+    """
+    if builder is None:
+        return [None] * len(columns)
+
+    resolver = ProjectionResolver(builder.catalog)
+    select_fields = builder.select_fields
+    if len(select_fields) == len(columns) and not any(f.endswith('*') for f in select_fields):
+        return resolver.column_types(select_fields, builder.base_table, builder.base_alias)
+
+    return resolver.column_types(
+        [f"{builder.base_alias}.{name}" for name in columns],
+        builder.base_table,
+        builder.base_alias
+    )
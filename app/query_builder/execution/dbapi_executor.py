@@ -0,0 +1,77 @@
+"""DB-API 2.0 based query executors."""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from app.query_builder.execution.base import QueryExecutor
+
+
+class DBAPIExecutor(QueryExecutor):
+    """Executor for any DB-API 2.0 driver.
+
+    Each thread gets its own connection from the connection factory, so a
+    single executor can be shared by a thread pool.
+    """
+
+    def __init__(self, connect: Callable[[], Any], dialect: str = "generic"):
+        """Initialize the executor.
+
+        Args:
+            connect: Factory returning a new DB-API connection
+            dialect: SQL dialect of the database
+        """
+        self.connect = connect
+        self.dialect = dialect
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> Any:
+        """Get the calling thread's connection, opening it if needed."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self.connect()
+        return connection
+
+    def current_connection(self) -> Optional[Any]:
+        """Get the calling thread's connection without opening one."""
+        return getattr(self._local, 'connection', None)
+
+    @contextmanager
+    def cursor(self, sql: str, params: Optional[Sequence[Any]] = None) -> Iterator[Any]:
+        """Execute a statement and yield its DB-API cursor."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, tuple(params or ()))
+            yield cursor
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        connection = self.current_connection()
+        if connection is not None:
+            self._local.connection = None
+            connection.close()
+
+
+class SQLiteExecutor(DBAPIExecutor):
+    """Executor backed by SQLite, used as a local stand-in for the database.
+
+    Queries built with ``schema="main"`` run unchanged. Use a file path or a
+    shared-cache URI (``file:name?mode=memory&cache=shared``) when the
+    executor is used from several threads.
+    """
+
+    def __init__(self, database: str = ":memory:", uri: bool = False):
+        """Initialize the executor.
+
+        Args:
+            database: SQLite database path or URI
+            uri: Whether ``database`` is a URI
+        """
+        self.database = database
+        super().__init__(
+            lambda: sqlite3.connect(database, uri=uri, check_same_thread=False),
+            dialect="sqlite"
+        )
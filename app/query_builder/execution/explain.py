@@ -0,0 +1,406 @@
+"""EXPLAIN integration for built queries.
+
+Runs the dialect's EXPLAIN for a query, parses the output into a tree of
+:class:`PlanNode` and flags common problems:
+
+* ``full_scan``: a catalog table read without an index
+* ``inner_scan``: a table scanned inside a nested loop, i.e. once per row
+  of the outer tables (usually a bad join order or a missing join index)
+* ``automatic_index``: the database builds a temporary index for a join
+  because the join column has none
+* ``temp_sort``: ORDER BY, GROUP BY or DISTINCT needs a separate sort
+
+:class:`PlanSampler` captures plans of slow shapes automatically.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.query_builder.execution.base import QueryExecutor, QueryResult
+from app.query_builder.schema import Catalog, get_catalog
+
+# EXPLAIN statement per executor dialect
+EXPLAIN_STATEMENTS = {
+    'sqlite': "EXPLAIN QUERY PLAN {sql}",
+    'postgres': "EXPLAIN (FORMAT JSON) {sql}",
+}
+
+# SQLite loop lines, e.g. "SCAN tr", "SEARCH c USING INDEX ix (companyId=?)"
+# or "SCAN TABLE ciqTransaction AS tr" on older versions
+SQLITE_LOOP_PATTERN = re.compile(
+    r"^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)(?:\s+AS\s+(\w+))?(?:\s+USING\s+(.*))?$"
+)
+SQLITE_TEMP_SORT_PATTERN = re.compile(r"^USE TEMP B-TREE FOR (.+)$")
+
+# PostgreSQL node types that read a relation, by operation
+POSTGRES_OPERATIONS = {
+    'Seq Scan': 'scan',
+    'Index Scan': 'search',
+    'Index Only Scan': 'search',
+    'Bitmap Heap Scan': 'search',
+    'Sort': 'sort',
+    'Incremental Sort': 'sort',
+}
+
+
+class PlanNode:
+    """One step of a query plan."""
+
+    __slots__ = ('detail', 'operation', 'table', 'alias', 'index', 'rows', 'children')
+
+    def __init__(
+            self,
+            detail: str,
+            operation: str = 'other',
+            table: Optional[str] = None,
+            alias: Optional[str] = None,
+            index: Optional[str] = None,
+            rows: Optional[float] = None
+    ):
+        """Initialize the node.
+
+        Args:
+            detail: Plan line as reported by the database
+            operation: ``scan`` (full read), ``search`` (index lookup),
+                ``sort`` or ``other``
+            table: Table read by the step, if any
+            alias: Alias of the table in the query
+            index: Index used by the step, if any
+            rows: Estimated rows produced, if reported
+        """
+        self.detail = detail
+        self.operation = operation
+        self.table = table
+        self.alias = alias
+        self.index = index
+        self.rows = rows
+        self.children: List['PlanNode'] = []
+
+    def walk(self) -> Iterator['PlanNode']:
+        """Iterate over the node and its descendants, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable description of the node and its children."""
+        node: Dict[str, Any] = {'detail': self.detail, 'operation': self.operation}
+        for name in ('table', 'alias', 'index', 'rows'):
+            if getattr(self, name) is not None:
+                node[name] = getattr(self, name)
+        if self.children:
+            node['children'] = [child.to_dict() for child in self.children]
+        return node
+
+
+class PlanIssue:
+    """Problem found in a query plan."""
+
+    __slots__ = ('kind', 'table', 'alias', 'message')
+
+    def __init__(self, kind: str, message: str, table: Optional[str] = None,
+                 alias: Optional[str] = None):
+        self.kind = kind
+        self.message = message
+        self.table = table
+        self.alias = alias
+
+    def __repr__(self) -> str:
+        return f"PlanIssue({self.kind}: {self.message})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable description of the issue."""
+        return {'kind': self.kind, 'table': self.table, 'alias': self.alias,
+                'message': self.message}
+
+
+class ExplainPlan:
+    """Parsed plan of a query with the issues found in it."""
+
+    __slots__ = ('sql', 'dialect', 'roots', 'issues')
+
+    def __init__(self, sql: str, dialect: str, roots: List[PlanNode], issues: List[PlanIssue]):
+        self.sql = sql
+        self.dialect = dialect
+        self.roots = roots
+        self.issues = issues
+
+    def walk(self) -> Iterator[PlanNode]:
+        """Iterate over all plan nodes, depth first."""
+        for root in self.roots:
+            yield from root.walk()
+
+    @property
+    def full_scans(self) -> List[PlanIssue]:
+        """Get the full-scan issues of the plan."""
+        return [issue for issue in self.issues if issue.kind in ('full_scan', 'inner_scan')]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable description of the plan."""
+        return {
+            'sql': self.sql,
+            'dialect': self.dialect,
+            'plan': [root.to_dict() for root in self.roots],
+            'issues': [issue.to_dict() for issue in self.issues]
+        }
+
+
+class QueryExplainer:
+    """Runner of EXPLAIN for built queries on an executor."""
+
+    def __init__(
+            self,
+            executor: QueryExecutor,
+            catalog: Optional[Catalog] = None,
+            table_rows: Optional[Dict[str, int]] = None,
+            large_table_rows: int = 100000
+    ):
+        """Initialize the explainer.
+
+        Args:
+            executor: Executor of the database the queries run on
+            catalog: Schema catalog, defaults to the current catalog
+            table_rows: Known row counts per table; full scans of tables
+                with fewer than ``large_table_rows`` rows are not flagged
+                (tables without a count are treated as large)
+            large_table_rows: Row count from which a table counts as large
+        """
+        if executor.dialect not in EXPLAIN_STATEMENTS:
+            raise ValueError(f"EXPLAIN is not supported for dialect: {executor.dialect}")
+        self.executor = executor
+        self.catalog = catalog or get_catalog()
+        self.table_rows = table_rows or {}
+        self.large_table_rows = large_table_rows
+
+    def explain(self, builder: Any) -> ExplainPlan:
+        """Explain the query of a builder that has parsed a request."""
+        return self.explain_sql(builder.build_query(), builder.base_table, builder.base_alias)
+
+    def explain_sql(
+            self,
+            sql: str,
+            base_table: str = "ciqTransaction",
+            base_alias: str = "tr"
+    ) -> ExplainPlan:
+        """Explain a query.
+
+        Args:
+            sql: SQL produced by the builder
+            base_table: Base table of the query
+            base_alias: Alias of the base table
+
+        Returns:
+            Parsed plan with its issues
+        """
+        dialect = self.executor.dialect
+        result = self.executor.execute(EXPLAIN_STATEMENTS[dialect].format(sql=sql))
+        if dialect == 'sqlite':
+            roots = self._parse_sqlite(result, base_table, base_alias)
+        else:
+            roots = self._parse_postgres(result)
+        return ExplainPlan(sql, dialect, roots, self._find_issues(roots, dialect))
+
+    def _parse_sqlite(self, result: QueryResult, base_table: str, base_alias: str) -> List[PlanNode]:
+        """Build the plan tree from EXPLAIN QUERY PLAN rows (id, parent, _, detail)."""
+        roots: List[PlanNode] = []
+        nodes: Dict[int, PlanNode] = {}
+        for node_id, parent, _, detail in result.rows:
+            node = self._sqlite_node(detail, base_table, base_alias)
+            nodes[node_id] = node
+            if parent in nodes:
+                nodes[parent].children.append(node)
+            else:
+                roots.append(node)
+        return roots
+
+    def _sqlite_node(self, detail: str, base_table: str, base_alias: str) -> PlanNode:
+        """Parse one EXPLAIN QUERY PLAN line."""
+        match = SQLITE_LOOP_PATTERN.match(detail)
+        if match is None:
+            sort = SQLITE_TEMP_SORT_PATTERN.match(detail)
+            return PlanNode(detail, 'sort' if sort else 'other')
+
+        verb, name, alias, using = match.groups()
+        if alias is None:
+            # Aliased tables are reported by alias only
+            alias = name
+            name = self.catalog.table_for_alias(name, base_table, base_alias) or name
+        index = None
+        if using:
+            index = re.sub(r"^(?:AUTOMATIC\s+)?(?:COVERING\s+)?INDEX\s*|\s*\(.*\)$", '', using)
+            index = index or using
+        return PlanNode(detail, 'search' if verb == 'SEARCH' else 'scan', name, alias, index)
+
+    def _parse_postgres(self, result: QueryResult) -> List[PlanNode]:
+        """Build the plan tree from EXPLAIN (FORMAT JSON) output."""
+        document = result.rows[0][0]
+        if isinstance(document, str):
+            document = json.loads(document)
+        return [self._postgres_node(entry['Plan']) for entry in document]
+
+    def _postgres_node(self, plan: Dict[str, Any]) -> PlanNode:
+        """Convert one PostgreSQL plan node and its children."""
+        node_type = plan.get('Node Type', '')
+        table = plan.get('Relation Name')
+        detail = node_type if table is None else f"{node_type} on {table} {plan.get('Alias', '')}"
+        node = PlanNode(
+            detail.strip(),
+            POSTGRES_OPERATIONS.get(node_type, 'other'),
+            table,
+            plan.get('Alias'),
+            plan.get('Index Name'),
+            plan.get('Plan Rows')
+        )
+        node.children = [self._postgres_node(child) for child in plan.get('Plans', ())]
+        return node
+
+    def _find_issues(self, roots: List[PlanNode], dialect: str) -> List[PlanIssue]:
+        """Flag full scans, scans inside loops, automatic indexes and sorts."""
+        issues: List[PlanIssue] = []
+        self._check_level(roots, issues, nested_siblings=dialect == 'sqlite')
+        return issues
+
+    def _check_level(self, nodes: List[PlanNode], issues: List[PlanIssue],
+                     inner: bool = False, nested_siblings: bool = True) -> None:
+        """Check sibling plan nodes.
+
+        In SQLite plans the later loops of a level run inside the earlier
+        ones; in PostgreSQL plans siblings are independent inputs (e.g. of an
+        Append or a Hash Join) and only the inner inputs of a Nested Loop are
+        nested.
+        """
+        loops = 0
+        for node in nodes:
+            nested = inner or (nested_siblings and loops > 0)
+            if node.operation in ('scan', 'search') and node.table is not None:
+                loops += 1
+                self._check_read(node, nested, issues)
+            elif node.operation == 'sort':
+                issues.append(PlanIssue('temp_sort', f"Separate sort step: {node.detail}"))
+
+            # The second input of a nested loop join runs once per outer row
+            if node.detail.startswith('Nested Loop') and len(node.children) > 1:
+                self._check_level(node.children[:1], issues, inner, nested_siblings)
+                self._check_level(node.children[1:], issues, True, nested_siblings)
+            else:
+                self._check_level(node.children, issues, inner, nested_siblings)
+
+    def _check_read(self, node: PlanNode, nested: bool, issues: List[PlanIssue]) -> None:
+        """Check one table access."""
+        if node.index and 'AUTOMATIC' in node.detail:
+            issues.append(PlanIssue(
+                'automatic_index',
+                f"Temporary index built to join {node.alias}; index the join column of {node.table}",
+                node.table, node.alias
+            ))
+        # Scans of a whole index (e.g. a covering index) are not flagged
+        if node.operation != 'scan' or node.index or self.catalog.table(node.table) is None:
+            return
+        rows = self.table_rows.get(node.table)
+        if rows is not None and rows < self.large_table_rows:
+            return
+        size = 'large table' if rows is not None else 'table'
+        if nested:
+            issues.append(PlanIssue(
+                'inner_scan',
+                f"Full scan of {size} {node.table} ({node.alias}) inside a nested loop, "
+                f"once per outer row; check the join order and join indexes",
+                node.table, node.alias
+            ))
+        else:
+            issues.append(PlanIssue(
+                'full_scan', f"Full scan of {size} {node.table} ({node.alias})",
+                node.table, node.alias
+            ))
+
+
+class PlanSampler:
+    """Sampler capturing the plans of slow query shapes.
+
+    Queries are timed as they execute; a query slower than ``slow_ms`` is
+    explained with probability ``sample_rate`` until ``per_shape`` plans of
+    its shape have been captured. At most ``capacity`` shapes are kept,
+    the least recently captured ones are dropped first.
+    """
+
+    def __init__(
+            self,
+            explainer: QueryExplainer,
+            slow_ms: float = 500.0,
+            sample_rate: float = 0.1,
+            per_shape: int = 3,
+            capacity: int = 128
+    ):
+        """Initialize the sampler.
+
+        Args:
+            explainer: Explainer for the executor the queries run on
+            slow_ms: Execution time from which a query counts as slow
+            sample_rate: Probability of explaining a slow query
+            per_shape: Plans kept per shape
+            capacity: Shapes kept
+        """
+        self.explainer = explainer
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.per_shape = per_shape
+        self.capacity = capacity
+        self._plans: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute(self, builder: Any) -> QueryResult:
+        """Execute a builder's query, capturing its plan if it is slow.
+
+        The execution time is also recorded in the builder's stats
+        collector, if it has one.
+        """
+        sql = builder.build_query()
+        started = time.perf_counter()
+        result = self.explainer.executor.execute(sql)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if builder.stats_collector is not None and builder.fingerprint is not None:
+            builder.stats_collector.record_latency(builder.fingerprint, elapsed_ms)
+        self.observe(builder, elapsed_ms, sql)
+        return result
+
+    def observe(self, builder: Any, elapsed_ms: float,
+                sql: Optional[str] = None) -> Optional[ExplainPlan]:
+        """Report the execution time of a builder's query.
+
+        Args:
+            builder: Builder that has parsed the request
+            elapsed_ms: Execution time in milliseconds
+            sql: SQL that was executed, built from the builder if omitted
+
+        Returns:
+            The captured plan, or None if none was captured
+        """
+        if elapsed_ms < self.slow_ms or builder.fingerprint is None:
+            return None
+        shape = builder.fingerprint.key
+        with self._lock:
+            captured = self._plans.get(shape, ())
+            if len(captured) >= self.per_shape or random.random() >= self.sample_rate:
+                return None
+
+        plan = self.explainer.explain_sql(
+            sql or builder.build_query(), builder.base_table, builder.base_alias
+        )
+        entry = dict(plan.to_dict(), elapsed_ms=round(elapsed_ms, 3), captured_at=time.time())
+        with self._lock:
+            plans = self._plans.setdefault(shape, [])
+            if len(plans) < self.per_shape:
+                plans.append(entry)
+            self._plans.move_to_end(shape)
+            while len(self._plans) > self.capacity:
+                self._plans.popitem(last=False)
+        return plan
+
+    def captured(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the captured plans per shape key."""
+        with self._lock:
+            return {shape: list(plans) for shape, plans in self._plans.items()}
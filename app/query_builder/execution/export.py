@@ -0,0 +1,331 @@
+"""Streaming export of query results to CSV, NDJSON or Parquet.
+
+Rows are pulled from the cursor in batches and encoded incrementally, so
+memory use is bounded by the batch size and the prefetch depth whatever
+the size of the result. Chunks can be written to a file or streamed as a
+chunked HTTP response body.
+"""
+import contextvars
+import csv
+import io
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.query_builder.execution.base import QueryExecutor
+from app.query_builder.execution.cancellation import current_token
+from app.query_builder.execution.columnar import (
+    _import_optional,
+    resolve_result_types,
+    rows_to_arrow_batch
+)
+from app.query_builder.schema import ProjectionResolver
+
+
+class ExportEncoder(ABC):
+    """Interface for incremental result encoders."""
+
+    # MIME type of the encoded output
+    content_type = "application/octet-stream"
+
+    @abstractmethod
+    def begin(self, columns: List[str], column_types: List[Optional[str]]) -> bytes:
+        """Start the output (e.g. header row) for the given columns."""
+        pass
+
+    @abstractmethod
+    def encode(self, rows: List[Tuple[Any, ...]]) -> bytes:
+        """Encode one batch of rows."""
+        pass
+
+    def end(self) -> bytes:
+        """Finish the output (e.g. file footer)."""
+        return b""
+
+
+class CSVEncoder(ExportEncoder):
+    """Encoder for RFC 4180 CSV with a header row."""
+
+    content_type = "text/csv; charset=utf-8"
+
+    def __init__(self, dialect: str = 'excel'):
+        """Initialize the CSV encoder.
+
+        Args:
+            dialect: csv module dialect
+        """
+        self.dialect = dialect
+
+    def begin(self, columns: List[str], column_types: List[Optional[str]]) -> bytes:
+        return self.encode([tuple(columns)])
+
+    def encode(self, rows: List[Tuple[Any, ...]]) -> bytes:
+        text = io.StringIO()
+        csv.writer(text, dialect=self.dialect).writerows(rows)
+        return text.getvalue().encode('utf-8')
+
+
+class NDJSONEncoder(ExportEncoder):
+    """Encoder for newline-delimited JSON, one object per row."""
+
+    content_type = "application/x-ndjson"
+
+    def __init__(self):
+        """Initialize the NDJSON encoder."""
+        self.columns: List[str] = []
+
+    def begin(self, columns: List[str], column_types: List[Optional[str]]) -> bytes:
+        self.columns = columns
+        return b""
+
+    def encode(self, rows: List[Tuple[Any, ...]]) -> bytes:
+        columns = self.columns
+        return ''.join(
+            json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows
+        ).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that hands written bytes back in chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """Get and forget everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetEncoder(ExportEncoder):
+    """Encoder for Parquet, writing one row group per batch (requires pyarrow)."""
+
+    content_type = "application/vnd.apache.parquet"
+
+    # Arrow type per catalog column type; unknown types are written as strings
+    ARROW_TYPES = {
+        'int': 'int64',
+        'float': 'float64',
+        'bool': 'bool_',
+        'date': 'date32',
+        'str': 'string',
+        'text': 'string',
+    }
+
+    def __init__(self, compression: str = 'snappy'):
+        """Initialize the Parquet encoder.
+
+        Args:
+            compression: Parquet compression codec
+        """
+        self.compression = compression
+        self.columns: List[str] = []
+        self.column_types: List[Optional[str]] = []
+        self._pa = None
+        self._schema = None
+        self._sink: Optional[_ChunkSink] = None
+        self._writer = None
+
+    def begin(self, columns: List[str], column_types: List[Optional[str]]) -> bytes:
+        pa = self._pa = _import_optional('pyarrow', "Parquet export")
+        parquet = _import_optional('pyarrow.parquet', "Parquet export").parquet
+        self.columns = columns
+        self.column_types = [
+            column_type if column_type in self.ARROW_TYPES or column_type == 'datetime' else 'str'
+            for column_type in column_types
+        ]
+        self._schema = pa.schema([
+            (name, pa.timestamp('us') if column_type == 'datetime'
+             else getattr(pa, self.ARROW_TYPES[column_type])())
+            for name, column_type in zip(columns, self.column_types)
+        ])
+        self._sink = _ChunkSink()
+        self._writer = parquet.ParquetWriter(self._sink, self._schema, compression=self.compression)
+        return self._sink.drain()
+
+    def encode(self, rows: List[Tuple[Any, ...]]) -> bytes:
+        untyped = {index for index in range(len(self.columns)) if not self._is_typed(index)}
+        if untyped:
+            rows = [
+                tuple(
+                    str(value) if index in untyped and value is not None else value
+                    for index, value in enumerate(row)
+                )
+                for row in rows
+            ]
+        batch = rows_to_arrow_batch(self.columns, self.column_types, rows)
+        table = self._pa.Table.from_batches([batch]).cast(self._schema)
+        self._writer.write_table(table, row_group_size=max(1, len(rows)))
+        return self._sink.drain()
+
+    def end(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+    def _is_typed(self, index: int) -> bool:
+        """Check if a column's values are converted by their catalog type."""
+        return self.column_types[index] not in ('str', 'text')
+
+
+# Encoder factory per export format
+ENCODERS: Dict[str, Callable[[], ExportEncoder]] = {
+    'csv': CSVEncoder,
+    'ndjson': NDJSONEncoder,
+    'parquet': ParquetEncoder,
+}
+
+# End-of-stream marker between the producer thread and the consumer
+_DONE = object()
+
+
+class ExportPipeline:
+    """Pipeline that streams a built query's result into an export format."""
+
+    def __init__(self, executor: QueryExecutor, batch_size: int = 10000, prefetch: int = 2):
+        """Initialize the export pipeline.
+
+        Args:
+            executor: Executor used to run queries
+            batch_size: Rows fetched and encoded per batch
+            prefetch: Encoded chunks buffered ahead of the consumer by a
+                background thread; 0 fetches and encodes on demand
+        """
+        self.executor = executor
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+
+    def content_type(self, export_format: str) -> str:
+        """Get the MIME type of an export format."""
+        return self._encoder(export_format).content_type
+
+    def iter_chunks(self, builder: Any, export_format: str = 'csv') -> Iterator[bytes]:
+        """Stream the encoded result of a parsed request.
+
+        Suitable as a chunked HTTP response body: the query advances only as
+        fast as chunks are consumed (plus ``prefetch`` chunks), and closing
+        the iterator stops the query.
+
+        Args:
+            builder: FlexibleQueryBuilder that has parsed the request
+            export_format: One of ``csv``, ``ndjson`` or ``parquet``
+
+        Yields:
+            Encoded chunks
+        """
+        for chunk, _ in self._stream(builder, export_format):
+            if chunk:
+                yield chunk
+
+    def export_to_file(self, builder: Any, path: str, export_format: str = 'csv') -> int:
+        """Write the encoded result of a parsed request to a file.
+
+        Returns:
+            Number of rows exported
+        """
+        exported = 0
+        with open(path, 'wb') as export_file:
+            for chunk, rows in self._stream(builder, export_format):
+                export_file.write(chunk)
+                exported += rows
+        return exported
+
+    def _stream(self, builder: Any, export_format: str) -> Iterator[Tuple[bytes, int]]:
+        """Stream (chunk, row count) pairs, via a bounded prefetch queue if enabled."""
+        encoder = self._encoder(export_format)
+        if self.prefetch <= 0:
+            yield from self._produce(builder, encoder)
+            return
+
+        chunks: 'queue.Queue[Any]' = queue.Queue(maxsize=self.prefetch)
+        stopped = threading.Event()
+
+        def offer(item: Any) -> bool:
+            """Queue an item, blocking while the consumer is behind (backpressure).
+
+            Returns False once the consumer has stopped, so the producer never
+            blocks on a full queue nobody reads any more.
+            """
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer() -> None:
+            try:
+                for item in self._produce(builder, encoder):
+                    if not offer(item):
+                        return
+                offer(_DONE)
+            except BaseException as e:
+                offer(e)
+
+        # The producer runs in the caller's context, e.g. its cancellation scope
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(producer,), name='query-export',
+                                  daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+
+    def _produce(self, builder: Any, encoder: ExportEncoder) -> Iterator[Tuple[bytes, int]]:
+        """Fetch batches from the cursor and encode them."""
+        token = current_token()
+        with self.executor.cursor(builder.build_query()) as cursor:
+            cursor_columns = self.executor.column_names(cursor)
+            columns = self._headers(builder, cursor_columns)
+            yield encoder.begin(columns, resolve_result_types(builder, cursor_columns)), 0
+            while True:
+                if token is not None:
+                    token.raise_if_cancelled()
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield encoder.encode([tuple(row) for row in rows]), len(rows)
+            yield encoder.end(), 0
+
+    @staticmethod
+    def _headers(builder: Any, cursor_columns: Sequence[str]) -> List[str]:
+        """Use the builder's resolved SELECT list for headers when it maps 1:1."""
+        select_fields = builder.select_fields
+        if len(select_fields) == len(cursor_columns) and not any(
+                field.endswith('*') for field in select_fields
+        ):
+            return ProjectionResolver(builder.catalog).column_labels(select_fields)
+        return list(cursor_columns)
+
+    @staticmethod
+    def _encoder(export_format: str) -> ExportEncoder:
+        """Create the encoder of an export format."""
+        factory = ENCODERS.get(export_format)
+        if factory is None:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        return factory()
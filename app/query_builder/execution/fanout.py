@@ -0,0 +1,496 @@
+"""Query fan-out: partitioned sub-queries executed in parallel and merged."""
+import heapq
+import itertools
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.query_builder.analyzers.partition_pruner import parse_typed_literal, typed_literal
+from app.query_builder.execution.base import QueryExecutor, QueryResult
+
+# "<field> IN ('a', 'b', ...)" conditions produced by FilterParser
+IN_CONDITION_PATTERN = re.compile(r"^([a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*) IN \((.*)\)$")
+
+# "<field> <op> <literal>" range conditions produced by FilterParser and, with
+# dialect-typed literals such as CAST('2020-01-01' AS DATE), by PartitionPruner
+RANGE_CONDITION_PATTERN = re.compile(r"^([a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*) (>=|>|<=|<) (.+)$")
+
+# Quoted SQL string literals (quotes escaped by doubling)
+LITERAL_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+
+# Dialects sorting NULLs as larger than any value (last in ascending order);
+# the others (SQLite, MySQL, SQL Server) sort them first
+NULLS_HIGH_DIALECTS = frozenset({'postgres', 'oracle'})
+
+# Aggregates that can be recombined from partition results
+AGGREGATE_PATTERN = re.compile(
+    r"^(COUNT|SUM|MIN|MAX|AVG)\s*\((.*)\)(?:\s+AS\s+\w+)?$",
+    re.IGNORECASE
+)
+
+
+def _sum(values: List[Any]) -> Any:
+    present = [value for value in values if value is not None]
+    return sum(present) if present else None
+
+
+def _min(values: List[Any]) -> Any:
+    present = [value for value in values if value is not None]
+    return min(present) if present else None
+
+
+def _max(values: List[Any]) -> Any:
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+# How partial aggregates combine into the overall aggregate
+AGGREGATE_COMBINERS: Dict[str, Callable[[List[Any]], Any]] = {
+    'COUNT': _sum,
+    'SUM': _sum,
+    'MIN': _min,
+    'MAX': _max,
+}
+
+
+class SubQuery:
+    """One partition of a fanned-out query."""
+
+    __slots__ = ('sql', 'partition')
+
+    def __init__(self, sql: str, partition: str):
+        self.sql = sql
+        self.partition = partition
+
+    def __repr__(self) -> str:
+        return f"SubQuery({self.partition})"
+
+
+class FanOutPlan:
+    """Sub-queries of a partitioned request and how to merge their results.
+
+    Modes:
+        concat: partitions are concatenated in order
+        merge: partitions are sorted and combined with a k-way merge
+        aggregate: partition groups are re-aggregated, then sorted
+    """
+
+    __slots__ = (
+        'queries', 'mode', 'visible_columns', 'order_keys',
+        'group_columns', 'aggregates', 'limit', 'offset'
+    )
+
+    def __init__(
+            self,
+            queries: List[SubQuery],
+            mode: str,
+            visible_columns: int,
+            order_keys: List[Tuple[int, bool]],
+            group_columns: List[int],
+            aggregates: Dict[int, str],
+            limit: Optional[int],
+            offset: Optional[int]
+    ):
+        self.queries = queries
+        self.mode = mode
+        self.visible_columns = visible_columns
+        self.order_keys = order_keys  # (column index, descending)
+        self.group_columns = group_columns
+        self.aggregates = aggregates  # column index -> aggregate function
+        self.limit = limit
+        self.offset = offset
+
+
+class PartitionPlanner:
+    """Planner that splits a parsed request into partitioned sub-queries.
+
+    Requests are split by value chunks of their largest IN list or, when a
+    range key is configured and the request bounds it on both sides, by
+    range buckets of that key.
+    """
+
+    def __init__(
+            self,
+            max_partitions: int = 8,
+            chunk_size: int = 500,
+            range_key: Optional[str] = None
+    ):
+        """Initialize the partition planner.
+
+        Args:
+            max_partitions: Maximum number of sub-queries
+            chunk_size: Minimum IN list values per sub-query
+            range_key: Field split into range buckets (e.g. ``tr.announcedDate``)
+        """
+        self.max_partitions = max_partitions
+        self.chunk_size = chunk_size
+        self.range_key = range_key
+
+    def plan(self, builder: Any) -> Optional[FanOutPlan]:
+        """Plan the sub-queries of a parsed request.
+
+        Args:
+            builder: FlexibleQueryBuilder that has parsed the request
+
+        Returns:
+            Fan-out plan, or None if the request should run as one query
+        """
+        if builder.rollup is not None:
+            return None  # rollup reads are already cheap
+        if builder.union_tables:
+            return None  # union branches are already separate queries
+
+        partitions = self._split_values(builder.where_conditions)
+        if partitions is None and self.range_key:
+            partitions = self._split_range(builder.where_conditions)
+        if partitions is None or len(partitions) < 2:
+            return None
+
+        select_fields = list(builder.select_fields)
+        visible_columns = len(select_fields)
+        order_fields = [clause.rsplit(' ', 1) for clause in builder.order_by_clauses]
+        group_columns: List[int] = []
+        aggregates: Dict[int, str] = {}
+
+        if builder.group_by_fields:
+            mode = 'aggregate'
+            for index, field in enumerate(select_fields):
+                if field in builder.group_by_fields:
+                    group_columns.append(index)
+                    continue
+                match = AGGREGATE_PATTERN.match(field)
+                function = match.group(1).upper() if match else None
+                if function not in AGGREGATE_COMBINERS or 'DISTINCT' in match.group(2).upper():
+                    return None  # cannot recombine this column from partitions
+                aggregates[index] = function
+            if any(field not in select_fields for field, _ in order_fields):
+                return None
+        elif order_fields:
+            mode = 'merge'
+            # Sort columns missing from the projection are added and stripped after merging
+            for field, _ in order_fields:
+                if field not in select_fields:
+                    select_fields.append(field)
+        else:
+            mode = 'concat'
+
+        limit, offset = builder.limit_value, builder.offset_value
+        sub_limit = None
+        if limit is not None and mode != 'aggregate':
+            sub_limit = limit + (offset or 0)
+
+        queries = [
+            SubQuery(
+                builder.sql_constructor.build_query(
+                    select_fields=select_fields,
+                    where_conditions=where_conditions,
+                    group_by_fields=builder.group_by_fields,
+                    order_by_clauses=builder.order_by_clauses,
+                    limit_value=sub_limit,
+                    offset_value=None,
+                    joins=builder.joins,
+                    from_table=builder.partition_table,
+                    semi_joins=self._semi_joins(builder, where_conditions)
+                ),
+                description
+            )
+            for description, where_conditions in partitions
+        ]
+
+        return FanOutPlan(
+            queries=queries,
+            mode=mode,
+            visible_columns=visible_columns,
+            order_keys=[
+                (select_fields.index(field), direction.upper() == 'DESC')
+                for field, direction in order_fields
+            ],
+            group_columns=group_columns,
+            aggregates=aggregates,
+            limit=limit,
+            offset=offset
+        )
+
+    @staticmethod
+    def _semi_joins(builder: Any, where_conditions: List[str]) -> List[Dict[str, Any]]:
+        """Plan the semi-joins of a partition like the builder planned its own.
+
+        Partitions rewrite the split condition, which may belong to a
+        semi-join, so the plans are made again from the partition's
+        conditions.
+        """
+        if not builder.semi_joins:
+            return []
+        return builder.join_analyzer.plan_semi_joins(
+            builder.joins,
+            builder.select_fields,
+            where_conditions,
+            builder.group_by_fields,
+            builder.order_by_clauses,
+            builder.base_alias,
+            builder.filter_join_policy
+        )
+
+    def _split_values(self, where_conditions: List[str]) -> Optional[List[Tuple[str, List[str]]]]:
+        """Split the largest IN list into value chunks."""
+        best_index, best_field, best_values = None, None, []
+        for index, condition in enumerate(where_conditions):
+            match = IN_CONDITION_PATTERN.match(condition)
+            if not match:
+                continue
+            values = [f"'{value}'" for value in LITERAL_PATTERN.findall(match.group(2))]
+            if len(values) > len(best_values):
+                best_index, best_field, best_values = index, match.group(1), values
+
+        if best_index is None or len(best_values) <= self.chunk_size:
+            return None
+
+        partitions = min(self.max_partitions, math.ceil(len(best_values) / self.chunk_size))
+        size = math.ceil(len(best_values) / partitions)
+        result = []
+        for start in range(0, len(best_values), size):
+            chunk = best_values[start:start + size]
+            conditions = list(where_conditions)
+            conditions[best_index] = f"{best_field} IN ({', '.join(chunk)})"
+            result.append((f"{best_field} values {start}-{start + len(chunk) - 1}", conditions))
+        return result
+
+    def _split_range(self, where_conditions: List[str]) -> Optional[List[Tuple[str, List[str]]]]:
+        """Split the bounded range of the range key into buckets.
+
+        All bounds on the range key are intersected, so the buckets cover
+        the tightest lower and upper bound; requests whose bounds cannot be
+        compared are not split.
+        """
+        lower = upper = None
+        remaining = []
+        for condition in where_conditions:
+            match = RANGE_CONDITION_PATTERN.match(condition)
+            literal = parse_typed_literal(match.group(3)) if match else None
+            if literal is None or match.group(1) != self.range_key:
+                remaining.append(condition)
+                continue
+            bound = (match.group(2), literal[0], literal[1])
+            try:
+                if bound[0] in ('>=', '>'):
+                    lower = bound if lower is None else _tighter(lower, bound, upper=False)
+                else:
+                    upper = bound if upper is None else _tighter(upper, bound, upper=True)
+            except (TypeError, ValueError):
+                return None
+
+        if lower is None or upper is None:
+            return None
+
+        boundaries = _range_boundaries(lower[1], upper[1], self.max_partitions)
+        if boundaries is None:
+            return None
+
+        # Bucket boundaries keep the literal type of the request's bounds
+        sql_type = lower[2] or upper[2]
+        result = []
+        for index in range(len(boundaries) - 1):
+            low_op = lower[0] if index == 0 else '>='
+            high_op = upper[0] if index == len(boundaries) - 2 else '<'
+            low, high = boundaries[index], boundaries[index + 1]
+            conditions = remaining + [
+                f"{self.range_key} {low_op} {typed_literal(low, sql_type)}",
+                f"{self.range_key} {high_op} {typed_literal(high, sql_type)}"
+            ]
+            result.append((f"{self.range_key} {low_op} {low} and {high_op} {high}", conditions))
+        return result
+
+
+def _range_value(value: str) -> Any:
+    """Parse a date, integer or decimal range bound for comparison."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    if re.match(r'^-?\d+$', value):
+        return int(value)
+    return float(value)
+
+
+def _tighter(current: Tuple[str, ...], bound: Tuple[str, ...], upper: bool) -> Tuple[str, ...]:
+    """Get the tighter of two (operator, value, SQL type) bounds on the same side of a range.
+
+    Raises:
+        ValueError: If a value is not a date or number
+        TypeError: If the values cannot be compared
+    """
+    current_value, value = _range_value(current[1]), _range_value(bound[1])
+    if current_value == value:
+        # The strict operator excludes the bound itself
+        return current if current[0] in ('>', '<') else bound
+    if upper:
+        return bound if value < current_value else current
+    return bound if value > current_value else current
+
+
+def _range_boundaries(low: str, high: str, partitions: int) -> Optional[List[str]]:
+    """Compute bucket boundaries for a date, integer or decimal range."""
+    try:
+        start, end = date.fromisoformat(low), date.fromisoformat(high)
+        span = (end - start).days
+        if span < 1:
+            return None
+        step = max(1, math.ceil(span / partitions))
+        points = [start + timedelta(days=offset) for offset in range(0, span, step)] + [end]
+        return [point.isoformat() for point in points]
+    except ValueError:
+        pass
+
+    try:
+        if re.match(r'^-?\d+$', low) and re.match(r'^-?\d+$', high):
+            start, end = int(low), int(high)
+            step = max(1, math.ceil((end - start) / partitions))
+            points = list(range(start, end, step)) + [end]
+        else:
+            start, end = float(low), float(high)
+            step = (end - start) / partitions
+            points = [start + step * index for index in range(partitions)] + [end]
+    except ValueError:
+        return None
+
+    if end <= start:
+        return None
+    return [str(point) for point in points]
+
+
+class _SortValue:
+    """Sort key component following SQL ordering.
+
+    NULLs sort as the lowest value, or as the highest with ``nulls_high``
+    (Postgres and Oracle), matching the ORDER BY of the database.
+    """
+
+    __slots__ = ('value', 'descending', 'nulls_high')
+
+    def __init__(self, value: Any, descending: bool, nulls_high: bool = False):
+        self.value = value
+        self.descending = descending
+        self.nulls_high = nulls_high
+
+    def __eq__(self, other: Any) -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: Any) -> bool:
+        a, b = self.value, other.value
+        if a == b:
+            return False
+        if a is None:
+            less = not self.nulls_high
+        elif b is None:
+            less = self.nulls_high
+        else:
+            less = a < b
+        return not less if self.descending else less
+
+
+class FanOutRunner:
+    """Runner that executes fan-out plans over a thread pool."""
+
+    def __init__(
+            self,
+            executor: QueryExecutor,
+            planner: Optional[PartitionPlanner] = None,
+            max_workers: int = 8
+    ):
+        """Initialize the fan-out runner.
+
+        Args:
+            executor: Executor used for every sub-query
+            planner: Partition planner, defaults to value chunking
+            max_workers: Maximum concurrent sub-queries
+        """
+        self.executor = executor
+        self.planner = planner or PartitionPlanner(max_partitions=max_workers)
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def execute(self, builder: Any) -> QueryResult:
+        """Execute a parsed request, fanning out when the planner splits it."""
+        plan = self.planner.plan(builder)
+        if plan is None:
+            return self.executor.execute(builder.build_query())
+        return self.run(plan)
+
+    def run(self, plan: FanOutPlan) -> QueryResult:
+        """Execute a fan-out plan and merge its partition results."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='query-fanout'
+            )
+        futures = [self._pool.submit(self.executor.execute, query.sql) for query in plan.queries]
+
+        start = plan.offset or 0
+        stop = start + plan.limit if plan.limit is not None else None
+
+        try:
+            if plan.mode == 'concat':
+                return self._concat(futures, start, stop)
+            results = [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+
+        columns = results[0].columns[:plan.visible_columns]
+        if plan.mode == 'merge':
+            merged = heapq.merge(*(result.rows for result in results), key=self._sort_key(plan))
+            rows = list(itertools.islice(merged, start, stop))
+        else:
+            rows = self._aggregate(plan, results)
+            if plan.order_keys:
+                rows.sort(key=self._sort_key(plan))
+            rows = rows[start:stop]
+
+        return QueryResult(columns, [row[:plan.visible_columns] for row in rows])
+
+    def close(self) -> None:
+        """Shut down the thread pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _concat(self, futures: Sequence[Any], start: int, stop: Optional[int]) -> QueryResult:
+        """Concatenate partition results in order, stopping once enough rows arrived."""
+        columns: List[str] = []
+        rows: List[Tuple[Any, ...]] = []
+        for future in futures:
+            result = future.result()
+            columns = columns or result.columns
+            rows.extend(result.rows)
+            if stop is not None and len(rows) >= stop:
+                break
+        return QueryResult(columns, rows[start:stop])
+
+    def _aggregate(self, plan: FanOutPlan, results: List[QueryResult]) -> List[Tuple[Any, ...]]:
+        """Re-aggregate the groups of all partitions."""
+        groups: Dict[Tuple[Any, ...], List[Tuple[Any, ...]]] = {}
+        for result in results:
+            for row in result.rows:
+                key = tuple(row[index] for index in plan.group_columns)
+                groups.setdefault(key, []).append(row)
+
+        rows = []
+        for partials in groups.values():
+            row = list(partials[0])
+            for index, function in plan.aggregates.items():
+                row[index] = AGGREGATE_COMBINERS[function]([partial[index] for partial in partials])
+            rows.append(tuple(row))
+        return rows
+
+    def _sort_key(self, plan: FanOutPlan) -> Callable[[Tuple[Any, ...]], Tuple[_SortValue, ...]]:
+        """Build the row sort key of a plan's ORDER BY for the executor's dialect."""
+        order_keys = plan.order_keys
+        nulls_high = self.executor.dialect in NULLS_HIGH_DIALECTS
+
+        def key(row: Tuple[Any, ...]) -> Tuple[_SortValue, ...]:
+            return tuple(
+                _SortValue(row[index], descending, nulls_high) for index, descending in order_keys
+            )
+
+        return key
@@ -0,0 +1,237 @@
+"""Execution policies: statement timeouts and row caps.
+
+An :class:`ExecutionPolicy` limits how long a statement may run and how
+many rows it may return. The builder applies the row cap to the LIMIT of
+the query it builds; :class:`GuardedExecutor` renders the timeout for its
+dialect, enforces both limits while rows are fetched and aborts the
+running statement when the current cancellation token is cancelled.
+"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from app.query_builder.execution.base import QueryExecutor, QueryResult
+from app.query_builder.execution.cancellation import (
+    CancellationToken,
+    QueryCancelledError,
+    QueryTimeoutError,
+    current_token
+)
+from app.query_builder.execution.dbapi_executor import DBAPIExecutor
+
+# SQLite virtual machine instructions between cancellation checks
+SQLITE_CHECK_INTERVAL = 1000
+
+# MySQL user variable holding the session timeout replaced for a statement
+MYSQL_PREVIOUS_TIMEOUT = "@query_builder_previous_max_execution_time"
+
+
+def render_timeout(dialect: str, sql: str, timeout_ms: int) -> Tuple[List[str], str, List[str]]:
+    """Render a statement timeout for a dialect.
+
+    Args:
+        dialect: Executor dialect
+        sql: Statement to limit
+        timeout_ms: Timeout in milliseconds
+
+    Returns:
+        Tuple of (statements to run first on the same connection, statement,
+        statements restoring the session afterwards); dialects without an
+        SQL-level timeout return the statement unchanged
+    """
+    if dialect == 'postgres':
+        # Scoped to the current transaction
+        return [f"SET LOCAL statement_timeout = {int(timeout_ms)}"], sql, []
+    if dialect == 'mysql' and sql.startswith('SELECT '):
+        return [], f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */ {sql[len('SELECT '):]}", []
+    if dialect == 'mysql':
+        # The session timeout outlives the statement; put the previous one back
+        return [
+            f"SET {MYSQL_PREVIOUS_TIMEOUT} = @@SESSION.MAX_EXECUTION_TIME",
+            f"SET SESSION MAX_EXECUTION_TIME = {int(timeout_ms)}"
+        ], sql, [f"SET SESSION MAX_EXECUTION_TIME = {MYSQL_PREVIOUS_TIMEOUT}"]
+    return [], sql, []
+
+
+class ExecutionPolicy:
+    """Limits applied to the execution of built queries."""
+
+    __slots__ = ('timeout_ms', 'max_rows')
+
+    def __init__(self, timeout_ms: Optional[int] = None, max_rows: Optional[int] = None):
+        """Initialize the policy.
+
+        Args:
+            timeout_ms: Maximum statement run time in milliseconds
+            max_rows: Maximum number of rows a query may return
+        """
+        if timeout_ms is not None and timeout_ms <= 0:
+            raise ValueError("timeout_ms must be positive")
+        if max_rows is not None and max_rows < 0:
+            raise ValueError("max_rows must not be negative")
+        self.timeout_ms = timeout_ms
+        self.max_rows = max_rows
+
+    def cap_limit(self, limit_value: Optional[int]) -> Optional[int]:
+        """Get the LIMIT of a query under the row cap."""
+        if self.max_rows is None:
+            return limit_value
+        return self.max_rows if limit_value is None else min(limit_value, self.max_rows)
+
+    def __repr__(self) -> str:
+        return f"ExecutionPolicy(timeout_ms={self.timeout_ms}, max_rows={self.max_rows})"
+
+
+class GuardedExecutor(QueryExecutor):
+    """Executor enforcing an execution policy and cancellation tokens.
+
+    Wraps a :class:`DBAPIExecutor`. Every statement runs under the token of
+    the current :func:`cancellation_scope` (if any), limited by the policy
+    timeout: the timeout is rendered for the dialect (PostgreSQL
+    ``SET LOCAL statement_timeout``, MySQL ``MAX_EXECUTION_TIME``, the
+    pyodbc connection timeout for SQL Server, a progress handler for
+    SQLite), and cancelling the token asks the database to abort the
+    statement. No more than ``max_rows`` rows are fetched.
+    """
+
+    def __init__(self, executor: DBAPIExecutor, policy: ExecutionPolicy):
+        """Initialize the guarded executor.
+
+        Args:
+            executor: Executor providing per-thread connections
+            policy: Limits applied to every statement
+        """
+        self.executor = executor
+        self.dialect = executor.dialect
+        self.policy = policy
+
+    @contextmanager
+    def cursor(self, sql: str, params: Optional[Sequence[Any]] = None) -> Iterator[Any]:
+        """Execute a statement under the policy and yield its cursor."""
+        token = current_token() or CancellationToken()
+        timeout_ms = self._timeout_ms(token)
+        token.raise_if_cancelled()
+        deadline = None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+
+        def interrupted() -> bool:
+            return token.cancelled or (deadline is not None and time.monotonic() >= deadline)
+
+        connection = self.executor.connection
+        preludes, statement, epilogues = ([], sql, []) if timeout_ms is None else render_timeout(
+            self.dialect, sql, max(1, math.ceil(timeout_ms))
+        )
+        cursor = connection.cursor()
+        session_changed = False
+        try:
+            with self._guard(connection, timeout_ms, interrupted), \
+                    token.on_cancel(lambda: self._abort(connection, cursor)):
+                try:
+                    for prelude in preludes:
+                        cursor.execute(prelude)
+                        session_changed = True
+                    cursor.execute(statement, tuple(params or ()))
+                    # Fetches run under the guard too
+                    yield cursor
+                except QueryCancelledError:
+                    raise
+                except Exception as e:
+                    if interrupted():
+                        raise self._interruption(token) from e
+                    raise
+        finally:
+            cursor.close()
+            if session_changed and epilogues:
+                self._restore_session(connection, epilogues)
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> QueryResult:
+        """Execute a query and fetch at most ``max_rows`` rows."""
+        if self.policy.max_rows is None:
+            return super().execute(sql, params)
+        rows: List[Tuple[Any, ...]] = []
+        columns: List[str] = []
+        for columns, batch in self.iter_batches(sql, params, batch_size=max(1, self.policy.max_rows)):
+            rows.extend(batch)
+        return QueryResult(columns, rows)
+
+    def iter_batches(
+            self,
+            sql: str,
+            params: Optional[Sequence[Any]] = None,
+            batch_size: int = 1000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """Fetch rows in batches, stopping at ``max_rows`` rows."""
+        remaining = self.policy.max_rows
+        for columns, rows in super().iter_batches(sql, params, batch_size):
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            yield columns, rows
+            if remaining == 0:
+                return
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self.executor.close()
+
+    def _timeout_ms(self, token: CancellationToken) -> Optional[float]:
+        """Get the time a statement may run: the policy timeout or the token deadline."""
+        candidates = [value for value in (self.policy.timeout_ms, token.remaining_ms())
+                      if value is not None]
+        return min(candidates) if candidates else None
+
+    @contextmanager
+    def _guard(
+            self,
+            connection: Any,
+            timeout_ms: Optional[float],
+            interrupted: Callable[[], bool]
+    ) -> Iterator[None]:
+        """Install the driver-level timeout or interruption check of a connection."""
+        if self.dialect == 'sqlite':
+            connection.set_progress_handler(lambda: 1 if interrupted() else 0, SQLITE_CHECK_INTERVAL)
+            try:
+                yield
+            finally:
+                connection.set_progress_handler(None, SQLITE_CHECK_INTERVAL)
+            return
+        if self.dialect == 'mssql' and timeout_ms is not None and hasattr(connection, 'timeout'):
+            # pyodbc query timeout, in whole seconds
+            previous = connection.timeout
+            connection.timeout = max(1, math.ceil(timeout_ms / 1000))
+            try:
+                yield
+            finally:
+                connection.timeout = previous
+            return
+        yield
+
+    @staticmethod
+    def _restore_session(connection: Any, statements: List[str]) -> None:
+        """Run the statements undoing the session settings of a statement."""
+        cursor = connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _abort(connection: Any, cursor: Any) -> None:
+        """Ask the database to abort the statement running on a connection.
+
+        sqlite3 interrupts and psycopg2 cancels through the connection;
+        pyodbc only cancels through the cursor running the statement.
+        """
+        for target, method in ((connection, 'interrupt'), (connection, 'cancel'), (cursor, 'cancel')):
+            abort = getattr(target, method, None)
+            if callable(abort):
+                abort()
+                return
+
+    @staticmethod
+    def _interruption(token: CancellationToken) -> QueryCancelledError:
+        """Build the error for an interrupted statement."""
+        if token.requested:
+            return QueryCancelledError("Query cancelled")
+        return QueryTimeoutError("Query exceeded its timeout")
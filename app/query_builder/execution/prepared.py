@@ -0,0 +1,352 @@
+"""Prepared-statement execution of built queries.
+
+The builder inlines filter values as quoted literals, so every request
+produces new SQL text and the database parses and plans it again. Here
+the literals are lifted into bind parameters: requests of the same shape
+(the same fingerprint) produce the same statement template, which is
+prepared once per connection and reused while it stays in that
+connection's LRU cache.
+"""
+import hashlib
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.query_builder.execution.base import QueryExecutor
+from app.query_builder.execution.dbapi_executor import DBAPIExecutor
+
+# Quoted SQL string literals (with '' escapes)
+LITERAL_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+
+# SQLSTATE of PostgreSQL's "prepared statement does not exist"
+POSTGRES_MISSING_STATEMENT = '26000'
+
+# Placeholder per parameter style; numbered styles are 1-based
+PLACEHOLDERS = {
+    'qmark': lambda n: '?',
+    'format': lambda n: '%s',
+    'numeric': lambda n: f':{n}',
+    'dollar': lambda n: f'${n}',
+    'at': lambda n: f'@P{n}',
+}
+
+
+def parameterize_sql(sql: str, paramstyle: str = 'qmark') -> Tuple[str, List[str]]:
+    """Replace the string literals of a query with bind placeholders.
+
+    Args:
+        sql: SQL produced by the builder
+        paramstyle: Placeholder style (see PLACEHOLDERS)
+
+    Returns:
+        Tuple of (statement template, parameter values)
+    """
+    placeholder = PLACEHOLDERS[paramstyle]
+    params: List[str] = []
+    parts = LITERAL_PATTERN.split(sql)
+    template = []
+    for position, part in enumerate(parts):
+        if position % 2:
+            params.append(part.replace("''", "'"))
+            template.append(placeholder(len(params)))
+        elif paramstyle == 'format':
+            template.append(part.replace('%', '%%'))
+        else:
+            template.append(part)
+    return ''.join(template), params
+
+
+def statement_key(template: str) -> str:
+    """Get the cache key (and handle name suffix) of a statement template."""
+    return hashlib.blake2b(template.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class StatementPreparer(ABC):
+    """Interface for preparing and executing statements on one kind of server."""
+
+    # Placeholder style of prepared statement templates
+    paramstyle = 'qmark'
+
+    @abstractmethod
+    def prepare(self, connection: Any, name: str, template: str, param_count: int) -> Any:
+        """Prepare a statement on a connection and return its handle."""
+        pass
+
+    @abstractmethod
+    def execute(self, cursor: Any, handle: Any, params: Sequence[Any]) -> None:
+        """Execute a prepared statement on a cursor of its connection."""
+        pass
+
+    def deallocate(self, connection: Any, handle: Any) -> None:
+        """Release a prepared statement evicted from the cache."""
+        pass
+
+    def is_missing(self, error: Exception) -> bool:
+        """Whether an execution failed because the server lost the statement."""
+        return False
+
+
+class DriverStatementCache(StatementPreparer):
+    """Preparer relying on the driver's own per-connection statement cache.
+
+    Drivers such as sqlite3 keep compiled statements keyed by SQL text;
+    sending the same parameterized template lets them skip the prepare.
+    The handle is the template itself.
+    """
+
+    def __init__(self, paramstyle: str = 'qmark'):
+        """Initialize the preparer.
+
+        Args:
+            paramstyle: Placeholder style of the driver
+        """
+        self.paramstyle = paramstyle
+
+    def prepare(self, connection: Any, name: str, template: str, param_count: int) -> Any:
+        return template
+
+    def execute(self, cursor: Any, handle: Any, params: Sequence[Any]) -> None:
+        cursor.execute(handle, tuple(params))
+
+
+class PostgresPreparer(StatementPreparer):
+    """Preparer using PostgreSQL PREPARE / EXECUTE / DEALLOCATE."""
+
+    paramstyle = 'dollar'
+
+    def prepare(self, connection: Any, name: str, template: str, param_count: int) -> Any:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"PREPARE {name} AS {template}")
+        finally:
+            cursor.close()
+        return name, param_count
+
+    def execute(self, cursor: Any, handle: Any, params: Sequence[Any]) -> None:
+        name, param_count = handle
+        if not param_count:
+            cursor.execute(f"EXECUTE {name}")
+            return
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * param_count)})", tuple(params))
+
+    def deallocate(self, connection: Any, handle: Any) -> None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"DEALLOCATE {handle[0]}")
+        finally:
+            cursor.close()
+
+    def is_missing(self, error: Exception) -> bool:
+        # SQLSTATE 26000 (invalid_sql_statement_name); psycopg2 and psycopg 3 spellings
+        code = getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+        return code == POSTGRES_MISSING_STATEMENT
+
+
+class SQLServerPreparer(StatementPreparer):
+    """Preparer using SQL Server sp_prepare / sp_execute / sp_unprepare.
+
+    Parameters are declared as NVARCHAR, matching the quoted literals the
+    builder renders.
+    """
+
+    paramstyle = 'at'
+
+    def prepare(self, connection: Any, name: str, template: str, param_count: int) -> Any:
+        declarations = ', '.join(f"@P{n} NVARCHAR(4000)" for n in range(1, param_count + 1))
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SET NOCOUNT ON; DECLARE @handle INT; "
+                "EXEC sp_prepare @handle OUTPUT, ?, ?; SELECT @handle",
+                (declarations or None, template)
+            )
+            return cursor.fetchone()[0], param_count
+        finally:
+            cursor.close()
+
+    def execute(self, cursor: Any, handle: Any, params: Sequence[Any]) -> None:
+        statement_handle, param_count = handle
+        placeholders = ''.join(', ?' for _ in range(param_count))
+        cursor.execute(f"EXEC sp_execute ?{placeholders}", (statement_handle,) + tuple(params))
+
+    def deallocate(self, connection: Any, handle: Any) -> None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("EXEC sp_unprepare ?", (handle[0],))
+        finally:
+            cursor.close()
+
+    def is_missing(self, error: Exception) -> bool:
+        # Error 8179: "Could not find prepared statement with handle %d"
+        return any('(8179)' in str(arg) or 'Could not find prepared statement' in str(arg)
+                   for arg in error.args)
+
+
+# Preparer per executor dialect
+PREPARERS = {
+    'sqlite': lambda: DriverStatementCache('qmark'),
+    'postgres': PostgresPreparer,
+    'mssql': SQLServerPreparer,
+}
+
+
+class PreparedStatementRegistry:
+    """Registry of prepared statement handles per connection.
+
+    Each connection has its own LRU cache of at most ``capacity`` handles,
+    keeping the number of server-side statements within the server's
+    limits. Connections are tracked until :meth:`forget` is called, which
+    the owning executor does when it closes or replaces a connection; a new
+    connection starts with an empty cache, so statements are prepared
+    again after a reconnect.
+    """
+
+    def __init__(self, preparer: StatementPreparer, capacity: int = 256):
+        """Initialize the registry.
+
+        Args:
+            preparer: Preparer for the server kind
+            capacity: Maximum prepared statements per connection
+        """
+        self.preparer = preparer
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reprepared = 0
+        self._caches: Dict[int, Tuple[Any, 'OrderedDict[str, Any]']] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, connection: Any, cursor: Any, template: str, params: Sequence[Any]) -> None:
+        """Execute a statement template on a cursor, preparing it if needed.
+
+        A cached handle that the server no longer knows (e.g. after a
+        server-side reset) is prepared again once before giving up; any
+        other error is raised unchanged, without executing again.
+        """
+        key = statement_key(template)
+        cache = self._cache(connection)
+        handle = cache.get(key)
+        if handle is None:
+            self.misses += 1
+            handle = self._prepare(connection, cache, key, template, len(params))
+            self.preparer.execute(cursor, handle, params)
+            return
+
+        self.hits += 1
+        cache.move_to_end(key)
+        try:
+            self.preparer.execute(cursor, handle, params)
+        except Exception as e:
+            if not self.preparer.is_missing(e):
+                raise
+            del cache[key]
+            self.reprepared += 1
+            handle = self._prepare(connection, cache, key, template, len(params))
+            self.preparer.execute(cursor, handle, params)
+
+    def forget(self, connection: Any) -> None:
+        """Drop the cached handles of a closed or replaced connection."""
+        with self._lock:
+            self._caches.pop(id(connection), None)
+
+    def size(self, connection: Any) -> int:
+        """Get the number of statements cached for a connection."""
+        entry = self._caches.get(id(connection))
+        return len(entry[1]) if entry else 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'reprepared': self.reprepared,
+            'connections': len(self._caches)
+        }
+
+    def _cache(self, connection: Any) -> 'OrderedDict[str, Any]':
+        """Get the handle cache of a connection."""
+        entry = self._caches.get(id(connection))
+        if entry is None or entry[0] is not connection:
+            with self._lock:
+                # The registry holds the connection so its id cannot be reused
+                entry = self._caches[id(connection)] = (connection, OrderedDict())
+        return entry[1]
+
+    def _prepare(
+            self,
+            connection: Any,
+            cache: 'OrderedDict[str, Any]',
+            key: str,
+            template: str,
+            param_count: int
+    ) -> Any:
+        """Prepare a statement and add it to a connection's cache."""
+        while len(cache) >= self.capacity:
+            _, evicted = cache.popitem(last=False)
+            self.evictions += 1
+            try:
+                self.preparer.deallocate(connection, evicted)
+            except Exception:
+                pass  # the server drops it with the connection anyway
+        handle = self.preparer.prepare(connection, f"qb_{key}", template, param_count)
+        cache[key] = handle
+        return handle
+
+
+class PreparedExecutor(QueryExecutor):
+    """Executor that runs builder SQL as cached prepared statements.
+
+    Wraps a :class:`DBAPIExecutor`. SQL passed without parameters has its
+    literals lifted into bind parameters first, so everything built on
+    executors (fan-out, columnar materialization, export) benefits.
+    """
+
+    def __init__(
+            self,
+            executor: DBAPIExecutor,
+            preparer: Optional[StatementPreparer] = None,
+            capacity: int = 256
+    ):
+        """Initialize the prepared executor.
+
+        Args:
+            executor: Executor providing per-thread connections
+            preparer: Preparer for the server kind, chosen from the
+                executor's dialect when omitted
+            capacity: Maximum prepared statements per connection
+        """
+        self.executor = executor
+        self.dialect = executor.dialect
+        factory = PREPARERS.get(executor.dialect, DriverStatementCache)
+        self.registry = PreparedStatementRegistry(preparer or factory(), capacity)
+
+    @contextmanager
+    def cursor(self, sql: str, params: Optional[Sequence[Any]] = None) -> Iterator[Any]:
+        """Execute a statement as a prepared statement and yield its cursor."""
+        if params is None:
+            template, params = parameterize_sql(sql, self.registry.preparer.paramstyle)
+        else:
+            template = sql
+        connection = self.executor.connection
+        cursor = connection.cursor()
+        try:
+            self.registry.execute(connection, cursor, template, params)
+            yield cursor
+        finally:
+            cursor.close()
+
+    def reconnect(self) -> None:
+        """Replace the calling thread's connection; statements are prepared again."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the calling thread's connection and forget its statements."""
+        connection = self.executor.current_connection()
+        if connection is not None:
+            self.registry.forget(connection)
+        self.executor.close()
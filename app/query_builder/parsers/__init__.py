@@ -1,10 +1,30 @@
 """Parameter parsers for the flexible query builder."""
-from app.query_builder.parsers.base import ParserInterface
-from app.query_builder.parsers.select_parser import SelectParser
-from app.query_builder.parsers.group_parser import GroupByParser
-from app.query_builder.parsers.order_parser import OrderByParser
-from app.query_builder.parsers.filter_parser import FilterParser
-from app.query_builder.parsers.factory import RequestParserFactory, LimitOffsetParser
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.parsers.base import ParserInterface
+    from app.query_builder.parsers.select_parser import SelectParser
+    from app.query_builder.parsers.group_parser import GroupByParser
+    from app.query_builder.parsers.order_parser import OrderByParser
+    from app.query_builder.parsers.filter_parser import FilterParser
+    from app.query_builder.parsers.filter_expression import (
+        FilterExpressionCompiler,
+        FilterExpressionParser
+    )
+    from app.query_builder.parsers.factory import RequestParserFactory, LimitOffsetParser
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ParserInterface': 'app.query_builder.parsers.base',
+    'SelectParser': 'app.query_builder.parsers.select_parser',
+    'GroupByParser': 'app.query_builder.parsers.group_parser',
+    'OrderByParser': 'app.query_builder.parsers.order_parser',
+    'FilterParser': 'app.query_builder.parsers.filter_parser',
+    'FilterExpressionCompiler': 'app.query_builder.parsers.filter_expression',
+    'FilterExpressionParser': 'app.query_builder.parsers.filter_expression',
+    'LimitOffsetParser': 'app.query_builder.parsers.factory',
+    'RequestParserFactory': 'app.query_builder.parsers.factory'
+})
 
 __all__ = [
     'ParserInterface',
@@ -12,6 +32,8 @@ __all__ = [
     'GroupByParser',
     'OrderByParser',
     'FilterParser',
+    'FilterExpressionCompiler',
+    'FilterExpressionParser',
     'LimitOffsetParser',
     'RequestParserFactory'
 ]
\ No newline at end of file
@@ -6,6 +6,10 @@ from app.query_builder.parsers.select_parser import SelectParser
 from app.query_builder.parsers.group_parser import GroupByParser
 from app.query_builder.parsers.order_parser import OrderByParser
 from app.query_builder.parsers.filter_parser import FilterParser
+from app.query_builder.parsers.filter_expression import FilterExpressionParser
+from app.query_builder.schema import Catalog, get_catalog
+from app.query_builder.utils.validators import validate_limit_offset
+from app.utils.errors import QueryBuildError
 
 
 class LimitOffsetParser(ParserInterface):
@@ -17,23 +21,36 @@ class LimitOffsetParser(ParserInterface):
 
     def parse(self, key: str, value: str, builder: Any) -> None:
         """Parse a LIMIT or OFFSET parameter and update the builder state."""
+        try:
+            number = int(str(value).strip())
+        except ValueError:
+            number = None
+        if number is None or not validate_limit_offset(number):
+            raise QueryBuildError(f"Invalid {key} '{value}': expected a non-negative integer")
+
         if key == "limit":
-            builder.limit_value = int(value)
+            builder.limit_value = number
         elif key == "offset":
-            builder.offset_value = int(value)
+            builder.offset_value = number
 
 
 class RequestParserFactory:
     """Factory for creating appropriate parameter parsers."""
 
-    def __init__(self):
-        """Initialize the parser factory with all available parsers."""
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the parser factory with all available parsers.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        catalog = catalog or get_catalog()
         self.parsers: List[ParserInterface] = [
-            SelectParser(),
-            GroupByParser(),
-            OrderByParser(),
+            SelectParser(catalog),
+            GroupByParser(catalog),
+            OrderByParser(catalog),
             LimitOffsetParser(),
-            FilterParser()  # FilterParser should be last as it's the most generic
+            FilterExpressionParser(catalog),
+            FilterParser(catalog)  # FilterParser should be last as it's the most generic
         ]
 
     def get_parser(self, key: str) -> Optional[ParserInterface]:
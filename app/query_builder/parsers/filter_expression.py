@@ -0,0 +1,561 @@
+"""Boolean filter expression parser for the flexible query builder.
+
+The ``filter`` parameter accepts nested boolean expressions such as::
+
+    (industry = 32 OR industry = 34) AND NOT c.companyName LIKE 'Acme%'
+
+Expressions are parsed into a tree, simplified (nested AND/OR flattened,
+constants folded, negations pushed into predicates, equalities on the same
+field merged into IN lists) and rendered as WHERE conditions. Each term of
+a top-level AND becomes its own condition so that join analysis, semi-join
+planning and rollup routing see them individually.
+
+Supported predicates: ``=``, ``!=``, ``<>``, ``<``, ``<=``, ``>``, ``>=``,
+``[NOT] LIKE``, ``[NOT] IN (...)``, ``IS [NOT] NULL``, ``TRUE`` and
+``FALSE``. Fields are qualified columns (``alias.column``) or field mapping
+keys; values are quoted strings, numbers or bare words.
+"""
+import re
+from typing import Any, Iterator, List, Optional, Tuple
+
+from app.query_builder.analyzers.partition_pruner import PartitionPruner
+from app.query_builder.parsers.base import ParserInterface
+from app.query_builder.schema import Catalog, ValueCoercer, get_catalog
+from app.query_builder.utils.formatting import format_sql_value
+from app.utils.errors import QueryBuildError
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<op>>=|<=|!=|<>|=|>|<)
+      | (?P<punct>[(),])
+      | (?P<word>[^\s(),'=<>!]+)
+    )
+""", re.VERBOSE)
+
+# Fields allowed after mapping: "<alias>.<column>"
+FIELD_PATTERN = re.compile(r"^[a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*$")
+
+# Comparisons that restrict the partition column range, by the operator
+# PartitionPruner.restrict expects (None for equality)
+PRUNABLE_OPERATORS = {'=': None, '>=': '>=', '>': '>', '<=': '<=', '<': '<'}
+
+KEYWORDS = frozenset({'AND', 'OR', 'NOT', 'IN', 'LIKE', 'IS', 'NULL', 'TRUE', 'FALSE'})
+
+# Operator of the negated predicate (valid under SQL three-valued logic in WHERE)
+NEGATED_OPERATORS = {
+    '=': '!=', '!=': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>',
+    'LIKE': 'NOT LIKE', 'NOT LIKE': 'LIKE'
+}
+
+
+class FilterNode:
+    """Node of a boolean filter expression tree."""
+
+    __slots__ = ()
+
+    def key(self) -> Tuple[Any, ...]:
+        """Get a hashable identity used to deduplicate equivalent nodes."""
+        raise NotImplementedError
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FilterNode) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.key()[1:]!r}"
+
+
+class Constant(FilterNode):
+    """Constant TRUE or FALSE."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('const', self.value)
+
+
+class Comparison(FilterNode):
+    """Comparison of a field with a value."""
+
+    __slots__ = ('field', 'op', 'value')
+
+    def __init__(self, field: str, op: str, value: str):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('cmp', self.field, self.op, self.value)
+
+
+class InList(FilterNode):
+    """Membership test of a field in a list of values."""
+
+    __slots__ = ('field', 'values', 'negated')
+
+    def __init__(self, field: str, values: Tuple[str, ...], negated: bool = False):
+        self.field = field
+        self.values = values
+        self.negated = negated
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('in', self.field, self.values, self.negated)
+
+
+class IsNull(FilterNode):
+    """NULL test of a field."""
+
+    __slots__ = ('field', 'negated')
+
+    def __init__(self, field: str, negated: bool = False):
+        self.field = field
+        self.negated = negated
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('null', self.field, self.negated)
+
+
+class Not(FilterNode):
+    """Negation of an expression."""
+
+    __slots__ = ('child',)
+
+    def __init__(self, child: FilterNode):
+        self.child = child
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('not', self.child.key())
+
+
+class BoolOp(FilterNode):
+    """AND or OR of expressions."""
+
+    __slots__ = ('op', 'children')
+
+    def __init__(self, op: str, children: List[FilterNode]):
+        self.op = op
+        self.children = children
+
+    def key(self) -> Tuple[Any, ...]:
+        return ('bool', self.op, tuple(child.key() for child in self.children))
+
+
+class FilterExpressionCompiler:
+    """Compiler from filter expressions to simplified WHERE conditions."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the filter expression compiler.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+        self.coercer = ValueCoercer(self.catalog)
+
+    def compile(
+            self,
+            expression: str,
+            base_table: Optional[str] = None,
+            base_alias: Optional[str] = None
+    ) -> List[str]:
+        """Compile a filter expression into WHERE conditions to be ANDed.
+
+        Args:
+            expression: Filter expression
+            base_table: Base table name; when given with ``base_alias``,
+                fields are validated against the catalog tables and values
+                against the catalog column types
+            base_alias: Base table alias
+
+        Returns:
+            WHERE conditions; empty when the expression is always true
+
+        Raises:
+            QueryBuildError: If the expression is malformed or refers to
+                unknown fields
+        """
+        return [
+            self.render(term, nested=True)
+            for term in self.terms(expression, base_table, base_alias)
+        ]
+
+    def terms(
+            self,
+            expression: str,
+            base_table: Optional[str] = None,
+            base_alias: Optional[str] = None
+    ) -> List[FilterNode]:
+        """Compile a filter expression into simplified terms to be ANDed.
+
+        Takes the same arguments as :meth:`compile`.
+
+        Returns:
+            Terms of the top-level AND; empty when the expression is always true
+        """
+        tree = self.parse(expression)
+        if base_table and base_alias:
+            tree = self.coerce(tree, base_table, base_alias)
+        tree = self.simplify(tree)
+        if isinstance(tree, Constant) and tree.value:
+            return []
+        return tree.children if isinstance(tree, BoolOp) and tree.op == 'AND' else [tree]
+
+    def parse(self, expression: str) -> FilterNode:
+        """Parse a filter expression into a tree."""
+        tokens = _Tokens(expression)
+        node = self._parse_or(tokens)
+        if tokens.peek() is not None:
+            raise tokens.error("Unexpected")
+        return node
+
+    def coerce(self, node: FilterNode, base_table: str, base_alias: str) -> FilterNode:
+        """Validate the fields and canonicalize the values of an expression tree."""
+        if isinstance(node, (Comparison, InList, IsNull)):
+            self._check_field(node.field, base_table, base_alias)
+        if isinstance(node, Comparison) and 'LIKE' not in node.op:
+            value = self.coercer.coerce(node.field, [node.value], base_table, base_alias)[0]
+            return Comparison(node.field, node.op, value)
+        if isinstance(node, InList):
+            values = self.coercer.coerce(node.field, node.values, base_table, base_alias)
+            return InList(node.field, tuple(values), node.negated)
+        if isinstance(node, Not):
+            return Not(self.coerce(node.child, base_table, base_alias))
+        if isinstance(node, BoolOp):
+            return BoolOp(node.op, [self.coerce(c, base_table, base_alias) for c in node.children])
+        return node
+
+    def simplify(self, node: FilterNode) -> FilterNode:
+        """Simplify an expression tree."""
+        if isinstance(node, Not):
+            return self.simplify(self._negate(node.child))
+        if isinstance(node, InList):
+            return _in_or_comparison(node.field, node.values, node.negated)
+        if not isinstance(node, BoolOp):
+            return node
+
+        is_and = node.op == 'AND'
+        children: List[FilterNode] = []
+        for child in (self.simplify(child) for child in node.children):
+            if isinstance(child, BoolOp) and child.op == node.op:
+                children.extend(child.children)  # flatten
+            elif isinstance(child, Constant):
+                if child.value != is_and:
+                    return child  # FALSE in an AND, TRUE in an OR
+            else:
+                children.append(child)
+
+        children = self._merge_memberships(children, is_and)
+        if any(isinstance(child, Constant) for child in children):
+            return Constant(False)  # contradictory memberships in an AND
+
+        unique = list(dict.fromkeys(children))
+        if not unique:
+            return Constant(is_and)
+        if len(unique) == 1:
+            return unique[0]
+        return BoolOp(node.op, unique)
+
+    def render(self, node: FilterNode, nested: bool = False) -> str:
+        """Render an expression tree as SQL.
+
+        Args:
+            node: Expression tree
+            nested: Whether the result is combined with other conditions,
+                in which case OR expressions are parenthesized
+        """
+        if isinstance(node, Constant):
+            return "1 = 1" if node.value else "1 = 0"
+        if isinstance(node, Comparison):
+            return f"{node.field} {node.op} {format_sql_value(node.value)}"
+        if isinstance(node, InList):
+            values = ', '.join(format_sql_value(value) for value in node.values)
+            return f"{node.field} {'NOT IN' if node.negated else 'IN'} ({values})"
+        if isinstance(node, IsNull):
+            return f"{node.field} IS {'NOT NULL' if node.negated else 'NULL'}"
+        if isinstance(node, Not):
+            return f"NOT ({self.render(node.child)})"
+        rendered = f" {node.op} ".join(self.render(child, nested=True) for child in node.children)
+        return f"({rendered})" if nested and node.op == 'OR' else rendered
+
+    def shape(self, expression: str) -> str:
+        """Describe the structure of an expression without its values."""
+        return self._shape(self.simplify(self.parse(expression)))
+
+    def _shape(self, node: FilterNode) -> str:
+        """Render an expression tree with value placeholders."""
+        if isinstance(node, Comparison):
+            return f"{node.field} {node.op} ?"
+        if isinstance(node, InList):
+            return f"{node.field} {'NOT IN' if node.negated else 'IN'} (?)"
+        if isinstance(node, Not):
+            child = self._shape(node.child)
+            return f"NOT {child}" if isinstance(node.child, BoolOp) else f"NOT ({child})"
+        if isinstance(node, BoolOp):
+            return '(' + f" {node.op} ".join(sorted(self._shape(c) for c in node.children)) + ')'
+        return self.render(node)
+
+    def _check_field(self, field: str, base_table: str, base_alias: str) -> None:
+        """Check that a field refers to a catalog column, like plain filter parameters.
+
+        Columns of tables with column metadata must exist.
+        """
+        alias, _, column = field.partition('.')
+        table_name = self.catalog.table_for_alias(alias, base_table, base_alias)
+        table = self.catalog.table(table_name)
+        if table_name is None or (table is not None and column not in table.column_index):
+            raise QueryBuildError(f"Unknown filter field: {field}")
+
+    @staticmethod
+    def _negate(node: FilterNode) -> FilterNode:
+        """Negate an expression, pushing the negation into its predicates.
+
+        The negation is pushed down before the expression is simplified:
+        contradictions such as ``a = 1 AND a = 2`` are folded to FALSE, which
+        is only right where UNKNOWN (a NULL ``a``) counts as FALSE. Negating
+        the folded FALSE would wrongly accept the rows where ``a`` is NULL.
+        """
+        if isinstance(node, Constant):
+            return Constant(not node.value)
+        if isinstance(node, Not):
+            return node.child
+        if isinstance(node, Comparison):
+            return Comparison(node.field, NEGATED_OPERATORS[node.op], node.value)
+        if isinstance(node, InList):
+            return InList(node.field, node.values, not node.negated)
+        if isinstance(node, IsNull):
+            return IsNull(node.field, not node.negated)
+        # De Morgan's laws hold under SQL three-valued logic
+        return BoolOp('OR' if node.op == 'AND' else 'AND', [Not(child) for child in node.children])
+
+    @staticmethod
+    def _merge_memberships(children: List[FilterNode], is_and: bool) -> List[FilterNode]:
+        """Merge equality and IN predicates on the same field.
+
+        In an OR, ``a = 1 OR a IN (2, 3)`` becomes ``a IN (1, 2, 3)``. In an
+        AND, value sets are intersected (an empty intersection is FALSE) and
+        exclusions are combined: ``a != 1 AND a != 2`` becomes
+        ``a NOT IN (1, 2)``.
+        """
+        merged: List[Any] = []
+        slots = {}
+        for child in children:
+            membership = _membership(child)
+            if membership is None:
+                merged.append(child)
+                continue
+            field, values, negated = membership
+            if negated and not is_and:
+                merged.append(child)  # OR of exclusions stays as written
+                continue
+            slot_key = (field, negated)
+            if slot_key not in slots:
+                slots[slot_key] = len(merged)
+                merged.append([field, list(values), negated])
+                continue
+            slot = merged[slots[slot_key]]
+            if negated or not is_and:
+                # Union: OR of inclusions, AND of exclusions
+                slot[1].extend(value for value in values if value not in slot[1])
+            else:
+                # Intersection: AND of inclusions
+                slot[1] = [value for value in slot[1] if value in values]
+
+        result: List[FilterNode] = []
+        for item in merged:
+            if isinstance(item, list):
+                field, values, negated = item
+                result.append(
+                    _in_or_comparison(field, tuple(values), negated) if values
+                    else Constant(False)
+                )
+            else:
+                result.append(item)
+        return result
+
+    def _parse_or(self, tokens: '_Tokens') -> FilterNode:
+        children = [self._parse_and(tokens)]
+        while tokens.accept_keyword('OR'):
+            children.append(self._parse_and(tokens))
+        return children[0] if len(children) == 1 else BoolOp('OR', children)
+
+    def _parse_and(self, tokens: '_Tokens') -> FilterNode:
+        children = [self._parse_not(tokens)]
+        while tokens.accept_keyword('AND'):
+            children.append(self._parse_not(tokens))
+        return children[0] if len(children) == 1 else BoolOp('AND', children)
+
+    def _parse_not(self, tokens: '_Tokens') -> FilterNode:
+        if tokens.accept_keyword('NOT'):
+            return Not(self._parse_not(tokens))
+        return self._parse_primary(tokens)
+
+    def _parse_primary(self, tokens: '_Tokens') -> FilterNode:
+        if tokens.accept('('):
+            node = self._parse_or(tokens)
+            tokens.expect(')')
+            return node
+        if tokens.accept_keyword('TRUE'):
+            return Constant(True)
+        if tokens.accept_keyword('FALSE'):
+            return Constant(False)
+        return self._parse_predicate(tokens)
+
+    def _parse_predicate(self, tokens: '_Tokens') -> FilterNode:
+        kind, text = tokens.next("Expected a field")
+        if kind != 'word' or text.upper() in KEYWORDS:
+            raise tokens.error("Expected a field at", text)
+        field = self.catalog.field_mappings.get(text, text)
+        if not FIELD_PATTERN.match(field):
+            raise tokens.error("Unknown filter field", text)
+
+        if tokens.accept_keyword('IS'):
+            negated = tokens.accept_keyword('NOT')
+            if not tokens.accept_keyword('NULL'):
+                raise tokens.error("Expected NULL after IS")
+            return IsNull(field, negated)
+
+        negated = tokens.accept_keyword('NOT')
+        if tokens.accept_keyword('IN'):
+            tokens.expect('(')
+            values = [tokens.value()]
+            while tokens.accept(','):
+                values.append(tokens.value())
+            tokens.expect(')')
+            return InList(field, tuple(dict.fromkeys(values)), negated)
+        if tokens.accept_keyword('LIKE'):
+            return Comparison(field, 'NOT LIKE' if negated else 'LIKE', tokens.value())
+        if negated:
+            raise tokens.error("Expected IN or LIKE after NOT")
+
+        kind, op = tokens.next("Expected an operator")
+        if kind != 'op':
+            raise tokens.error("Expected an operator at", op)
+        return Comparison(field, '!=' if op == '<>' else op, tokens.value())
+
+
+class FilterExpressionParser(ParserInterface):
+    """Parser for the ``filter`` boolean expression parameter."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the filter expression parser.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.compiler = FilterExpressionCompiler(catalog)
+        self.partition_pruner = PartitionPruner(self.compiler.catalog)
+
+    def can_parse(self, key: str) -> bool:
+        """Check if this parser can handle the given parameter key."""
+        return key == "filter"
+
+    def parse(self, key: str, value: str, builder: Any) -> None:
+        """Parse a filter expression and update the builder state.
+
+        Top-level comparisons of the base table's partition column with a
+        date join the builder's date range like the equivalent filter
+        parameters (see PartitionPruner); other predicates on the column,
+        such as IN lists or terms of an OR, are rendered as written.
+        """
+        partition_column = self.partition_pruner.partition_column(builder)
+        for term in self.compiler.terms(value, builder.base_table, builder.base_alias):
+            if (
+                    isinstance(term, Comparison)
+                    and term.field == partition_column
+                    and term.op in PRUNABLE_OPERATORS
+                    and self.partition_pruner.restrict(builder, PRUNABLE_OPERATORS[term.op], term.value)
+            ):
+                continue
+            builder.where_conditions.append(self.compiler.render(term, nested=True))
+
+
+class _Tokens:
+    """Token stream over a filter expression."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens: List[Tuple[str, str, int]] = list(self._tokenize(expression))
+        self.position = 0
+
+    def peek(self) -> Optional[Tuple[str, str, int]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self, message: str) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise self.error(message)
+        self.position += 1
+        return token[0], token[1]
+
+    def accept(self, punct: str) -> bool:
+        token = self.peek()
+        if token is not None and token[0] == 'punct' and token[1] == punct:
+            self.position += 1
+            return True
+        return False
+
+    def accept_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        if token is not None and token[0] == 'word' and token[1].upper() == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, punct: str) -> None:
+        if not self.accept(punct):
+            raise self.error(f"Expected '{punct}'")
+
+    def value(self) -> str:
+        """Consume a literal value (quoted string, number or bare word)."""
+        kind, text = self.next("Expected a value")
+        if kind == 'string':
+            return text[1:-1].replace("''", "'")
+        if kind != 'word' or text.upper() in KEYWORDS:
+            raise self.error("Expected a value at", text)
+        return text
+
+    def error(self, message: str, text: Optional[str] = None) -> QueryBuildError:
+        token = self.peek() if text is None else self.tokens[self.position - 1]
+        if token is None:
+            return QueryBuildError(f"Invalid filter expression: {message} at end of input")
+        return QueryBuildError(
+            f"Invalid filter expression: {message} '{token[1]}' (position {token[2]})"
+        )
+
+    @staticmethod
+    def _tokenize(expression: str) -> Iterator[Tuple[str, str, int]]:
+        position = 0
+        end = len(expression.rstrip())
+        while position < end:
+            match = TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                raise QueryBuildError(
+                    f"Invalid filter expression: unexpected character at position {position}"
+                )
+            kind = match.lastgroup
+            yield kind, match.group(kind), match.start(kind)
+            position = match.end()
+
+
+def _membership(node: FilterNode) -> Optional[Tuple[str, Tuple[str, ...], bool]]:
+    """Describe an equality or IN predicate as (field, values, negated)."""
+    if isinstance(node, InList):
+        return node.field, node.values, node.negated
+    if isinstance(node, Comparison) and node.op in ('=', '!='):
+        return node.field, (node.value,), node.op == '!='
+    return None
+
+
+def _in_or_comparison(field: str, values: Tuple[str, ...], negated: bool) -> FilterNode:
+    """Build an IN predicate, or a comparison for a single value."""
+    if len(values) == 1:
+        return Comparison(field, '!=' if negated else '=', values[0])
+    return InList(field, values, negated)
@@ -1,46 +1,114 @@
 """Filter parser for the flexible query builder."""
-from typing import Any
+from typing import Any, List, Optional
 
+from app.query_builder.analyzers.partition_pruner import PartitionPruner
 from app.query_builder.parsers.base import ParserInterface
-from app.utils.constants import FIELD_MAPPINGS, FILTER_OPERATORS, JOIN_PATHS
+from app.query_builder.schema import Catalog, ValueCoercer, get_catalog
+from app.query_builder.utils.formatting import format_sql_value
+from app.query_builder.utils.validators import validate_alias, validate_field_name
+from app.utils.errors import QueryBuildError
 
 
 class FilterParser(ParserInterface):
     """Parser for filter parameters."""
 
+    # Parameters handled by other parsers
+    SPECIAL_PARAMS = frozenset({
+        "select", "exclude", "filter", "groupBy", "orderBy", "limit", "offset"
+    })
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the filter parser.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+        self.coercer = ValueCoercer(self.catalog)
+        self.partition_pruner = PartitionPruner(self.catalog)
+
     def can_parse(self, key: str) -> bool:
         """Check if this parser can handle the given parameter key."""
         # This parser handles any key that:
         # - Is a field mapping
         # - Is a join key
-        # - Is not a special parameter (select, groupBy, orderBy, limit, offset)
-        special_params = {"select", "groupBy", "orderBy", "limit", "offset"}
+        # - Is not a special parameter and references a qualified field
         return (
-                key in FIELD_MAPPINGS
-                or key in self._get_join_keys()
-                or (key not in special_params and "." in key)
+                key in self.catalog.filter_keys
+                or (key not in self.SPECIAL_PARAMS and "." in key)
         )
 
-    def _get_join_keys(self):
-        """Get all keys from JOIN_PATHS."""
-        return JOIN_PATHS.keys()
-
     def parse(self, key: str, value: str, builder: Any) -> None:
-        """Parse a filter parameter and update the builder state."""
+        """Parse a filter parameter and update the builder state.
+
+        Values are validated against the column type from the catalog and
+        rendered in canonical form; IN lists are deduplicated. Range filters
+        on the partition column of the base table are collected into the
+        builder's date range (see PartitionPruner) and rendered after all
+        parameters are parsed.
+
+        Raises:
+            QueryBuildError: If the field is not a valid column known to the
+                catalog, or a value does not match its column type
+        """
         # Convert key to actual field if in mapping
-        field_name = FIELD_MAPPINGS.get(key, key)
+        field_name = self.catalog.field_mappings.get(key, key)
+        self._check_field(key, field_name, builder)
 
-        # Check for operators
-        for op_prefix, sql_op in FILTER_OPERATORS.items():
-            if isinstance(value, str) and value.startswith(f"{op_prefix}:"):
-                filter_value = value[len(op_prefix) + 1:]
-                builder.where_conditions.append(f"{field_name} {sql_op} '{filter_value}'")
+        # Check for operators (values like "gte:100")
+        sql_op, filter_value = None, str(value)
+        if isinstance(value, str) and ':' in value:
+            op_prefix, _, operand = value.partition(':')
+            if op_prefix in self.catalog.filter_operators:
+                sql_op, filter_value = self.catalog.filter_operators[op_prefix], operand
+
+        if field_name == self.partition_pruner.partition_column(builder):
+            if self.partition_pruner.restrict(builder, sql_op, filter_value):
                 return
 
+        if sql_op == 'BETWEEN':
+            bounds = [v.strip() for v in filter_value.split(',')]
+            if len(bounds) != 2:
+                raise QueryBuildError(f"BETWEEN on {key} needs two values: {filter_value}")
+            low, high = (self._coerce(field_name, [bound], builder)[0] for bound in bounds)
+            builder.where_conditions.append(
+                f"{field_name} BETWEEN {format_sql_value(low)} AND {format_sql_value(high)}"
+            )
+            return
+        if sql_op:
+            if sql_op != 'LIKE':
+                filter_value = self._coerce(field_name, [filter_value], builder)[0]
+            builder.where_conditions.append(f"{field_name} {sql_op} {format_sql_value(filter_value)}")
+            return
+
         # Handle comma-separated values (IN clause)
         if isinstance(value, str) and ',' in value:
-            values = [f"'{v.strip()}'" for v in value.split(',')]
-            builder.where_conditions.append(f"{field_name} IN ({', '.join(values)})")
+            values = self._coerce(field_name, [v.strip() for v in value.split(',')], builder)
+            builder.where_conditions.append(
+                f"{field_name} IN ({', '.join(format_sql_value(v) for v in values)})"
+            )
         else:
             # Default to equality
-            builder.where_conditions.append(f"{field_name} = '{value}'")
\ No newline at end of file
+            value = self._coerce(field_name, [str(value)], builder)[0]
+            builder.where_conditions.append(f"{field_name} = {format_sql_value(value)}")
+
+    def _check_field(self, key: str, field_name: str, builder: Any) -> None:
+        """Check that a filter field is a safe reference to a catalog column.
+
+        The field is rendered into the SQL as it is, so both the alias and
+        the column must be plain identifiers. Columns of tables with column
+        metadata must exist; unqualified fields refer to the base table.
+        """
+        alias, _, column = field_name.rpartition('.')
+        if (alias and not validate_alias(alias)) or not validate_field_name(column):
+            raise QueryBuildError(f"Invalid filter field: {key}")
+        table_name = self.catalog.table_for_alias(
+            alias or builder.base_alias, builder.base_table, builder.base_alias
+        )
+        table = self.catalog.table(table_name)
+        if table_name is None or (table is not None and column not in table.column_index):
+            raise QueryBuildError(f"Unknown filter field: {key}")
+
+    def _coerce(self, field_name: str, values: List[str], builder: Any) -> List[str]:
+        """Validate and canonicalize values against the field's column type."""
+        return self.coercer.coerce(field_name, values, builder.base_table, builder.base_alias)
@@ -1,13 +1,21 @@
 """GROUP BY clause parser for the flexible query builder."""
-from typing import Any
+from typing import Any, Optional
 
 from app.query_builder.parsers.base import ParserInterface
-from app.utils.constants import FIELD_MAPPINGS
+from app.query_builder.schema import Catalog, get_catalog
 
 
 class GroupByParser(ParserInterface):
     """Parser for GROUP BY parameters."""
 
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the group by parser.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
     def can_parse(self, key: str) -> bool:
         """Check if this parser can handle the given parameter key."""
         return key == "groupBy"
@@ -18,7 +26,7 @@ class GroupByParser(ParserInterface):
         for field in fields:
             field = field.strip()
             # Map to actual field name if exists in mapping
-            mapped_field = FIELD_MAPPINGS.get(field, field)
+            mapped_field = self.catalog.field_mappings.get(field, field)
 
             # Add to select if not already there
             if mapped_field not in builder.select_fields:
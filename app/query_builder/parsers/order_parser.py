@@ -1,19 +1,28 @@
 """ORDER BY clause parser for the flexible query builder."""
-from typing import Any
+from typing import Any, Optional
 
 from app.query_builder.parsers.base import ParserInterface
-from app.utils.constants import FIELD_MAPPINGS
+from app.query_builder.schema import Catalog, get_catalog
 
 
 class OrderByParser(ParserInterface):
     """Parser for ORDER BY parameters."""
 
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the order by parser.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
     def can_parse(self, key: str) -> bool:
         """Check if this parser can handle the given parameter key."""
         return key == "orderBy"
 
     def parse(self, key: str, value: str, builder: Any) -> None:
         """Parse an ORDER BY parameter and update the builder state."""
+        field_mappings = self.catalog.field_mappings
         fields = value.split(',')
         for field in fields:
             field = field.strip()
@@ -22,12 +31,12 @@ class OrderByParser(ParserInterface):
                 field_name = field_name.strip()
                 direction = direction.strip().upper()
                 # Map field name if it exists in mapping
-                if field_name in FIELD_MAPPINGS:
-                    field_name = FIELD_MAPPINGS[field_name]
+                if field_name in field_mappings:
+                    field_name = field_mappings[field_name]
                 builder.order_by_clauses.append(f"{field_name} {direction}")
             else:
                 # Default to ASC if no direction specified
                 field_name = field.strip()
-                if field_name in FIELD_MAPPINGS:
-                    field_name = FIELD_MAPPINGS[field_name]
+                if field_name in field_mappings:
+                    field_name = field_mappings[field_name]
                 builder.order_by_clauses.append(f"{field_name} ASC")
\ No newline at end of file
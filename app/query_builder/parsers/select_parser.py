@@ -1,24 +1,47 @@
 """SELECT clause parser for the flexible query builder."""
-from typing import Any
+from typing import Any, Optional
 
 from app.query_builder.parsers.base import ParserInterface
+from app.query_builder.schema import Catalog, ProjectionResolver, get_catalog
 from app.query_builder.utils.formatting import split_and_trim
-from app.utils.constants import FIELD_MAPPINGS
 
 
 class SelectParser(ParserInterface):
-    """Parser for SELECT parameters."""
+    """Parser for SELECT and column exclusion parameters."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the select parser.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+        self.projection_resolver = ProjectionResolver(self.catalog)
 
     def can_parse(self, key: str) -> bool:
         """Check if this parser can handle the given parameter key."""
-        return key == "select"
+        return key in ("select", "exclude")
 
     def parse(self, key: str, value: str, builder: Any) -> None:
-        """Parse a SELECT parameter and update the builder state."""
+        """Parse a SELECT or exclude parameter and update the builder state."""
         fields = split_and_trim(value)
+        field_mappings = self.catalog.field_mappings
+
+        if key == "exclude":
+            for field in fields:
+                builder.excluded_fields.append(field_mappings.get(field, field))
+            return
+
         for field in fields:
+            # Expand projection profiles like @summary or @c.summary
+            if self.projection_resolver.is_profile(field):
+                for profile_field in self.projection_resolver.expand(
+                        field, builder.base_table, builder.base_alias
+                ):
+                    if profile_field not in builder.select_fields:
+                        builder.select_fields.append(profile_field)
             # Map to actual field name if exists in mapping
-            if field in FIELD_MAPPINGS:
-                builder.select_fields.append(FIELD_MAPPINGS[field])
+            elif field in field_mappings:
+                builder.select_fields.append(field_mappings[field])
             else:
-                builder.select_fields.append(field)
\ No newline at end of file
+                builder.select_fields.append(field)
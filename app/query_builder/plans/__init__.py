@@ -0,0 +1,35 @@
+"""Query plan caching and precompilation for the flexible query builder."""
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.plans.cache import PlanCache, QueryPlan, plan_key, request_key
+    from app.query_builder.plans.store import PlanStore, PlanStoreError, write_plan_store
+    from app.query_builder.plans.precompile import PrecompileReport, compile_corpus
+    from app.query_builder.plans.shared import SharedPlanCache
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'PlanCache': 'app.query_builder.plans.cache',
+    'QueryPlan': 'app.query_builder.plans.cache',
+    'plan_key': 'app.query_builder.plans.cache',
+    'request_key': 'app.query_builder.plans.cache',
+    'PlanStore': 'app.query_builder.plans.store',
+    'PlanStoreError': 'app.query_builder.plans.store',
+    'write_plan_store': 'app.query_builder.plans.store',
+    'PrecompileReport': 'app.query_builder.plans.precompile',
+    'compile_corpus': 'app.query_builder.plans.precompile',
+    'SharedPlanCache': 'app.query_builder.plans.shared'
+})
+
+__all__ = [
+    'PlanCache',
+    'QueryPlan',
+    'plan_key',
+    'request_key',
+    'PlanStore',
+    'PlanStoreError',
+    'write_plan_store',
+    'PrecompileReport',
+    'compile_corpus',
+    'SharedPlanCache'
+]
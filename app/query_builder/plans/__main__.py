@@ -0,0 +1,86 @@
+"""Precompile a request corpus into a plan store.
+
+Usage::
+
+    python -m app.query_builder.plans CORPUS --output PATH [--workers N]
+        [--dialect DIALECT] [--route-partitions] ...
+
+Run at build/deploy time with a captured request log (one JSON object of
+request parameters per line). Workers load the store at startup with
+PlanCache.warm so new processes skip parsing for known requests.
+"""
+import argparse
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.query_builder.analyzers.index_advisor import read_request_log
+from app.query_builder.analyzers.join_analyzer import FILTER_JOIN_POLICIES
+from app.query_builder.plans.precompile import BUILDER_SETTINGS, compile_corpus
+from app.query_builder.schema import DEFAULT_PROJECTION
+from app.query_builder.schema.catalog import CatalogError
+from app.query_builder.utils.formatting import split_and_trim
+
+
+# Command line option of every builder setting (see BUILDER_SETTINGS)
+SETTING_OPTIONS: Dict[str, Tuple[Tuple[str, ...], Dict[str, Any]]] = {
+    'base_table': (('--base-table',), {'default': "ciqTransaction"}),
+    'base_alias': (('--base-alias',), {'default': "tr"}),
+    'default_projection': (('--projection',), {
+        'default': DEFAULT_PROJECTION, 'metavar': 'PROFILE', 'help': "default projection profile of the workers"
+    }),
+    'use_rollups': (('--no-rollups',), {
+        'action': 'store_false', 'help': "workers do not use rollups"
+    }),
+    'filter_join_policy': (('--filter-join-policy',), {
+        'default': 'join', 'choices': FILTER_JOIN_POLICIES
+    }),
+    'max_rows': (('--max-rows',), {
+        'type': int, 'help': "row cap of the workers' execution policy"
+    }),
+    'dialect': (('--dialect',), {
+        'choices': ('postgres', 'mysql', 'mssql', 'sqlite'), 'help': "database dialect of the workers"
+    }),
+    'route_partitions': (('--route-partitions',), {
+        'action': 'store_true', 'help': "workers route queries to partition tables"
+    }),
+    'union_tables': (('--union-tables',), {
+        'type': split_and_trim, 'default': (), 'metavar': 'TABLES',
+        'help': "comma-separated tables the workers read along with the base table"
+    }),
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compile the corpus and write the plan store."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus', help="JSON-lines file of request parameters")
+    parser.add_argument('--output', required=True, help="plan store path")
+    parser.add_argument('--workers', type=int, help="worker processes (defaults to CPU count)")
+    parser.add_argument('--per-shape', type=int, default=32,
+                        help="distinct requests kept per shape, 0 for all")
+    parser.add_argument('--catalog', help="catalog file (defaults to the packaged catalog)")
+    for name in BUILDER_SETTINGS:
+        flags, options = SETTING_OPTIONS[name]
+        parser.add_argument(*flags, dest=name, **options)
+    args = parser.parse_args(argv)
+
+    try:
+        report = compile_corpus(
+            read_request_log(args.corpus),
+            args.output,
+            workers=args.workers,
+            per_shape=args.per_shape,
+            catalog_path=args.catalog,
+            **{name: getattr(args, name) for name in BUILDER_SETTINGS}
+        )
+    except (CatalogError, OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Wrote {report.plans} plans for {report.shapes} shapes to {args.output} "
+          f"({report.requests} requests, {report.unique} distinct, {report.failed} failed)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
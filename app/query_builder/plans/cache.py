@@ -0,0 +1,402 @@
+"""In-process cache of parsed request plans.
+
+Parsing a request (parser dispatch, value coercion, field and join
+analysis, rollup routing, semi-join planning) is the expensive part of
+building a query. A :class:`QueryPlan` captures the components a builder
+holds after parsing, so a builder seeing the same request again can adopt
+them instead of parsing. Joins, semi-joins and rollups are recorded by
+catalog key and resolved against the builder's catalog when applied.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.query_builder.analyzers.partition_pruner import Bound, DateRange
+from app.query_builder.analyzers.rollup_router import RollupRewrite
+from app.query_builder.schema import Catalog, JoinRecord
+from app.query_builder.stats.fingerprint import QueryFingerprint
+from app.query_builder.utils.formatting import split_and_trim
+
+# Size in bytes of the request keys (also the key width of plan stores)
+PLAN_KEY_SIZE = 16
+
+# Builder arguments that affect parsing, and therefore plan keys; plan
+# stores are precompiled for a value of each (see precompile.compile_corpus).
+# max_rows stands for the row cap of the builder's execution policy.
+PLAN_SETTINGS = ('base_table', 'base_alias', 'default_projection', 'use_rollups',
+                 'filter_join_policy', 'max_rows', 'dialect', 'route_partitions', 'union_tables')
+
+
+def plan_key(params: Dict[str, Any], builder: Any) -> bytes:
+    """Get the cache key of a request for a builder.
+
+    The key covers the parameters in request order (their order decides
+    the order of the generated conditions), the builder settings that
+    affect parsing and the catalog content digest, so plans built for
+    another configuration or catalog (including an edited catalog that kept
+    its version after a reload) never match.
+
+    Args:
+        params: Request parameters as passed to parse_request_params
+        builder: FlexibleQueryBuilder the request is parsed by
+
+    Returns:
+        Fixed-size binary key
+    """
+    return _digest([_settings(builder), list(params.items())])
+
+
+def request_key(params: Dict[str, Any], builder: Any) -> bytes:
+    """Get a key shared by all requests a builder answers with the same rows.
+
+    Unlike :func:`plan_key`, the key does not depend on how a request is
+    spelled: parameter order, whitespace around comma-separated values,
+    field mapping aliases versus the fields they map to and the order of
+    IN list values are normalized. Parameters no parser handles are left
+    out. Only the relative order of ``select`` and ``groupBy`` is kept, as
+    it decides the column order of grouped results.
+
+    Args:
+        params: Request parameters as passed to parse_request_params
+        builder: FlexibleQueryBuilder the request is parsed by
+
+    Returns:
+        Fixed-size binary key
+    """
+    catalog = builder.catalog
+    field_mappings = catalog.field_mappings
+    entries = []
+    for key, value in params.items():
+        if builder.parser_factory.get_parser(key) is None:
+            continue
+        if key in ('select', 'exclude', 'groupBy'):
+            value = [field_mappings.get(field, field) for field in split_and_trim(str(value))]
+        elif key == 'orderBy':
+            value = [_order_term(term, field_mappings) for term in str(value).split(',')]
+        elif key in ('limit', 'offset'):
+            value = str(value).strip()
+            value = int(value) if value.isdigit() else value
+        elif key != 'filter':
+            key = field_mappings.get(key, key)
+            value = _filter_value(value, catalog)
+        entries.append((key, value))
+    entries.sort(key=lambda entry: (entry[0], json.dumps(entry[1], default=str)))
+    order_sensitive = [key for key in params if key in ('select', 'groupBy')]
+    return _digest([_settings(builder), order_sensitive, entries])
+
+
+def _settings(builder: Any) -> Tuple[Any, ...]:
+    """Get the builder settings that affect parsing."""
+    return (
+        builder.catalog.digest,
+        *(_setting(builder, name) for name in PLAN_SETTINGS)
+    )
+
+
+def _setting(builder: Any, name: str) -> Any:
+    """Get the value of one of the PLAN_SETTINGS of a builder."""
+    if name == 'max_rows':
+        return None if builder.policy is None else builder.policy.max_rows
+    return getattr(builder, name)
+
+
+def _digest(document: Any) -> bytes:
+    """Hash a JSON-serializable document into a request key."""
+    encoded = json.dumps(document, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=PLAN_KEY_SIZE).digest()
+
+
+def _order_term(term: str, field_mappings: Any) -> List[str]:
+    """Normalize one ORDER BY term to [field, direction]."""
+    field, _, direction = term.partition(':')
+    field = field.strip()
+    return [field_mappings.get(field, field), direction.strip().upper() or 'ASC']
+
+
+def _filter_value(value: Any, catalog: Catalog) -> Any:
+    """Normalize a filter value; IN lists become sorted distinct values."""
+    value = str(value)
+    op_prefix, _, operand = value.partition(':')
+    if operand and op_prefix in catalog.filter_operators:
+        # BETWEEN bounds keep their order; other operands are used verbatim
+        if catalog.filter_operators[op_prefix] == 'BETWEEN':
+            return [op_prefix, split_and_trim(operand)]
+        return [op_prefix, operand]
+    if ',' in value:
+        return sorted(set(split_and_trim(value)))
+    return value
+
+
+def _bound_state(bound: Optional[Bound]) -> Optional[List[Any]]:
+    """Get the JSON state of a date range bound."""
+    return None if bound is None else [bound[0].isoformat(), bound[1]]
+
+
+class QueryPlan:
+    """Parsed components of one request, independent of any builder."""
+
+    __slots__ = ('state',)
+
+    def __init__(self, state: Dict[str, Any]):
+        """Initialize the plan.
+
+        Args:
+            state: JSON-serializable component state (see :meth:`capture`)
+        """
+        self.state = state
+
+    @classmethod
+    def capture(cls, builder: Any) -> 'QueryPlan':
+        """Capture the components of a builder that has parsed a request."""
+        rollup = builder.rollup
+        fingerprint = builder.fingerprint
+        return cls({
+            'select_fields': list(builder.select_fields),
+            'excluded_fields': list(builder.excluded_fields),
+            'where_conditions': list(builder.where_conditions),
+            'group_by_fields': list(builder.group_by_fields),
+            'order_by_clauses': list(builder.order_by_clauses),
+            'limit_value': builder.limit_value,
+            'offset_value': builder.offset_value,
+            'joins': [join.key for join in builder.joins],
+            'semi_joins': [
+                {
+                    'key': semi_join['key'],
+                    'joins': [join.key for join in semi_join['joins']],
+                    'conditions': list(semi_join['conditions']),
+                    'mode': semi_join['mode'],
+                    'correlation': semi_join['correlation']
+                }
+                for semi_join in builder.semi_joins
+            ],
+            'rollup': None if rollup is None else {
+                'name': rollup.table,
+                'select_fields': list(rollup.select_fields),
+                'where_conditions': list(rollup.where_conditions),
+                'group_by_fields': list(rollup.group_by_fields),
+                'order_by_clauses': list(rollup.order_by_clauses)
+            },
+            'partition_table': builder.partition_table,
+            'date_range': None if builder.date_range is None else [
+                _bound_state(builder.date_range.lower),
+                _bound_state(builder.date_range.upper)
+            ],
+            'fingerprint': None if fingerprint is None else [
+                fingerprint.filters,
+                fingerprint.select,
+                fingerprint.joins,
+                fingerprint.group_by,
+                fingerprint.order_by,
+                fingerprint.paging
+            ]
+        })
+
+    def apply(self, builder: Any) -> None:
+        """Set a builder's components from the plan.
+
+        Raises:
+            KeyError: If a join or rollup of the plan is not in the
+                builder's catalog
+        """
+        state = self.state
+        catalog = builder.catalog
+        joins = [self._join(catalog, key) for key in state['joins']]
+        semi_joins = [
+            {
+                'key': semi_join['key'],
+                'joins': [self._join(catalog, key) for key in semi_join['joins']],
+                'conditions': list(semi_join['conditions']),
+                'mode': semi_join['mode'],
+                'correlation': (
+                    None if semi_join['correlation'] is None
+                    else tuple(semi_join['correlation'])
+                )
+            }
+            for semi_join in state['semi_joins']
+        ]
+        rollup = self._rollup(catalog, builder.base_table, state['rollup'])
+
+        builder.select_fields = list(state['select_fields'])
+        builder.excluded_fields = list(state['excluded_fields'])
+        builder.where_conditions = list(state['where_conditions'])
+        builder.group_by_fields = list(state['group_by_fields'])
+        builder.order_by_clauses = list(state['order_by_clauses'])
+        builder.limit_value = state['limit_value']
+        builder.offset_value = state['offset_value']
+        builder.joins = joins
+        builder.semi_joins = semi_joins
+        builder.rollup = rollup
+        builder.partition_table = state.get('partition_table')
+        builder.date_range = self._date_range(state.get('date_range'))
+        builder.fingerprint = self._fingerprint(state['fingerprint'])
+
+    def encode(self) -> bytes:
+        """Serialize the plan to compact JSON."""
+        return json.dumps(self.state, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def decode(cls, payload: bytes) -> 'QueryPlan':
+        """Deserialize a plan written by :meth:`encode`."""
+        return cls(json.loads(payload))
+
+    @property
+    def shape(self) -> Optional[str]:
+        """Get the fingerprint key of the planned request."""
+        fingerprint = self._fingerprint(self.state['fingerprint'])
+        return None if fingerprint is None else fingerprint.key
+
+    @staticmethod
+    def _join(catalog: Catalog, key: str) -> JoinRecord:
+        """Get the join record of a catalog join."""
+        return catalog.join_records[key]
+
+    @staticmethod
+    def _rollup(
+            catalog: Catalog,
+            base_table: str,
+            state: Optional[Dict[str, Any]]
+    ) -> Optional[RollupRewrite]:
+        """Rebuild the rollup rewrite of a plan."""
+        if state is None:
+            return None
+        for rollup in catalog.rollups.get(base_table, ()):
+            if rollup.name == state['name']:
+                return RollupRewrite(
+                    rollup,
+                    list(state['select_fields']),
+                    list(state['where_conditions']),
+                    list(state['group_by_fields']),
+                    list(state['order_by_clauses'])
+                )
+        raise KeyError(state['name'])
+
+    @staticmethod
+    def _date_range(state: Optional[List[Any]]) -> Optional[DateRange]:
+        """Rebuild the partition column range of a plan."""
+        if state is None:
+            return None
+        lower, upper = (
+            None if bound is None else (datetime.fromisoformat(bound[0]), bound[1])
+            for bound in state
+        )
+        return DateRange(lower, upper)
+
+    @staticmethod
+    def _fingerprint(state: Optional[List[Any]]) -> Optional[QueryFingerprint]:
+        """Rebuild the fingerprint of a plan."""
+        if state is None:
+            return None
+        filters, select, joins, group_by, order_by, paging = state
+        return QueryFingerprint(
+            filters=tuple(tuple(item) for item in filters),
+            select=tuple(select),
+            joins=tuple(joins),
+            group_by=tuple(group_by),
+            order_by=tuple(order_by),
+            paging=tuple(paging)
+        )
+
+
+class PlanCache:
+    """Thread-safe LRU cache of query plans keyed by :func:`plan_key`.
+
+    Pass one cache to every builder of a worker; it can be prepopulated
+    from a plan store written by the precompile CLI so the first requests
+    of a new worker skip parsing. With a shared cache, plans missing
+    locally are looked up in (and new plans published to) the cache shared
+    by all workers of the host.
+    """
+
+    def __init__(self, capacity: int = 10000, shared: Optional[Any] = None):
+        """Initialize the cache.
+
+        Args:
+            capacity: Maximum number of cached plans
+            shared: SharedPlanCache of the host's worker processes
+        """
+        self.capacity = capacity
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._plans: 'OrderedDict[bytes, QueryPlan]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[QueryPlan]:
+        """Get the plan of a request key, or None."""
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self.hits += 1
+                self._plans.move_to_end(key)
+                return plan
+
+        payload = self.shared.get(key) if self.shared is not None else None
+        if payload is None:
+            self.misses += 1
+            return None
+        self.shared_hits += 1
+        plan = QueryPlan.decode(payload)
+        self._insert(key, plan)
+        return plan
+
+    def put(self, key: bytes, plan: QueryPlan) -> None:
+        """Add a plan, evicting the least recently used one when full."""
+        self._insert(key, plan)
+        if self.shared is not None:
+            self.shared.put(key, plan.encode())
+
+    def discard(self, key: bytes) -> None:
+        """Remove the plan of a request key, if cached."""
+        with self._lock:
+            self._plans.pop(key, None)
+        if self.shared is not None:
+            self.shared.discard(key)
+
+    def warm(self, store: Any, catalog: Optional[Catalog] = None) -> int:
+        """Prepopulate the cache from a plan store.
+
+        Args:
+            store: Open PlanStore
+            catalog: Catalog of the builders using the cache; a store
+                written for another catalog content is skipped
+
+        Returns:
+            Number of plans loaded
+        """
+        if catalog is not None and store.catalog_digest != catalog.digest:
+            return 0
+        entries: List[Tuple[bytes, QueryPlan]] = []
+        for key, payload in store.items():
+            if len(entries) >= self.capacity:
+                break
+            entries.append((key, QueryPlan.decode(payload)))
+        with self._lock:
+            for key, plan in entries:
+                self._plans[key] = plan
+            while len(self._plans) > self.capacity:
+                self._plans.popitem(last=False)
+        return len(entries)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'size': len(self._plans)
+        }
+
+    def _insert(self, key: bytes, plan: QueryPlan) -> None:
+        """Add a plan to the in-process cache."""
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.capacity:
+                self._plans.popitem(last=False)
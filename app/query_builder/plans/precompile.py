@@ -0,0 +1,163 @@
+"""Precompilation of a request corpus into a plan store.
+
+Captured request parameters are deduplicated, parsed across a process
+pool and reduced to the most frequent requests of every shape before the
+plans are written to a store that workers load at startup.
+"""
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.query_builder.plans.cache import PLAN_SETTINGS, QueryPlan, plan_key
+from app.query_builder.plans.store import write_plan_store
+from app.query_builder.schema import Catalog, get_catalog
+from app.query_builder.schema.loader import load_catalog_cached
+from app.utils.errors import QueryBuildError
+
+logger = logging.getLogger(__name__)
+
+# Builder arguments that affect parsing (and therefore plan keys)
+BUILDER_SETTINGS = PLAN_SETTINGS
+
+# Per-process state of pool workers (set by _init_worker)
+_worker_catalog: Optional[Catalog] = None
+_worker_settings: Dict[str, Any] = {}
+
+
+class PrecompileReport:
+    """Counters of one precompilation run."""
+
+    __slots__ = ('requests', 'unique', 'failed', 'shapes', 'plans')
+
+    def __init__(self, requests: int, unique: int, failed: int, shapes: int, plans: int):
+        self.requests = requests
+        self.unique = unique
+        self.failed = failed
+        self.shapes = shapes
+        self.plans = plans
+
+    def to_dict(self) -> Dict[str, int]:
+        """Get the counters as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def compile_request(
+        params: Dict[str, Any],
+        catalog: Catalog,
+        settings: Dict[str, Any]
+) -> Tuple[bytes, str, bytes]:
+    """Parse one request and encode its plan.
+
+    Args:
+        params: Request parameters
+        catalog: Schema catalog
+        settings: Builder arguments (see BUILDER_SETTINGS)
+
+    Returns:
+        Tuple of (request key, shape key, encoded plan)
+
+    Raises:
+        QueryBuildError: If the request is invalid
+    """
+    from app.query_builder.core.builder import FlexibleQueryBuilder
+    from app.query_builder.execution.policy import ExecutionPolicy
+
+    arguments = dict(settings)
+    max_rows = arguments.pop('max_rows', None)
+    if max_rows is not None:
+        arguments['policy'] = ExecutionPolicy(max_rows=max_rows)
+    builder = FlexibleQueryBuilder('dbo', catalog=catalog, **arguments)
+    builder.parse_request_params(params)
+    # Make sure the plan also builds, so broken requests are not stored
+    builder.build_query()
+    return plan_key(params, builder), builder.fingerprint.key, QueryPlan.capture(builder).encode()
+
+
+def compile_corpus(
+        corpus: Iterable[Dict[str, Any]],
+        output: str,
+        workers: Optional[int] = None,
+        per_shape: int = 32,
+        catalog_path: Optional[str] = None,
+        **settings: Any
+) -> PrecompileReport:
+    """Compile a request corpus into a plan store.
+
+    Args:
+        corpus: Request parameter dictionaries, e.g. from a request log
+        output: Path of the plan store to write
+        workers: Number of worker processes, defaults to the CPU count
+        per_shape: Most frequent distinct requests kept per shape;
+            0 keeps all of them
+        catalog_path: Catalog file, defaults to the packaged catalog
+        **settings: Builder arguments (see BUILDER_SETTINGS)
+
+    Returns:
+        Counters of the run
+    """
+    unknown = set(settings) - set(BUILDER_SETTINGS)
+    if unknown:
+        raise TypeError(f"Unknown builder settings: {', '.join(sorted(unknown))}")
+
+    # Identical requests are compiled once; their count ranks them within a shape
+    counts: Counter = Counter()
+    requests: Dict[str, Dict[str, Any]] = {}
+    total = 0
+    for params in corpus:
+        total += 1
+        identity = json.dumps(list(params.items()), separators=(',', ':'), default=str)
+        counts[identity] += 1
+        requests.setdefault(identity, params)
+
+    identities = list(requests)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(catalog_path, settings)
+    ) as pool:
+        chunksize = max(1, len(identities) // ((workers or 4) * 8))
+        results = list(pool.map(_compile_worker, (requests[i] for i in identities),
+                                chunksize=chunksize))
+
+    by_shape: Dict[str, List[Tuple[int, bytes, bytes]]] = {}
+    failed = 0
+    for identity, result in zip(identities, results):
+        if result is None:
+            failed += counts[identity]
+            continue
+        key, shape, payload = result
+        by_shape.setdefault(shape, []).append((counts[identity], key, payload))
+
+    entries: List[Tuple[int, bytes, bytes]] = []
+    for plans in by_shape.values():
+        plans.sort(key=lambda plan: -plan[0])
+        entries.extend(plans[:per_shape] if per_shape else plans)
+    entries.sort(key=lambda entry: -entry[0])
+
+    catalog = load_catalog_cached(catalog_path) if catalog_path else get_catalog()
+    written = write_plan_store(output, ((key, payload) for _, key, payload in entries), {
+        'catalog_version': catalog.version,
+        'catalog_digest': catalog.digest,
+        'settings': settings,
+        'requests': total,
+        'shapes': len(by_shape)
+    })
+    return PrecompileReport(total, len(identities), failed, len(by_shape), written)
+
+
+def _init_worker(catalog_path: Optional[str], settings: Dict[str, Any]) -> None:
+    """Load the catalog once per pool worker."""
+    global _worker_catalog, _worker_settings
+    _worker_catalog = load_catalog_cached(catalog_path) if catalog_path else get_catalog()
+    _worker_settings = settings
+
+
+def _compile_worker(params: Dict[str, Any]) -> Optional[Tuple[bytes, str, bytes]]:
+    """Compile one request in a pool worker; invalid requests yield None."""
+    try:
+        return compile_request(params, _worker_catalog, _worker_settings)
+    except QueryBuildError as e:
+        logger.debug(f"Skipping invalid request {params}: {e}")
+        return None
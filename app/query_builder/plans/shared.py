@@ -0,0 +1,273 @@
+"""Plan cache shared by the worker processes of a host.
+
+The cache is a set-associative hash table in a memory-mapped file. Every
+worker maps the same file, so a plan compiled by one worker is found by
+all the others. Layout::
+
+    page 0   header: magic, format, catalog tag, set count, ways, slot size
+    slots    ``sets * ways`` fixed-size slots: sequence, key, length, payload
+
+Writers take the stripe lock of the set they write, an in-process lock
+plus a POSIX byte-range lock on the header page, so writers of different
+sets never wait for each other. Readers take no lock: each slot carries a
+sequence number that is odd while the slot is written (a seqlock), and a
+reader that sees it change discards what it read.
+
+The header records which catalog the entries were built for; opening the
+cache with another catalog clears it. Plan keys include the catalog
+content digest as well, so workers still running an older catalog never
+read plans built for a newer one.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import random
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.query_builder.plans.cache import PLAN_KEY_SIZE
+from app.query_builder.schema import Catalog
+
+MAGIC = b'QBSHARE\x00'
+
+# Bumped whenever the file layout changes
+SHARED_FORMAT = 1
+
+HEADER = struct.Struct('<8sI16sIII')
+SLOT_HEADER = struct.Struct(f'<Q{PLAN_KEY_SIZE}sI')
+SEQUENCE = struct.Struct('<Q')
+
+# Slots start on the first page; the rest of page 0 holds the stripe lock bytes
+SLOTS_OFFSET = mmap.PAGESIZE
+
+# Byte of page 0 locked while the cache is created or cleared
+GLOBAL_LOCK_BYTE = HEADER.size
+
+
+def catalog_tag(catalog: Catalog) -> bytes:
+    """Get the tag identifying the catalog a shared cache holds plans for."""
+    identity = f"{catalog.digest}:{catalog.source}"
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=16).digest()
+
+
+class SharedPlanCache:
+    """Cross-process cache of encoded plans backed by a memory-mapped file.
+
+    Use it as the ``shared`` level of a :class:`PlanCache`; it stores the
+    encoded plans, the per-process cache keeps them decoded.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            catalog: Catalog,
+            sets: int = 2048,
+            ways: int = 4,
+            slot_size: int = 4096,
+            stripes: int = 64
+    ):
+        """Open or create a shared plan cache.
+
+        Args:
+            path: Cache file, shared by all workers of a host
+            catalog: Catalog of the workers; a cache built for another
+                catalog is cleared
+            sets: Number of hash sets
+            ways: Slots per set
+            slot_size: Bytes per slot; plans that do not fit are not shared
+            stripes: Number of writer locks
+
+        Raises:
+            ValueError: If the file exists with a different geometry
+        """
+        if stripes > SLOTS_OFFSET - GLOBAL_LOCK_BYTE - 1:
+            raise ValueError(f"At most {SLOTS_OFFSET - GLOBAL_LOCK_BYTE - 1} stripes are supported")
+        self.path = path
+        self.sets = sets
+        self.ways = ways
+        self.slot_size = slot_size
+        self.stripes = stripes
+        self.capacity = slot_size - SLOT_HEADER.size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.oversized = 0
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+
+        size = SLOTS_OFFSET + sets * ways * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, GLOBAL_LOCK_BYTE)
+            try:
+                self._open(size, catalog_tag(catalog))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, GLOBAL_LOCK_BYTE)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Get the encoded plan of a request key, or None."""
+        first = self._set_index(key) * self.ways
+        for slot in range(first, first + self.ways):
+            payload = self._read(slot, key)
+            if payload is not None:
+                self.hits += 1
+                return payload
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, payload: bytes) -> bool:
+        """Store an encoded plan.
+
+        Returns:
+            False if the plan is too large for a slot
+        """
+        if len(payload) > self.capacity:
+            self.oversized += 1
+            return False
+        set_index = self._set_index(key)
+        first = set_index * self.ways
+        with self._stripe(set_index):
+            target = None
+            for slot in range(first, first + self.ways):
+                slot_key, length = self._slot_key(slot)
+                if slot_key == key:
+                    target = slot
+                    break
+                if target is None and not length:
+                    target = slot
+            if target is None:
+                # Random replacement within the set
+                target = first + random.randrange(self.ways)
+                self.evictions += 1
+            self._write(target, key, payload)
+        self.stores += 1
+        return True
+
+    def discard(self, key: bytes) -> None:
+        """Remove the plan of a request key, if stored."""
+        set_index = self._set_index(key)
+        first = set_index * self.ways
+        with self._stripe(set_index):
+            for slot in range(first, first + self.ways):
+                if self._slot_key(slot)[0] == key:
+                    self._write(slot, bytes(PLAN_KEY_SIZE), b'')
+
+    def clear(self) -> None:
+        """Remove all plans."""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, GLOBAL_LOCK_BYTE)
+        try:
+            self._clear()
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, GLOBAL_LOCK_BYTE)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters of this process."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'oversized': self.oversized
+        }
+
+    def close(self) -> None:
+        """Unmap the cache file."""
+        self._map.close()
+        os.close(self._fd)
+
+    def __enter__(self) -> 'SharedPlanCache':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _open(self, size: int, tag: bytes) -> None:
+        """Map the cache file, initializing or clearing it as needed."""
+        current_size = os.fstat(self._fd).st_size
+        if current_size == 0:
+            os.ftruncate(self._fd, size)
+        elif current_size != size:
+            raise ValueError(f"Shared plan cache {self.path} has a different size; "
+                             f"remove it or use another path")
+        self._map = mmap.mmap(self._fd, size)
+
+        magic, shared_format, stored_tag, sets, ways, slot_size = HEADER.unpack_from(self._map, 0)
+        if magic == MAGIC and (sets, ways, slot_size) != (self.sets, self.ways, self.slot_size):
+            self._map.close()
+            raise ValueError(f"Shared plan cache {self.path} has a different geometry; "
+                             f"remove it or use another path")
+        if magic != MAGIC or shared_format != SHARED_FORMAT or stored_tag != tag:
+            # New file, older layout or another catalog: start empty
+            self._clear()
+            HEADER.pack_into(self._map, 0, MAGIC, SHARED_FORMAT, tag,
+                             self.sets, self.ways, self.slot_size)
+
+    def _clear(self) -> None:
+        """Empty all occupied slots, holding every stripe lock."""
+        for stripe in range(self.stripes):
+            self._lock_stripe(stripe)
+        try:
+            empty_key = bytes(PLAN_KEY_SIZE)
+            for slot in range(self.sets * self.ways):
+                if self._slot_key(slot)[1]:
+                    # Written like any update, so concurrent readers notice
+                    self._write(slot, empty_key, b'')
+        finally:
+            for stripe in reversed(range(self.stripes)):
+                self._unlock_stripe(stripe)
+
+    @contextmanager
+    def _stripe(self, set_index: int) -> Iterator[None]:
+        """Hold the writer lock of a set."""
+        stripe = set_index % self.stripes
+        self._lock_stripe(stripe)
+        try:
+            yield
+        finally:
+            self._unlock_stripe(stripe)
+
+    def _lock_stripe(self, stripe: int) -> None:
+        # POSIX record locks are per process, so threads need their own lock
+        self._stripe_locks[stripe].acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, GLOBAL_LOCK_BYTE + 1 + stripe)
+
+    def _unlock_stripe(self, stripe: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, GLOBAL_LOCK_BYTE + 1 + stripe)
+        self._stripe_locks[stripe].release()
+
+    def _set_index(self, key: bytes) -> int:
+        return int.from_bytes(key[:8], 'little') % self.sets
+
+    def _slot_key(self, slot: int) -> Tuple[bytes, int]:
+        """Read the key and payload length of a slot (writers only)."""
+        _, key, length = SLOT_HEADER.unpack_from(self._map, SLOTS_OFFSET + slot * self.slot_size)
+        return key, length
+
+    def _read(self, slot: int, key: bytes) -> Optional[bytes]:
+        """Read a slot's payload if it holds a key, without locking."""
+        offset = SLOTS_OFFSET + slot * self.slot_size
+        sequence, slot_key, length = SLOT_HEADER.unpack_from(self._map, offset)
+        if slot_key != key or sequence & 1 or not length or length > self.capacity:
+            return None
+        start = offset + SLOT_HEADER.size
+        payload = self._map[start:start + length]
+        # A concurrent writer changed the slot while it was read
+        if SEQUENCE.unpack_from(self._map, offset)[0] != sequence:
+            return None
+        return payload
+
+    def _write(self, slot: int, key: bytes, payload: bytes) -> None:
+        """Write a slot under the seqlock protocol (stripe lock held)."""
+        offset = SLOTS_OFFSET + slot * self.slot_size
+        sequence = SEQUENCE.unpack_from(self._map, offset)[0]
+        SEQUENCE.pack_into(self._map, offset, sequence + 1)
+        start = offset + SLOT_HEADER.size
+        self._map[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self._map, offset, sequence + 1, key, len(payload))
+        SEQUENCE.pack_into(self._map, offset, sequence + 2)
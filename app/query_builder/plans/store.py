@@ -0,0 +1,170 @@
+"""Compact on-disk store of precompiled query plans.
+
+Layout (little endian)::
+
+    header   magic, format, entry count, index offset, metadata length
+    metadata JSON object (catalog version and digest, builder settings, counters)
+    payloads encoded plans, most frequent requests first
+    index    one fixed-size record per plan (key, payload offset, length),
+             sorted by key
+
+The file is opened with ``mmap``: looking a plan up is a binary search
+over the index records and reading a plan touches only its own pages, so
+many worker processes can share one store through the page cache.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.query_builder.plans.cache import PLAN_KEY_SIZE
+
+MAGIC = b'QBPLANS\x00'
+
+# Bumped whenever the file layout or the plan encoding changes
+STORE_FORMAT = 1
+
+HEADER = struct.Struct('<8sIIQI')
+INDEX_RECORD = struct.Struct(f'<{PLAN_KEY_SIZE}sQI')
+
+
+class PlanStoreError(Exception):
+    """Raised when a plan store file is missing, truncated or incompatible."""
+    pass
+
+
+def write_plan_store(
+        path: str,
+        entries: Iterable[Tuple[bytes, bytes]],
+        metadata: Optional[Dict[str, Any]] = None
+) -> int:
+    """Write a plan store.
+
+    The file is written next to its destination and renamed into place, so
+    workers never open a partially written store.
+
+    Args:
+        path: Destination path
+        entries: (request key, encoded plan) pairs in priority order
+        metadata: JSON-serializable store metadata
+
+    Returns:
+        Number of plans written
+    """
+    meta = json.dumps(metadata or {}, separators=(',', ':')).encode('utf-8')
+    offset = HEADER.size + len(meta)
+    index: Dict[bytes, Tuple[int, int]] = {}
+    payloads = []
+    locations: Dict[bytes, Tuple[int, int]] = {}
+    for key, payload in entries:
+        if len(key) != PLAN_KEY_SIZE:
+            raise ValueError(f"Plan keys must be {PLAN_KEY_SIZE} bytes")
+        if key in index:
+            continue
+        # Identical plans (e.g. requests differing only in ignored keys) share a payload
+        location = locations.get(payload)
+        if location is None:
+            location = locations[payload] = (offset, len(payload))
+            payloads.append(payload)
+            offset += len(payload)
+        index[key] = location
+
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as store_file:
+        store_file.write(HEADER.pack(MAGIC, STORE_FORMAT, len(index), offset, len(meta)))
+        store_file.write(meta)
+        for payload in payloads:
+            store_file.write(payload)
+        for key in sorted(index):
+            store_file.write(INDEX_RECORD.pack(key, *index[key]))
+    os.replace(temp_path, path)
+    return len(index)
+
+
+class PlanStore:
+    """Read-only, memory-mapped plan store."""
+
+    def __init__(self, path: str):
+        """Open a plan store.
+
+        Args:
+            path: Path of a file written by :func:`write_plan_store`
+
+        Raises:
+            PlanStoreError: If the file is not a compatible plan store
+        """
+        self.path = path
+        try:
+            with open(path, 'rb') as store_file:
+                self._map = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise PlanStoreError(f"Cannot open plan store {path}: {e}")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise PlanStoreError(f"Plan store {path} is truncated")
+        magic, store_format, count, index_offset, meta_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or store_format != STORE_FORMAT:
+            self.close()
+            raise PlanStoreError(f"{path} is not a plan store of format {STORE_FORMAT}")
+        if index_offset + count * INDEX_RECORD.size != len(self._map):
+            self.close()
+            raise PlanStoreError(f"Plan store {path} is truncated")
+
+        self.count = count
+        self._index_offset = index_offset
+        self.metadata: Dict[str, Any] = json.loads(
+            self._map[HEADER.size:HEADER.size + meta_length]
+        )
+
+    @property
+    def catalog_version(self) -> Any:
+        """Get the version of the catalog the plans were built with."""
+        return self.metadata.get('catalog_version')
+
+    @property
+    def catalog_digest(self) -> Optional[str]:
+        """Get the content digest of the catalog the plans were built with."""
+        return self.metadata.get('catalog_digest')
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Get the encoded plan of a request key, or None."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, offset, length = self._record(middle)
+            if record_key == key:
+                return self._map[offset:offset + length]
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def items(self) -> Iterator[Tuple[bytes, bytes]]:
+        """Iterate over (request key, encoded plan) pairs in priority order."""
+        records = sorted((self._record(position) for position in range(self.count)),
+                         key=lambda record: record[1])
+        for key, offset, length in records:
+            yield key, self._map[offset:offset + length]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def close(self) -> None:
+        """Unmap the store."""
+        self._map.close()
+
+    def __enter__(self) -> 'PlanStore':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _record(self, position: int) -> Tuple[bytes, int, int]:
+        """Read an index record."""
+        return INDEX_RECORD.unpack_from(self._map, self._index_offset + position * INDEX_RECORD.size)
@@ -0,0 +1,77 @@
+"""Schema metadata for the flexible query builder."""
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.schema.catalog import (
+        Catalog,
+        CatalogError,
+        ColumnDef,
+        IndexDef,
+        JoinEdge,
+        JoinRecord,
+        PartitionDef,
+        RollupDef,
+        TableDef,
+        normalize_aggregate
+    )
+    from app.query_builder.schema.coercion import ValueCoercer
+    from app.query_builder.schema.loader import (
+        DEFAULT_CATALOG_PATH,
+        DEFAULT_SNAPSHOT_PATH,
+        build_catalog,
+        get_catalog,
+        load_catalog,
+        load_catalog_cached,
+        reload_catalog,
+        write_catalog_snapshot
+    )
+    from app.query_builder.schema.projections import DEFAULT_PROJECTION, ProjectionResolver
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Catalog': 'app.query_builder.schema.catalog',
+    'CatalogError': 'app.query_builder.schema.catalog',
+    'ColumnDef': 'app.query_builder.schema.catalog',
+    'IndexDef': 'app.query_builder.schema.catalog',
+    'JoinEdge': 'app.query_builder.schema.catalog',
+    'JoinRecord': 'app.query_builder.schema.catalog',
+    'PartitionDef': 'app.query_builder.schema.catalog',
+    'RollupDef': 'app.query_builder.schema.catalog',
+    'TableDef': 'app.query_builder.schema.catalog',
+    'normalize_aggregate': 'app.query_builder.schema.catalog',
+    'ValueCoercer': 'app.query_builder.schema.coercion',
+    'DEFAULT_CATALOG_PATH': 'app.query_builder.schema.loader',
+    'DEFAULT_SNAPSHOT_PATH': 'app.query_builder.schema.loader',
+    'build_catalog': 'app.query_builder.schema.loader',
+    'get_catalog': 'app.query_builder.schema.loader',
+    'load_catalog': 'app.query_builder.schema.loader',
+    'load_catalog_cached': 'app.query_builder.schema.loader',
+    'reload_catalog': 'app.query_builder.schema.loader',
+    'write_catalog_snapshot': 'app.query_builder.schema.loader',
+    'DEFAULT_PROJECTION': 'app.query_builder.schema.projections',
+    'ProjectionResolver': 'app.query_builder.schema.projections'
+})
+
+__all__ = [
+    'Catalog',
+    'CatalogError',
+    'ColumnDef',
+    'IndexDef',
+    'JoinEdge',
+    'JoinRecord',
+    'PartitionDef',
+    'RollupDef',
+    'TableDef',
+    'normalize_aggregate',
+    'ValueCoercer',
+    'DEFAULT_CATALOG_PATH',
+    'DEFAULT_SNAPSHOT_PATH',
+    'build_catalog',
+    'get_catalog',
+    'load_catalog',
+    'load_catalog_cached',
+    'reload_catalog',
+    'write_catalog_snapshot',
+    'DEFAULT_PROJECTION',
+    'ProjectionResolver'
+]
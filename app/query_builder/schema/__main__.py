@@ -0,0 +1,38 @@
+"""Precompile the schema catalog into a snapshot.
+
+Usage::
+
+    python -m app.query_builder.schema [--catalog PATH] [--output PATH]
+
+Run at build/deploy time so workers load the catalog with a single read
+instead of parsing and validating the catalog file on cold start.
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from app.query_builder.schema.catalog import CatalogError
+from app.query_builder.schema.loader import load_catalog, write_catalog_snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Validate the catalog and write its snapshot."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--catalog', help="catalog file (defaults to the packaged catalog)")
+    parser.add_argument('--output', help="snapshot path (defaults to <catalog>.snapshot)")
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = load_catalog(args.catalog)
+        path = write_catalog_snapshot(catalog, args.output)
+    except (CatalogError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Wrote catalog snapshot {path} (version {catalog.version}, "
+          f"{len(catalog.tables)} tables, {len(catalog.joins)} joins)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Immutable schema catalog structures for the flexible query builder."""
+import re
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+class CatalogError(Exception):
+    """Raised when catalog metadata is missing or inconsistent."""
+
+
+# Aggregate a rollup measure can store, and how partial values are combined
+ROLLUP_COMBINERS = {'COUNT': 'SUM', 'SUM': 'SUM', 'MIN': 'MIN', 'MAX': 'MAX'}
+
+# Intervals a table can be partitioned by
+PARTITION_INTERVALS = ('year', 'month')
+
+_AGGREGATE_CALL = re.compile(r"^(\w+)\s*\((.*)\)$", re.DOTALL)
+
+
+def normalize_aggregate(expression: str) -> Optional[str]:
+    """Normalize an aggregate call for matching, e.g. ``sum( tr.x )`` -> ``SUM(tr.x)``.
+
+    Returns:
+        Normalized expression, or None if it is not a function call
+    """
+    match = _AGGREGATE_CALL.match(expression.strip())
+    if not match:
+        return None
+    argument = re.sub(r"\s+", '', match.group(2))
+    return f"{match.group(1).upper()}({argument})"
+
+
+class _ProxyState(dict):
+    """Picklable stand-in for a read-only mapping inside a snapshot."""
+
+
+def _thaw(value: Any) -> Any:
+    """Convert read-only mappings into picklable state."""
+    if isinstance(value, MappingProxyType):
+        return _ProxyState((key, _thaw(item)) for key, item in value.items())
+    return value
+
+
+def _freeze(value: Any) -> Any:
+    """Convert snapshot state back into read-only mappings."""
+    if isinstance(value, _ProxyState):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+def _restore(cls: type, state: Tuple[Any, ...]) -> Any:
+    """Recreate a frozen record from its pickled slot values."""
+    record = cls.__new__(cls)
+    record._init(**{name: _freeze(value) for name, value in zip(cls.__slots__, state)})
+    return record
+
+
+class _Frozen:
+    """Base class for slotted records that cannot be modified after creation."""
+
+    __slots__ = ()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _restore, (type(self), tuple(_thaw(getattr(self, name)) for name in self.__slots__))
+
+    def _init(self, **values: Any) -> None:
+        """Assign slot values, bypassing the immutability guard."""
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:2])
+        return f"{type(self).__name__}({fields})"
+
+
+class ColumnDef(_Frozen):
+    """Column metadata."""
+
+    __slots__ = ('name', 'type', 'heavy')
+
+    def __init__(self, name: str, type: str, heavy: bool = False):
+        self._init(name=name, type=type, heavy=heavy)
+
+
+class IndexDef(_Frozen):
+    """Index metadata."""
+
+    __slots__ = ('name', 'table', 'columns')
+
+    def __init__(self, name: str, table: str, columns: Tuple[str, ...]):
+        self._init(name=name, table=table, columns=columns)
+
+
+class TableDef(_Frozen):
+    """Table metadata with a precomputed column index."""
+
+    __slots__ = ('name', 'columns', 'column_index', 'profiles', 'indexes')
+
+    def __init__(
+            self,
+            name: str,
+            columns: Tuple[ColumnDef, ...],
+            profiles: Mapping[str, Tuple[str, ...]],
+            indexes: Tuple[IndexDef, ...]
+    ):
+        self._init(
+            name=name,
+            columns=columns,
+            column_index=MappingProxyType({column.name: column for column in columns}),
+            profiles=MappingProxyType(dict(profiles)),
+            indexes=indexes
+        )
+
+    def light_columns(self) -> Tuple[str, ...]:
+        """Get the names of all non-heavy columns."""
+        return tuple(column.name for column in self.columns if not column.heavy)
+
+
+class JoinEdge(_Frozen):
+    """Join path from the base table (or another join) to a table.
+
+    The join condition may use ``{alias}`` and ``{base}`` placeholders for
+    the joined alias and the builder's base alias.
+    """
+
+    __slots__ = ('key', 'table', 'alias', 'condition', 'requires', 'exact')
+
+    def __init__(
+            self,
+            key: str,
+            table: str,
+            alias: str,
+            condition: str,
+            requires: Tuple[str, ...] = (),
+            exact: bool = False
+    ):
+        self._init(
+            key=key,
+            table=table,
+            alias=alias,
+            condition=condition,
+            requires=requires,
+            exact=exact
+        )
+
+    def render_condition(self, base_alias: str) -> str:
+        """Render the join condition for a base alias."""
+        return self.condition.replace('{alias}', self.alias).replace('{base}', base_alias)
+
+    def render(self, schema: str, base_alias: str) -> str:
+        """Render the JOIN statement for a schema and base alias."""
+        return (
+            f"JOIN {schema}.{self.table} {self.alias} "
+            f"ON {self.render_condition(base_alias)}"
+        )
+
+
+class JoinRecord(_Frozen):
+    """Join of a built query: a catalog join and how its condition is rendered.
+
+    Records are created once per catalog join and shared by all builders.
+    Item access (``record['info']``) is kept for code written against the
+    join dicts records replaced.
+    """
+
+    __slots__ = ('key', 'info', 'use_exact')
+
+    def __init__(self, edge: JoinEdge):
+        # Joins flagged as exact use their catalog condition verbatim
+        self._init(key=edge.key, info=edge, use_exact=edge.exact)
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+
+class RollupDef(_Frozen):
+    """Pre-aggregated table that can answer grouped requests on a base table.
+
+    ``dimensions`` maps request fields (e.g. ``si.simpleIndustryId``) to
+    rollup columns; ``measures`` maps normalized aggregates (e.g.
+    ``COUNT(*)``) to the rollup columns storing them.
+    """
+
+    __slots__ = ('name', 'base_table', 'dimensions', 'measures')
+
+    def __init__(
+            self,
+            name: str,
+            base_table: str,
+            dimensions: Mapping[str, str],
+            measures: Mapping[str, str]
+    ):
+        self._init(
+            name=name,
+            base_table=base_table,
+            dimensions=MappingProxyType(dict(dimensions)),
+            measures=MappingProxyType(dict(measures))
+        )
+
+
+class PartitionDef(_Frozen):
+    """Date partitioning of a table.
+
+    ``table_pattern`` optionally names the table holding one partition,
+    formatted with ``year`` and ``month`` (e.g. ``ciqTransaction_{year}``);
+    each such table must hold exactly the rows of its interval.
+    """
+
+    __slots__ = ('table', 'column', 'interval', 'table_pattern')
+
+    def __init__(
+            self,
+            table: str,
+            column: str,
+            interval: str,
+            table_pattern: Optional[str] = None
+    ):
+        self._init(table=table, column=column, interval=interval, table_pattern=table_pattern)
+
+
+class Catalog(_Frozen):
+    """Schema catalog with precomputed lookup indexes.
+
+    Instances are built by :func:`app.query_builder.schema.loader.load_catalog`
+    and never modified afterwards, so they can be shared between threads and
+    swapped atomically on reload. ``digest`` is a hash of the catalog content;
+    unlike ``version``, which is maintained by hand, it changes with every
+    edit of the catalog or the legacy constants.
+    """
+
+    __slots__ = (
+        'version',
+        'source',
+        'digest',
+        'tables',
+        'joins',
+        'join_records',
+        'joins_by_alias',
+        'alias_tables',
+        'field_mappings',
+        'filter_operators',
+        'filter_keys',
+        'preferred_joins',
+        'join_selectors',
+        'join_priority',
+        'rollups',
+        'partitions'
+    )
+
+    def __init__(
+            self,
+            version: Any,
+            source: Optional[str],
+            tables: Dict[str, TableDef],
+            joins: Dict[str, JoinEdge],
+            field_mappings: Dict[str, str],
+            filter_operators: Dict[str, str],
+            preferred_joins: Dict[str, str],
+            join_selectors: Dict[str, Dict[str, str]],
+            join_order: Tuple[str, ...],
+            rollups: Tuple[RollupDef, ...] = (),
+            partitions: Tuple[PartitionDef, ...] = (),
+            digest: Optional[str] = None
+    ):
+        joins_by_alias: Dict[str, Tuple[JoinEdge, ...]] = {}
+        alias_tables: Dict[str, str] = {}
+        for edge in joins.values():
+            joins_by_alias[edge.alias] = joins_by_alias.get(edge.alias, ()) + (edge,)
+            alias_tables.setdefault(edge.alias, edge.table)
+
+        # Rollups per base table, most aggregated (fewest dimensions) first
+        rollups_by_table: Dict[str, Tuple[RollupDef, ...]] = {}
+        for rollup in sorted(rollups, key=lambda r: len(r.dimensions)):
+            rollups_by_table[rollup.base_table] = (
+                rollups_by_table.get(rollup.base_table, ()) + (rollup,)
+            )
+
+        self._init(
+            version=version,
+            source=source,
+            digest=digest,
+            tables=MappingProxyType(dict(tables)),
+            joins=MappingProxyType(dict(joins)),
+            join_records=MappingProxyType({key: JoinRecord(edge) for key, edge in joins.items()}),
+            joins_by_alias=MappingProxyType(joins_by_alias),
+            alias_tables=MappingProxyType(alias_tables),
+            field_mappings=MappingProxyType(dict(field_mappings)),
+            filter_operators=MappingProxyType(dict(filter_operators)),
+            filter_keys=frozenset(field_mappings) | frozenset(joins),
+            preferred_joins=MappingProxyType(dict(preferred_joins)),
+            join_selectors=MappingProxyType({
+                field: MappingProxyType(dict(choices))
+                for field, choices in join_selectors.items()
+            }),
+            join_priority=MappingProxyType({
+                table: position for position, table in enumerate(join_order)
+            }),
+            rollups=MappingProxyType(rollups_by_table),
+            partitions=MappingProxyType({partition.table: partition for partition in partitions})
+        )
+
+    def table_for_alias(self, alias: str, base_table: str, base_alias: str) -> Optional[str]:
+        """Find the table behind an alias."""
+        if alias == base_alias:
+            return base_table
+        return self.alias_tables.get(alias)
+
+    def table(self, name: Optional[str]) -> Optional[TableDef]:
+        """Get table metadata by name."""
+        return self.tables.get(name) if name else None
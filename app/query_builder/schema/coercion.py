@@ -0,0 +1,134 @@
+"""Typed validation and coercion of filter values.
+
+Filter values arrive as strings. Before any SQL is assembled they are
+checked against the catalog type of the filtered column and converted to
+a canonical text form in bulk (one C-level ``map`` per list, failing
+values are only searched for once the batch fails), then deduplicated.
+Values keep being rendered as quoted literals; canonical forms make
+equivalent values (``007`` and ``7``) collapse in IN lists and keep
+malformed values from reaching the database.
+"""
+import math
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.query_builder.schema.catalog import Catalog
+from app.query_builder.schema.loader import get_catalog
+from app.utils.errors import QueryBuildError
+
+# Values shown in an error message before the rest is summarized
+MAX_REPORTED_VALUES = 5
+
+BOOL_VALUES = {
+    'true': '1', 't': '1', 'yes': '1', 'y': '1', '1': '1',
+    'false': '0', 'f': '0', 'no': '0', 'n': '0', '0': '0',
+}
+
+
+def _canonical_int(value: str) -> str:
+    return str(int(value))
+
+
+def _canonical_float(value: str) -> str:
+    number = float(value)
+    if math.isnan(number) or math.isinf(number):
+        raise ValueError(value)
+    return repr(number)
+
+
+def _canonical_date(value: str) -> str:
+    return date.fromisoformat(value.strip()).isoformat()
+
+
+def _canonical_datetime(value: str) -> str:
+    return datetime.fromisoformat(value.strip()).isoformat(sep=' ')
+
+
+def _canonical_bool(value: str) -> str:
+    return BOOL_VALUES[value.strip().lower()]
+
+
+# Canonical text conversion per catalog column type; other types pass through
+CONVERTERS: Dict[str, Callable[[str], str]] = {
+    'int': _canonical_int,
+    'float': _canonical_float,
+    'date': _canonical_date,
+    'datetime': _canonical_datetime,
+    'bool': _canonical_bool,
+}
+
+
+class ValueCoercer:
+    """Coercer that validates filter values against catalog column types."""
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the value coercer.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+
+    def column_type(self, field: str, base_table: str, base_alias: str) -> Optional[str]:
+        """Get the catalog type of a qualified field, or None if unknown."""
+        alias, _, column = field.partition('.')
+        table = self.catalog.table(self.catalog.table_for_alias(alias, base_table, base_alias))
+        if table is None or column not in table.column_index:
+            return None
+        return table.column_index[column].type
+
+    def coerce(
+            self,
+            field: str,
+            values: Iterable[str],
+            base_table: str,
+            base_alias: str
+    ) -> List[str]:
+        """Validate values for a field and convert them to canonical, unique text.
+
+        Args:
+            field: Qualified field the values are compared with
+            values: Raw filter values
+            base_table: Base table name
+            base_alias: Base table alias
+
+        Returns:
+            Canonical values in first-seen order without duplicates
+
+        Raises:
+            QueryBuildError: If any value does not match the column type
+        """
+        # Deduplicate raw values first; large IN lists are often repetitive
+        unique = list(dict.fromkeys(values))
+        column_type = self.column_type(field, base_table, base_alias)
+        converter = CONVERTERS.get(column_type)
+        if converter is None:
+            return unique
+
+        try:
+            canonical = list(map(converter, unique))
+        except (ValueError, KeyError, OverflowError):
+            raise self._invalid(field, column_type, converter, unique)
+        return list(dict.fromkeys(canonical))
+
+    @staticmethod
+    def _invalid(
+            field: str,
+            column_type: str,
+            converter: Callable[[str], str],
+            values: List[str]
+    ) -> QueryBuildError:
+        """Build the error listing the values that fail conversion."""
+        invalid = []
+        for value in values:
+            try:
+                converter(value)
+            except (ValueError, KeyError, OverflowError):
+                invalid.append(value)
+        shown = ', '.join(repr(value) for value in invalid[:MAX_REPORTED_VALUES])
+        more = len(invalid) - MAX_REPORTED_VALUES
+        suffix = f" (and {more} more)" if more > 0 else ""
+        noun = 'value' if len(invalid) == 1 else 'values'
+        return QueryBuildError(
+            f"Invalid {noun} for {field} (expected {column_type}): {shown}{suffix}"
+        )
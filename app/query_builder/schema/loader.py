@@ -0,0 +1,458 @@
+"""Catalog loading, validation and hot reloading."""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.query_builder.schema.catalog import (
+    Catalog,
+    CatalogError,
+    ColumnDef,
+    IndexDef,
+    JoinEdge,
+    PARTITION_INTERVALS,
+    PartitionDef,
+    ROLLUP_COMBINERS,
+    RollupDef,
+    TableDef,
+    normalize_aggregate
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Catalog file shipped with the package; can be overridden per deployment
+DEFAULT_CATALOG_PATH = os.environ.get(
+    'QUERY_BUILDER_CATALOG',
+    os.path.join(os.path.dirname(__file__), 'catalog.json')
+)
+
+# Precompiled snapshot of the default catalog (see write_catalog_snapshot)
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    'QUERY_BUILDER_CATALOG_SNAPSHOT',
+    DEFAULT_CATALOG_PATH + '.snapshot'
+)
+
+# Bumped whenever the pickled catalog layout changes
+SNAPSHOT_FORMAT = 5
+
+# Module providing the legacy join paths, field mappings and operators
+LEGACY_CONSTANTS_MODULE = 'app.utils.constants'
+
+# Column types understood by the builder
+COLUMN_TYPES = {'int', 'float', 'str', 'text', 'date', 'datetime', 'bool'}
+
+_intern = sys.intern
+
+_current_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def load_catalog(path: Optional[str] = None) -> Catalog:
+    """Load and validate a catalog file.
+
+    The join paths, field mappings and filter operators from
+    ``app.utils.constants`` form the seed; entries in the file are
+    overlaid on top of them.
+
+    Args:
+        path: Path of the JSON catalog file, defaults to DEFAULT_CATALOG_PATH
+
+    Returns:
+        Validated, immutable catalog
+
+    Raises:
+        CatalogError: If the file cannot be read or is inconsistent
+    """
+    path = path or DEFAULT_CATALOG_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as catalog_file:
+            document = json.load(catalog_file)
+    except (OSError, ValueError) as e:
+        raise CatalogError(f"Cannot load catalog {path}: {e}")
+
+    return build_catalog(document, source=path)
+
+
+def build_catalog(document: Dict[str, Any], source: Optional[str] = None) -> Catalog:
+    """Build a validated catalog from a parsed catalog document.
+
+    Args:
+        document: Parsed catalog document
+        source: Where the document came from, used in error messages
+
+    Returns:
+        Validated, immutable catalog
+    """
+    if not isinstance(document, dict):
+        raise CatalogError("Catalog document must be an object")
+
+    # Imported here so that loading a snapshot never needs the legacy module
+    from app.utils.constants import FIELD_MAPPINGS, FILTER_OPERATORS, JOIN_PATHS
+
+    tables = {
+        _intern(name): _build_table(name, spec)
+        for name, spec in document.get('tables', {}).items()
+    }
+    joins = _build_joins(JOIN_PATHS, document.get('joins', {}))
+
+    field_mappings = {
+        _intern(key): _intern(value)
+        for key, value in {**FIELD_MAPPINGS, **document.get('field_mappings', {})}.items()
+    }
+    filter_operators = {
+        _intern(key): value
+        for key, value in {**FILTER_OPERATORS, **document.get('filter_operators', {})}.items()
+    }
+
+    rules = document.get('join_rules', {})
+    preferred_joins = {
+        _intern(alias): _intern(key) for alias, key in rules.get('preferred', {}).items()
+    }
+    join_selectors = {
+        _intern(field): {str(value): _intern(key) for value, key in choices.items()}
+        for field, choices in rules.get('selectors', {}).items()
+    }
+    join_order = tuple(_intern(table) for table in rules.get('order', []))
+
+    rollups = tuple(
+        _build_rollup(name, spec) for name, spec in document.get('rollups', {}).items()
+    )
+
+    partitions = tuple(
+        _build_partition(table, spec, tables) for table, spec in document.get('partitions', {}).items()
+    )
+
+    _validate(tables, joins, field_mappings, preferred_joins, join_selectors)
+
+    return Catalog(
+        version=document.get('version'),
+        source=source,
+        tables=tables,
+        joins=joins,
+        field_mappings=field_mappings,
+        filter_operators=filter_operators,
+        preferred_joins=preferred_joins,
+        join_selectors=join_selectors,
+        join_order=join_order,
+        rollups=rollups,
+        partitions=partitions,
+        digest=_content_digest(document, JOIN_PATHS, FIELD_MAPPINGS, FILTER_OPERATORS)
+    )
+
+
+def get_catalog() -> Catalog:
+    """Get the current catalog, loading it on first use."""
+    global _current_catalog
+    catalog = _current_catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _current_catalog is None:
+                _current_catalog = load_catalog_cached()
+            catalog = _current_catalog
+    return catalog
+
+
+def reload_catalog(path: Optional[str] = None) -> Catalog:
+    """Reload the catalog and swap it in atomically.
+
+    The new catalog is fully built and validated before it replaces the
+    current one; on failure the current catalog stays in place. Builders
+    created before the reload keep the catalog they started with.
+
+    Args:
+        path: Path of the JSON catalog file, defaults to DEFAULT_CATALOG_PATH
+
+    Returns:
+        The newly loaded catalog
+    """
+    global _current_catalog
+    catalog = load_catalog(path)
+    with _catalog_lock:
+        _current_catalog = catalog
+    logger.info(f"Loaded schema catalog version {catalog.version} from {catalog.source}")
+    return catalog
+
+
+def load_catalog_cached(
+        path: Optional[str] = None,
+        snapshot_path: Optional[str] = None
+) -> Catalog:
+    """Load a catalog from its precompiled snapshot when it is up to date.
+
+    The snapshot is read with a single read and unpickled; it is used only
+    if it was written from the current catalog file and legacy constants
+    module by the same Python version. Otherwise the catalog file is
+    loaded and validated as usual.
+
+    Args:
+        path: Path of the JSON catalog file, defaults to DEFAULT_CATALOG_PATH
+        snapshot_path: Path of the snapshot, defaults to DEFAULT_SNAPSHOT_PATH
+            for the default catalog and ``<path>.snapshot`` otherwise
+
+    Returns:
+        Validated, immutable catalog
+    """
+    path = path or DEFAULT_CATALOG_PATH
+    snapshot_path = snapshot_path or (
+        DEFAULT_SNAPSHOT_PATH if path == DEFAULT_CATALOG_PATH else path + '.snapshot'
+    )
+
+    catalog = load_catalog_snapshot(snapshot_path, path)
+    if catalog is None:
+        catalog = load_catalog(path)
+    return catalog
+
+
+def write_catalog_snapshot(catalog: Catalog, snapshot_path: Optional[str] = None) -> str:
+    """Write a precompiled snapshot of a catalog.
+
+    The snapshot contains the catalog with all of its lookup indexes and a
+    signature of the files it was built from. Snapshots are pickles and
+    must only be loaded from trusted locations.
+
+    Args:
+        catalog: Catalog to serialize; must have been loaded from a file
+        snapshot_path: Destination, defaults to ``<catalog source>.snapshot``
+
+    Returns:
+        Path of the written snapshot
+    """
+    if not catalog.source:
+        raise CatalogError("Only catalogs loaded from a file can be snapshotted")
+
+    snapshot_path = snapshot_path or (
+        DEFAULT_SNAPSHOT_PATH if catalog.source == DEFAULT_CATALOG_PATH
+        else catalog.source + '.snapshot'
+    )
+    payload = pickle.dumps(
+        (SNAPSHOT_FORMAT, sys.version_info[:2], _source_signature(catalog.source), catalog),
+        protocol=pickle.HIGHEST_PROTOCOL
+    )
+
+    # Write to a temporary file and rename so readers never see a partial file
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as snapshot_file:
+        snapshot_file.write(payload)
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+def load_catalog_snapshot(snapshot_path: str, source_path: str) -> Optional[Catalog]:
+    """Load a catalog snapshot if it matches its source files.
+
+    Args:
+        snapshot_path: Path of the snapshot
+        source_path: Path of the catalog file the snapshot must come from
+
+    Returns:
+        The snapshotted catalog, or None if missing, stale or unreadable
+    """
+    try:
+        with open(snapshot_path, 'rb') as snapshot_file:
+            payload = snapshot_file.read()
+    except OSError:
+        return None
+
+    try:
+        snapshot_format, python_version, signature, catalog = pickle.loads(payload)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable catalog snapshot {snapshot_path}: {e}")
+        return None
+
+    if (
+            snapshot_format != SNAPSHOT_FORMAT
+            or tuple(python_version) != sys.version_info[:2]
+            or signature != _source_signature(source_path)
+    ):
+        logger.info(f"Ignoring stale catalog snapshot {snapshot_path}")
+        return None
+
+    return catalog
+
+
+def _content_digest(document: Dict[str, Any], *seeds: Any) -> str:
+    """Hash a catalog document and the legacy constants it is overlaid on."""
+    encoded = json.dumps([document, *seeds], sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _source_signature(path: str) -> Tuple[Tuple[str, int, int], ...]:
+    """Describe the files a catalog is built from (path, size, mtime)."""
+    paths = [os.path.abspath(path)]
+    spec = importlib.util.find_spec(LEGACY_CONSTANTS_MODULE)
+    if spec is not None and spec.origin:
+        paths.append(spec.origin)
+
+    signature = []
+    for source in paths:
+        try:
+            stat = os.stat(source)
+        except OSError:
+            continue
+        signature.append((source, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def _build_table(name: str, spec: Dict[str, Any]) -> TableDef:
+    """Build table metadata from its catalog entry."""
+    columns = tuple(
+        ColumnDef(_intern(column), _intern(info.get('type', 'str')), bool(info.get('heavy', False)))
+        for column, info in spec.get('columns', {}).items()
+    )
+    profiles = {
+        _intern(profile): tuple(_intern(column) for column in profile_columns)
+        for profile, profile_columns in spec.get('profiles', {}).items()
+    }
+    indexes = tuple(
+        IndexDef(_intern(index), _intern(name), tuple(_intern(column) for column in index_columns))
+        for index, index_columns in spec.get('indexes', {}).items()
+    )
+    return TableDef(_intern(name), columns, profiles, indexes)
+
+
+def _build_joins(
+        join_paths: Dict[str, Dict[str, Any]],
+        overlay: Dict[str, Dict[str, Any]]
+) -> Dict[str, JoinEdge]:
+    """Build join edges from the legacy join paths and the catalog overlay."""
+    joins = {}
+    for key in list(join_paths) + [key for key in overlay if key not in join_paths]:
+        spec = {**join_paths.get(key, {}), **overlay.get(key, {})}
+        missing = [field for field in ('table', 'alias', 'condition') if not spec.get(field)]
+        if missing:
+            raise CatalogError(f"Join '{key}' is missing {', '.join(missing)}")
+        joins[_intern(key)] = JoinEdge(
+            key=_intern(key),
+            table=_intern(spec['table']),
+            alias=_intern(spec['alias']),
+            condition=spec['condition'],
+            requires=tuple(_intern(dep) for dep in spec.get('requires', ())),
+            exact=bool(spec.get('exact', False))
+        )
+    return joins
+
+
+def _build_rollup(name: str, spec: Dict[str, Any]) -> RollupDef:
+    """Build rollup metadata from its catalog entry.
+
+    The entry names the base table it aggregates, the request fields it is
+    grouped by (``dimensions``: field -> rollup column) and the aggregates
+    it stores (``measures``: rollup column -> aggregate expression).
+    """
+    base_table = spec.get('base_table')
+    dimensions = spec.get('dimensions') or {}
+    if not base_table or not dimensions:
+        raise CatalogError(f"Rollup '{name}' needs a base_table and dimensions")
+
+    measures = {}
+    for column, expression in (spec.get('measures') or {}).items():
+        aggregate = normalize_aggregate(expression)
+        function = aggregate.partition('(')[0] if aggregate else None
+        if function not in ROLLUP_COMBINERS or 'DISTINCT' in aggregate.upper():
+            raise CatalogError(
+                f"Rollup '{name}' measure '{column}' must be one of "
+                f"{', '.join(sorted(ROLLUP_COMBINERS))} (got '{expression}')"
+            )
+        measures[aggregate] = _intern(column)
+
+    return RollupDef(
+        name=_intern(name),
+        base_table=_intern(base_table),
+        dimensions={_intern(field): _intern(column) for field, column in dimensions.items()},
+        measures=measures
+    )
+
+
+def _build_partition(table: str, spec: Dict[str, Any], tables: Dict[str, TableDef]) -> PartitionDef:
+    """Build partition metadata from its catalog entry.
+
+    The entry is keyed by the partitioned table and names its date or
+    datetime partition ``column``, the partition ``interval`` and
+    optionally the ``table_pattern`` of the per-partition tables.
+    """
+    column = spec.get('column')
+    interval = spec.get('interval', 'year')
+    table_def = tables.get(table)
+    if table_def is None or column not in table_def.column_index:
+        raise CatalogError(f"Partitioning of '{table}' references unknown column '{column}'")
+    if table_def.column_index[column].type not in ('date', 'datetime'):
+        raise CatalogError(f"Partition column {table}.{column} must be a date or datetime")
+    if interval not in PARTITION_INTERVALS:
+        raise CatalogError(
+            f"Partitioning of '{table}' has unknown interval '{interval}' "
+            f"(expected one of {', '.join(PARTITION_INTERVALS)})"
+        )
+
+    table_pattern = spec.get('table_pattern')
+    if table_pattern is not None:
+        try:
+            table_pattern.format(year=2000, month=1)
+        except (KeyError, IndexError, ValueError) as e:
+            raise CatalogError(f"Partition table pattern of '{table}' is invalid: {e}")
+
+    return PartitionDef(
+        table=_intern(table),
+        column=_intern(column),
+        interval=interval,
+        table_pattern=table_pattern
+    )
+
+
+def _validate(
+        tables: Dict[str, TableDef],
+        joins: Dict[str, JoinEdge],
+        field_mappings: Dict[str, str],
+        preferred_joins: Dict[str, str],
+        join_selectors: Dict[str, Dict[str, str]]
+) -> None:
+    """Check cross references between catalog sections."""
+    for table in tables.values():
+        for column in table.columns:
+            if column.type not in COLUMN_TYPES:
+                raise CatalogError(
+                    f"Column {table.name}.{column.name} has unknown type '{column.type}'"
+                )
+        for profile, columns in table.profiles.items():
+            _check_columns(table, columns, f"profile '{profile}'")
+        for index in table.indexes:
+            _check_columns(table, index.columns, f"index '{index.name}'")
+
+    for edge in joins.values():
+        for dep in edge.requires:
+            if dep not in joins:
+                raise CatalogError(f"Join '{edge.key}' requires unknown join '{dep}'")
+    for edge in joins.values():
+        _check_acyclic(edge.key, joins, ())
+
+    for key, field in field_mappings.items():
+        if not isinstance(field, str) or not field:
+            raise CatalogError(f"Field mapping '{key}' must be a non-empty string")
+
+    for alias, key in preferred_joins.items():
+        if key not in joins or joins[key].alias != alias:
+            raise CatalogError(f"Preferred join '{key}' does not provide alias '{alias}'")
+    for field, choices in join_selectors.items():
+        for key in choices.values():
+            if key not in joins:
+                raise CatalogError(f"Join selector for '{field}' references unknown join '{key}'")
+
+
+def _check_columns(table: TableDef, columns: Tuple[str, ...], owner: str) -> None:
+    """Check that columns referenced by a profile or index exist."""
+    for column in columns:
+        if column not in table.column_index:
+            raise CatalogError(f"{owner} of {table.name} references unknown column '{column}'")
+
+
+def _check_acyclic(key: str, joins: Dict[str, JoinEdge], path: Tuple[str, ...]) -> None:
+    """Check that join requirements do not form a cycle."""
+    if key in path:
+        raise CatalogError(f"Join requirements form a cycle: {' -> '.join(path + (key,))}")
+    for dep in joins[key].requires:
+        _check_acyclic(dep, joins, path + (key,))
@@ -0,0 +1,182 @@
+"""Projection profile resolution for the flexible query builder."""
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.query_builder.schema.catalog import Catalog
+from app.query_builder.schema.loader import get_catalog
+from app.utils.errors import QueryBuildError
+
+# Profile used when a request does not specify ``select``
+DEFAULT_PROJECTION = 'summary'
+
+# Aggregate select expressions such as "COUNT(*)" or "SUM(tr.transactionSize) AS total"
+AGGREGATE_PATTERN = re.compile(
+    r"^(COUNT|SUM|AVG|MIN|MAX)\s*\((?:DISTINCT\s+)?(.*)\)(?:\s+AS\s+\w+)?$",
+    re.IGNORECASE
+)
+
+# Result types of aggregates whose type does not follow their argument
+AGGREGATE_TYPES = {'COUNT': 'int', 'SUM': 'float', 'AVG': 'float'}
+
+
+class ProjectionResolver:
+    """Resolver that expands projection profiles into explicit column lists."""
+
+    # Built-in profiles available for every table with column metadata
+    ALL_PROFILE = 'all'    # every column except heavy ones
+    FULL_PROFILE = 'full'  # wildcard, heavy columns included
+
+    def __init__(self, catalog: Optional[Catalog] = None):
+        """Initialize the projection resolver.
+
+        Args:
+            catalog: Schema catalog, defaults to the current catalog
+        """
+        self.catalog = catalog or get_catalog()
+        # Expanded profiles per (token, base table, base alias), as interned names
+        self._expanded: Dict[Tuple[str, str, str], Tuple[str, ...]] = {}
+
+    def is_profile(self, token: str) -> bool:
+        """Check if a select token refers to a projection profile."""
+        return token.startswith('@')
+
+    def expand(self, token: str, base_table: str, base_alias: str) -> List[str]:
+        """Expand a profile token such as ``@summary`` or ``@c.summary``.
+
+        Args:
+            token: Profile token including the leading ``@``
+            base_table: Base table name
+            base_alias: Base table alias
+
+        Returns:
+            List of qualified field names
+
+        Raises:
+            QueryBuildError: If the table has no such profile
+        """
+        expanded = self._expanded.get((token, base_table, base_alias))
+        if expanded is None:
+            expanded = self._expanded[(token, base_table, base_alias)] = tuple(
+                sys.intern(field) for field in self._expand(token, base_table, base_alias)
+            )
+        return list(expanded)
+
+    def _expand(self, token: str, base_table: str, base_alias: str) -> List[str]:
+        """Expand a profile token without caching."""
+        name = token[1:]
+        alias = base_alias
+        if '.' in name:
+            alias, name = name.split('.', 1)
+        table = self.catalog.table(self.catalog.table_for_alias(alias, base_table, base_alias))
+
+        if name == self.FULL_PROFILE:
+            return [f"{alias}.*"]
+
+        columns = None
+        if table is not None:
+            columns = table.light_columns() if name == self.ALL_PROFILE else table.profiles.get(name)
+
+        if not columns:
+            raise QueryBuildError(f"Unknown projection profile: {token}")
+
+        return [f"{alias}.{column}" for column in columns]
+
+    def default_fields(
+            self,
+            base_table: str,
+            base_alias: str,
+            profile: Optional[str]
+    ) -> List[str]:
+        """Get the default projection used when no fields are selected.
+
+        Falls back to ``<alias>.*`` when no profile is configured or the
+        base table has no such profile.
+        """
+        table = self.catalog.table(base_table)
+        if profile and table is not None and profile in table.profiles:
+            return self.expand(f"@{profile}", base_table, base_alias)
+        return [f"{base_alias}.*"]
+
+    def apply_exclusions(
+            self,
+            select_fields: List[str],
+            excluded_fields: Iterable[str],
+            base_table: str,
+            base_alias: str
+    ) -> List[str]:
+        """Remove excluded columns from a select list.
+
+        Wildcards on a table with excluded columns are expanded to the
+        table's remaining columns so the exclusion can take effect.
+        """
+        excluded = {
+            field if '.' in field else f"{base_alias}.{field}"
+            for field in excluded_fields
+        }
+        excluded_aliases = {field.split('.', 1)[0] for field in excluded}
+
+        result = []
+        for field in select_fields:
+            alias, _, column = field.partition('.')
+            if column == '*' and alias in excluded_aliases:
+                table = self.catalog.table(
+                    self.catalog.table_for_alias(alias, base_table, base_alias)
+                )
+                if table is not None:
+                    result.extend(f"{alias}.{column.name}" for column in table.columns)
+                    continue
+            result.append(field)
+
+        return [field for field in result if field not in excluded]
+
+    def column_types(
+            self,
+            select_fields: Iterable[str],
+            base_table: str,
+            base_alias: str
+    ) -> List[Optional[str]]:
+        """Resolve the catalog column type of each selected field.
+
+        Args:
+            select_fields: Selected fields (without wildcards)
+            base_table: Base table name
+            base_alias: Base table alias
+
+        Returns:
+            Column type per field, or None where the type is unknown
+        """
+        return [self._field_type(field, base_table, base_alias) for field in select_fields]
+
+    def column_labels(self, select_fields: Iterable[str]) -> List[str]:
+        """Get the result column label of each selected field.
+
+        Qualified columns are labelled by their column name, expressions by
+        their ``AS`` alias or, failing that, by the expression itself.
+        """
+        labels = []
+        for field in select_fields:
+            field = field.strip()
+            alias_match = re.search(r"\s+AS\s+(\w+)$", field, re.IGNORECASE)
+            if alias_match:
+                labels.append(alias_match.group(1))
+            elif re.match(r"^[a-z]+\.[a-zA-Z_][a-zA-Z0-9_]*$", field):
+                labels.append(field.split('.', 1)[1])
+            else:
+                labels.append(field)
+        return labels
+
+    def _field_type(self, field: str, base_table: str, base_alias: str) -> Optional[str]:
+        """Resolve the type of a single select expression."""
+        match = AGGREGATE_PATTERN.match(field.strip())
+        if match:
+            function = match.group(1).upper()
+            if function in AGGREGATE_TYPES:
+                return AGGREGATE_TYPES[function]
+            field = match.group(2)
+
+        alias, _, column = field.strip().partition('.')
+        table = self.catalog.table(self.catalog.table_for_alias(alias, base_table, base_alias))
+        if table is None or column not in table.column_index:
+            return None
+        return table.column_index[column].type
@@ -0,0 +1,26 @@
+"""Workload statistics for the flexible query builder."""
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.stats.fingerprint import QueryFingerprint, fingerprint_request
+    from app.query_builder.stats.sketch import CountMinSketch, LatencyHistogram, SpaceSavingTopK
+    from app.query_builder.stats.collector import ShapeStatsCollector
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'QueryFingerprint': 'app.query_builder.stats.fingerprint',
+    'fingerprint_request': 'app.query_builder.stats.fingerprint',
+    'CountMinSketch': 'app.query_builder.stats.sketch',
+    'LatencyHistogram': 'app.query_builder.stats.sketch',
+    'SpaceSavingTopK': 'app.query_builder.stats.sketch',
+    'ShapeStatsCollector': 'app.query_builder.stats.collector'
+})
+
+__all__ = [
+    'QueryFingerprint',
+    'fingerprint_request',
+    'CountMinSketch',
+    'LatencyHistogram',
+    'SpaceSavingTopK',
+    'ShapeStatsCollector'
+]
@@ -0,0 +1,111 @@
+"""Streaming request shape statistics for the flexible query builder."""
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.query_builder.stats.fingerprint import QueryFingerprint
+from app.query_builder.stats.sketch import CountMinSketch, LatencyHistogram, SpaceSavingTopK
+
+
+class ShapeStatsCollector:
+    """Collector of per-shape request counts and latencies in bounded memory.
+
+    Every request is counted in a count-min sketch; the hottest shapes are
+    tracked with a space-saving top-K and keep a latency histogram and a
+    description of the shape. Memory is bounded by ``capacity`` whatever
+    the number of distinct shapes.
+    """
+
+    def __init__(self, capacity: int = 256, sketch_width: int = 2048, sketch_depth: int = 4):
+        """Initialize the collector.
+
+        Args:
+            capacity: Number of shapes tracked in detail
+            sketch_width: Count-min sketch width
+            sketch_depth: Count-min sketch depth
+        """
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._sketch = CountMinSketch(sketch_width, sketch_depth)
+        self._top = SpaceSavingTopK(capacity)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._shapes: Dict[str, QueryFingerprint] = {}
+
+    def record(self, fingerprint: QueryFingerprint, latency_ms: Optional[float] = None) -> None:
+        """Record one request of a shape.
+
+        Args:
+            fingerprint: Shape of the request
+            latency_ms: Observed latency in milliseconds, if measured
+        """
+        key = fingerprint.key
+        with self._lock:
+            self._sketch.add(key)
+            evicted = self._top.offer(key)
+            if evicted is not None:
+                self._histograms.pop(evicted, None)
+                self._shapes.pop(evicted, None)
+
+            self._shapes.setdefault(key, fingerprint)
+            if latency_ms is not None:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram()
+                histogram.add(latency_ms)
+
+    def record_latency(self, fingerprint: QueryFingerprint, latency_ms: float) -> None:
+        """Record a latency (e.g. execution time) without counting a request."""
+        with self._lock:
+            if fingerprint.key in self._top:
+                histogram = self._histograms.get(fingerprint.key)
+                if histogram is None:
+                    histogram = self._histograms[fingerprint.key] = LatencyHistogram()
+                histogram.add(latency_ms)
+
+    def estimate_count(self, fingerprint: QueryFingerprint) -> int:
+        """Estimate how many requests of a shape have been recorded."""
+        with self._lock:
+            return self._sketch.estimate(fingerprint.key)
+
+    def snapshot(self, top_n: Optional[int] = None) -> Dict[str, Any]:
+        """Get the current statistics.
+
+        Args:
+            top_n: Limit the number of shapes reported
+
+        Returns:
+            Dictionary with totals and the hottest shapes, most frequent first
+        """
+        with self._lock:
+            shapes: List[Dict[str, Any]] = []
+            for key, count, error in self._top.top(top_n):
+                histogram = self._histograms.get(key)
+                shapes.append({
+                    'fingerprint': key,
+                    'count': count,
+                    'count_error': error,
+                    'estimated_count': self._sketch.estimate(key),
+                    'latency_ms': histogram.summary() if histogram else None,
+                    'shape': self._shapes[key].describe()
+                })
+            return {
+                'started_at': self.started_at,
+                'total_requests': self._sketch.total,
+                'tracked_shapes': len(shapes),
+                'shapes': shapes
+            }
+
+    def dump(self, path: str, top_n: Optional[int] = None) -> None:
+        """Write the current statistics to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as dump_file:
+            json.dump(self.snapshot(top_n), dump_file, indent=2)
+
+    def reset(self) -> None:
+        """Discard all statistics."""
+        with self._lock:
+            self.started_at = time.time()
+            self._sketch = CountMinSketch(self._sketch.width, self._sketch.depth)
+            self._top = SpaceSavingTopK(self._top.capacity)
+            self._histograms.clear()
+            self._shapes.clear()
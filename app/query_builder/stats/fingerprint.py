@@ -0,0 +1,100 @@
+"""Request shape fingerprinting for the flexible query builder."""
+import hashlib
+from typing import Any, Dict, Tuple
+
+from app.query_builder.parsers.filter_expression import FilterExpressionParser
+from app.query_builder.parsers.filter_parser import FilterParser
+
+
+class QueryFingerprint:
+    """Value-independent description of a request's shape.
+
+    Two requests share a fingerprint when they filter the same fields with
+    the same operators, select/group/order the same fields, need the same
+    joins and page the same way, whatever the filter values are.
+    """
+
+    __slots__ = ('key', 'filters', 'select', 'joins', 'group_by', 'order_by', 'paging')
+
+    def __init__(
+            self,
+            filters: Tuple[Tuple[str, str], ...],
+            select: Tuple[str, ...],
+            joins: Tuple[str, ...],
+            group_by: Tuple[str, ...],
+            order_by: Tuple[str, ...],
+            paging: Tuple[bool, bool]
+    ):
+        self.filters = filters
+        self.select = select
+        self.joins = joins
+        self.group_by = group_by
+        self.order_by = order_by
+        self.paging = paging
+        shape = repr((filters, select, joins, group_by, order_by, paging))
+        self.key = hashlib.blake2b(shape.encode('utf-8'), digest_size=8).hexdigest()
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, QueryFingerprint) and other.key == self.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"QueryFingerprint({self.key})"
+
+    def describe(self) -> Dict[str, Any]:
+        """Get a JSON-serializable description of the shape."""
+        return {
+            'filters': [f"{field} {op}" for field, op in self.filters],
+            'select': list(self.select),
+            'joins': list(self.joins),
+            'group_by': list(self.group_by),
+            'order_by': list(self.order_by),
+            'limit': self.paging[0],
+            'offset': self.paging[1]
+        }
+
+
+def fingerprint_request(params: Dict[str, str], builder: Any) -> QueryFingerprint:
+    """Fingerprint a parsed request.
+
+    Args:
+        params: Request parameters as passed to parse_request_params
+        builder: FlexibleQueryBuilder that has parsed the parameters
+
+    Returns:
+        Fingerprint of the request shape
+    """
+    catalog = builder.catalog
+
+    filters = []
+    for key, value in params.items():
+        parser = builder.parser_factory.get_parser(key)
+        if isinstance(parser, FilterExpressionParser):
+            # Boolean expressions are described by their structure without values
+            filters.append((key, parser.compiler.shape(value)))
+            continue
+        if not isinstance(parser, FilterParser):
+            continue
+        filters.append((catalog.field_mappings.get(key, key), _filter_operator(value, catalog)))
+
+    return QueryFingerprint(
+        filters=tuple(sorted(filters)),
+        select=tuple(builder.select_fields),
+        joins=tuple(sorted(join.key for join in builder.joins)),
+        group_by=tuple(builder.group_by_fields),
+        order_by=tuple(builder.order_by_clauses),
+        paging=(builder.limit_value is not None, builder.offset_value is not None)
+    )
+
+
+def _filter_operator(value: Any, catalog: Any) -> str:
+    """Classify a filter value by the operator it will compile to."""
+    if isinstance(value, str):
+        op_prefix, sep, _ = value.partition(':')
+        if sep and op_prefix in catalog.filter_operators:
+            return op_prefix
+        if ',' in value:
+            return 'in'
+    return 'eq'
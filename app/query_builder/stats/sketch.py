@@ -0,0 +1,152 @@
+"""Bounded-memory streaming summaries for workload statistics."""
+import hashlib
+import math
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class CountMinSketch:
+    """Count-min sketch for approximate frequency counts.
+
+    Estimates never undercount; with ``width = ceil(e / epsilon)`` and
+    ``depth = ceil(ln(1 / delta))`` they overcount by at most
+    ``epsilon * total`` with probability ``1 - delta``.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """Initialize the sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows (independent hash functions)
+        """
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _positions(self, item: str) -> List[int]:
+        """Get the counter position of an item in each row."""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing gives `depth` independent-enough positions
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Count an occurrence of an item."""
+        self.total += count
+        for row, position in zip(self._rows, self._positions(item)):
+            row[position] += count
+
+    def estimate(self, item: str) -> int:
+        """Estimate how often an item has been counted."""
+        return min(row[position] for row, position in zip(self._rows, self._positions(item)))
+
+
+class SpaceSavingTopK:
+    """Space-saving heavy-hitter tracker keeping at most ``capacity`` items.
+
+    When full, a new item replaces the item with the smallest count and
+    inherits that count as its error bound.
+    """
+
+    def __init__(self, capacity: int = 256):
+        """Initialize the tracker.
+
+        Args:
+            capacity: Maximum number of tracked items
+        """
+        self.capacity = capacity
+        self._counts: Dict[Hashable, List[int]] = {}  # item -> [count, error]
+
+    def offer(self, item: Hashable, count: int = 1) -> Optional[Hashable]:
+        """Count an occurrence of an item.
+
+        Returns:
+            The item evicted to make room, if any
+        """
+        entry = self._counts.get(item)
+        if entry is not None:
+            entry[0] += count
+            return None
+
+        evicted = None
+        floor = 0
+        if len(self._counts) >= self.capacity:
+            evicted = min(self._counts, key=lambda key: self._counts[key][0])
+            floor = self._counts.pop(evicted)[0]
+        self._counts[item] = [floor + count, floor]
+        return evicted
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._counts
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int, int]]:
+        """Get the most frequent items as (item, count, error) tuples."""
+        # Ties are broken by the smaller error bound (more certain counts first)
+        ranked = sorted(
+            self._counts.items(),
+            key=lambda entry: (entry[1][0], -entry[1][1]),
+            reverse=True
+        )
+        return [(item, count, error) for item, (count, error) in ranked[:n]]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with bounded relative error.
+
+    Bucket boundaries grow geometrically, so the memory used is fixed by
+    the covered range and quantiles are accurate to about ``precision``.
+    """
+
+    def __init__(self, min_value: float = 0.01, max_value: float = 600000.0, precision: float = 0.05):
+        """Initialize the histogram.
+
+        Args:
+            min_value: Smallest distinguished value (milliseconds)
+            max_value: Largest distinguished value (milliseconds)
+            precision: Relative width of each bucket
+        """
+        self._min_value = min_value
+        self._growth = 1.0 + precision
+        self._bucket_count = int(math.log(max_value / min_value, self._growth)) + 2
+        self._buckets: Dict[int, int] = {}  # sparse: only non-empty buckets
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        """Record a value."""
+        if value <= self._min_value:
+            bucket = 0
+        else:
+            bucket = min(
+                int(math.log(value / self._min_value, self._growth)) + 1,
+                self._bucket_count - 1
+            )
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (0 <= q <= 1) of the recorded values."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen > rank:
+                return min(self._upper_bound(bucket), self.max)
+        return self.max
+
+    def _upper_bound(self, bucket: int) -> float:
+        """Get the upper bound of a bucket."""
+        return self._min_value * self._growth ** bucket
+
+    def summary(self, quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99)) -> Dict[str, Any]:
+        """Summarize the recorded values."""
+        result: Dict[str, Any] = {'count': self.count, 'max': round(self.max, 3)}
+        for q in quantiles:
+            result[f"p{q * 100:g}"] = round(self.quantile(q), 3)
+        return result
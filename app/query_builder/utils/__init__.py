@@ -1,20 +1,39 @@
 """Utility functions for the flexible query builder."""
-from app.query_builder.utils.formatting import (
-    split_and_trim,
-    format_sql_value,
-    format_in_clause
-)
-from app.query_builder.utils.regex_helpers import (
-    extract_field_aliases,
-    extract_field_references,
-    parse_condition
-)
-from app.query_builder.utils.validators import (
-    validate_field_name,
-    validate_alias,
-    validate_order_direction,
-    validate_limit_offset
-)
+from app.query_builder.utils.lazy import TYPE_CHECKING, lazy_exports
+
+if TYPE_CHECKING:
+    from app.query_builder.utils.formatting import (
+        split_and_trim,
+        format_sql_value,
+        format_in_clause
+    )
+    from app.query_builder.utils.regex_helpers import (
+        extract_field_aliases,
+        extract_field_references,
+        parse_condition,
+        strip_string_literals
+    )
+    from app.query_builder.utils.validators import (
+        validate_field_name,
+        validate_alias,
+        validate_order_direction,
+        validate_limit_offset
+    )
+
+# Submodules are imported on first attribute access to keep startup fast
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'split_and_trim': 'app.query_builder.utils.formatting',
+    'format_sql_value': 'app.query_builder.utils.formatting',
+    'format_in_clause': 'app.query_builder.utils.formatting',
+    'extract_field_aliases': 'app.query_builder.utils.regex_helpers',
+    'extract_field_references': 'app.query_builder.utils.regex_helpers',
+    'parse_condition': 'app.query_builder.utils.regex_helpers',
+    'strip_string_literals': 'app.query_builder.utils.regex_helpers',
+    'validate_field_name': 'app.query_builder.utils.validators',
+    'validate_alias': 'app.query_builder.utils.validators',
+    'validate_order_direction': 'app.query_builder.utils.validators',
+    'validate_limit_offset': 'app.query_builder.utils.validators'
+})
 
 __all__ = [
     'split_and_trim',
@@ -23,6 +42,7 @@ __all__ = [
     'extract_field_aliases',
     'extract_field_references',
     'parse_condition',
+    'strip_string_literals',
     'validate_field_name',
     'validate_alias',
     'validate_order_direction',
@@ -0,0 +1,39 @@
+"""Lazy attribute loading for package ``__init__`` modules."""
+import importlib
+import sys
+
+# This module is imported by every package __init__, so it deliberately
+# avoids importing typing (a noticeable part of cold-start time).
+
+# Stand-in for typing.TYPE_CHECKING for the package __init__ modules, whose
+# re-exports are declared under ``if TYPE_CHECKING:`` for type checkers.
+# Type checkers recognize the name and treat the block as reachable.
+TYPE_CHECKING = False
+
+
+def lazy_exports(package: str, exports: dict) -> tuple:
+    """Create module-level ``__getattr__``/``__dir__`` hooks (PEP 562).
+
+    Exported names are imported from their defining module on first access
+    and then cached on the package, so importing a package only pays for
+    the submodules that are actually used.
+
+    Args:
+        package: Name of the package (``__name__`` of its ``__init__``)
+        exports: Mapping of exported name -> defining module name
+
+    Returns:
+        Tuple of (``__getattr__``, ``__dir__``) functions
+    """
+    def __getattr__(name: str) -> object:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
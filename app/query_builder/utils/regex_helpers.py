@@ -28,6 +28,18 @@ def extract_field_references(text: str) -> List[Tuple[str, str]]:
     return re.findall(r'([a-z]+)\.([a-zA-Z_]+)', text)
 
 
+def strip_string_literals(text: str) -> str:
+    """Replace quoted SQL string literals with empty literals.
+
+    Args:
+        text: SQL text
+
+    Returns:
+        Text whose literals cannot be mistaken for field references
+    """
+    return re.sub(r"'(?:[^']|'')*'", "''", text)
+
+
 def parse_condition(condition: str) -> Dict[str, str]:
     """Parse a SQL condition into components.
 
@@ -0,0 +1,122 @@
+"""Allocation budget check for building queries.
+
+Builds a set of representative requests under tracemalloc and reports,
+per request, the peak memory allocated while parsing and building (the
+transient garbage a build leaves to the allocator and GC) and the memory
+and blocks still held by the builder afterwards::
+
+    python benchmarks/allocations.py [--iterations 50] [--no-check]
+
+Exits with status 1 when a request goes over its budget in BUDGETS, so
+the script can run in CI next to the startup benchmark.
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tracemalloc
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from app.query_builder import FlexibleQueryBuilder  # noqa: E402
+from app.query_builder.schema import get_catalog  # noqa: E402
+
+SCHEMA = "bench"
+
+REQUESTS: Dict[str, Dict[str, str]] = {
+    'default projection': {'limit': '10'},
+    'filters and order': {
+        'industry': '32,34',
+        'transactionType': '1',
+        'orderBy': 'announcedDate:desc',
+        'limit': '10'
+    },
+    'joined select': {
+        'select': 'tr.transactionId,c.companyName,si.simpleIndustryDescription,geo.country',
+        'transactionType': '14',
+        'limit': '50'
+    },
+    'grouped': {
+        'select': 'geo.countryId,COUNT(*) AS transactions,SUM(tr.transactionSize) AS total',
+        'groupBy': 'geo.countryId',
+        'orderBy': 'transactions:desc'
+    },
+    'filter expression': {
+        'filter': "(industry = 32 OR industry = 34) AND NOT c.companyName LIKE 'Acme%'",
+        'limit': '10'
+    },
+    'date range': {'announcedDate': 'between:2019-03,2020', 'companyId': '10,20,30,40,50'},
+}
+
+# Per request: (peak KiB while building, KiB held by the builder afterwards)
+BUDGETS: Dict[str, Tuple[float, float]] = {
+    'default projection': (8, 4),
+    'filters and order': (10, 5),
+    'joined select': (10, 5),
+    'grouped': (8, 4),
+    'filter expression': (14, 8),
+    'date range': (10, 5),
+}
+
+
+def build(params: Dict[str, str]) -> FlexibleQueryBuilder:
+    """Parse and build one request with a fresh builder, as a worker does."""
+    builder = FlexibleQueryBuilder(SCHEMA)
+    builder.parse_request_params(params)
+    builder.build_query()
+    return builder
+
+
+def measure(params: Dict[str, str], iterations: int) -> Tuple[float, float, float]:
+    """Measure the median peak KiB, retained KiB and retained blocks of a build."""
+    build(params)  # warm up lazy imports and regex caches outside the measurement
+    peaks: List[float] = []
+    retained: List[float] = []
+    blocks: List[float] = []
+    for _ in range(iterations):
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        builder = build(params)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        peaks.append((peak - start) / 1024)
+        retained.append((current - start) / 1024)
+        blocks.append(sum(stat.count_diff for stat in after.compare_to(before, 'filename')))
+        del builder
+    return statistics.median(peaks), statistics.median(retained), statistics.median(blocks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Allocation budget check")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--no-check', action='store_true', help="report without enforcing budgets")
+    args = parser.parse_args()
+
+    # Load the catalog before tracing; it is shared by all builds
+    get_catalog()
+    tracemalloc.start()
+    failures = []
+    print(f"{'request':<20} {'peak KiB':>9} {'held KiB':>9} {'blocks':>7} {'budget':>13}")
+    for name, params in REQUESTS.items():
+        peak, held, blocks = measure(params, args.iterations)
+        peak_budget, held_budget = BUDGETS[name]
+        over = peak > peak_budget or held > held_budget
+        if over:
+            failures.append(name)
+        print(f"{name:<20} {peak:>9.1f} {held:>9.1f} {blocks:>7.0f} "
+              f"{f'{peak_budget:.0f}/{held_budget:.0f}':>13}{'  OVER' if over else ''}")
+    tracemalloc.stop()
+
+    if failures and not args.no_check:
+        print(f"Over budget: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
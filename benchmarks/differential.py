@@ -0,0 +1,405 @@
+"""Differential correctness and speed harness for builder optimizations.
+
+Loads a synthetic dataset shaped after the catalog (transactions,
+companies, industries, countries, ...) into SQLite, generates randomized
+requests and runs every request through a baseline pipeline and the
+selected optimized pipelines. Result sets are compared row for row and
+build/execution times are reported per pipeline::
+
+    python benchmarks/differential.py [--requests 500] [--rows 20000] [--seed 7]
+        [--pipelines exists,in,cte,rollups,plan_cache,prepared,all]
+
+Exits with status 1 when an optimized pipeline returns different rows
+than the baseline, or fails where the baseline does not.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from app.query_builder import FlexibleQueryBuilder  # noqa: E402
+from app.query_builder.analyzers.join_analyzer import EQUI_JOIN_PATTERN  # noqa: E402
+from app.query_builder.execution import PreparedExecutor, SQLiteExecutor  # noqa: E402
+from app.query_builder.plans import PlanCache  # noqa: E402
+from app.query_builder.schema import Catalog, TableDef, get_catalog, load_catalog  # noqa: E402
+from app.utils.errors import QueryBuildError  # noqa: E402
+
+SCHEMA = "main"
+SQLITE_TYPES = {'int': 'INTEGER', 'float': 'REAL', 'bool': 'INTEGER'}
+WORDS = ('Alpha', 'Acme', 'Beta', 'Delta', 'Gamma', 'Nova', 'Omega', 'Zenith')
+FIRST_DATE = date(2000, 1, 1)
+
+# Share of NULLs in non-key columns and of foreign keys without a match
+NULL_RATE = 0.05
+DANGLING_RATE = 0.02
+
+# Builder arguments and whether statements run prepared, per pipeline;
+# instantiated once per run so caches persist across requests
+PIPELINES: Dict[str, Callable[[], Tuple[Dict[str, Any], bool]]] = {
+    'baseline': lambda: ({'use_rollups': False}, False),
+    'exists': lambda: ({'use_rollups': False, 'filter_join_policy': 'exists'}, False),
+    'in': lambda: ({'use_rollups': False, 'filter_join_policy': 'in'}, False),
+    'cte': lambda: ({'use_rollups': False, 'filter_join_policy': 'cte'}, False),
+    'rollups': lambda: ({'use_rollups': True}, False),
+    'plan_cache': lambda: ({'use_rollups': False, 'plan_cache': PlanCache()}, False),
+    'prepared': lambda: ({'use_rollups': False}, True),
+    'all': lambda: ({'filter_join_policy': 'exists', 'plan_cache': PlanCache()}, True),
+}
+
+
+def key_column(table: TableDef) -> str:
+    """Get the primary key column of a table (its pk_ index or first column)."""
+    for index in table.indexes:
+        if index.name.startswith('pk_'):
+            return index.columns[0]
+    return table.columns[0].name
+
+
+def foreign_keys(catalog: Catalog, base_table: str, base_alias: str) -> Dict[Tuple[str, str], str]:
+    """Derive (table, column) -> referenced table from the catalog's equality joins."""
+    references = {}
+    for edge in catalog.joins.values():
+        match = EQUI_JOIN_PATTERN.match(edge.render_condition(base_alias))
+        if not match:
+            continue
+        left_alias, left_column, right_alias, right_column = match.groups()
+        left = (catalog.table_for_alias(left_alias, base_table, base_alias), left_column)
+        right = (catalog.table_for_alias(right_alias, base_table, base_alias), right_column)
+        for (table, column), (target, target_column) in ((left, right), (right, left)):
+            if table is None or target is None or table == target:
+                continue
+            if (target_column == key_column(catalog.tables[target])
+                    and column != key_column(catalog.tables[table])):
+                references[(table, column)] = target
+    return references
+
+
+def table_sizes(catalog: Catalog, base_table: str, rows: int,
+                references: Dict[Tuple[str, str], str]) -> Dict[str, int]:
+    """Choose row counts: the base table is largest, referencing tables next."""
+    sizes = {}
+    for name in catalog.tables:
+        if name == base_table:
+            sizes[name] = rows
+        elif any(table == name for table, _ in references):
+            sizes[name] = max(50, rows // 10)
+        else:
+            sizes[name] = 40
+    return sizes
+
+
+def random_value(column_type: str, column: str, rng: random.Random) -> Any:
+    """Generate a value of a catalog column type."""
+    if column_type == 'int':
+        return rng.randint(1, 1000)
+    if column_type == 'float':
+        return round(rng.uniform(0.5, 5000.0), 2)
+    if column_type == 'bool':
+        return rng.randint(0, 1)
+    if column_type in ('date', 'datetime'):
+        day = FIRST_DATE + timedelta(days=rng.randint(0, 9000))
+        if column_type == 'date':
+            return day.isoformat()
+        return f"{day.isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+    return f"{rng.choice(WORDS)} {column} {rng.randint(1, 60)}"
+
+
+def create_dataset(path: str, catalog: Catalog, base_table: str, base_alias: str,
+                   rows: int, rng: random.Random) -> None:
+    """Create the synthetic tables, their catalog indexes and the rollup tables."""
+    references = foreign_keys(catalog, base_table, base_alias)
+    sizes = table_sizes(catalog, base_table, rows, references)
+    connection = sqlite3.connect(path)
+    with connection:
+        for name, table in catalog.tables.items():
+            key = key_column(table)
+            definitions = ', '.join(
+                f"{column.name} {SQLITE_TYPES.get(column.type, 'TEXT')}"
+                f"{' PRIMARY KEY' if column.name == key else ''}"
+                for column in table.columns
+            )
+            connection.execute(f"CREATE TABLE {name} ({definitions})")
+
+            data = []
+            for row_id in range(1, sizes[name] + 1):
+                row = []
+                for column in table.columns:
+                    target = references.get((name, column.name))
+                    if column.name == key:
+                        row.append(row_id)
+                    elif target is not None:
+                        # A few references point nowhere, exercising inner join semantics
+                        dangling = rng.random() < DANGLING_RATE
+                        row.append(sizes[target] + 1 if dangling else rng.randint(1, sizes[target]))
+                    elif rng.random() < NULL_RATE:
+                        row.append(None)
+                    else:
+                        row.append(random_value(column.type, column.name, rng))
+                data.append(row)
+            placeholders = ', '.join('?' * len(table.columns))
+            connection.executemany(f"INSERT INTO {name} VALUES ({placeholders})", data)
+
+            for index in table.indexes:
+                if not index.name.startswith('pk_'):
+                    connection.execute(
+                        f"CREATE INDEX {index.name} ON {name} ({', '.join(index.columns)})"
+                    )
+
+        # Rollups are built with the builder itself, so they share its join semantics
+        for rollup in catalog.rollups.get(base_table, ()):
+            builder = FlexibleQueryBuilder(SCHEMA, base_table, base_alias, catalog=catalog,
+                                           use_rollups=False)
+            select = [f"{field} AS {column}" for field, column in rollup.dimensions.items()]
+            select += [f"{aggregate} AS {column}" for aggregate, column in rollup.measures.items()]
+            builder.parse_request_params({
+                'select': ','.join(select),
+                'groupBy': ','.join(rollup.dimensions)
+            })
+            connection.execute(f"CREATE TABLE {rollup.name} AS {builder.build_query()}")
+    connection.close()
+
+
+class RequestGenerator:
+    """Generator of randomized request parameters over the catalog's fields."""
+
+    def __init__(self, catalog: Catalog, path: str, base_table: str, base_alias: str,
+                 rng: random.Random):
+        self.catalog = catalog
+        self.rng = rng
+        self.base_alias = base_alias
+        self.key_field = f"{base_alias}.{key_column(catalog.tables[base_table])}"
+
+        aliases = {base_alias: base_table}
+        for edge in catalog.joins.values():
+            aliases.setdefault(edge.alias, edge.table)
+        self.fields: Dict[str, str] = {}
+        for alias, table_name in aliases.items():
+            for column in catalog.tables[table_name].columns:
+                if not column.heavy:
+                    self.fields[f"{alias}.{column.name}"] = column.type
+        self.numeric = [field for field, kind in self.fields.items() if kind in ('int', 'float')]
+        self.operators = [op for op in ('gte', 'lte', 'gt', 'lt', 'ne')
+                          if op in catalog.filter_operators]
+        self.rollups = list(catalog.rollups.get(base_table, ()))
+
+        # Sample real values so that filters select something
+        connection = sqlite3.connect(path)
+        self.values: Dict[str, List[str]] = {}
+        for field in self.fields:
+            alias, column = field.split('.')
+            rows = connection.execute(
+                f"SELECT DISTINCT {column} FROM {aliases[alias]} "
+                f"WHERE {column} IS NOT NULL LIMIT 200"
+            ).fetchall()
+            self.values[field] = [str(row[0]) for row in rows] or ['1']
+        connection.close()
+
+    def generate(self) -> Dict[str, str]:
+        """Generate one request."""
+        rng = self.rng
+        params: Dict[str, str] = {}
+        grouped = rng.random() < 0.4
+        rollup = None
+        if grouped and self.rollups and rng.random() < 0.5:
+            # Stay within a rollup's dimensions and measures so routing is exercised
+            rollup = rng.choice(self.rollups)
+        fields = list(rollup.dimensions) if rollup else list(self.fields)
+
+        for field in rng.sample(fields, rng.randint(0, min(3, len(fields)))):
+            params[field] = self._filter_value(field)
+        if rollup is None and rng.random() < 0.15:
+            params['filter'] = self._expression()
+
+        if grouped:
+            group_by = rng.sample(fields, rng.randint(1, min(2, len(fields))))
+            if rollup:
+                aggregates = rng.sample(list(rollup.measures), rng.randint(1, len(rollup.measures)))
+            else:
+                aggregates = ['COUNT(*)'] + [
+                    f"{rng.choice(('SUM', 'MIN', 'MAX'))}({field})"
+                    for field in rng.sample(self.numeric, min(len(self.numeric), rng.randint(0, 2)))
+                ]
+            measures = [f"{aggregate} AS m{number}" for number, aggregate in enumerate(aggregates)]
+            params['select'] = ','.join(group_by + measures)
+            params['groupBy'] = ','.join(group_by)
+            order_by = group_by
+        else:
+            if rng.random() < 0.6:
+                params['select'] = ','.join(rng.sample(list(self.fields), rng.randint(1, 4)))
+            # The key makes the order total, so LIMIT/OFFSET pick the same rows
+            order_by = rng.sample(list(self.fields), rng.randint(0, 1)) + [self.key_field]
+
+        if rng.random() < 0.4:
+            params['orderBy'] = ','.join(
+                f"{field}:{rng.choice(('asc', 'desc'))}" for field in order_by
+            )
+            if rng.random() < 0.6:
+                params['limit'] = str(rng.randint(1, 50))
+                if rng.random() < 0.3:
+                    params['offset'] = str(rng.randint(0, 20))
+        return params
+
+    def _filter_value(self, field: str) -> str:
+        """Generate the value of a field filter: equality, IN list, range or LIKE."""
+        rng = self.rng
+        values = self.values[field]
+        choice = rng.random()
+        if choice < 0.35:
+            return ','.join(rng.sample(values, min(len(values), rng.randint(2, 5))))
+        if choice < 0.6 and self.operators and self.fields[field] != 'text':
+            return f"{rng.choice(self.operators)}:{rng.choice(values)}"
+        if choice < 0.7 and self.fields[field] == 'text' and 'like' in self.catalog.filter_operators:
+            return f"like:{rng.choice(WORDS)}%"
+        return rng.choice(values)
+
+    def _expression(self) -> str:
+        """Generate a nested boolean filter expression."""
+        rng = self.rng
+
+        def predicate() -> str:
+            field = rng.choice(list(self.fields))
+            values = [self._literal(value) for value in rng.sample(
+                self.values[field], min(3, len(self.values[field])))]
+            kind = rng.random()
+            if kind < 0.3:
+                return f"{field} IN ({', '.join(values)})"
+            if kind < 0.4:
+                return f"{field} IS {'NOT ' if rng.random() < 0.5 else ''}NULL"
+            return f"{field} {rng.choice(('=', '!=', '<', '>='))} {values[0]}"
+
+        first, second, third = predicate(), predicate(), predicate()
+        negation = 'NOT ' if rng.random() < 0.5 else ''
+        return f"{first} {rng.choice(('AND', 'OR'))} ({second} OR {negation}{third})"
+
+    @staticmethod
+    def _literal(value: str) -> str:
+        return "'" + value.replace("'", "''") + "'"
+
+
+class PipelineRun:
+    """Outcomes and timings of one pipeline."""
+
+    def __init__(self, name: str, builder_kwargs: Dict[str, Any], executor: Any):
+        self.name = name
+        self.builder_kwargs = builder_kwargs
+        self.executor = executor
+        self.build_ms: List[float] = []
+        self.execute_ms: List[float] = []
+        self.mismatches: List[Tuple[Dict[str, str], str, str]] = []
+
+    def run(self, params: Dict[str, str], catalog: Catalog, base_table: str,
+            base_alias: str) -> Tuple[Any, str]:
+        """Build and execute a request; returns (normalized rows or error, SQL)."""
+        started = time.perf_counter()
+        try:
+            builder = FlexibleQueryBuilder(SCHEMA, base_table, base_alias, catalog=catalog,
+                                           **self.builder_kwargs)
+            builder.parse_request_params(params)
+            sql = builder.build_query()
+        except QueryBuildError as e:
+            return f"error: {e}", ''
+        built = time.perf_counter()
+        try:
+            rows = self.executor.execute(sql).rows
+        except sqlite3.Error as e:
+            return f"database error: {e}", sql
+        finished = time.perf_counter()
+        self.build_ms.append((built - started) * 1000)
+        self.execute_ms.append((finished - built) * 1000)
+        return normalize(rows), sql
+
+
+def normalize(rows: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    """Make result sets comparable: round floats (aggregation order) and sort."""
+    normalized = [
+        tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+        for row in rows
+    ]
+    return sorted(normalized, key=repr)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Differential correctness and speed harness")
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=2,
+                        help="times the request set is replayed (warms caches)")
+    parser.add_argument('--rows', type=int, default=20000, help="rows in the base table")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--pipelines', default='exists,in,cte,rollups,plan_cache,prepared,all',
+                        help="comma-separated optimized pipelines: " + ', '.join(PIPELINES))
+    parser.add_argument('--catalog', help="catalog file (defaults to the packaged catalog)")
+    parser.add_argument('--base-table', default="ciqTransaction")
+    parser.add_argument('--base-alias', default="tr")
+    parser.add_argument('--database', help="SQLite file to create (defaults to a temporary file)")
+    parser.add_argument('--show', type=int, default=5, help="mismatches printed per pipeline")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.pipelines.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PIPELINES]
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(unknown)}")
+
+    catalog = load_catalog(args.catalog) if args.catalog else get_catalog()
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='qb-differential-')
+    path = args.database or os.path.join(directory, 'dataset.db')
+    if os.path.exists(path):
+        os.remove(path)
+    create_dataset(path, catalog, args.base_table, args.base_alias, args.rows, rng)
+    generator = RequestGenerator(catalog, path, args.base_table, args.base_alias, rng)
+    requests = [generator.generate() for _ in range(args.requests)]
+
+    runs = []
+    for name in ['baseline'] + names:
+        builder_kwargs, prepared = PIPELINES[name]()
+        executor = SQLiteExecutor(path)
+        runs.append(PipelineRun(name, builder_kwargs, PreparedExecutor(executor) if prepared else executor))
+    baseline, optimized = runs[0], runs[1:]
+
+    invalid = 0
+    for round_number in range(args.rounds):
+        for position, params in enumerate(requests):
+            # Alternate the order so neither side always runs on a warmer page cache
+            order = optimized if (position + round_number) % 2 else list(reversed(optimized))
+            expected, expected_sql = baseline.run(params, catalog, args.base_table, args.base_alias)
+            if isinstance(expected, str) and round_number == 0:
+                invalid += 1
+            for run in order:
+                actual, sql = run.run(params, catalog, args.base_table, args.base_alias)
+                if actual != expected:
+                    run.mismatches.append((params, expected_sql, sql))
+
+    print(f"{len(requests)} requests x {args.rounds} rounds on {args.rows} base rows "
+          f"({invalid} rejected by the builder), dataset {path}")
+    print(f"{'pipeline':<12} {'mismatch':>8} {'build p50':>10} {'build p90':>10} "
+          f"{'exec p50':>10} {'exec p90':>10} {'total ms':>10} {'speedup':>8}")
+    baseline_total = sum(baseline.build_ms) + sum(baseline.execute_ms)
+    for run in runs:
+        total = sum(run.build_ms) + sum(run.execute_ms)
+        print(f"{run.name:<12} {len(run.mismatches):>8} "
+              f"{statistics.median(run.build_ms or [0]):>10.3f} {percentile(run.build_ms, 0.9):>10.3f} "
+              f"{statistics.median(run.execute_ms or [0]):>10.3f} {percentile(run.execute_ms, 0.9):>10.3f} "
+              f"{total:>10.1f} {baseline_total / total if total else 0:>7.2f}x")
+
+    for run in optimized:
+        for params, expected_sql, sql in run.mismatches[:args.show]:
+            print(f"\n[{run.name}] {params}\n  baseline:  {expected_sql}\n  optimized: {sql}")
+    return 1 if any(run.mismatches for run in optimized) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
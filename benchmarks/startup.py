@@ -0,0 +1,82 @@
+"""Cold-start benchmark for the flexible query builder.
+
+Each scenario runs in a fresh interpreter so import and catalog loading
+costs are measured the way a newly started worker sees them::
+
+    python benchmarks/startup.py [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet prints its own elapsed time in milliseconds
+SCENARIOS = {
+    'import package': """
+import time
+start = time.perf_counter()
+import app.query_builder
+print((time.perf_counter() - start) * 1000)
+""",
+    'first build (catalog file)': """
+import time
+start = time.perf_counter()
+from app.query_builder import FlexibleQueryBuilder
+from app.query_builder.schema import loader
+loader._current_catalog = loader.load_catalog()
+builder = FlexibleQueryBuilder("bench")
+builder.parse_request_params({"select": "@summary", "limit": "10"})
+builder.build_query()
+print((time.perf_counter() - start) * 1000)
+""",
+    'first build (catalog snapshot)': """
+import time
+start = time.perf_counter()
+from app.query_builder import FlexibleQueryBuilder
+builder = FlexibleQueryBuilder("bench")
+builder.parse_request_params({"select": "@summary", "limit": "10"})
+builder.build_query()
+print((time.perf_counter() - start) * 1000)
+""",
+}
+
+
+def run_scenario(code: str, runs: int) -> list:
+    """Run a snippet in fresh interpreters and collect its timings."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    # Make sure the snapshot scenario has an up-to-date snapshot to read
+    subprocess.run(
+        [sys.executable, '-m', 'app.query_builder.schema'],
+        cwd=REPO_ROOT, check=True, capture_output=True,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(
+            filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')]))}
+    )
+
+    print(f"{'scenario':<32} {'median ms':>10} {'p90 ms':>10}")
+    for name, code in SCENARIOS.items():
+        timings = sorted(run_scenario(code, args.runs))
+        p90 = timings[min(len(timings) - 1, int(len(timings) * 0.9))]
+        print(f"{name:<32} {statistics.median(timings):>10.2f} {p90:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
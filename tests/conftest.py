@@ -0,0 +1,97 @@
+"""Shared fixtures: a small SQLite database with the catalog's tables."""
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+TABLES = """
+CREATE TABLE ciqTransaction(
+    transactionId INT PRIMARY KEY, companyId INT, transactionIdTypeId INT, statusId INT,
+    announcedDate TEXT, closingDate TEXT, transactionSize REAL, currencyId INT, comments TEXT
+);
+CREATE TABLE ciqTransactionArchive AS SELECT * FROM ciqTransaction WHERE 0;
+CREATE TABLE ciqCompany(
+    companyId INT PRIMARY KEY, companyName TEXT, simpleIndustryId INT, countryId INT,
+    webpage TEXT, businessDescription TEXT
+);
+CREATE TABLE ciqSimpleIndustry(simpleIndustryId INT PRIMARY KEY, simpleIndustryDescription TEXT);
+CREATE TABLE ciqCountryGeo(countryId INT PRIMARY KEY, country TEXT, isoCountry2 TEXT, region TEXT);
+CREATE TABLE ciqTransactionType(transactionIdTypeId INT PRIMARY KEY, transactionIdTypeName TEXT);
+"""
+
+# Transactions announced before this date are in the archive table
+ARCHIVE_BEFORE = "2015-01-01"
+
+
+def _populate(connection: sqlite3.Connection) -> None:
+    rng = random.Random(7)
+    connection.executescript(TABLES)
+    connection.executemany(
+        "INSERT INTO ciqSimpleIndustry VALUES (?, ?)",
+        [(i, f"Industry {i}") for i in range(1, 41)]
+    )
+    connection.executemany(
+        "INSERT INTO ciqCountryGeo VALUES (?, ?, ?, ?)",
+        [(i, f"Country {i}", f"C{i}", f"R{i % 5}") for i in range(1, 31)]
+    )
+    connection.executemany(
+        "INSERT INTO ciqTransactionType VALUES (?, ?)",
+        [(i, f"Type {i}") for i in range(1, 20)]
+    )
+    connection.executemany(
+        "INSERT INTO ciqCompany VALUES (?, ?, ?, ?, NULL, 'description')",
+        [(i, f"Company {i}", rng.randint(1, 40), rng.randint(1, 30)) for i in range(1, 201)]
+    )
+    start = date(2010, 1, 1)
+    rows = []
+    for i in range(1, 1001):
+        rows.append((
+            i,
+            rng.randint(1, 200),
+            rng.choice([1, 2, 3, 14]),
+            None if i % 10 == 0 else rng.randint(1, 5),
+            (start + timedelta(days=rng.randint(0, 3650))).isoformat(),
+            None,
+            None if i % 7 == 0 else round(rng.random() * 1000, 2),
+            1,
+            "comment"
+        ))
+    connection.executemany("INSERT INTO ciqTransaction VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.commit()
+
+
+@pytest.fixture(scope="session")
+def db_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """Path of a database with 1000 transactions (some with NULL status and size)."""
+    path = str(tmp_path_factory.mktemp("db") / "transactions.db")
+    connection = sqlite3.connect(path)
+    _populate(connection)
+    connection.close()
+    return path
+
+
+@pytest.fixture(scope="session")
+def split_db_path(tmp_path_factory: pytest.TempPathFactory, db_path: str) -> str:
+    """Path of the same data with old transactions moved to ciqTransactionArchive."""
+    path = str(tmp_path_factory.mktemp("db") / "split.db")
+    connection = sqlite3.connect(path)
+    _populate(connection)
+    connection.execute(
+        "INSERT INTO ciqTransactionArchive SELECT * FROM ciqTransaction WHERE announcedDate < ?",
+        (ARCHIVE_BEFORE,)
+    )
+    connection.execute("DELETE FROM ciqTransaction WHERE announcedDate < ?", (ARCHIVE_BEFORE,))
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def executor(db_path: str):
+    from app.query_builder.execution import SQLiteExecutor
+
+    executor = SQLiteExecutor(db_path)
+    yield executor
+    executor.close()
+
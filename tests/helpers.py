@@ -0,0 +1,19 @@
+"""Helpers shared by the tests."""
+from typing import Any, Dict
+
+from app.query_builder import FlexibleQueryBuilder
+
+# Schema of the test database (SQLite's main schema)
+SCHEMA = "main"
+
+
+def build(params: Dict[str, Any], **kwargs: Any) -> FlexibleQueryBuilder:
+    """Parse a request with a fresh builder."""
+    builder = FlexibleQueryBuilder(SCHEMA, **kwargs)
+    builder.parse_request_params(params)
+    return builder
+
+
+def build_sql(params: Dict[str, Any], **kwargs: Any) -> str:
+    """Parse a request with a fresh builder and build its query."""
+    return build(params, **kwargs).build_query()
@@ -0,0 +1,43 @@
+"""Allocation budgets of query builds, measured with tracemalloc."""
+import importlib.util
+import os
+import tracemalloc
+
+import pytest
+
+from app.query_builder.schema import get_catalog
+
+BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'allocations.py')
+
+
+def load_benchmark():
+    """Load the allocation benchmark, which holds the requests and their budgets."""
+    spec = importlib.util.spec_from_file_location('allocation_benchmark', BENCHMARK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmark = load_benchmark()
+
+
+@pytest.fixture
+def traced():
+    get_catalog()  # shared by all builds; loaded outside the measurement
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('name', list(benchmark.REQUESTS))
+def test_build_stays_within_its_allocation_budget(traced, name):
+    peak, held, _ = benchmark.measure(benchmark.REQUESTS[name], iterations=10)
+    peak_budget, held_budget = benchmark.BUDGETS[name]
+    assert peak <= peak_budget, f"{name}: peak {peak:.1f} KiB over {peak_budget} KiB"
+    assert held <= held_budget, f"{name}: held {held:.1f} KiB over {held_budget} KiB"
+
+
+def test_every_request_has_a_budget():
+    assert set(benchmark.BUDGETS) == set(benchmark.REQUESTS)
@@ -0,0 +1,99 @@
+"""Tests for loading and validating the schema catalog."""
+import copy
+import json
+
+import pytest
+
+from app.query_builder.schema import loader
+from app.query_builder.schema.catalog import CatalogError
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog, load_catalog
+from tests.helpers import build
+
+
+@pytest.fixture
+def document():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        return copy.deepcopy(json.load(catalog_file))
+
+
+@pytest.fixture
+def restore_current_catalog():
+    current = loader._current_catalog
+    yield
+    loader._current_catalog = current
+
+
+def test_catalog_overlays_the_legacy_constants(document):
+    catalog = build_catalog(document)
+    assert catalog.joins['company_reverse'].condition == '{alias}.companyId = {base}.companyId'
+    assert catalog.joins['company'].condition == 'c.companyId = tr.companyId'
+    assert catalog.field_mappings['industry'] == 'si.simpleIndustryId'
+    assert catalog.filter_operators['between'] == 'BETWEEN'
+    assert catalog.table_for_alias('geo', 'ciqTransaction', 'tr') == 'ciqCountryGeo'
+    assert 'company' in catalog.filter_keys
+
+
+def test_catalog_is_immutable(document):
+    catalog = build_catalog(document)
+    with pytest.raises(AttributeError):
+        catalog.version = 2
+    with pytest.raises(TypeError):
+        catalog.tables['x'] = None
+    with pytest.raises(AttributeError):
+        catalog.joins['company'].alias = 'x'
+
+
+@pytest.mark.parametrize('edit, message', [
+    (lambda d: d['tables']['ciqCompany']['columns'].update(x={'type': 'uuid'}), "unknown type 'uuid'"),
+    (lambda d: d['tables']['ciqCompany']['profiles'].update(x=['nope']), "profile 'x'"),
+    (lambda d: d['tables']['ciqCompany']['indexes'].update(ix=['nope']), "index 'ix'"),
+    (lambda d: d['joins'].update(x={'table': 't', 'alias': 'x'}), "'x' is missing condition"),
+    (lambda d: d['joins']['industry'].update(requires=['nope']), "requires unknown join 'nope'"),
+    (lambda d: d['joins'].update(company={'requires': ['country']}), 'cycle'),
+    (lambda d: d['join_rules']['preferred'].update(c='industry'), "does not provide alias 'c'"),
+    (lambda d: d['join_rules']['selectors'].update(x={'1': 'nope'}), "unknown join 'nope'"),
+    (lambda d: d['field_mappings'].update(x=''), "'x' must be a non-empty string"),
+    (lambda d: d['rollups'].update(r={'base_table': 'ciqTransaction'}), 'needs a base_table'),
+    (lambda d: d['rollups'].update(r={
+        'base_table': 'ciqTransaction', 'dimensions': {'industry': 'i'}, 'measures': {'a': 'AVG(x)'}
+    }), "measure 'a'"),
+])
+def test_inconsistent_catalogs_are_rejected(document, edit, message):
+    edit(document)
+    with pytest.raises(CatalogError, match=message):
+        build_catalog(document)
+
+
+def test_unreadable_catalog_file_is_rejected(tmp_path):
+    path = tmp_path / 'catalog.json'
+    path.write_text('{', encoding='utf-8')
+    with pytest.raises(CatalogError, match='Cannot load catalog'):
+        load_catalog(str(path))
+
+
+def test_failed_reload_keeps_the_current_catalog(tmp_path, document, restore_current_catalog):
+    path = tmp_path / 'catalog.json'
+    document['version'] = 7
+    path.write_text(json.dumps(document), encoding='utf-8')
+    assert loader.reload_catalog(str(path)).version == 7
+
+    document['joins']['industry']['requires'] = ['nope']
+    path.write_text(json.dumps(document), encoding='utf-8')
+    with pytest.raises(CatalogError):
+        loader.reload_catalog(str(path))
+    assert loader.get_catalog().version == 7
+
+
+def test_builders_keep_the_catalog_they_started_with(tmp_path, document, restore_current_catalog):
+    document['field_mappings']['status'] = 'tr.statusId'
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps(document), encoding='utf-8')
+    loader.reload_catalog(str(path))
+    builder = build({})
+
+    del document['field_mappings']['status']
+    path.write_text(json.dumps(document), encoding='utf-8')
+    loader.reload_catalog(str(path))
+    builder.parse_request_params({'status': '2'})
+    assert builder.where_conditions == ["tr.statusId = '2'"]
+    assert build({'status': '2'}).where_conditions == []
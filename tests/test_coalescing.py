@@ -0,0 +1,223 @@
+"""Tests for coalescing identical in-flight requests."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.query_builder import FlexibleQueryBuilder
+from app.query_builder.execution import (
+    AsyncRequestCoalescer,
+    CancellationToken,
+    QueryCancelledError,
+    RequestCoalescer,
+    cancellation_scope
+)
+from app.query_builder.execution.cancellation import current_token
+from tests.helpers import SCHEMA, build_sql
+
+REQUEST = {'select': 'tr.transactionId', 'industry': '3,4', 'orderBy': 'announcedDate', 'limit': '5'}
+RESPELLED = {'limit': 5, 'orderBy': 'tr.announcedDate:asc', 'si.simpleIndustryId': '4, 3',
+             'select': 'tr.transactionId'}
+
+
+class GatedExecutor:
+    """Executor holding every statement until released, counting executions."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.fail = None
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def execute(self, sql, params=None):
+        with self.lock:
+            self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        token = current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+        if self.fail is not None:
+            raise self.fail
+        return self.executor.execute(sql, params)
+
+
+def builder_factory():
+    return FlexibleQueryBuilder(SCHEMA)
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Caller(threading.Thread):
+    """Thread running one request, keeping its result or error."""
+
+    def __init__(self, coalescer, params=REQUEST, token=None):
+        super().__init__(daemon=True)
+        self.coalescer = coalescer
+        self.params = params
+        self.token = token or CancellationToken()
+        self.result = self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            with cancellation_scope(self.token):
+                self.result = self.coalescer.execute(self.params)
+        except BaseException as e:
+            self.error = e
+
+    def finish(self):
+        self.join(5)
+        assert not self.is_alive()
+        return self
+
+
+@pytest.fixture
+def gate(executor):
+    return GatedExecutor(executor)
+
+
+@pytest.fixture
+def coalescer(gate):
+    return RequestCoalescer(gate, builder_factory)
+
+
+def lead(coalescer, gate):
+    leader = Caller(coalescer)
+    assert gate.started.wait(5)
+    return leader
+
+
+def test_identical_requests_share_one_execution(executor, gate, coalescer):
+    leader = lead(coalescer, gate)
+    waiters = [Caller(coalescer, params) for params in (REQUEST, RESPELLED, RESPELLED)]
+    wait_until(lambda: coalescer.stats()['coalesced'] == 3)
+    gate.release.set()
+
+    expected = executor.execute(build_sql(REQUEST)).rows
+    assert expected and leader.finish().result.rows == expected
+    for waiter in waiters:
+        assert waiter.finish().result.rows == expected
+        assert waiter.result.rows is not leader.result.rows
+    assert gate.calls == 1
+    assert coalescer.stats() == {'executions': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_finished_requests_are_not_cached(gate, coalescer):
+    gate.release.set()
+    coalescer.execute(REQUEST)
+    coalescer.execute(RESPELLED)
+    assert gate.calls == 2
+    assert coalescer.stats()['coalesced'] == 0
+
+
+def test_different_requests_do_not_share(gate, coalescer):
+    leader = lead(coalescer, gate)
+    other = Caller(coalescer, dict(REQUEST, industry='3'))
+    wait_until(lambda: coalescer.stats()['executions'] == 2)
+    gate.release.set()
+    assert leader.finish().result.rows and other.finish().result.rows
+    assert gate.calls == 2
+
+
+def test_errors_reach_every_waiting_caller(gate, coalescer):
+    gate.fail = RuntimeError("connection lost")
+    leader = lead(coalescer, gate)
+    waiter = Caller(coalescer, RESPELLED)
+    wait_until(lambda: coalescer.stats()['coalesced'] == 1)
+    gate.release.set()
+    assert leader.finish().error is gate.fail
+    assert waiter.finish().error is gate.fail
+    assert coalescer.stats()['in_flight'] == 0
+
+
+def test_waiters_retry_when_the_leading_caller_is_cancelled(gate, coalescer):
+    leader = lead(coalescer, gate)
+    waiter = Caller(coalescer, RESPELLED)
+    wait_until(lambda: coalescer.stats()['coalesced'] == 1)
+    leader.token.cancel()
+    gate.release.set()
+    assert isinstance(leader.finish().error, QueryCancelledError)
+    assert waiter.finish().error is None and waiter.result.rows
+    assert gate.calls == 2
+
+
+def test_cancelled_waiters_stop_waiting(gate, coalescer):
+    leader = lead(coalescer, gate)
+    waiter = Caller(coalescer, RESPELLED)
+    wait_until(lambda: coalescer.stats()['coalesced'] == 1)
+    waiter.token.cancel()
+    assert isinstance(waiter.finish().error, QueryCancelledError)
+    assert leader.is_alive()
+    gate.release.set()
+    assert leader.finish().result.rows
+    assert gate.calls == 1
+
+
+async def settle(coalescer, coalesced):
+    while coalescer.stats()['coalesced'] < coalesced:
+        await asyncio.sleep(0.005)
+
+
+def test_async_requests_share_one_execution(executor, gate):
+    coalescer = AsyncRequestCoalescer(gate, builder_factory)
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(coalescer.execute(params))
+                 for params in (REQUEST, RESPELLED, RESPELLED)]
+        await asyncio.wait_for(settle(coalescer, 2), 5)
+        gate.release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    expected = executor.execute(build_sql(REQUEST)).rows
+    assert all(result.rows == expected for result in results)
+    assert gate.calls == 1
+    assert coalescer.stats() == {'executions': 1, 'coalesced': 2, 'in_flight': 0}
+
+
+def test_cancelling_an_async_waiter_keeps_the_shared_execution(gate):
+    coalescer = AsyncRequestCoalescer(gate, builder_factory)
+
+    async def scenario():
+        leader = asyncio.ensure_future(coalescer.execute(REQUEST))
+        waiter = asyncio.ensure_future(coalescer.execute(RESPELLED))
+        await asyncio.wait_for(settle(coalescer, 1), 5)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        gate.release.set()
+        return await leader
+
+    assert asyncio.run(scenario()).rows
+    assert gate.calls == 1
+
+
+def test_async_waiters_retry_when_the_leading_caller_is_cancelled(gate):
+    coalescer = AsyncRequestCoalescer(gate, builder_factory)
+    token = CancellationToken()
+
+    async def execute_cancellable():
+        with cancellation_scope(token):
+            return await coalescer.execute(REQUEST)
+
+    async def scenario():
+        leader = asyncio.ensure_future(execute_cancellable())
+        waiter = asyncio.ensure_future(coalescer.execute(RESPELLED))
+        await asyncio.wait_for(settle(coalescer, 1), 5)
+        token.cancel()
+        gate.release.set()
+        with pytest.raises(QueryCancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(scenario()).rows
+    assert gate.calls == 2
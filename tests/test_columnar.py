@@ -0,0 +1,82 @@
+"""Tests for columnar materialization of query results."""
+import pytest
+
+from app.query_builder.execution import ColumnarMaterializer, ExecutionPolicy, GuardedExecutor, SQLiteExecutor
+from tests.helpers import build
+
+np = pytest.importorskip('numpy')
+
+SELECT = 'tr.transactionId,tr.statusId,tr.announcedDate,tr.transactionSize,c.companyName'
+
+
+@pytest.fixture
+def materializer(executor):
+    return ColumnarMaterializer(executor, batch_size=64)
+
+
+def test_columns_are_typed_from_the_catalog(executor, materializer):
+    builder = build({'select': SELECT, 'orderBy': 'transactionId'})
+    result = materializer.materialize(builder)
+    rows = executor.execute(builder.build_query()).rows
+
+    assert result.num_rows == 1000
+    assert result.types == ['int', 'int', 'date', 'float', 'str']
+    assert [array.dtype.str[1:] for array in result.arrays] == ['i8', 'i8', 'M8[D]', 'f8', 'O']
+    assert result.column('transactionId').tolist() == [row[0] for row in rows]
+    assert result.column('announcedDate')[0] == np.datetime64(rows[0][2])
+    assert result.column('companyName').tolist() == [row[4] for row in rows]
+
+
+def test_nulls_are_masked(materializer):
+    result = materializer.materialize(build({'select': SELECT, 'orderBy': 'transactionId'}))
+    status_mask = result.masks[result.columns.index('statusId')]
+    assert status_mask.tolist() == [i % 10 == 0 for i in range(1, 1001)]
+    assert result.masks[result.columns.index('transactionId')] is None
+    sizes = result.column('transactionSize')
+    assert np.isnan(sizes[6]) and not np.isnan(sizes[5])
+
+
+def test_wildcards_are_typed_by_column_name(materializer):
+    result = materializer.materialize(build({'select': 'tr.*', 'limit': '5'}))
+    assert dict(zip(result.columns, result.types))['transactionSize'] == 'float'
+    assert dict(zip(result.columns, result.types))['comments'] == 'text'
+
+
+def test_mistyped_values_fall_back_to_objects(materializer):
+    result = materializer.materialize_sql("SELECT 'x' AS a, 1 AS b", types=['int', 'int'])
+    assert result.types == [None, 'int']
+    assert result.column('a').tolist() == ['x']
+
+
+@pytest.mark.parametrize('policy', [None, ExecutionPolicy(max_rows=10)])
+def test_empty_results_keep_their_columns(db_path, policy):
+    executor = SQLiteExecutor(db_path)
+    if policy is not None:
+        executor = GuardedExecutor(executor, policy)
+    try:
+        builder = build({'select': 'tr.transactionId,tr.statusId', 'tr.statusId': '99'})
+        result = ColumnarMaterializer(executor).materialize(builder)
+        assert result.columns == ['transactionId', 'statusId']
+        assert result.types == ['int', 'int']
+        assert result.num_rows == 0
+        assert executor.execute(builder.build_query()).columns == ['transactionId', 'statusId']
+    finally:
+        executor.close()
+
+
+def test_to_pandas_uses_nullable_integers(materializer):
+    pytest.importorskip('pandas')
+    frame = materializer.materialize(build({'select': SELECT, 'orderBy': 'transactionId'})).to_pandas()
+    assert str(frame['statusId'].dtype) == 'Int64'
+    assert frame['statusId'].isna().sum() == 100
+    assert frame['transactionSize'].isna().sum() == 142
+
+
+def test_arrow_batches(materializer):
+    pa = pytest.importorskip('pyarrow')
+    builder = build({'select': 'tr.transactionId,tr.statusId', 'orderBy': 'transactionId', 'limit': '150'})
+    batches = list(materializer.iter_arrow_batches(builder))
+    assert [batch.num_rows for batch in batches] == [64, 64, 22]
+    assert batches[0].schema.field('statusId').type == pa.int64()
+    assert batches[0].column(1).null_count == 6
+    assert materializer.materialize(builder).to_arrow().num_rows == 150
@@ -0,0 +1,129 @@
+"""Tests for the differential correctness harness."""
+import importlib.util
+import json
+import os
+import random
+import sqlite3
+
+import pytest
+
+from app.query_builder import FlexibleQueryBuilder
+from app.query_builder.schema import get_catalog
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH
+from app.utils.errors import QueryBuildError
+
+HARNESS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'differential.py')
+
+ROLLUPS = {
+    'txByIndustryType': {
+        'base_table': 'ciqTransaction',
+        'dimensions': {'si.simpleIndustryId': 'industryId', 'tr.transactionIdTypeId': 'typeId'},
+        'measures': {'n': 'COUNT(*)', 'total': 'SUM(tr.transactionSize)'},
+    },
+}
+
+
+def load_harness():
+    spec = importlib.util.spec_from_file_location('differential_harness', HARNESS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+harness = load_harness()
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('differential') / 'dataset.db')
+    harness.create_dataset(path, get_catalog(), 'ciqTransaction', 'tr', 300, random.Random(1))
+    return path
+
+
+def run(tmp_path, *args):
+    return harness.main(['--requests', '40', '--rows', '300', '--rounds', '1',
+                         '--database', str(tmp_path / 'dataset.db'), *args])
+
+
+def test_foreign_keys_come_from_the_catalog_joins():
+    assert harness.foreign_keys(get_catalog(), 'ciqTransaction', 'tr') == {
+        ('ciqTransaction', 'companyId'): 'ciqCompany',
+        ('ciqTransaction', 'transactionIdTypeId'): 'ciqTransactionType',
+        ('ciqCompany', 'simpleIndustryId'): 'ciqSimpleIndustry',
+        ('ciqCompany', 'countryId'): 'ciqCountryGeo',
+    }
+
+
+def test_dataset_has_catalog_indexes_and_dangling_references(dataset):
+    connection = sqlite3.connect(dataset)
+    try:
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {'ix_ciqTransaction_company', 'ix_ciqCompany_industry'} <= indexes
+        assert connection.execute("SELECT COUNT(*) FROM ciqTransaction").fetchone() == (300,)
+        dangling, = connection.execute(
+            "SELECT COUNT(*) FROM ciqTransaction tr LEFT JOIN ciqCompany c ON c.companyId = tr.companyId "
+            "WHERE c.companyId IS NULL AND tr.companyId IS NOT NULL"
+        ).fetchone()
+        assert dangling > 0
+    finally:
+        connection.close()
+
+
+def test_generated_requests_are_reproducible_and_build(dataset):
+    catalog = get_catalog()
+    first, second = (harness.RequestGenerator(catalog, dataset, 'ciqTransaction', 'tr', random.Random(seed))
+                     for seed in (3, 3))
+    requests = [first.generate() for _ in range(50)]
+    assert requests == [second.generate() for _ in range(50)]
+
+    built = 0
+    for params in requests:
+        builder = FlexibleQueryBuilder(harness.SCHEMA, 'ciqTransaction', 'tr', catalog=catalog)
+        try:
+            builder.parse_request_params(params)
+            builder.build_query()
+        except QueryBuildError:
+            continue
+        built += 1
+    assert built >= 45
+
+
+def test_normalize_rounds_floats_and_sorts():
+    assert harness.normalize([(2, 0.1 + 0.2), (1, None)]) == [(1, None), (2, 0.3)]
+
+
+def test_optimized_pipelines_match_the_baseline(tmp_path, capsys):
+    assert run(tmp_path) == 0
+    report = capsys.readouterr().out
+    assert '40 requests x 1 rounds on 300 base rows' in report
+    for name in harness.PIPELINES:
+        assert f"\n{name:<12} {0:>8} " in report
+
+
+def test_rollup_pipeline_matches_with_a_rollup_catalog(tmp_path, capsys):
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['rollups'] = ROLLUPS
+    catalog_path = tmp_path / 'catalog.json'
+    catalog_path.write_text(json.dumps(document), encoding='utf-8')
+
+    assert run(tmp_path, '--pipelines', 'rollups,all', '--catalog', str(catalog_path)) == 0
+    connection = sqlite3.connect(str(tmp_path / 'dataset.db'))
+    try:
+        assert connection.execute("SELECT COUNT(*) FROM txByIndustryType").fetchone()[0] > 0
+    finally:
+        connection.close()
+
+
+def test_differing_results_are_reported(tmp_path, capsys, monkeypatch):
+    monkeypatch.setitem(harness.PIPELINES, 'broken', lambda: (
+        {'use_rollups': False, 'union_tables': ['ciqTransactionArchive'], 'filter_join_policy': 'join'}, False
+    ))
+    assert run(tmp_path, '--pipelines', 'broken', '--show', '1') == 1
+    assert '\n[broken] {' in capsys.readouterr().out
+
+
+def test_unknown_pipelines_are_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        run(tmp_path, '--pipelines', 'exists,hash')
+    assert 'unknown pipelines: hash' in capsys.readouterr().err
@@ -0,0 +1,129 @@
+"""Tests for EXPLAIN integration and plan sampling."""
+import json
+
+import pytest
+
+from app.query_builder.execution import QueryResult
+from app.query_builder.execution.explain import PlanSampler, QueryExplainer
+from app.query_builder.stats import ShapeStatsCollector
+from tests.helpers import build
+
+POSTGRES_PLAN = [{'Plan': {
+    'Node Type': 'Nested Loop',
+    'Plan Rows': 40,
+    'Plans': [
+        {'Node Type': 'Index Scan', 'Relation Name': 'ciqCompany', 'Alias': 'c',
+         'Index Name': 'ix_ciqCompany_industry', 'Plan Rows': 4},
+        {'Node Type': 'Seq Scan', 'Relation Name': 'ciqTransaction', 'Alias': 'tr', 'Plan Rows': 10},
+    ],
+}}]
+
+
+def seq_scan(table, alias):
+    return {'Node Type': 'Seq Scan', 'Relation Name': table, 'Alias': alias, 'Plan Rows': 1000}
+
+
+class PostgresExplainExecutor:
+    """Executor answering every statement with a fixed PostgreSQL JSON plan."""
+
+    dialect = 'postgres'
+
+    def __init__(self, plan=None):
+        self.plan = plan or POSTGRES_PLAN
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        return QueryResult(['QUERY PLAN'], [(json.dumps(self.plan),)])
+
+
+def kinds(plan):
+    return [(issue.kind, issue.alias) for issue in plan.issues]
+
+
+def test_indexed_lookup_has_no_issues(executor):
+    plan = build({'select': 'tr.transactionId', 'tr.transactionId': '5'}).explain(executor)
+    [node] = plan.roots
+    assert (node.operation, node.table, node.alias) == ('search', 'ciqTransaction', 'tr')
+    assert node.index == 'sqlite_autoindex_ciqTransaction_1'
+    assert plan.issues == []
+
+
+def test_unindexed_filter_is_a_full_scan(executor):
+    plan = build({'select': 'tr.transactionId', 'tr.statusId': '2'}).explain(executor)
+    assert kinds(plan) == [('full_scan', 'tr')]
+    assert plan.full_scans[0].table == 'ciqTransaction'
+
+
+def test_scans_inside_joins_and_sorts_are_flagged(executor):
+    plan = build({'select': 'tr.transactionId,c.companyName', 'industry': '3',
+                  'orderBy': 'announcedDate'}).explain(executor)
+    assert kinds(plan) == [('inner_scan', 'tr'), ('temp_sort', None)]
+
+
+def test_automatic_indexes_are_flagged(executor):
+    plan = QueryExplainer(executor).explain_sql(
+        "SELECT tr.transactionId FROM main.ciqTransaction tr "
+        "JOIN main.ciqCompany c ON c.simpleIndustryId = tr.statusId"
+    )
+    assert ('automatic_index', 'c') in kinds(plan)
+
+
+def test_small_tables_are_not_flagged(executor):
+    explainer = QueryExplainer(executor, table_rows={'ciqTransaction': 1000})
+    assert explainer.explain(build({'select': 'tr.transactionId', 'tr.statusId': '2'})).issues == []
+
+
+def test_postgres_json_plans():
+    executor = PostgresExplainExecutor()
+    plan = QueryExplainer(executor).explain(build({'select': 'tr.transactionId', 'industry': '3'}))
+    assert executor.statements[0].startswith('EXPLAIN (FORMAT JSON) SELECT')
+    assert len(plan.roots) == 1
+    assert [(node.operation, node.alias, node.rows) for node in plan.walk()] == [
+        ('other', None, 40), ('search', 'c', 4), ('scan', 'tr', 10)
+    ]
+    assert kinds(plan) == [('inner_scan', 'tr')]
+    assert json.loads(json.dumps(plan.to_dict()))['plan'][0]['children'][0]['index'] == 'ix_ciqCompany_industry'
+
+
+@pytest.mark.parametrize('plan', [
+    {'Node Type': 'Append', 'Plans': [seq_scan('ciqTransaction', 'tr'), seq_scan('ciqTransactionArchive', 'tr')]},
+    {'Node Type': 'Hash Join', 'Plans': [
+        seq_scan('ciqTransaction', 'tr'),
+        {'Node Type': 'Hash', 'Plans': [seq_scan('ciqCompany', 'c')]},
+    ]},
+])
+def test_postgres_siblings_outside_nested_loops_are_not_nested(plan):
+    explained = QueryExplainer(PostgresExplainExecutor([{'Plan': plan}])).explain_sql("SELECT 1")
+    assert [issue.kind for issue in explained.issues] == ['full_scan', 'full_scan']
+
+
+def test_unsupported_dialect_is_rejected():
+    executor = PostgresExplainExecutor()
+    executor.dialect = 'mysql'
+    with pytest.raises(ValueError, match='not supported'):
+        QueryExplainer(executor)
+
+
+def test_sampler_captures_slow_shapes_up_to_a_bound(executor):
+    sampler = PlanSampler(QueryExplainer(executor), slow_ms=0, sample_rate=1.0, per_shape=2, capacity=2)
+    collector = ShapeStatsCollector()
+    for value in ('1', '2', '3'):
+        builder = build({'select': 'tr.transactionId', 'tr.statusId': value}, stats_collector=collector)
+        assert sampler.execute(builder).rows
+    for params in ({'tr.currencyId': '1'}, {'tr.companyId': '1'}):
+        sampler.execute(build(params))
+
+    captured = sampler.captured()
+    assert len(captured) == 2
+    assert builder.fingerprint.key not in captured
+    assert collector.snapshot()['shapes'][0]['latency_ms']['count'] == 6
+
+
+def test_sampler_ignores_fast_queries(executor):
+    sampler = PlanSampler(QueryExplainer(executor), slow_ms=60000, sample_rate=1.0)
+    builder = build({'select': 'tr.transactionId', 'tr.statusId': '2'})
+    assert sampler.observe(builder, 10.0) is None
+    assert sampler.observe(builder, 60000.0).issues[0].kind == 'full_scan'
+    [entry] = sampler.captured()[builder.fingerprint.key]
+    assert entry['elapsed_ms'] == 60000.0
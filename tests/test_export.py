@@ -0,0 +1,123 @@
+"""Tests for streaming exports."""
+import csv
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from app.query_builder.execution import (
+    CancellationToken,
+    CSVEncoder,
+    ExportPipeline,
+    QueryCancelledError,
+    cancellation_scope
+)
+from app.query_builder.execution import export
+from tests.helpers import build
+
+PARAMS = {'select': 'tr.transactionId,c.companyName,tr.statusId', 'orderBy': 'transactionId'}
+
+
+class CountingEncoder(CSVEncoder):
+    """CSV encoder counting the batches it has encoded."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = 0
+
+    def encode(self, rows):
+        self.batches += 1
+        return super().encode(rows)
+
+
+@pytest.fixture
+def counting_encoder(monkeypatch):
+    encoder = CountingEncoder()
+    monkeypatch.setitem(export.ENCODERS, 'csv', lambda: encoder)
+    return encoder
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_csv_matches_the_query_result(executor, prefetch):
+    builder = build(PARAMS)
+    body = b''.join(ExportPipeline(executor, batch_size=64, prefetch=prefetch).iter_chunks(builder, 'csv'))
+    rows = list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    assert rows[0] == ['transactionId', 'companyName', 'statusId']
+    expected = executor.execute(builder.build_query()).rows
+    assert rows[1:] == [['' if value is None else str(value) for value in row] for row in expected]
+
+
+def test_ndjson_matches_the_query_result(executor):
+    builder = build({**PARAMS, 'limit': '50'})
+    body = b''.join(ExportPipeline(executor, batch_size=16).iter_chunks(builder, 'ndjson'))
+    objects = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+    assert [tuple(obj.values()) for obj in objects] == executor.execute(builder.build_query()).rows
+    assert objects[9]['statusId'] is None
+
+
+def test_parquet_is_typed_from_the_catalog(executor):
+    pa = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    builder = build({**PARAMS, 'select': PARAMS['select'] + ',tr.announcedDate,tr.transactionSize'})
+    body = b''.join(ExportPipeline(executor, batch_size=300).iter_chunks(builder, 'parquet'))
+    table = parquet.read_table(pa.BufferReader(body))
+    assert table.num_rows == 1000
+    assert [str(field.type) for field in table.schema] == ['int64', 'string', 'int64', 'date32[day]', 'double']
+    assert parquet.ParquetFile(pa.BufferReader(body)).num_row_groups == 4
+    assert table.column('statusId').null_count == 100
+
+
+def test_export_to_file_counts_rows(executor, tmp_path):
+    path = tmp_path / 'export.csv'
+    assert ExportPipeline(executor).export_to_file(build({'select': 'tr.*'}), str(path)) == 1000
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 1001
+
+
+def test_empty_result_has_a_header(executor):
+    builder = build({'select': 'tr.transactionId', 'tr.statusId': '99'})
+    assert b''.join(ExportPipeline(executor).iter_chunks(builder)) == b'transactionId\r\n'
+
+
+def test_prefetch_is_bounded_and_closing_stops_the_query(executor, counting_encoder):
+    pipeline = ExportPipeline(executor, batch_size=10, prefetch=2)
+    chunks = pipeline.iter_chunks(build(PARAMS), 'csv')
+    next(chunks)
+    next(chunks)
+    time.sleep(0.3)
+    # Header and first batch consumed, queued chunks, and one waiting to be queued
+    assert counting_encoder.batches <= 2 + pipeline.prefetch + 1
+    chunks.close()
+    encoded = counting_encoder.batches
+    time.sleep(0.2)
+    assert counting_encoder.batches == encoded < 100
+    assert [thread for thread in threading.enumerate() if thread.name == 'query-export'] == []
+
+
+def test_closing_after_the_last_batch_does_not_hang(executor):
+    chunks = ExportPipeline(executor, batch_size=5000, prefetch=1).iter_chunks(build(PARAMS), 'csv')
+    next(chunks)
+    next(chunks)
+    time.sleep(0.3)
+    # The producer has queued the end of the stream and waits to queue its end marker
+    closing = threading.Thread(target=chunks.close, daemon=True)
+    closing.start()
+    closing.join(2)
+    assert not closing.is_alive()
+
+
+def test_cancellation_reaches_the_producer(executor):
+    token = CancellationToken()
+    chunks = ExportPipeline(executor, batch_size=10, prefetch=1).iter_chunks(build(PARAMS), 'csv')
+    with cancellation_scope(token), pytest.raises(QueryCancelledError):
+        next(chunks)
+        token.cancel()
+        for _ in chunks:
+            pass
+
+
+def test_unknown_format_is_rejected(executor):
+    with pytest.raises(ValueError, match='Unsupported export format'):
+        list(ExportPipeline(executor).iter_chunks(build({}), 'xml'))
+    assert ExportPipeline(executor).content_type('ndjson') == 'application/x-ndjson'
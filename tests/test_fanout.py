@@ -0,0 +1,126 @@
+"""Tests for query fan-out planning and merging."""
+import re
+
+import pytest
+
+from app.query_builder.execution import FanOutRunner, PartitionPlanner, SQLiteExecutor
+from tests.helpers import build
+
+COMPANY_IDS = ','.join(str(i) for i in range(1, 121))
+
+
+class PostgresOrderExecutor(SQLiteExecutor):
+    """SQLite executor sorting NULLs the way Postgres does (last when ascending)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.dialect = 'postgres'
+
+    def execute(self, sql, params=None):
+        sql = re.sub(r'\b(ASC|DESC)\b', lambda m: m.group(1) + (
+            ' NULLS LAST' if m.group(1) == 'ASC' else ' NULLS FIRST'), sql)
+        return super().execute(sql, params)
+
+
+def fan_out(executor, builder, **planner_options):
+    runner = FanOutRunner(executor, PartitionPlanner(**planner_options))
+    try:
+        plan = runner.planner.plan(builder)
+        assert plan is not None and len(plan.queries) > 1
+        return runner.run(plan).rows
+    finally:
+        runner.close()
+
+
+@pytest.mark.parametrize('params', [
+    {'companyId': COMPANY_IDS, 'select': 'tr.transactionId,tr.announcedDate'},
+    {'companyId': COMPANY_IDS, 'orderBy': 'announcedDate:desc,transactionId', 'limit': '25', 'offset': '5'},
+    {'companyId': COMPANY_IDS, 'select': 'tr.transactionIdTypeId,COUNT(*) AS n,SUM(tr.transactionSize) AS total',
+     'groupBy': 'transactionType', 'orderBy': 'transactionType'},
+])
+def test_value_fan_out_matches_single_query(executor, params):
+    builder = build(params)
+    expected = executor.execute(builder.build_query()).rows
+    rows = fan_out(executor, builder, chunk_size=30, max_partitions=4)
+    if 'groupBy' in params:
+        # Partial sums are added in another order
+        assert [row[:2] for row in rows] == [row[:2] for row in expected]
+        assert [row[2] for row in rows] == pytest.approx([row[2] for row in expected])
+    elif 'orderBy' in params:
+        assert rows == expected
+    else:
+        assert sorted(rows) == sorted(expected)
+
+
+def test_range_split_intersects_bounds():
+    planner = PartitionPlanner(max_partitions=2, range_key='tr.transactionSize')
+    partitions = planner._split_range([
+        "tr.transactionSize > '200'",
+        "tr.transactionSize >= '100'",
+        "tr.transactionSize < '800'",
+        "tr.transactionSize <= '900'",
+        "tr.statusId = '1'",
+    ])
+    first, last = partitions[0][1], partitions[-1][1]
+    assert first[0] == "tr.statusId = '1'"
+    assert "tr.transactionSize > '200'" in first
+    assert "tr.transactionSize < '800'" in last
+    assert not any("'100'" in condition or "'900'" in condition for _, conditions in partitions
+                   for condition in conditions)
+
+
+def test_range_split_refuses_incomparable_bounds():
+    planner = PartitionPlanner(range_key='tr.announcedDate')
+    assert planner._split_range([
+        "tr.announcedDate >= '2015-01-01'",
+        "tr.announcedDate > 'soon'",
+        "tr.announcedDate < '2016-01-01'",
+    ]) is None
+
+
+def test_range_fan_out_with_several_bounds_matches_single_query(executor):
+    builder = build({
+        'filter': 'tr.transactionSize > 200 AND tr.transactionSize <= 900',
+        'tr.transactionSize': 'gte:100',
+        'select': 'tr.transactionId',
+    })
+    expected = executor.execute(builder.build_query()).rows
+    rows = fan_out(executor, builder, max_partitions=4, range_key='tr.transactionSize')
+    assert sorted(rows) == sorted(expected)
+
+
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+@pytest.mark.parametrize('executor_class', [SQLiteExecutor, PostgresOrderExecutor])
+def test_merge_places_nulls_like_the_database(db_path, executor_class, direction):
+    executor = executor_class(db_path)
+    builder = build({
+        'companyId': COMPANY_IDS,
+        'select': 'tr.transactionId,tr.transactionSize',
+        'orderBy': f'tr.transactionSize:{direction},transactionId',
+    })
+    try:
+        expected = executor.execute(builder.build_query()).rows
+        assert any(row[1] is None for row in expected)
+        assert fan_out(executor, builder, chunk_size=30, max_partitions=4) == expected
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize('policy', ['exists', 'in', 'cte'])
+@pytest.mark.parametrize('params', [
+    # Split on a base table filter next to a semi-joined industry filter
+    {'companyId': COMPANY_IDS, 'industry': '1,2,3,4,5,6,7,8,9,10', 'select': 'tr.transactionId'},
+    # Split on the semi-joined industry filter itself
+    {'industry': ','.join(str(i) for i in range(1, 41)), 'companyName': 'ne:Company 7',
+     'select': 'tr.transactionId'},
+])
+def test_fan_out_keeps_semi_joins(executor, policy, params):
+    builder = build(params, filter_join_policy=policy)
+    assert builder.semi_joins
+    expected = executor.execute(builder.build_query()).rows
+    plan = PartitionPlanner(chunk_size=10, max_partitions=4).plan(builder)
+    assert plan is not None
+    for query in plan.queries:
+        assert 'ciqTransaction tr JOIN' not in query.sql
+        assert ('EXISTS' if policy == 'exists' else 'IN (SELECT') in query.sql
+    assert sorted(fan_out(executor, builder, chunk_size=10, max_partitions=4)) == sorted(expected)
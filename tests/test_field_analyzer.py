@@ -0,0 +1,34 @@
+"""Tests for field usage analysis."""
+from app.query_builder.analyzers import FieldAnalyzer
+from tests.helpers import build_sql
+
+
+def test_columns_with_digits():
+    dependencies = FieldAnalyzer().analyze_fields(
+        ['tr.transactionId', 'geo.isoCountry2'],
+        ["geo.isoCountry2 = 'US'", "tr.col_3 IN ('1', '2')"],
+        [],
+        ['geo.isoCountry2 DESC']
+    )
+    assert dependencies.field_refs == {
+        'tr': {'transactionId', 'col_3'},
+        'geo': {'isoCountry2'},
+    }
+    assert dependencies.query_params == {'geo.isoCountry2': 'US', 'tr.col_3': '1,2'}
+
+
+def test_references_inside_expressions():
+    dependencies = FieldAnalyzer().analyze_fields(
+        ['COUNT(DISTINCT c.companyId) AS companies', 'SUM(tr.transactionSize) AS total'],
+        ["(si.simpleIndustryId = '1' OR c.companyName LIKE 'A%')"],
+        ['geo.region'],
+        []
+    )
+    assert dependencies.used_aliases == {'c', 'tr', 'si', 'geo'}
+    assert dependencies['field_refs']['c'] == {'companyId', 'companyName'}
+
+
+def test_digit_column_filter_joins_its_table():
+    sql = build_sql({'select': 'tr.transactionId', 'geo.isoCountry2': 'US'})
+    assert 'JOIN main.ciqCountryGeo geo' in sql
+    assert "geo.isoCountry2 = 'US'" in sql
@@ -0,0 +1,98 @@
+"""Tests for the filter expression parameter."""
+import pytest
+
+from app.query_builder.parsers.filter_expression import FilterExpressionCompiler
+from app.utils.errors import QueryBuildError
+from tests.helpers import build_sql
+
+
+def where_rows(executor, condition):
+    """Get the transaction ids matching a literal WHERE condition."""
+    sql = f"SELECT tr.transactionId FROM ciqTransaction tr WHERE {condition}"
+    return sorted(executor.execute(sql).rows)
+
+
+def filter_rows(executor, expression):
+    """Get the transaction ids matching a filter expression."""
+    sql = build_sql({'select': 'tr.transactionId', 'filter': expression})
+    return sorted(executor.execute(sql).rows)
+
+
+@pytest.fixture
+def compiler():
+    return FilterExpressionCompiler()
+
+
+@pytest.mark.parametrize('expression', [
+    "NOT (tr.statusId = 1 AND tr.statusId = 2)",
+    "NOT (tr.statusId IN (1, 2) AND tr.statusId IN (3, 4))",
+    "NOT (tr.statusId = 1 AND tr.statusId = 2 AND tr.transactionIdTypeId = 1)",
+    "NOT (tr.transactionIdTypeId = 1 OR (tr.statusId = 1 AND tr.statusId = 2))",
+    "NOT NOT (tr.statusId = 1 AND tr.statusId = 2)",
+    "NOT (tr.statusId = 1 OR tr.statusId = 2)",
+    "NOT (tr.statusId > 2 AND tr.transactionSize < 500)",
+    "tr.statusId IS NULL OR NOT (tr.statusId != 3 AND tr.transactionIdTypeId = 14)",
+])
+def test_expression_matches_literal_sql_with_nulls(executor, expression):
+    expected = where_rows(executor, expression)
+    assert filter_rows(executor, expression) == expected
+
+
+def test_negated_contradiction_keeps_rows_with_null_field_out(executor):
+    rows = filter_rows(executor, "NOT (tr.statusId = 1 AND tr.statusId = 2)")
+    assert len(rows) == 900  # every tenth transaction has no status
+    assert rows == where_rows(executor, "tr.statusId IS NOT NULL")
+
+
+def test_contradiction_is_folded_outside_a_negation(compiler):
+    assert compiler.compile("tr.statusId = 1 AND tr.statusId = 2") == ["1 = 0"]
+    assert compiler.compile("tr.statusId IN (1, 2) AND tr.statusId = 2") == ["tr.statusId = '2'"]
+
+
+def test_negation_is_pushed_into_predicates(compiler):
+    assert compiler.compile("NOT (industry = 32 OR industry = 34)") == [
+        "si.simpleIndustryId NOT IN ('32', '34')"
+    ]
+    assert compiler.compile("NOT (tr.statusId = 1 AND c.companyName LIKE 'A%')") == [
+        "(tr.statusId != '1' OR c.companyName NOT LIKE 'A%')"
+    ]
+    assert compiler.compile("NOT tr.statusId IS NULL") == ["tr.statusId IS NOT NULL"]
+    assert compiler.compile("NOT TRUE OR tr.statusId >= 3") == ["tr.statusId >= '3'"]
+    assert compiler.compile("NOT FALSE") == []
+
+
+def test_top_level_and_terms_are_separate_conditions(compiler):
+    assert compiler.compile("(tr.statusId = 1 OR tr.statusId = 2) AND tr.transactionIdTypeId != 14") == [
+        "tr.statusId IN ('1', '2')",
+        "tr.transactionIdTypeId != '14'",
+    ]
+
+
+@pytest.mark.parametrize('expression', [
+    "tr.statusId =",
+    "(tr.statusId = 1",
+    "tr.statusId = 1 AND",
+    "tr.statusId NOT = 1",
+    "foo = 1",
+    "tr.statusId = 1; DROP TABLE ciqTransaction",
+])
+def test_malformed_expressions_are_rejected(compiler, expression):
+    with pytest.raises(QueryBuildError):
+        compiler.compile(expression)
+
+
+@pytest.mark.parametrize('expression', [
+    "zz.foo = 1",
+    "tr.bogus = 3",
+    "tr.statusId = 1 OR NOT c.bogus IS NULL",
+    "tr.statusId = 1 AND si.nothing IN (1, 2)",
+    "c.companyName LIKE 'x%' OR zz.companyName LIKE 'y%'",
+])
+def test_unknown_aliases_and_columns_are_rejected(expression):
+    with pytest.raises(QueryBuildError, match='Unknown filter field'):
+        build_sql({'filter': expression})
+
+
+def test_known_fields_of_joined_tables_are_accepted():
+    sql = build_sql({'filter': "si.simpleIndustryId = 3 OR c.companyName IS NULL"})
+    assert "(si.simpleIndustryId = '3' OR c.companyName IS NULL)" in sql
@@ -0,0 +1,59 @@
+"""Tests for filter parameters."""
+import pytest
+
+from app.utils.errors import QueryBuildError
+from tests.helpers import build
+
+
+def conditions(params):
+    return build(params).where_conditions
+
+
+@pytest.mark.parametrize('key', [
+    "tr.foo OR 1=1 --",
+    "tr.statusId OR 1=1 --",
+    "tr.statusId; DROP TABLE ciqTransaction",
+    "tr.statusId = 1 OR tr.statusId",
+    "tr.(statusId)",
+    "Tr.statusId",
+    "tr.x.statusId",
+    "tr.",
+])
+def test_unsafe_keys_are_rejected(key):
+    with pytest.raises(QueryBuildError, match="Invalid filter field"):
+        build({key: '1'})
+
+
+@pytest.mark.parametrize('key', ["tr.foo", "c.statusId", "zz.statusId", "tr.companyName", "company_reverse"])
+def test_unknown_columns_are_rejected(key):
+    with pytest.raises(QueryBuildError, match="Unknown filter field"):
+        build({key: '1'})
+
+
+def test_mapped_and_qualified_keys_are_accepted():
+    assert conditions({'industry': '32', 'tr.statusId': '2', 'c.companyName': 'like:Acme%'}) == [
+        "si.simpleIndustryId = '32'",
+        "tr.statusId = '2'",
+        "c.companyName LIKE 'Acme%'",
+    ]
+
+
+def test_values_are_coerced_to_the_column_type():
+    assert conditions({'tr.statusId': '007'}) == ["tr.statusId = '7'"]
+    assert conditions({'tr.statusId': '3, 03,1'}) == ["tr.statusId IN ('3', '1')"]
+    assert conditions({'tr.transactionSize': 'gte:1e3'}) == ["tr.transactionSize >= '1000.0'"]
+    assert conditions({'tr.transactionSize': 'between:5,10'}) == [
+        "tr.transactionSize BETWEEN '5.0' AND '10.0'"
+    ]
+
+
+@pytest.mark.parametrize('params', [
+    {'tr.statusId': 'abc'},
+    {'tr.statusId': '1,2,x'},
+    {'tr.transactionSize': 'gte:nan'},
+    {'tr.closingDate': '2020-13-01'},
+    {'tr.transactionSize': 'between:5'},
+])
+def test_invalid_values_are_rejected(params):
+    with pytest.raises(QueryBuildError):
+        build(params)
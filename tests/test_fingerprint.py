@@ -0,0 +1,118 @@
+"""Tests for request fingerprints and shape statistics."""
+import json
+
+from app.query_builder.plans import PlanCache
+from app.query_builder.stats import (
+    CountMinSketch,
+    LatencyHistogram,
+    QueryFingerprint,
+    ShapeStatsCollector,
+    SpaceSavingTopK
+)
+from tests.helpers import build
+
+
+def fingerprint(params):
+    return build(params).fingerprint
+
+
+def test_requests_differing_in_values_share_a_fingerprint():
+    assert fingerprint({'industry': '32', 'select': 'tr.transactionId', 'limit': '10'}) == \
+        fingerprint({'industry': '7', 'select': 'tr.transactionId', 'limit': '500'})
+    assert fingerprint({'industry': '32,34', 'tr.transactionSize': 'gte:5'}) == \
+        fingerprint({'tr.transactionSize': 'gte:900', 'industry': '1,2,3'})
+    assert fingerprint({'filter': "tr.statusId = 2 OR tr.statusId = 3"}) == \
+        fingerprint({'filter': "tr.statusId = 4 OR tr.statusId = 5"})
+    assert fingerprint({'si.simpleIndustryId': '3'}) == fingerprint({'industry': '4'})
+
+
+def test_requests_differing_in_shape_get_different_fingerprints():
+    base = {'industry': '32', 'select': 'tr.transactionId'}
+    shapes = [
+        base,
+        {**base, 'industry': '32,34'},
+        {**base, 'industry': 'ne:32'},
+        {**base, 'select': 'tr.transactionId,c.companyName'},
+        {**base, 'orderBy': 'announcedDate'},
+        {**base, 'limit': '10'},
+        {**base, 'limit': '10', 'offset': '5'},
+        {**base, 'country': '3'},
+        {'filter': "tr.statusId = 2 AND tr.statusId = 3", 'select': 'tr.transactionId'},
+        {'filter': "tr.statusId = 2 OR tr.statusId = 3", 'select': 'tr.transactionId'},
+    ]
+    assert len({fingerprint(params).key for params in shapes}) == len(shapes)
+
+
+def test_describe_omits_values():
+    described = fingerprint({'industry': '32,34', 'limit': '10', 'select': 'tr.transactionId'}).describe()
+    assert described['filters'] == ['si.simpleIndustryId in']
+    assert described['joins'] == ['company', 'industry']
+    assert described['limit'] is True and described['offset'] is False
+    assert '32' not in json.dumps(described)
+
+
+def test_builder_records_parsed_and_cached_requests():
+    collector = ShapeStatsCollector()
+    cache = PlanCache()
+    for value in ('1', '2', '1', '2'):
+        build({'transactionType': value}, stats_collector=collector, plan_cache=cache)
+    build({'country': '3'}, stats_collector=collector)
+
+    snapshot = collector.snapshot()
+    assert snapshot['total_requests'] == 5
+    assert [shape['count'] for shape in snapshot['shapes']] == [4, 1]
+    assert snapshot['shapes'][0]['latency_ms']['count'] == 4
+    assert snapshot['shapes'][0]['shape']['filters'] == ['tr.transactionIdTypeId eq']
+
+
+def test_collector_memory_is_bounded():
+    collector = ShapeStatsCollector(capacity=4)
+    hot = fingerprint({'industry': '1'})
+    for _ in range(50):
+        collector.record(hot, 1.0)
+    for i in range(40):
+        collector.record(QueryFingerprint((), (f"tr.col{i}",), (), (), (), (False, False)))
+    snapshot = collector.snapshot()
+    assert snapshot['tracked_shapes'] <= 4
+    assert snapshot['total_requests'] == 90
+    assert snapshot['shapes'][0]['fingerprint'] == hot.key
+    assert collector.estimate_count(hot) >= 50
+
+
+def test_collector_dump_and_reset(tmp_path):
+    collector = ShapeStatsCollector()
+    collector.record(fingerprint({'industry': '1'}), 2.5)
+    path = tmp_path / 'stats.json'
+    collector.dump(str(path))
+    assert json.loads(path.read_text(encoding='utf-8'))['total_requests'] == 1
+    collector.reset()
+    assert collector.snapshot()['shapes'] == []
+
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=16, depth=3)
+    for i in range(200):
+        sketch.add(f"item-{i % 40}")
+    assert sketch.total == 200
+    assert all(sketch.estimate(f"item-{i}") >= 5 for i in range(40))
+
+
+def test_space_saving_keeps_heavy_hitters():
+    top = SpaceSavingTopK(capacity=3)
+    for item in ['a'] * 10 + ['b'] * 6 + list('cdefgh'):
+        top.offer(item)
+    ranked = top.top()
+    assert len(ranked) == 3
+    assert ranked[:2] == [('a', 10, 0), ('b', 6, 0)]
+    item, count, error = ranked[2]
+    assert count - error <= 1
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(precision=0.05)
+    for value in range(1, 101):
+        histogram.add(float(value))
+    assert abs(histogram.quantile(0.5) - 50) <= 50 * 0.06
+    assert abs(histogram.quantile(0.99) - 99) <= 99 * 0.06
+    assert histogram.summary()['max'] == 100.0
+    assert LatencyHistogram().quantile(0.5) == 0.0
@@ -0,0 +1,75 @@
+"""Tests for index recommendations from replayed requests."""
+import json
+
+from app.query_builder.analyzers import IndexAdvisor
+from app.query_builder.analyzers.index_advisor import main, read_request_log
+
+
+def recommend(requests):
+    advisor = IndexAdvisor(schema='main')
+    advisor.replay(requests)
+    return [(r.table, r.columns, r.requests) for r in advisor.recommend()]
+
+
+def test_equality_columns_come_before_range_and_sort_columns():
+    assert recommend([{'tr.transactionSize': 'gte:5', 'orderBy': 'announcedDate', 'tr.statusId': '2'}]) == [
+        ('ciqTransaction', ('statusId', 'transactionSize', 'announcedDate'), 1)
+    ]
+
+
+def test_prefix_candidates_are_folded_into_longer_ones():
+    assert recommend([
+        {'tr.statusId': '2'},
+        {'tr.statusId': '2', 'tr.transactionSize': 'gte:5'},
+        {'tr.statusId': '2', 'tr.transactionSize': 'lt:5', 'orderBy': 'announcedDate'},
+    ]) == [('ciqTransaction', ('statusId', 'transactionSize', 'announcedDate'), 3)]
+
+
+def test_existing_indexes_are_not_recommended():
+    assert recommend([
+        {'companyId': '3'},
+        {'transactionType': '1', 'announcedDate': '2012'},
+        {'industry': '3'},
+    ]) == []
+
+
+def test_joined_tables_are_indexed_on_their_join_column():
+    assert recommend([{'c.companyName': 'like:Ac%'}]) == [('ciqCompany', ('companyId', 'companyName'), 1)]
+    # A leading wildcard cannot use an index on the pattern column
+    assert recommend([{'c.companyName': 'like:%Ac'}]) == []
+
+
+def test_columns_with_digits_are_indexed():
+    assert recommend([{'geo.isoCountry2': 'US'}]) == [('ciqCountryGeo', ('countryId', 'isoCountry2'), 1)]
+    assert recommend([{'geo.region': 'EU', 'orderBy': 'geo.isoCountry2'}]) == [
+        ('ciqCountryGeo', ('countryId', 'region', 'isoCountry2'), 1)
+    ]
+
+
+def test_ranking_and_report():
+    advisor = IndexAdvisor(schema='main')
+    advisor.replay([{'tr.statusId': '1'}] * 3 + [{'tr.currencyId': '1'}] + [{'tr.nope': '1'}])
+    report = advisor.report(top_n=1)
+    assert (report['replayed'], report['failed']) == (4, 1)
+    assert report['recommendations'] == [{
+        'table': 'ciqTransaction',
+        'columns': ['statusId'],
+        'benefit': 3.0,
+        'requests': 3,
+        'ddl': 'CREATE INDEX ix_ciqTransaction_statusId ON main.ciqTransaction (statusId)',
+        'example': {'tr.statusId': '1'},
+    }]
+    # Reports can be taken repeatedly without accumulating merged benefits
+    assert advisor.report() == advisor.report()
+
+
+def test_request_log_and_command(tmp_path, capsys):
+    path = tmp_path / 'requests.jsonl'
+    path.write_text(
+        json.dumps({'params': {'tr.statusId': '2'}}) + '\n\n' + json.dumps({'tr.statusId': '3'}) + '\n',
+        encoding='utf-8'
+    )
+    assert list(read_request_log(str(path))) == [{'tr.statusId': '2'}, {'tr.statusId': '3'}]
+    assert main([str(path), '--schema', 'main', '--json']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report['recommendations'][0]['requests'] == 2
@@ -0,0 +1,60 @@
+"""Tests for join discovery and ordering."""
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.query_builder import FlexibleQueryBuilder
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog
+from tests.helpers import SCHEMA, build_sql
+
+
+@pytest.fixture(scope="module")
+def region_catalog():
+    """Catalog with a region join whose dependency's table is not in join_rules.order."""
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = copy.deepcopy(json.load(catalog_file))
+    document['tables']['ciqRegion'] = {
+        'columns': {'region': {'type': 'str'}, 'regionName': {'type': 'str'}}
+    }
+    document['joins']['region'] = {
+        'table': 'ciqRegion',
+        'alias': 'rg',
+        'condition': '{alias}.region = geo.region',
+        'requires': ['country']
+    }
+    document['join_rules']['order'] = ['ciqRegion'] + document['join_rules']['order']
+    return build_catalog(document, source='test')
+
+
+def test_joins_follow_their_requirements(region_catalog):
+    builder = FlexibleQueryBuilder(SCHEMA, catalog=region_catalog)
+    builder.parse_request_params({'select': 'tr.transactionId,rg.regionName'})
+    assert [join.key for join in builder.joins] == ['company', 'country', 'region']
+    sql = builder.build_query()
+    assert sql.index('JOIN main.ciqCountryGeo geo') < sql.index('JOIN main.ciqRegion rg')
+
+
+def test_priority_orders_independent_joins():
+    sql = build_sql({'select': 'tt.transactionIdTypeName,c.companyName', 'transactionType': '1'})
+    assert sql.index('ciqCompany') < sql.index('ciqTransactionType')
+
+
+def test_join_order_does_not_depend_on_hash_seed():
+    script = (
+        "from app.query_builder import FlexibleQueryBuilder as F\n"
+        "b = F('main')\n"
+        "b.parse_request_params({'select': 'tr.transactionId,geo.country,si.simpleIndustryDescription,"
+        "tt.transactionIdTypeName,c.companyName', 'transactionType': '14'})\n"
+        "print(b.build_query())\n"
+    )
+    outputs = set()
+    for seed in ('1', '2', '3', '4'):
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join(sys.path))
+        outputs.add(subprocess.run(
+            [sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True
+        ).stdout)
+    assert len(outputs) == 1
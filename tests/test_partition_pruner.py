@@ -0,0 +1,114 @@
+"""Tests for partition column ranges and partition routing."""
+import json
+from datetime import datetime
+
+import pytest
+
+from app.query_builder.analyzers.partition_pruner import (
+    DateRange,
+    parse_typed_literal,
+    render_date_literal
+)
+from app.query_builder.execution import FanOutRunner, PartitionPlanner
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog
+from app.utils.errors import QueryBuildError
+from tests.helpers import build
+
+
+def conditions(params, **kwargs):
+    return build(params, **kwargs).where_conditions
+
+
+def ids(executor, builder):
+    return sorted(executor.execute(builder.build_query()).rows)
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'announcedDate': '2012'}, ["tr.announcedDate >= '2012-01-01'", "tr.announcedDate < '2013-01-01'"]),
+    ({'announcedDate': 'lte:2012-02'}, ["tr.announcedDate < '2012-03-01'"]),
+    ({'announcedDate': 'gt:2012-02-28'}, ["tr.announcedDate >= '2012-02-29'"]),
+    ({'announcedDate': 'between:2011,2012-06'}, ["tr.announcedDate >= '2011-01-01'", "tr.announcedDate < '2012-07-01'"]),
+    ({'announcedDate': 'gte:2011', 'tr.announcedDate': 'lt:2011-07'},
+     ["tr.announcedDate >= '2011-01-01'", "tr.announcedDate < '2011-07-01'"]),
+    ({'announcedDate': 'gte:2013', 'tr.announcedDate': 'lt:2012'}, ["1 = 0"]),
+])
+def test_filters_on_the_partition_column_become_one_range(params, expected):
+    assert conditions(params) == expected
+
+
+def test_range_literals_are_typed_for_the_dialect():
+    assert conditions({'announcedDate': '2012'}, dialect='postgres') == [
+        "tr.announcedDate >= CAST('2012-01-01' AS DATE)",
+        "tr.announcedDate < CAST('2013-01-01' AS DATE)",
+    ]
+    assert render_date_literal(datetime(2012, 1, 1, 12, 30), 'mssql') == \
+        "CAST('2012-01-01 12:30:00' AS DATETIME2)"
+
+
+@pytest.mark.parametrize('literal, expected', [
+    ("'2012-01-01'", ('2012-01-01', None)),
+    ("CAST('2012-01-01' AS DATE)", ('2012-01-01', 'DATE')),
+    ("CAST('2012-01-01 12:30:00' AS DATETIME2)", ('2012-01-01 12:30:00', 'DATETIME2')),
+    ("CAST(tr.x AS DATE)", None),
+    ("'a' OR 1 = 1", None),
+])
+def test_parse_typed_literal(literal, expected):
+    assert parse_typed_literal(literal) == expected
+
+
+@pytest.mark.parametrize('value', ['2012-13', 'gte:yesterday', 'between:2012', 'between:2012,x'])
+def test_invalid_dates_are_rejected(value):
+    with pytest.raises(QueryBuildError):
+        build({'announcedDate': value})
+
+
+@pytest.mark.parametrize('expression', [
+    "tr.announcedDate >= '2012-03-05' AND tr.announcedDate < '2013-01-01'",
+    "announcedDate = '2012-03-05' OR announcedDate = '2014-07-01'",
+    "tr.announcedDate > '2012-03-05' AND tr.announcedDate <= '2012-12-31' AND tr.statusId != 2",
+    "tr.announcedDate != '2012-03-05' AND tr.announcedDate < '2011-01-01'",
+])
+def test_filter_expressions_on_the_partition_column(executor, expression):
+    builder = build({'select': 'tr.transactionId', 'filter': expression})
+    literal = executor.execute(f"SELECT tr.transactionId FROM ciqTransaction tr WHERE {expression}").rows
+    assert ids(executor, builder) == sorted(literal)
+
+
+def test_filter_expression_joins_the_date_range():
+    builder = build({'filter': "announcedDate >= '2012-03-05' AND tr.statusId = 2", 'announcedDate': 'lt:2013'})
+    assert builder.date_range == DateRange((datetime(2012, 3, 5), True), (datetime(2013, 1, 1), False))
+    assert builder.where_conditions == [
+        "tr.statusId = '2'",
+        "tr.announcedDate >= '2012-03-05'",
+        "tr.announcedDate < '2013-01-01'",
+    ]
+
+
+def test_single_partition_is_routed_to_its_table():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['partitions']['ciqTransaction']['table_pattern'] = 'ciqTransaction_{year}'
+    catalog = build_catalog(document, source=DEFAULT_CATALOG_PATH)
+    routed = build({'announcedDate': '2012-03'}, catalog=catalog, route_partitions=True)
+    assert 'FROM main.ciqTransaction_2012 tr' in routed.build_query()
+    spanning = build({'announcedDate': 'between:2012,2013'}, catalog=catalog, route_partitions=True)
+    assert 'FROM main.ciqTransaction tr' in spanning.build_query()
+
+
+def test_range_fan_out_splits_dialect_typed_bounds():
+    builder = build({'select': 'tr.transactionId', 'announcedDate': 'between:2011,2012'}, dialect='postgres')
+    plan = PartitionPlanner(max_partitions=4, range_key='tr.announcedDate').plan(builder)
+    assert plan is not None and len(plan.queries) == 4
+    assert "tr.announcedDate >= CAST('2011-01-01' AS DATE)" in plan.queries[0].sql
+    assert "tr.announcedDate < CAST('2013-01-01' AS DATE)" in plan.queries[-1].sql
+
+
+def test_range_fan_out_over_the_date_range(executor):
+    builder = build({'select': 'tr.transactionId', 'announcedDate': 'between:2011,2013-06'})
+    runner = FanOutRunner(executor, PartitionPlanner(max_partitions=3, range_key='tr.announcedDate'))
+    try:
+        plan = runner.planner.plan(builder)
+        assert plan is not None and len(plan.queries) == 3
+        assert sorted(runner.run(plan).rows) == ids(executor, builder)
+    finally:
+        runner.close()
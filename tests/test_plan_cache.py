@@ -0,0 +1,186 @@
+"""Tests for the plan cache, plan stores and request keys."""
+import copy
+import json
+
+import pytest
+
+from app.query_builder.execution import ExecutionPolicy
+from app.query_builder.plans import PlanCache, PlanStore, QueryPlan, plan_key, request_key, write_plan_store
+from app.query_builder.plans.__main__ import main as precompile_main
+from app.query_builder.plans.precompile import compile_corpus
+from app.query_builder.plans.store import PlanStoreError
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog
+from tests.helpers import build
+
+REQUEST = {'status': '3', 'select': 'tr.transactionId', 'orderBy': 'transactionId', 'limit': '5'}
+DATED = {'announcedDate': 'gte:2012-01-01', 'industry': '32'}
+
+
+def load_document():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        return json.load(catalog_file)
+
+
+def catalog_mapping(column):
+    """Get a catalog mapping the ``status`` key to a transaction column."""
+    document = load_document()
+    document.setdefault('field_mappings', {})['status'] = f"tr.{column}"
+    return build_catalog(document, source=DEFAULT_CATALOG_PATH)
+
+
+def partitioned_catalog():
+    """Get a catalog with yearly partition tables for both transaction tables."""
+    document = load_document()
+    document['partitions'] = {
+        table: {'column': 'announcedDate', 'interval': 'year', 'table_pattern': table + '_{year}'}
+        for table in ('ciqTransaction', 'ciqTransactionArchive')
+    }
+    return build_catalog(document, source=DEFAULT_CATALOG_PATH)
+
+
+def test_edited_catalog_with_the_same_version_gets_new_plans():
+    cache = PlanCache()
+    before, after = catalog_mapping('statusId'), catalog_mapping('transactionIdTypeId')
+    assert before.version == after.version and before.digest != after.digest
+
+    first = build(REQUEST, catalog=before, plan_cache=cache)
+    reloaded = build(REQUEST, catalog=after, plan_cache=cache)
+    assert cache.stats()['hits'] == 0
+    assert first.where_conditions == ["tr.statusId = '3'"]
+    assert reloaded.where_conditions == ["tr.transactionIdTypeId = '3'"]
+
+
+def test_unchanged_catalog_keeps_its_digest_and_plans():
+    cache = PlanCache()
+    build(REQUEST, catalog=catalog_mapping('statusId'), plan_cache=cache)
+    cached = build(REQUEST, catalog=catalog_mapping('statusId'), plan_cache=cache)
+    assert cache.stats()['hits'] == 1
+    assert cached.where_conditions == ["tr.statusId = '3'"]
+
+
+def test_store_of_an_edited_catalog_is_not_warmed(tmp_path):
+    before, after = catalog_mapping('statusId'), catalog_mapping('transactionIdTypeId')
+    builder = build(REQUEST, catalog=before)
+    path = str(tmp_path / 'plans.store')
+    write_plan_store(path, [(plan_key(REQUEST, builder), QueryPlan.capture(builder).encode())], {
+        'catalog_version': before.version,
+        'catalog_digest': before.digest
+    })
+    store = PlanStore(path)
+    try:
+        assert PlanCache().warm(store, after) == 0
+        assert PlanCache().warm(store, before) == 1
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize('dates', [
+    {'announcedDate': '2012'},
+    {'announcedDate': 'gte:2012-03', 'tr.announcedDate': 'lt:2012-07'},
+])
+def test_cached_plan_restores_the_date_range(dates):
+    catalog = partitioned_catalog()
+    params = {'select': 'tr.transactionId', **dates}
+    options = {'catalog': catalog, 'route_partitions': True, 'union_tables': ['ciqTransactionArchive']}
+    cache = PlanCache()
+    parsed = build(params, plan_cache=cache, **options)
+    cached = build(params, plan_cache=cache, **options)
+    assert cache.stats()['hits'] == 1
+    assert cached.date_range == parsed.date_range is not None
+    assert cached.build_query() == parsed.build_query()
+    assert 'ciqTransactionArchive_2012' in cached.build_query()
+
+    decoded = QueryPlan.decode(QueryPlan.capture(parsed).encode())
+    restored = build({}, **options)
+    decoded.apply(restored)
+    assert restored.date_range == parsed.date_range
+
+
+def test_request_key_ignores_spelling():
+    builder = build({})
+    assert request_key({'industry': '34, 32', 'limit': '5', 'orderBy': 'announcedDate'}, builder) == \
+        request_key({'limit': 5, 'si.simpleIndustryId': '32,34,32', 'orderBy': 'tr.announcedDate:asc'}, builder)
+    assert request_key({'industry': '32'}, builder) != request_key({'industry': '34'}, builder)
+    assert request_key({'select': 'a.x,b.y', 'groupBy': 'a.x'}, builder) != \
+        request_key({'groupBy': 'a.x', 'select': 'a.x,b.y'}, builder)
+    assert request_key({'tr.transactionSize': 'between:5,10'}, builder) != \
+        request_key({'tr.transactionSize': 'between:10,5'}, builder)
+
+
+def test_plan_key_depends_on_builder_settings():
+    assert plan_key(REQUEST, build({})) == plan_key(REQUEST, build({}))
+    assert plan_key(REQUEST, build({})) != plan_key(REQUEST, build({}, filter_join_policy='exists'))
+    assert plan_key(REQUEST, build({})) != plan_key(dict(reversed(list(REQUEST.items()))), build({}))
+
+
+def test_catalog_digest_survives_a_copy():
+    catalog = catalog_mapping('statusId')
+    assert copy.deepcopy(catalog).digest == catalog.digest
+
+
+def test_corpus_is_precompiled_into_a_store(tmp_path):
+    corpus = (
+        [{'industry': '32', 'limit': '10'}] * 3
+        + [{'industry': str(i), 'limit': '10'} for i in range(1, 6)]
+        + [{'transactionType': '1', 'select': 'tr.transactionId'}]
+        + [{'tr.statusId': 'abc'}] * 2
+    )
+    path = str(tmp_path / 'plans.store')
+    report = compile_corpus(corpus, path, workers=2, per_shape=2)
+    assert report.to_dict() == {'requests': 11, 'unique': 8, 'failed': 2, 'shapes': 2, 'plans': 3}
+
+    cache = PlanCache()
+    with PlanStore(path) as store:
+        assert store.metadata['requests'] == 11
+        assert cache.warm(store, build({}).catalog) == 3
+    builder = build({'industry': '32', 'limit': '10'}, plan_cache=cache)
+    assert cache.stats()['hits'] == 1
+    assert builder.build_query() == build({'industry': '32', 'limit': '10'}).build_query()
+
+
+def test_precompile_command(tmp_path, capsys):
+    corpus = tmp_path / 'requests.jsonl'
+    corpus.write_text('{"industry": "32"}\n{"params": {"industry": "34"}}\n', encoding='utf-8')
+    path = str(tmp_path / 'plans.store')
+    assert precompile_main([str(corpus), '--output', path, '--workers', '1',
+                            '--filter-join-policy', 'exists']) == 0
+    assert 'Wrote 2 plans for 1 shapes' in capsys.readouterr().out
+    with PlanStore(path) as store:
+        assert store.metadata['settings']['filter_join_policy'] == 'exists'
+    with pytest.raises(TypeError, match='Unknown builder settings'):
+        compile_corpus([], path, stats_collector=None)
+
+
+@pytest.mark.parametrize('settings, options', [
+    ({'dialect': 'postgres'}, ['--dialect', 'postgres']),
+    ({'route_partitions': True}, ['--route-partitions']),
+    ({'policy': ExecutionPolicy(max_rows=1000)}, ['--max-rows', '1000']),
+    ({'union_tables': ['ciqTransactionArchive']}, ['--union-tables', 'ciqTransactionArchive']),
+])
+def test_stores_are_precompiled_for_builder_settings(tmp_path, settings, options):
+    corpus = tmp_path / 'requests.jsonl'
+    corpus.write_text(json.dumps(DATED) + '\n', encoding='utf-8')
+    path = str(tmp_path / 'plans.store')
+    assert precompile_main([str(corpus), '--output', path, '--workers', '1', *options]) == 0
+
+    for builder_settings, hits in ((settings, 1), ({}, 0)):
+        cache = PlanCache()
+        with PlanStore(path) as store:
+            cache.warm(store, build({}).catalog)
+        build(DATED, plan_cache=cache, **builder_settings)
+        assert cache.stats()['hits'] == hits
+
+
+def test_damaged_stores_are_rejected(tmp_path):
+    path = tmp_path / 'plans.store'
+    write_plan_store(str(path), [(plan_key(REQUEST, build({})), b'plan')])
+    with PlanStore(str(path)) as store:
+        assert store.get(plan_key(REQUEST, build({}))) == b'plan' and len(store) == 1
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(PlanStoreError, match='truncated'):
+        PlanStore(str(path))
+    path.write_bytes(b'not a plan store' * 4)
+    with pytest.raises(PlanStoreError, match='not a plan store'):
+        PlanStore(str(path))
+    with pytest.raises(PlanStoreError, match='Cannot open'):
+        PlanStore(str(tmp_path / 'missing.store'))
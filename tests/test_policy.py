@@ -0,0 +1,163 @@
+"""Tests for execution policies and query cancellation."""
+import threading
+import time
+
+import pytest
+
+from app.query_builder.execution import (
+    CancellationToken,
+    DBAPIExecutor,
+    ExecutionPolicy,
+    GuardedExecutor,
+    QueryCancelledError,
+    QueryTimeoutError,
+    SQLiteExecutor,
+    cancellation_scope
+)
+from app.query_builder.execution.policy import MYSQL_PREVIOUS_TIMEOUT, render_timeout
+from tests.helpers import build
+
+# Runs until it is interrupted
+ENDLESS = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+class FakeCursor:
+    """DB-API cursor recording the statements of its connection."""
+
+    description = (('value',),)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append(sql)
+        if self.connection.on_execute is not None and not sql.startswith('SET'):
+            self.connection.on_execute(self)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class PyodbcCursor(FakeCursor):
+    """Cursor that can cancel its statement, like pyodbc's."""
+
+    cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeConnection:
+    """DB-API connection without a way to abort statements, like pyodbc's."""
+
+    def __init__(self, cursor_class=FakeCursor, on_execute=None):
+        self.cursor_class = cursor_class
+        self.on_execute = on_execute
+        self.statements = []
+        self.cursors = []
+
+    def cursor(self):
+        cursor = self.cursor_class(self)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def guarded(connection, dialect, **policy):
+    return GuardedExecutor(DBAPIExecutor(lambda: connection, dialect), ExecutionPolicy(**policy))
+
+
+def test_mysql_session_timeout_is_restored():
+    connection = FakeConnection()
+    statement = "WITH x AS (SELECT 1) SELECT * FROM x"
+    guarded(connection, 'mysql', timeout_ms=1500).execute(statement)
+    assert connection.statements == [
+        f"SET {MYSQL_PREVIOUS_TIMEOUT} = @@SESSION.MAX_EXECUTION_TIME",
+        "SET SESSION MAX_EXECUTION_TIME = 1500",
+        statement,
+        f"SET SESSION MAX_EXECUTION_TIME = {MYSQL_PREVIOUS_TIMEOUT}",
+    ]
+
+
+def test_mysql_session_timeout_is_restored_after_a_failure():
+    def fail(cursor):
+        raise RuntimeError("syntax error")
+
+    connection = FakeConnection(on_execute=fail)
+    with pytest.raises(RuntimeError):
+        guarded(connection, 'mysql', timeout_ms=1500).execute("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert connection.statements[-1] == f"SET SESSION MAX_EXECUTION_TIME = {MYSQL_PREVIOUS_TIMEOUT}"
+
+
+def test_mysql_select_uses_a_hint():
+    connection = FakeConnection()
+    guarded(connection, 'mysql', timeout_ms=1500).execute("SELECT 1")
+    assert connection.statements == ["SELECT /*+ MAX_EXECUTION_TIME(1500) */ 1"]
+
+
+def test_render_timeout():
+    assert render_timeout('postgres', 'SELECT 1', 500) == (["SET LOCAL statement_timeout = 500"], 'SELECT 1', [])
+    assert render_timeout('sqlite', 'SELECT 1', 500) == ([], 'SELECT 1', [])
+
+
+def test_cancel_uses_the_cursor_when_the_connection_cannot():
+    token = CancellationToken()
+
+    def cancel_while_running(cursor):
+        token.cancel()
+        raise RuntimeError("Operation canceled")
+
+    connection = FakeConnection(PyodbcCursor, on_execute=cancel_while_running)
+    with cancellation_scope(token), pytest.raises(QueryCancelledError):
+        guarded(connection, 'mssql').execute("SELECT 1")
+    assert connection.cursors[0].cancelled
+
+
+def test_sqlite_statement_times_out(db_path):
+    executor = GuardedExecutor(SQLiteExecutor(db_path), ExecutionPolicy(timeout_ms=100))
+    try:
+        started = time.monotonic()
+        with pytest.raises(QueryTimeoutError):
+            executor.execute(ENDLESS)
+        assert time.monotonic() - started < 5
+        assert executor.execute("SELECT COUNT(*) FROM ciqTransaction").rows == [(1000,)]
+    finally:
+        executor.close()
+
+
+def test_sqlite_statement_is_cancelled(db_path):
+    executor = GuardedExecutor(SQLiteExecutor(db_path), ExecutionPolicy())
+    token = CancellationToken()
+    timer = threading.Timer(0.1, token.cancel)
+    timer.start()
+    try:
+        with cancellation_scope(token), pytest.raises(QueryCancelledError) as error:
+            executor.execute(ENDLESS)
+        assert not isinstance(error.value, QueryTimeoutError)
+    finally:
+        timer.cancel()
+        executor.close()
+
+
+def test_cancelled_token_runs_nothing():
+    connection = FakeConnection()
+    token = CancellationToken()
+    token.cancel()
+    with cancellation_scope(token), pytest.raises(QueryCancelledError):
+        guarded(connection, 'postgres', timeout_ms=100).execute("SELECT 1")
+    assert connection.statements == []
+
+
+def test_row_cap(db_path):
+    policy = ExecutionPolicy(max_rows=25)
+    assert build({'limit': '100'}, policy=policy).limit_value == 25
+    assert build({'limit': '10'}, policy=policy).limit_value == 10
+    executor = GuardedExecutor(SQLiteExecutor(db_path), policy)
+    try:
+        assert len(executor.execute("SELECT transactionId FROM ciqTransaction").rows) == 25
+        batches = list(executor.iter_batches("SELECT transactionId FROM ciqTransaction", batch_size=7))
+        assert [len(rows) for _, rows in batches] == [7, 7, 7, 4]
+    finally:
+        executor.close()
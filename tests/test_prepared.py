@@ -0,0 +1,200 @@
+"""Tests for prepared-statement execution."""
+import pytest
+
+from app.query_builder.execution import DBAPIExecutor, PreparedExecutor, PreparedStatementRegistry, SQLiteExecutor
+from app.query_builder.execution.prepared import (
+    DriverStatementCache,
+    PostgresPreparer,
+    SQLServerPreparer,
+    parameterize_sql
+)
+from tests.helpers import build_sql
+
+REQUESTS = [
+    {'select': 'tr.transactionId,c.companyName', 'industry': '3,4', 'orderBy': 'transactionId'},
+    {'select': 'tr.transactionId', 'c.companyName': "like:Company 1%", 'limit': '20', 'orderBy': 'transactionId'},
+    {'select': 'tr.transactionId', 'tr.transactionSize': 'between:100,200', 'announcedDate': '2012'},
+    {'select': 'tr.transactionIdTypeId,COUNT(*) AS n', 'groupBy': 'transactionType', 'tr.statusId': 'ne:2'},
+]
+
+
+class RecordingCursor:
+    description = (('value',),)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append((sql, tuple(params)))
+
+    def fetchone(self):
+        return (41,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def close(self):
+        pass
+
+
+class FlakyPreparer(DriverStatementCache):
+    """Preparer whose handles the server forgets after the first execution."""
+
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error or RuntimeError("prepared statement does not exist")
+        self.prepared = []
+        self.deallocated = []
+        self.executed = set()
+
+    def prepare(self, connection, name, template, param_count):
+        self.prepared.append(template)
+        return (template, len(self.prepared))
+
+    def execute(self, cursor, handle, params):
+        if handle in self.executed:
+            raise self.error
+        self.executed.add(handle)
+
+    def deallocate(self, connection, handle):
+        self.deallocated.append(handle[0])
+
+    def is_missing(self, error):
+        return 'does not exist' in str(error)
+
+
+class PostgresError(Exception):
+    def __init__(self, message, pgcode):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+@pytest.fixture
+def prepared(db_path):
+    executor = PreparedExecutor(SQLiteExecutor(db_path))
+    yield executor
+    executor.close()
+
+
+@pytest.mark.parametrize('paramstyle, template', [
+    ('qmark', "SELECT 1 WHERE a = ? AND b LIKE ?"),
+    ('format', "SELECT 1 WHERE a = %s AND b LIKE %s"),
+    ('numeric', "SELECT 1 WHERE a = :1 AND b LIKE :2"),
+    ('dollar', "SELECT 1 WHERE a = $1 AND b LIKE $2"),
+    ('at', "SELECT 1 WHERE a = @P1 AND b LIKE @P2"),
+])
+def test_literals_become_parameters(paramstyle, template):
+    assert parameterize_sql("SELECT 1 WHERE a = 'O''Neil' AND b LIKE 'x%'", paramstyle) == \
+        (template, ["O'Neil", 'x%'])
+
+
+def test_format_style_escapes_percent_outside_literals():
+    assert parameterize_sql("SELECT a % 2 FROM t WHERE b = '%'", 'format') == \
+        ("SELECT a %% 2 FROM t WHERE b = %s", ['%'])
+
+
+@pytest.mark.parametrize('params', REQUESTS)
+def test_prepared_results_match_inline_literals(executor, prepared, params):
+    sql = build_sql(params)
+    assert prepared.execute(sql).rows == executor.execute(sql).rows
+
+
+def test_requests_of_one_shape_share_a_statement(prepared):
+    for value in ('1', '2', '3', '14', '1'):
+        prepared.execute(build_sql({'select': 'tr.transactionId', 'transactionType': value}))
+    stats = prepared.registry.stats()
+    assert (stats['misses'], stats['hits']) == (1, 4)
+    assert prepared.registry.size(prepared.executor.connection) == 1
+
+
+def test_cache_is_bounded_per_connection():
+    registry = PreparedStatementRegistry(FlakyPreparer(), capacity=2)
+    connection = RecordingConnection()
+    for template in ('a', 'b', 'c'):
+        registry.execute(connection, None, template, [])
+    assert registry.size(connection) == 2
+    assert registry.stats()['evictions'] == 1
+    assert registry.preparer.deallocated == ['a']
+
+
+def test_forgotten_statement_is_prepared_again():
+    registry = PreparedStatementRegistry(FlakyPreparer())
+    connection = RecordingConnection()
+    registry.execute(connection, None, 'a', [])
+    registry.execute(connection, None, 'a', [])
+    assert registry.stats()['reprepared'] == 1
+    assert registry.preparer.prepared == ['a', 'a']
+
+
+def test_other_errors_are_raised_without_executing_again():
+    error = ValueError("value too long for type character varying(10)")
+    registry = PreparedStatementRegistry(FlakyPreparer(error))
+    connection = RecordingConnection()
+    registry.execute(connection, None, 'a', [])
+    with pytest.raises(ValueError) as raised:
+        registry.execute(connection, None, 'a', [])
+    assert raised.value is error
+    assert registry.preparer.prepared == ['a']
+    assert registry.stats()['reprepared'] == 0
+    assert registry.size(connection) == 1
+
+
+@pytest.mark.parametrize('preparer, error, missing', [
+    (PostgresPreparer(), PostgresError('prepared statement "qb_1" does not exist', '26000'), True),
+    (PostgresPreparer(), PostgresError('canceling statement due to statement timeout', '57014'), False),
+    (PostgresPreparer(), PostgresError('current transaction is aborted', '25P02'), False),
+    (SQLServerPreparer(), Exception('HY000', '[Microsoft][ODBC Driver 18 for SQL Server][SQL Server]'
+                                              'Could not find prepared statement with handle 7. (8179)'), True),
+    (SQLServerPreparer(), Exception('23000', 'Violation of PRIMARY KEY constraint (2627)'), False),
+    (DriverStatementCache(), RuntimeError('no such table: t'), False),
+])
+def test_only_missing_statements_are_recognized(preparer, error, missing):
+    assert preparer.is_missing(error) is missing
+
+
+def test_closing_forgets_the_connection(db_path):
+    prepared = PreparedExecutor(SQLiteExecutor(db_path))
+    prepared.execute("SELECT 1 WHERE 'a' = 'a'")
+    assert prepared.registry.stats()['connections'] == 1
+    prepared.close()
+    assert prepared.registry.stats()['connections'] == 0
+    prepared.execute("SELECT 1 WHERE 'a' = 'a'")
+    assert prepared.registry.stats()['misses'] == 2
+    prepared.close()
+
+
+def test_postgres_statements_are_prepared_once_and_deallocated():
+    connection = RecordingConnection()
+    prepared = PreparedExecutor(DBAPIExecutor(lambda: connection, 'postgres'), capacity=1)
+    prepared.execute("SELECT * FROM t WHERE a = '1'")
+    prepared.execute("SELECT * FROM t WHERE a = '2'")
+    prepared.execute("SELECT * FROM t")
+    first, second = (sql.split()[1] for sql, _ in (connection.statements[0], connection.statements[4]))
+    assert connection.statements == [
+        (f"PREPARE {first} AS SELECT * FROM t WHERE a = $1", ()),
+        (f"EXECUTE {first} (%s)", ('1',)),
+        (f"EXECUTE {first} (%s)", ('2',)),
+        (f"DEALLOCATE {first}", ()),
+        (f"PREPARE {second} AS SELECT * FROM t", ()),
+        (f"EXECUTE {second}", ()),
+    ]
+
+
+def test_sql_server_statements_use_sp_execute():
+    connection = RecordingConnection()
+    prepared = PreparedExecutor(DBAPIExecutor(lambda: connection, 'mssql'))
+    prepared.execute("SELECT * FROM t WHERE a = '1' AND b = '2'")
+    assert connection.statements[0][1] == ('@P1 NVARCHAR(4000), @P2 NVARCHAR(4000)',
+                                           'SELECT * FROM t WHERE a = @P1 AND b = @P2')
+    assert connection.statements[1] == ('EXEC sp_execute ?, ?, ?', (41, '1', '2'))
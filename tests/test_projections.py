@@ -0,0 +1,52 @@
+"""Tests for projection profiles and the default projection."""
+import logging
+
+import pytest
+
+from app.query_builder.schema import ProjectionResolver, get_catalog
+from app.utils.errors import QueryBuildError
+from tests.helpers import build, build_sql
+
+
+def test_default_projection_uses_summary_profile():
+    builder = build({})
+    assert builder.select_fields == [
+        'tr.transactionId', 'tr.companyId', 'tr.transactionIdTypeId',
+        'tr.announcedDate', 'tr.transactionSize'
+    ]
+
+
+def test_default_projection_none_selects_wildcard():
+    assert build_sql({}, default_projection=None).startswith("SELECT tr.* FROM")
+
+
+def test_profiles_expand_for_base_and_joined_aliases():
+    builder = build({'select': '@standard,@c.all'})
+    assert 'tr.closingDate' in builder.select_fields
+    assert 'c.companyName' in builder.select_fields
+    assert 'tr.comments' not in builder.select_fields
+
+
+def test_all_profile_skips_heavy_columns():
+    assert 'tr.comments' not in build({'select': '@all'}).select_fields
+
+
+def test_exclude_expands_wildcard():
+    builder = build({'select': 'tr.*', 'exclude': 'comments'})
+    assert 'tr.*' not in builder.select_fields
+    assert 'tr.comments' not in builder.select_fields
+    assert 'tr.transactionId' in builder.select_fields
+
+
+def test_unknown_profile_is_a_validation_error(caplog):
+    with caplog.at_level(logging.ERROR):
+        with pytest.raises(QueryBuildError, match="@nope"):
+            build({'select': '@nope'})
+    assert not caplog.records
+
+
+def test_column_labels_use_column_names_and_aliases():
+    resolver = ProjectionResolver(get_catalog())
+    assert resolver.column_labels(['tr.transactionId', 'geo.isoCountry2', 'COUNT(*) AS n', 'MAX(tr.x)']) == [
+        'transactionId', 'isoCountry2', 'n', 'MAX(tr.x)'
+    ]
@@ -0,0 +1,115 @@
+"""Tests for routing grouped requests to rollup tables."""
+import json
+import sqlite3
+
+import pytest
+
+from app.query_builder.execution import SQLiteExecutor
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog
+from tests.helpers import build
+
+ROLLUPS = {
+    'txByIndustryType': {
+        'base_table': 'ciqTransaction',
+        'dimensions': {'si.simpleIndustryId': 'industryId', 'tr.transactionIdTypeId': 'typeId'},
+        'measures': {'n': 'COUNT(*)', 'total': 'SUM(tr.transactionSize)', 'biggest': 'MAX(tr.transactionSize)'},
+    },
+    'txByIndustry': {
+        'base_table': 'ciqTransaction',
+        'dimensions': {'si.simpleIndustryId': 'industryId'},
+        'measures': {'n': 'COUNT(*)'},
+    },
+}
+
+ROLLUP_TABLES = """
+CREATE TABLE txByIndustryType AS
+SELECT si.simpleIndustryId AS industryId, tr.transactionIdTypeId AS typeId, COUNT(*) AS n,
+       SUM(tr.transactionSize) AS total, MAX(tr.transactionSize) AS biggest
+FROM ciqTransaction tr
+JOIN ciqCompany c ON c.companyId = tr.companyId
+JOIN ciqSimpleIndustry si ON si.simpleIndustryId = c.simpleIndustryId
+GROUP BY 1, 2;
+CREATE TABLE txByIndustry AS SELECT industryId, SUM(n) AS n FROM txByIndustryType GROUP BY 1;
+"""
+
+
+@pytest.fixture(scope="module")
+def rollup_catalog():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['rollups'] = ROLLUPS
+    return build_catalog(document, source='test')
+
+
+@pytest.fixture
+def rollup_executor(db_path, tmp_path):
+    path = str(tmp_path / 'rollups.db')
+    source, target = sqlite3.connect(db_path), sqlite3.connect(path)
+    source.backup(target)
+    target.executescript(ROLLUP_TABLES)
+    source.close()
+    target.close()
+    executor = SQLiteExecutor(path)
+    yield executor
+    executor.close()
+
+
+def rounded(rows):
+    return [tuple(round(value, 6) if isinstance(value, float) else value for value in row) for row in rows]
+
+
+@pytest.mark.parametrize('params, table', [
+    ({'select': 'si.simpleIndustryId,COUNT(*) AS n,SUM(tr.transactionSize) AS total', 'groupBy': 'industry',
+      'transactionType': '1,2', 'orderBy': 'n:desc,industry'}, 'txByIndustryType'),
+    ({'select': 'si.simpleIndustryId,tr.transactionIdTypeId,MAX(tr.transactionSize) AS biggest',
+      'groupBy': 'industry,transactionType', 'orderBy': 'industry,transactionType'}, 'txByIndustryType'),
+    ({'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry',
+      'filter': "si.simpleIndustryId = 3 OR tr.transactionIdTypeId = 14", 'orderBy': 'industry'}, 'txByIndustryType'),
+    ({'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry', 'orderBy': 'industry'}, 'txByIndustry'),
+])
+def test_covered_requests_read_the_most_aggregated_rollup(rollup_executor, rollup_catalog, params, table):
+    builder = build(params, catalog=rollup_catalog)
+    sql = builder.build_query()
+    assert builder.rollup is not None and builder.rollup.table == table
+    assert f"FROM main.{table} tr" in sql and 'JOIN' not in sql
+
+    base = build(params, catalog=rollup_catalog, use_rollups=False)
+    assert rounded(rollup_executor.execute(sql).rows) == rounded(rollup_executor.execute(base.build_query()).rows)
+    assert rollup_executor.execute(sql).columns == rollup_executor.execute(base.build_query()).columns
+
+
+@pytest.mark.parametrize('params', [
+    {'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry', 'tr.statusId': '2'},
+    {'select': 'si.simpleIndustryId,AVG(tr.transactionSize) AS a', 'groupBy': 'industry'},
+    {'select': 'si.simpleIndustryId,COUNT(DISTINCT tr.companyId) AS n', 'groupBy': 'industry'},
+    {'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry', 'c.companyName': 'x'},
+    {'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry', 'orderBy': 'announcedDate'},
+    # The rollups were built through the company join, which drops dangling rows
+    {'select': 'tr.transactionIdTypeId,COUNT(*) AS n', 'groupBy': 'transactionType'},
+    {'select': 'si.simpleIndustryId,tr.statusId', 'groupBy': 'industry,tr.statusId'},
+])
+def test_uncovered_requests_read_the_base_table(rollup_catalog, params):
+    builder = build(params, catalog=rollup_catalog)
+    assert builder.rollup is None
+    assert 'FROM main.ciqTransaction tr' in builder.build_query()
+
+
+def test_rollups_can_be_disabled(rollup_catalog):
+    params = {'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry'}
+    assert build(params, catalog=rollup_catalog, use_rollups=False).rollup is None
+    assert build(params, catalog=rollup_catalog, union_tables=['ciqTransactionArchive'],
+                 filter_join_policy='join').rollup is None
+
+
+def test_column_names_inside_literals_are_not_rewritten():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['rollups'] = {'txByIndustryName': {
+        'base_table': 'ciqTransaction',
+        'dimensions': {'si.simpleIndustryId': 'industryId', 'si.simpleIndustryDescription': 'industryName'},
+        'measures': {'n': 'COUNT(*)'},
+    }}
+    builder = build({'select': 'si.simpleIndustryId,COUNT(*) AS n', 'groupBy': 'industry',
+                     'filter': "si.simpleIndustryDescription = 'tr.statusId'"},
+                    catalog=build_catalog(document, source='test'))
+    assert builder.rollup.where_conditions == ["tr.industryName = 'tr.statusId'"]
@@ -0,0 +1,65 @@
+"""Tests for rendering filter-only joins as semi-joins."""
+import pytest
+
+from tests.helpers import build_sql
+
+POLICIES = ['exists', 'in', 'cte']
+
+REQUESTS = [
+    {'select': 'tr.transactionId', 'industry': '3,4,5'},
+    {'select': 'tr.transactionId,c.companyName', 'industry': '3,4,5'},
+    {'select': 'tr.transactionId', 'country': '3,4,5,6', 'industry': '1,2,3,4,5,6,7,8'},
+    {'select': 'tr.transactionId', 'c.companyName': 'like:Company 1%', 'country': '3,4,5,6'},
+    {'select': 'tr.transactionId', 'transactionType': '1', 'tt.transactionIdTypeName': 'Type 1'},
+    {'select': 'tr.transactionId', 'filter': "si.simpleIndustryId = 3 OR tr.statusId = 2"},
+    {'select': 'tr.transactionIdTypeId,COUNT(*) AS n', 'groupBy': 'transactionType', 'industry': '3,4,5'},
+]
+
+
+def rows(executor, params, policy):
+    return sorted(executor.execute(build_sql(params, filter_join_policy=policy)).rows, key=repr)
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+@pytest.mark.parametrize('params', REQUESTS)
+def test_semi_joins_match_regular_joins(executor, params, policy):
+    assert rows(executor, params, policy) == rows(executor, params, 'join')
+
+
+@pytest.mark.parametrize('policy, rendered', [
+    ('exists', "WHERE EXISTS (SELECT 1 FROM main.ciqCompany c JOIN main.ciqSimpleIndustry si"),
+    ('in', "WHERE tr.companyId IN (SELECT c.companyId FROM main.ciqCompany c JOIN main.ciqSimpleIndustry si"),
+    ('cte', "WHERE tr.companyId IN (SELECT companyId FROM company_filter)"),
+])
+def test_filter_only_chains_become_one_semi_join(policy, rendered):
+    sql = build_sql({'select': 'tr.transactionId', 'industry': '3,4'}, filter_join_policy=policy)
+    assert rendered in sql
+    assert ' JOIN main.ciqCompany c ON' not in sql
+
+
+def test_cte_filter_is_declared_once_and_distinct():
+    sql = build_sql({'select': 'tr.transactionId', 'industry': '3,4'}, filter_join_policy='cte')
+    assert sql.startswith("WITH company_filter AS (SELECT DISTINCT c.companyId FROM main.ciqCompany c")
+
+
+def test_projected_joins_stay_joins_and_their_dependants_correlate():
+    sql = build_sql({'select': 'tr.transactionId,c.companyName', 'industry': '3'}, filter_join_policy='in')
+    assert 'JOIN main.ciqCompany c ON c.companyId = tr.companyId' in sql
+    assert "c.simpleIndustryId IN (SELECT si.simpleIndustryId FROM main.ciqSimpleIndustry si" in sql
+
+
+@pytest.mark.parametrize('params', [
+    {'select': 'tr.transactionId', 'filter': "si.simpleIndustryId = 3 OR tr.statusId = 2"},
+    {'select': 'tr.transactionId', 'industry': '3', 'groupBy': 'industry'},
+    {'select': 'tr.transactionId', 'industry': '3', 'orderBy': 'industry'},
+])
+def test_conditions_or_lists_needing_the_join_keep_it(params):
+    for policy in POLICIES:
+        sql = build_sql(params, filter_join_policy=policy)
+        assert 'JOIN main.ciqSimpleIndustry si ON' in sql
+        assert 'EXISTS' not in sql and '_filter' not in sql
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match='Unknown filter join policy'):
+        build_sql({'industry': '3'}, filter_join_policy='hash')
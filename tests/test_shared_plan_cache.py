@@ -0,0 +1,119 @@
+"""Tests for the plan cache shared by worker processes."""
+import hashlib
+import json
+import multiprocessing
+
+import pytest
+
+from app.query_builder.plans import PlanCache, SharedPlanCache
+from app.query_builder.schema import get_catalog
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, build_catalog
+from tests.helpers import build
+
+GEOMETRY = {'sets': 16, 'ways': 2, 'slot_size': 2048}
+
+REQUEST = {'industry': '32,34', 'transactionType': '1', 'orderBy': 'announcedDate:desc', 'limit': '10'}
+
+
+def key(i):
+    return hashlib.blake2b(str(i).encode('utf-8'), digest_size=16).digest()
+
+
+def payload(i):
+    body = (str(i) * (i % 40 + 1)).encode('utf-8')
+    return hashlib.md5(body).digest() + body
+
+
+@pytest.fixture
+def fork():
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs the fork start method")
+    return multiprocessing.get_context('fork')
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'plans.shared')
+
+
+def hammer(path, worker):
+    """Read and write overlapping keys, counting torn reads."""
+    cache = SharedPlanCache(path, get_catalog(), **GEOMETRY)
+    torn = 0
+    for n in range(3000):
+        i = (n * 7919 + worker) % 100
+        found = cache.get(key(i))
+        if found is None:
+            cache.put(key(i), payload(i))
+        elif found != payload(i):
+            torn += 1
+    cache.close()
+    return torn
+
+
+def build_in_worker(path):
+    cache = PlanCache(shared=SharedPlanCache(path, get_catalog(), **GEOMETRY))
+    return build(REQUEST, plan_cache=cache).build_query()
+
+
+def test_put_get_and_discard(path):
+    with SharedPlanCache(path, get_catalog(), **GEOMETRY) as cache:
+        assert cache.get(key(1)) is None
+        assert cache.put(key(1), payload(1))
+        assert cache.get(key(1)) == payload(1)
+        assert cache.put(key(1), b'replaced') and cache.get(key(1)) == b'replaced'
+        cache.discard(key(1))
+        assert cache.get(key(1)) is None
+        assert not cache.put(key(2), b'x' * cache.capacity + b'x')
+        assert cache.stats()['oversized'] == 1
+
+
+def test_sets_evict_when_full(path):
+    with SharedPlanCache(path, get_catalog(), **GEOMETRY) as cache:
+        for i in range(200):
+            cache.put(key(i), payload(i))
+        stored = [i for i in range(200) if cache.get(key(i)) is not None]
+        assert len(stored) <= GEOMETRY['sets'] * GEOMETRY['ways']
+        assert all(cache.get(key(i)) == payload(i) for i in stored)
+        assert cache.stats()['evictions'] >= 200 - len(stored)
+        cache.clear()
+        assert all(cache.get(key(i)) is None for i in stored)
+
+
+def test_plans_are_shared_between_processes(path, fork):
+    with fork.Pool(2) as pool:
+        queries = pool.map(build_in_worker, [path, path])
+    cache = PlanCache(shared=SharedPlanCache(path, get_catalog(), **GEOMETRY))
+    try:
+        assert build(REQUEST, plan_cache=cache).build_query() == queries[0] == queries[1]
+        assert cache.stats()['shared_hits'] == 1
+    finally:
+        cache.shared.close()
+
+
+def test_concurrent_writers_never_expose_torn_plans(path, fork):
+    SharedPlanCache(path, get_catalog(), **GEOMETRY).close()
+    with fork.Pool(4) as pool:
+        assert pool.starmap(hammer, [(path, worker) for worker in range(4)]) == [0, 0, 0, 0]
+
+
+def test_another_catalog_clears_the_cache(path):
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['field_mappings']['status'] = 'tr.statusId'
+    edited = build_catalog(document, source=DEFAULT_CATALOG_PATH)
+
+    with SharedPlanCache(path, get_catalog(), **GEOMETRY) as cache:
+        cache.put(key(1), payload(1))
+    with SharedPlanCache(path, get_catalog(), **GEOMETRY) as cache:
+        assert cache.get(key(1)) == payload(1)
+    with SharedPlanCache(path, edited, **GEOMETRY) as cache:
+        assert cache.get(key(1)) is None
+
+
+def test_geometry_must_match(path):
+    SharedPlanCache(path, get_catalog(), **GEOMETRY).close()
+    with pytest.raises(ValueError, match='different size'):
+        SharedPlanCache(path, get_catalog(), **dict(GEOMETRY, sets=32))
+    with pytest.raises(ValueError, match='different geometry'):
+        SharedPlanCache(path, get_catalog(), **dict(GEOMETRY, sets=32, ways=1))
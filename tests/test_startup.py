@@ -0,0 +1,100 @@
+"""Tests for lazy package imports and catalog snapshots."""
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.query_builder.schema import loader
+from app.query_builder.schema.__main__ import main as snapshot_main
+from app.query_builder.schema.loader import DEFAULT_CATALOG_PATH, load_catalog_cached
+
+PACKAGES = [
+    'app.query_builder',
+    'app.query_builder.analyzers',
+    'app.query_builder.constructors',
+    'app.query_builder.core',
+    'app.query_builder.execution',
+    'app.query_builder.parsers',
+    'app.query_builder.plans',
+    'app.query_builder.schema',
+    'app.query_builder.stats',
+    'app.query_builder.utils',
+]
+
+
+def test_package_import_loads_no_submodules_or_typing():
+    script = (
+        "import sys\n"
+        "before = set(sys.modules)\n"
+        "import app.query_builder\n"
+        "loaded = sorted(set(sys.modules) - before)\n"
+        "print(','.join(loaded))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run(
+        [sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    loaded = set(output.split(','))
+    assert 'typing' not in loaded
+    assert {name for name in loaded if name.startswith('app.')} == {
+        'app.query_builder', 'app.query_builder.utils', 'app.query_builder.utils.lazy'
+    }
+
+
+@pytest.mark.parametrize('package', PACKAGES)
+def test_lazy_exports_resolve(package):
+    module = importlib.import_module(package)
+    for name in module.__all__:
+        assert getattr(module, name) is not None
+    assert set(module.__all__) <= set(dir(module))
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = tmp_path / 'catalog.json'
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+        path.write_text(catalog_file.read(), encoding='utf-8')
+    return str(path)
+
+
+def test_snapshot_is_loaded_without_parsing_the_catalog(catalog_path, capsys, monkeypatch):
+    assert snapshot_main(['--catalog', catalog_path]) == 0
+    assert 'Wrote catalog snapshot' in capsys.readouterr().out
+    parsed = loader.load_catalog(catalog_path)
+
+    def fail(path=None):
+        raise AssertionError("catalog file was parsed")
+
+    monkeypatch.setattr(loader, 'load_catalog', fail)
+    catalog = load_catalog_cached(catalog_path)
+    assert catalog.source == catalog_path
+    assert catalog.digest == parsed.digest
+    assert catalog.joins['country'].requires == ('company',)
+    assert catalog.field_mappings == parsed.field_mappings
+
+
+def test_stale_snapshot_is_ignored(catalog_path):
+    snapshot_main(['--catalog', catalog_path])
+    with open(catalog_path, encoding='utf-8') as catalog_file:
+        document = json.load(catalog_file)
+    document['version'] = 99
+    with open(catalog_path, 'w', encoding='utf-8') as catalog_file:
+        json.dump(document, catalog_file)
+    assert load_catalog_cached(catalog_path).version == 99
+
+
+def test_unreadable_snapshot_is_ignored(catalog_path):
+    with open(catalog_path + '.snapshot', 'wb') as snapshot_file:
+        snapshot_file.write(b'not a pickle')
+    assert load_catalog_cached(catalog_path).version == 1
+
+
+def test_snapshot_command_reports_invalid_catalogs(tmp_path, capsys):
+    path = tmp_path / 'catalog.json'
+    path.write_text('{"joins": {"x": {"table": "t"}}}', encoding='utf-8')
+    assert snapshot_main(['--catalog', str(path)]) == 1
+    assert 'error:' in capsys.readouterr().err
+    assert not os.path.exists(str(path) + '.snapshot')
@@ -0,0 +1,100 @@
+"""Tests for queries reading the base table and union tables."""
+import pytest
+
+from app.query_builder.execution import PartitionPlanner, SQLiteExecutor
+from app.utils.errors import QueryBuildError
+from tests.helpers import build, build_sql
+
+ARCHIVE = ['ciqTransactionArchive']
+
+
+@pytest.fixture
+def split_executor(split_db_path):
+    executor = SQLiteExecutor(split_db_path)
+    yield executor
+    executor.close()
+
+
+def union_rows(split_executor, params, **kwargs):
+    return split_executor.execute(build_sql(params, union_tables=ARCHIVE, **kwargs)).rows
+
+
+def single_rows(executor, params, **kwargs):
+    return executor.execute(build_sql(params, **kwargs)).rows
+
+
+@pytest.mark.parametrize('policy', ['join', 'exists', 'in', 'cte'])
+@pytest.mark.parametrize('params', [
+    {'select': 'tr.transactionId,tr.announcedDate', 'transactionType': '1'},
+    {'select': 'tr.transactionId,c.companyName', 'industry': '3,4,5,6,7,8'},
+    {'select': 'tr.*', 'industry': '3,4,5,6,7,8', 'filter': "tr.statusId != 2"},
+])
+def test_union_matches_the_single_table(executor, split_executor, params, policy):
+    expected = single_rows(executor, params, filter_join_policy=policy)
+    assert sorted(union_rows(split_executor, params, filter_join_policy=policy), key=repr) == \
+        sorted(expected, key=repr)
+
+
+@pytest.mark.parametrize('policy', ['join', 'cte'])
+@pytest.mark.parametrize('paging', [{'limit': '15'}, {'limit': '10', 'offset': '7'}, {}])
+def test_ordered_union_matches_the_single_table(executor, split_executor, paging, policy):
+    params = {
+        'select': 'tr.transactionId',
+        'industry': '3,4,5,6,7,8',
+        'orderBy': 'announcedDate:desc,transactionId',
+        **paging,
+    }
+    expected = single_rows(executor, params, filter_join_policy=policy)
+    assert union_rows(split_executor, params, filter_join_policy=policy) == expected
+
+
+@pytest.mark.parametrize('paging', [{'limit': '15'}, {}])
+def test_union_shares_one_with_clause(split_executor, paging):
+    params = {'select': 'tr.transactionId', 'industry': '3,4', 'orderBy': 'transactionId', **paging}
+    sql = build_sql(params, union_tables=ARCHIVE, filter_join_policy='cte')
+    assert sql.startswith('WITH company_filter AS (')
+    assert sql.count('WITH ') == 1
+    assert sql.count('FROM company_filter') == 2
+    assert 'SELECT * FROM (WITH' not in sql
+    split_executor.execute(sql)
+
+
+def test_branches_are_limited_to_the_rows_the_union_can_return():
+    sql = build_sql({'select': 'tr.transactionId', 'orderBy': 'transactionId', 'limit': '10', 'offset': '5'},
+                    union_tables=ARCHIVE)
+    assert sql.count('LIMIT 15') == 2
+    assert sql.endswith('ORDER BY transactionId ASC LIMIT 10 OFFSET 5')
+
+
+def test_sort_columns_missing_from_the_select_list_are_hidden(executor, split_executor):
+    params = {'select': 'tr.transactionId', 'orderBy': 'announcedDate:desc,transactionId', 'limit': '20'}
+    result = split_executor.execute(build_sql(params, union_tables=ARCHIVE))
+    assert result.columns == ['transactionId']
+    assert result.rows == single_rows(executor, params)
+
+
+@pytest.mark.parametrize('params, message', [
+    ({'select': 'tr.transactionIdTypeId,COUNT(*) AS n', 'groupBy': 'transactionType'}, 'Grouped'),
+    ({'select': 'COUNT(*) AS n'}, 'aggregate'),
+    ({'select': 'tr.companyId,c.companyId'}, 'selected twice'),
+    ({'select': "tr.transactionSize * 2"}, 'needs an AS name'),
+])
+def test_unsupported_requests_are_rejected(params, message):
+    with pytest.raises(QueryBuildError, match=message):
+        build_sql(params, union_tables=ARCHIVE)
+
+
+@pytest.mark.parametrize('tables, message', [
+    (['ciqCompany'], 'does not have the columns'),
+    (['nope'], 'Unknown union table'),
+    (['ciqTransaction'], 'listed twice'),
+    (['ciqTransactionArchive', 'ciqTransactionArchive'], 'listed twice'),
+])
+def test_union_tables_must_share_the_base_columns(tables, message):
+    with pytest.raises(ValueError, match=message):
+        build({}, union_tables=tables)
+
+
+def test_unions_are_not_fanned_out():
+    builder = build({'companyId': ','.join(str(i) for i in range(1, 201))}, union_tables=ARCHIVE)
+    assert PartitionPlanner(chunk_size=10).plan(builder) is None